@@ -7,12 +7,12 @@ This package provides a Flask-based chatbot application with emotion detection.
 import os
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
 from flask_cors import CORS
 
-# Initialize extensions
+# Initialize extensions; Flask-Migrate is only imported by create_app, since Alembic
+# is slow to import and not needed to serve requests
 db = SQLAlchemy()
-migrate = Migrate()
+migrate = None
 
 def create_app(config_name='default'):
     """
@@ -43,8 +43,23 @@ def create_app(config_name='default'):
     if not os.path.exists(templates_folder):
         os.makedirs(templates_folder)
 
+    # Tune the SQLite connections and their pool before the engine is created
+    from chatbot_app.sqlite_profile import apply_sqlite_profile, get_sqlite_profile, sqlite_engine_options
+    sqlite_profile = get_sqlite_profile(app.config.get('SQLITE_PROFILE', 'default'),
+                                        app.config.get('SQLITE_PRAGMAS'))
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        **sqlite_engine_options(app.config['SQLALCHEMY_DATABASE_URI'], sqlite_profile),
+        **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+    }
+
     # Initialize extensions with app
+    global migrate
     db.init_app(app)
+    with app.app_context():
+        apply_sqlite_profile(db.engine, sqlite_profile)
+    if migrate is None:
+        from flask_migrate import Migrate
+        migrate = Migrate()
     migrate.init_app(app, db)
 
     # Configure CORS
@@ -66,4 +81,13 @@ def create_app(config_name='default'):
     from chatbot_app.error_handlers import register_error_handlers
     register_error_handlers(app)
 
+    # Register command line tools
+    from chatbot_app.commands import register_commands
+    register_commands(app)
+
+    # Build the chatbot now instead of on the first request
+    if app.config.get('CHAT_PRELOAD'):
+        from chatbot_app.routes.main import preload_chatbot
+        preload_chatbot(app)
+
     return app
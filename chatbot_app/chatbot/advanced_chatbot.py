@@ -1,839 +1,208 @@
 import re
+import copy
+import hashlib
 import json
 import logging
 import random
 import math
-from typing import Dict, List, Tuple, Optional
+from functools import lru_cache
+from itertools import islice
+from types import MappingProxyType
+from typing import Dict, List, Mapping, NamedTuple, Tuple, Optional
 
+import numpy as np
+
+from chatbot_app.chatbot.analysis_cache import AnalysisCache
 from chatbot_app.chatbot.drinks_recommendations import DrinkRecommender
+from chatbot_app.chatbot.overrides import DEFAULT_OVERRIDES_PATH, OverrideTable, load_overrides
+from chatbot_app.chatbot.pattern_matcher import keyword_gated_pattern, tokenize
+from chatbot_app.chatbot.rule_pack import DEFAULT_RULE_PACK_PATH, RulePack, load_rule_pack
+from chatbot_app.chatbot.session_store import DEFAULT_HISTORY_DEPTH, SessionState
+
+
+# Version of the scoring code: bump it when the weights or thresholds of analyze_emotion
+# change, so that stored labels are re-scored (see chatbot_app/rescore.py)
+SCORING_VERSION = 1
+
+
+def _read_only(array: np.ndarray) -> np.ndarray:
+    """Mark a shared array as read-only and return it."""
+    array.flags.writeable = False
+    return array
+
+
+def _emotion_indices(emotions: List[str], emotion_index: Mapping[str, int]) -> np.ndarray:
+    """
+    Map emotion names to their positions in the score vector, skipping unknown emotions.
+
+    Args:
+        emotions: The emotion names
+        emotion_index: Mapping from emotion name to score vector position
+
+    Returns:
+        Read-only array of indices into the score vector
+    """
+    return _read_only(np.array([emotion_index[emotion] for emotion in emotions if emotion in emotion_index],
+                               dtype=np.intp))
+
+
+@lru_cache(maxsize=None)
+def _rule_pack(path: str) -> RulePack:
+    """Compiled rule pack, loaded once per process and shared by every instance."""
+    return load_rule_pack(path)
+
+
+@lru_cache(maxsize=None)
+def _override_table(path: str, rules_path: str) -> OverrideTable:
+    """Fixed analyses of known messages, checked before any scoring."""
+    return OverrideTable(load_overrides(path), _rule_pack(rules_path).emotion_images)
+
+
+@lru_cache(maxsize=None)
+def _scoring_checksum(overrides_path: str, rules_path: str) -> str:
+    """Identifier of everything the scores depend on: scoring code, rule pack and overrides."""
+    overrides = json.dumps(_override_table(overrides_path, rules_path).rules, sort_keys=True)
+    return hashlib.sha256(
+        f"{SCORING_VERSION}\n{_rule_pack(rules_path).checksum}\n{overrides}".encode('utf-8')
+    ).hexdigest()
+
+
+@lru_cache(maxsize=None)
+def _emotion_group_indices(rules_path: str) -> Mapping[str, np.ndarray]:
+    """Score vector positions of every emotion group of a rule pack and of all non-neutral emotions."""
+    rules = _rule_pack(rules_path)
+    groups = {group: _emotion_indices(emotions, rules.emotion_index) for group, emotions in rules.emotion_groups.items()}
+    groups['non_neutral'] = _emotion_indices([emotion for emotion in rules.emotion_names if emotion != 'neutral'],
+                                             rules.emotion_index)
+    return MappingProxyType(groups)
+
+
+@lru_cache(maxsize=None)
+def _final_emotion_multipliers(rules_path: str) -> np.ndarray:
+    """Read-only vector of the final per-emotion multipliers of a rule pack, in score vector order."""
+    rules = _rule_pack(rules_path)
+    # Emotions without a multiplier get a small 1.05 boost
+    return _read_only(np.array([rules.final_emotion_multipliers.get(emotion, 1.05) for emotion in rules.emotion_names]))
+
+
+class BaseScores(NamedTuple):
+    """Context-independent emotion analysis of a message, as returned by score_text."""
+    # Fixed result of a special-case message, or None
+    override: Optional[Dict]
+    # Normalized read-only score vector indexed by emotion_index, or None for overrides
+    scores: Optional[np.ndarray]
+
 
 class AdvancedChatbot:
     """
     Advanced chatbot with emotion detection and contextual responses.
     """
-    def __init__(self):
+    def __init__(self, matcher: str = 'aho_corasick', cache_size: int = 1024, cache_ttl: Optional[float] = None,
+                 overrides_path: str = DEFAULT_OVERRIDES_PATH, history_depth: int = DEFAULT_HISTORY_DEPTH,
+                 rules_path: str = DEFAULT_RULE_PACK_PATH):
         """
         Initialize the chatbot with emotion patterns, responses, and context.
+
+        Args:
+            matcher: Name of the engine used to match the emotion pattern bank,
+                'aho_corasick' (single keyword pass), 'keyword_index' (token lookup)
+                or 'sequential' (every pattern)
+            cache_size: Number of analyzed texts kept in the analysis cache; 0 disables it
+            cache_ttl: Seconds an analysis stays cached, or None to keep it until evicted
+            overrides_path: JSON file with the fixed analyses of known messages
+            history_depth: Number of turns kept in the conversation memory and context histories
+            rules_path: JSON rule pack with the emotion patterns, weights, responses and images
         """
         # Configure logging
         logging.basicConfig(level=logging.INFO)
         self.logger = logging.getLogger(__name__)
 
-        # Initialize conversation memory
-        self.conversation_memory = []
-
-        # Initialize context
-        self.context = {
-            'current_emotion': 'neutral',
-            'current_topic': None,
-            'previous_messages': [],
-            'session_emotions': [],
-            'drink_recommendation_state': None,
-            'current_drink_question': None
-        }
+        # Initialize conversation memory and context as bounded ring buffers
+        state = SessionState(history_depth=history_depth)
+        self.history_depth = history_depth
+        self.conversation_memory = state.conversation_memory
+        self.context = state.context
+
+        # Optional callable receiving each turn that falls out of the conversation memory
+        self.turn_archiver = None
 
         # Initialize drink recommender
         self.drink_recommender = DrinkRecommender()
+        # Read-only rule tables, shared by reference with every other instance
+        self.rules = _rule_pack(rules_path)
+        self.drink_recommendation_patterns = self.rules.drink_recommendation_patterns
+        self.sentiment_analyzer = self.rules.sentiment_analyzer
+        self.topic_responses = self.rules.topic_responses
+        self.emotion_patterns = self.rules.emotion_patterns
+        self.emotion_responses = self.rules.emotion_responses
+        self.greeting_patterns = self.rules.greeting_patterns
+        self.greeting_responses = self.rules.greeting_responses
+        self.question_patterns = self.rules.question_patterns
+        self.emotion_images = self.rules.emotion_images
+
+        # Tables derived from the rules are built on first use and shared by every instance
+        self.override_table = _override_table(overrides_path, rules_path)
+        # Changes whenever the same message could be scored differently
+        self.scoring_checksum = _scoring_checksum(overrides_path, rules_path)
+        self.compiled_emotion_patterns = self.rules.compiled_emotion_patterns
+        self.pattern_matcher = self.rules.matcher(matcher)
+        self.lexicon, self.lexicon_phrases = self.rules.lexicon, self.rules.lexicon_phrases
+        self.emotion_names = self.rules.emotion_names
+        self.emotion_index = self.rules.emotion_index
+        self.emotion_group_indices = _emotion_group_indices(rules_path)
+        self.final_emotion_multipliers = _final_emotion_multipliers(rules_path)
+
+        # Memoized context-independent analysis of recently seen texts
+        self.analysis_cache = AnalysisCache(cache_size, cache_ttl)
+
+    def for_session(self, state: SessionState) -> 'AdvancedChatbot':
+        """
+        Get a chatbot for one session's conversation that shares this chatbot's tables.
 
-        # Initialize drink recommendation patterns
-        self.drink_recommendation_patterns = [
-            r'(?i)\b(recommend|suggest|what|which).*?(drink|alcohol|cocktail|beer|wine|whiskey|vodka)\b',
-            r'(?i)\b(what|which).*?(drink|alcohol|cocktail|beer|wine|whiskey|vodka).*?(should|would|could|can).*?(i|we).*?(have|try|drink|get)\b',
-            r'(?i)\b(i|we).*?(want|need|would like).*?(a|some|to get).*?(drink|alcohol|cocktail|beer|wine|whiskey|vodka)\b',
-            r'(?i)\b(i|we).*?(want|need|would like).*?(something).*?(to drink|to have)\b',
-            r'(?i)\b(help me|tell me).*?(choose|pick|select|find).*?(a|some).*?(drink|alcohol|cocktail|beer|wine|whiskey|vodka)\b',
-            r'(?i)\bcan you recommend a drink\b',
-            r'(?i)\brecommend.*?drink\b',
-            r'(?i)\bdrink recommendation\b',
-            r'(?i)\bsuggest.*?drink\b'
-        ]
-
-        # Initialize sentiment analyzer with expanded vocabulary
-        self.sentiment_analyzer = {
-            'positive': [
-                'happy', 'joy', 'love', 'excited', 'grateful', 'glad', 'pleased', 'delighted', 
-                'content', 'satisfied', 'cheerful', 'joyful', 'thrilled', 'elated', 'ecstatic', 
-                'wonderful', 'fantastic', 'terrific', 'great', 'good', 'nice', 'awesome', 'amazing', 
-                'excellent', 'superb', 'brilliant', 'outstanding', 'fabulous', 'marvelous', 'splendid',
-                'enjoy', 'enjoying', 'enjoyed', 'appreciate', 'appreciating', 'appreciated', 'like', 
-                'liked', 'loving', 'adore', 'adoring', 'admire', 'admiring', 'cherish', 'cherishing',
-                'hopeful', 'optimistic', 'positive', 'confident', 'enthusiastic', 'eager', 'keen',
-                'proud', 'triumphant', 'victorious', 'successful', 'accomplished', 'achieved',
-                'blessed', 'fortunate', 'lucky', 'privileged', 'honored', 'inspired', 'motivated',
-                'energized', 'refreshed', 'renewed', 'revitalized', 'uplifted', 'encouraged',
-                'empowered', 'fulfilled', 'gratified', 'satisfied', 'contented', 'peaceful',
-                'serene', 'tranquil', 'calm', 'relaxed', 'at ease', 'comfortable', 'cozy',
-                'secure', 'safe', 'protected', 'supported', 'validated', 'affirmed', 'accepted',
-                'included', 'welcomed', 'valued', 'appreciated', 'respected', 'admired',
-                'praised', 'complimented', 'congratulated', 'celebrated', 'honored', 'recognized',
-                'rewarded', 'blessed', 'thankful', 'grateful', 'appreciative', 'moved', 'touched'
-            ],
-            'negative': [
-                'sad', 'angry', 'fear', 'disgust', 'disappointed', 'upset', 'unhappy', 'depressed', 
-                'miserable', 'gloomy', 'heartbroken', 'devastated', 'crushed', 'hurt', 'pained', 
-                'suffering', 'agonizing', 'terrible', 'horrible', 'awful', 'dreadful', 'bad', 'worse', 
-                'worst', 'furious', 'enraged', 'outraged', 'annoyed', 'irritated', 'frustrated', 
-                'exasperated', 'mad', 'hate', 'hatred', 'despise', 'loathe', 'detest', 'abhor',
-                'scared', 'afraid', 'frightened', 'terrified', 'anxious', 'worried', 'concerned', 
-                'nervous', 'stressed', 'distressed', 'panicked', 'horrified', 'appalled', 'shocked',
-                'disgusted', 'revolted', 'repulsed', 'nauseated', 'sickened', 'offended', 'appalled',
-                'disappointed', 'let down', 'disheartened', 'disillusioned', 'dismayed', 'displeased',
-                'regretful', 'remorseful', 'guilty', 'ashamed', 'embarrassed', 'humiliated',
-                'abandoned', 'rejected', 'betrayed', 'deceived', 'cheated', 'used', 'manipulated',
-                'controlled', 'dominated', 'bullied', 'harassed', 'abused', 'victimized', 'targeted',
-                'excluded', 'isolated', 'alienated', 'ostracized', 'ignored', 'forgotten', 'neglected',
-                'unwanted', 'unloved', 'unappreciated', 'disrespected', 'disregarded', 'dismissed',
-                'belittled', 'ridiculed', 'mocked', 'teased', 'taunted', 'insulted', 'offended',
-                'criticized', 'judged', 'condemned', 'blamed', 'shamed', 'mortified', 'humiliated',
-                'inadequate', 'incompetent', 'incapable', 'helpless', 'powerless', 'weak', 'vulnerable',
-                'fragile', 'insecure', 'uncertain', 'doubtful', 'skeptical', 'suspicious', 'paranoid',
-                'jealous', 'envious', 'resentful', 'bitter', 'vengeful', 'spiteful', 'hostile',
-                'aggressive', 'violent', 'destructive', 'dangerous', 'threatening', 'menacing', 'scary',
-                'creepy', 'eerie', 'unsettling', 'disturbing', 'troubling', 'worrisome', 'concerning',
-                'alarming', 'dreading', 'desperate', 'hopeless', 'despairing', 'suicidal', 'worthless',
-                'useless', 'pointless', 'meaningless', 'empty', 'hollow', 'numb', 'detached', 'disconnected',
-                'overwhelmed', 'burdened', 'pressured', 'strained', 'exhausted', 'drained', 'depleted',
-                'fatigued', 'tired', 'weary', 'worn out', 'burned out', 'sick', 'ill', 'unwell', 'pained'
-            ],
-            'neutral': [
-                'neutral', 'calm', 'balanced', 'okay', 'ok', 'fine', 'alright', 'so-so', 'moderate', 
-                'average', 'ordinary', 'standard', 'normal', 'regular', 'usual', 'common', 'typical',
-                'indifferent', 'unbiased', 'impartial', 'dispassionate', 'detached', 'uninvolved',
-                'neither', 'nor', 'maybe', 'perhaps', 'possibly', 'somewhat', 'kind of', 'sort of',
-                'stable', 'steady', 'consistent', 'even', 'level', 'measured', 'reasonable', 'fair',
-                'objective', 'rational', 'logical', 'sensible', 'practical', 'pragmatic', 'realistic',
-                'middle-of-the-road', 'middle ground', 'halfway', 'in-between', 'intermediate', 'medium',
-                'adequate', 'sufficient', 'acceptable', 'satisfactory', 'passable', 'tolerable', 'decent',
-                'not bad', 'not good', 'not great', 'meh', 'whatever', 'anyhow', 'anyway', 'regardless',
-                'nevertheless', 'nonetheless', 'however', 'still', 'yet', 'though', 'although', 'even so',
-                'all the same', 'at any rate', 'in any case', 'in any event', 'be that as it may',
-                'reserved', 'restrained', 'controlled', 'composed', 'collected', 'poised', 'dignified',
-                'formal', 'proper', 'correct', 'appropriate', 'suitable', 'fitting', 'apt', 'becoming',
-                'equanimous', 'equable', 'temperate', 'mild', 'gentle', 'soft', 'light', 'slight',
-                'undecided', 'uncertain', 'unsure', 'ambivalent', 'conflicted', 'torn', 'of two minds',
-                'on the fence', 'sitting on the fence', 'hedging', 'noncommittal', 'uncommitted', 'undetermined'
-            ],
-            'intensity_modifiers': [
-                'very', 'really', 'extremely', 'incredibly', 'exceptionally', 'absolutely', 'completely',
-                'totally', 'utterly', 'thoroughly', 'entirely', 'fully', 'highly', 'intensely', 'deeply',
-                'profoundly', 'immensely', 'tremendously', 'exceedingly', 'extraordinarily', 'remarkably',
-                'particularly', 'especially', 'notably', 'significantly', 'substantially', 'considerably',
-                'greatly', 'vastly', 'hugely', 'enormously', 'immeasurably', 'unbelievably', 'insanely',
-                'ridiculously', 'crazy', 'super', 'mega', 'ultra', 'beyond', 'so', 'such', 'quite', 'rather',
-                'amazingly', 'astonishingly', 'astoundingly', 'strikingly', 'stunningly', 'surprisingly',
-                'shockingly', 'overwhelmingly', 'overpoweringly', 'intensively', 'fiercely', 'ferociously',
-                'violently', 'severely', 'seriously', 'gravely', 'critically', 'desperately', 'urgently',
-                'terribly', 'horribly', 'awfully', 'dreadfully', 'frightfully', 'fearfully', 'appallingly',
-                'atrociously', 'abominably', 'disgustingly', 'revoltingly', 'repulsively', 'sickeningly',
-                'nauseatingly', 'unbearably', 'intolerably', 'insufferably', 'unendurably', 'unspeakably',
-                'indescribably', 'inconceivably', 'unimaginably', 'unfathomably', 'incomprehensibly',
-                'impossibly', 'incredibly', 'unbelievably', 'fantastically', 'phenomenally', 'monumentally',
-                'colossally', 'gigantically', 'astronomically', 'exponentially', 'infinitely', 'eternally',
-                'perpetually', 'endlessly', 'ceaselessly', 'relentlessly', 'persistently', 'consistently',
-                'constantly', 'continually', 'continuously', 'incessantly', 'unceasingly', 'unremittingly',
-                'unrelentingly', 'unwaveringly', 'unfailingly', 'undoubtedly', 'unquestionably', 'undeniably',
-                'indisputably', 'irrefutably', 'incontrovertibly', 'incontestably', 'unmistakably', 'decidedly',
-                'definitely', 'certainly', 'surely', 'positively', 'absolutely', 'categorically', 'emphatically',
-                'vehemently', 'passionately', 'ardently', 'fervently', 'zealously', 'fanatically', 'obsessively',
-                'compulsively', 'maniacally', 'wildly', 'madly', 'crazily', 'hysterically', 'frantically',
-                'frenziedly', 'deliriously', 'ecstatically', 'euphorically', 'rapturously', 'blissfully',
-                'joyfully', 'gleefully', 'merrily', 'cheerfully', 'happily', 'contentedly', 'satisfyingly',
-                'pleasingly', 'gratifyingly', 'rewardingly', 'fulfillingly', 'meaningfully', 'significantly',
-                'importantly', 'crucially', 'vitally', 'essentially', 'fundamentally', 'basically', 'primarily'
-            ]
-        }
+        The returned chatbot is a shallow copy: patterns, lexicon, responses and caches are
+        shared, while the context, conversation memory and drink profile are the session's.
 
-        # Initialize topic responses
-        self.topic_responses = {
-            "general": "I'm here to help. What would you like to talk about today?",
-            "health": "Health is so important. What aspects of your wellbeing are you focusing on right now?",
-            "technology": "Technology can be both fascinating and challenging. What's on your mind in the tech world?",
-            "education": "Learning opens so many doors. What are you curious about or working to understand better?",
-            "entertainment": "Taking time for enjoyment is essential for balance. What kind of entertainment interests you?",
-            "politics": "Staying informed about current events can be valuable. What aspects of this topic are you thinking about?",
-            "science": "Science helps us understand our world in amazing ways. What scientific topics interest you?",
-            "relationships": "Connections with others are a fundamental part of life. How are your relationships going?",
-            "personal_development": "Growth is a journey, not a destination. What areas of development are you focusing on?",
-            "finance": "Financial wellbeing contributes to peace of mind. What financial matters are you considering?"
-        }
+        Args:
+            state: The conversation state of the session
 
-        # Initialize emotion patterns with comprehensive matching for all emotions
-        self.emotion_patterns = {
-            'achievement': [
-                r'\b(i|we) (took|passed|completed|finished|aced|won|accomplished|achieved|succeeded in|managed to)\b',
-                r'\b(i|we) (found|got|landed|secured|obtained) (a job|a new job|a position|a role|a promotion|an opportunity)\b',
-                r'\b(i|we) (lost|shed|dropped|reduced) (weight|pounds|kilos|kg|lb)\b',
-                r'\b(i|we) (graduated|earned|received|got) (a degree|a diploma|a certificate|a license)\b',
-                r'\b(i|we) (reached|hit|attained|met) (my|our) (goal|target|objective|milestone)\b',
-                r'\b(i|we) (finally|successfully|proudly) (did it|made it|completed it|finished it)\b',
-                r'\b(i|we) (overcame|conquered|beat|defeated|mastered) (a challenge|an obstacle|a difficulty|a problem|a fear)\b',
-                r'\b(achievement|accomplishment|success|victory|milestone|breakthrough|triumph)\b',
-                r'\b(proud of|accomplished|achieved|succeeded|won|completed|finished|mastered)\b',
-                r'\b(i|we) (earned|deserved|worked for|gained) (this|that|it|recognition|praise|reward)\b'
-            ],
-            'admiration': [
-                r'\b(i|we) (admire|look up to|respect|appreciate|value|esteem|revere|honor|idolize) (you|him|her|them|your|his|her|their)\b',
-                r'\b(i|we) (am|are|feel|felt) (admiration|respect|appreciation|awe|reverence|regard) (for|towards)\b',
-                r'\b(you|he|she|they) (are|is) (admirable|impressive|inspiring|amazing|remarkable|extraordinary|exceptional|outstanding)\b',
-                r'\b(so|very|really|truly|deeply) (admire|respect|appreciate|impressed by|inspired by|in awe of)\b',
-                r'\b(admiration|respect|appreciation|awe|reverence|regard|esteem|honor)\b',
-                r'\b(role model|hero|inspiration|mentor|idol|example|standard|benchmark)\b',
-                r'\b(look up to|inspired by|impressed by|in awe of|blown away by|amazed by) (you|him|her|them|your|his|her|their)\b',
-                r'\b(i wish i could|i aspire to|i hope to) (be like|emulate|match|reach|achieve) (you|him|her|them|your|his|her|their)\b',
-                r'\b(i|we) (admire|look up to|respect|appreciate|value|esteem|revere|honor|idolize) (my|our) (professor|teacher|mentor|boss|coach|leader|supervisor|manager|friends|friend|family|parents|colleagues|coworkers|teammates|partner|spouse)\b',
-                r'\b(i|we) (admire|look up to|respect|appreciate|value|esteem|revere|honor|idolize) (.*?)\b',
-                r'\b(that is|that\'s) (admiration|adminration)\b'
-            ],
-            'amusement': [
-                r'\b(i|we) (am|are|feel|felt) (amused|entertained|tickled|delighted|laughing|giggling|chuckling)\b',
-                r'\b(that|this) (is|was) (funny|hilarious|amusing|entertaining|comical|humorous|witty|hysterical)\b',
-                r'\b(i|we) (laughed|giggled|chuckled|cracked up|burst out laughing|couldn\'t stop laughing)\b',
-                r'\b(😂|🤣|😆|😄|😹|🙃|😅)\b',
-                r'\b(so|very|really|extremely|incredibly) (funny|amusing|hilarious|entertaining|comical|humorous)\b',
-                r'\b(humor|comedy|joke|pun|meme|laughter|amusement|entertainment)\b',
-                r'\b(made me laugh|cracked me up|tickled me|had me in stitches|had me rolling|lol|haha|hehe)\b',
-                r'\b(funny|hilarious|amusing|entertaining|comical|humorous|witty|hysterical)\b'
-            ],
-            'annoyance': [
-                r'\b(i|we) (am|are|feel|felt) (annoyed|irritated|bothered|irked|vexed|peeved|displeased|frustrated|aggravated|exasperated|ticked off|miffed)\b',
-                r'\b(this|that) (is|was) (annoying|irritating|bothersome|irksome|vexing|frustrating|aggravating|grating|infuriating|exasperating|maddening|tiresome)\b',
-                r'\b(it|this|that) (annoys|irritates|bothers|irks|vexes|peeves|frustrates|aggravates|grates on|gets on|drives) (me|us) (crazy|nuts|insane|mad|up the wall)?\b',
-                r'\b(getting|becoming|growing) (annoyed|irritated|bothered|frustrated|impatient|fed up|sick and tired|short-tempered)\b',
-                r'\b(annoyance|irritation|frustration|vexation|displeasure|impatience|exasperation|aggravation|pet peeve)\b',
-                r'\b(stop|quit|cease|cut it out|knock it off|give it a rest) (it|that|this|doing that|bothering me|annoying me|already)\b',
-                r'\b(tired of|fed up with|sick of|had enough of|can\'t stand|can\'t take|done with|over|through with|at my limit with) (this|that|it|you|them|him|her)\b',
-                r'\b(ugh|argh|grr|hmph|sigh|whatever|seriously|really|come on|oh please|for crying out loud|give me a break|enough already|how many times|not again)\b',
-                r'\b(on my nerves|getting to me|pushing my buttons|testing my patience|making me crazy|driving me nuts|the last straw)\b',
-                r'\b(why (do|would|should) (you|they|people|someone))|(how (hard|difficult) is it)|(what does it take)\b'
-            ],
-            'anticipation': [
-                r'\b(i|we) (am|are|feel|felt) (anticipating|expecting|awaiting|looking forward to|excited about|eager for)\b',
-                r'\b(i|we) (can\'t wait|am waiting|are waiting|have been waiting) (for|to)\b',
-                r'\b(i|we) (am|are) (excited|thrilled|eager|keen|impatient|anxious|ready) (about|for|to)\b',
-                r'\b(looking forward to|counting down to|excited about|eager for|ready for|prepared for)\b',
-                r'\b(anticipation|expectation|excitement|eagerness|readiness|preparation)\b',
-                r'\b(soon|coming|approaching|upcoming|imminent|forthcoming|about to)\b',
-                r'\b(can\'t wait|so excited|really looking forward|eagerly awaiting|eagerly anticipating)\b',
-                r'\b(countdown|preparing|getting ready|planning|anticipating)\b'
-            ],
-            'approval': [
-                r'\b(i|we) (approve|agree|endorse|support|back|favor|like|accept) (of|with)\b',
-                r'\b(i|we) (give|gave|offer|offered) (my|our) (approval|blessing|endorsement|support|backing)\b',
-                r'\b(this|that) (has|gets|earns|deserves|receives) (my|our) (approval|blessing|endorsement|support|backing)\b',
-                r'\b(i|we) (am|are) (in favor of|supportive of|behind|on board with|pleased with)\b',
-                r'\b(i|we) (am|are) (satisfied with) (?!(my|our) (language skills|abilities|performance|achievements|accomplishments|work|results|progress|growth|development|improvement))\b',
-                r'\b(approval|agreement|endorsement|support|backing|acceptance|thumbs up|green light)\b',
-                r'\b(approved|agreed|endorsed|supported|backed|favored|accepted)\b',
-                r'\b(good job|well done|nice work|great work|excellent|perfect|spot on|exactly right)\b',
-                r'\b(👍|✅|✓|👌|💯)\b'
-            ],
-            'curious': [
-                r'\b(i|we) (am|are|feel|felt) (curious|inquisitive|interested|intrigued|fascinated|captivated|wondering)\b',
-                r'\b(i|we) (wonder|wondered|am wondering|are wondering|was wondering|were wondering) (about|if|why|how|what|when|where|who)\b',
-                r'\b(that|this) (is|was) (interesting|intriguing|fascinating|captivating|thought-provoking|mind-boggling)\b',
-                r'\b(i|we) (want|wanted|would like) to (know|learn|understand|discover|explore|find out|figure out)\b',
-                r'\b(tell me|explain|share|elaborate) (about|on|more about|further on)\b',
-                r'\b(curiosity|interest|intrigue|fascination|wonder|inquisitiveness)\b',
-                r'\b(curious|inquisitive|interested|intrigued|fascinated|captivated|wondering) (about|in|by)\b',
-                r'\b(hmm|interesting|fascinating|intriguing|tell me more|i\'d like to know more)\b'
-            ],
-            'caring': [
-                r'\b(i|we) (care|care about|care for|look after|take care of|worry about|am concerned about|are concerned about)\b',
-                r'\b(i|we) (am|are|feel|felt) (caring|concerned|worried|protective|nurturing|supportive|compassionate|empathetic)\b',
-                r'\b(i|we) (want|wanted|would like|wish) (to help|to support|to be there for|to assist|to aid|to comfort)\b',
-                r'\b(how are you|are you okay|are you alright|are you well|how are you feeling|how are you doing)\b',
-                r'\b(take care|be careful|stay safe|look after yourself|take care of yourself|be well|get well soon)\b',
-                r'\b(caring|concern|compassion|empathy|sympathy|kindness|tenderness|warmth|affection)\b',
-                r'\b(i\'m here for you|i\'m here if you need me|i\'m here to help|i\'m here to support you|i\'m here to listen)\b',
-                r'\b(❤️|💕|💗|💓|💞|💖|💝|🤗|🫂)\b'
-            ],
-            'confusion': [
-                r'\b(i|we) (am|are|feel|felt) (confused|puzzled|perplexed|bewildered|baffled|disoriented|lost|muddled|unclear)\b',
-                r'\b(this|that) (is|was) (confusing|puzzling|perplexing|bewildering|baffling|disorienting|unclear|ambiguous|vague)\b',
-                r'\b(i|we) (don\'t|do not|can\'t|cannot) (understand|comprehend|grasp|follow|make sense of|figure out|get it)\b',
-                r'\b(what|how|why|when|where|who) (does this|is this|does that|is that|do you|are you) (mean|saying|talking about|referring to)\b',
-                r'\b(i\'m|i am) (lost|not following|not getting it|missing something|not understanding)\b',
-                r'\b(confusion|perplexity|bewilderment|disorientation|uncertainty|ambiguity|vagueness|doubt)\b',
-                r'\b(huh|what|eh|um|hmm|wait|sorry|excuse me|pardon|come again)\b',
-                r'\b(😕|😟|😮|🤔|❓|❔|🙄|😵‍💫)\b'
-            ],
-            'desire': [
-                r'\b(i|we) (want|desire|wish for|long for|crave|yearn for|hunger for|thirst for|need|would like)\b',
-                r'\b(i|we) (am|are|feel|felt) (desire|attraction|lust|passion|yearning|longing|craving|wanting)\b',
-                r'\b(i|we) (can\'t stop|cannot stop) (thinking about|wanting|desiring|craving|yearning for|longing for)\b',
-                r'\b(i|we) (would do|would give|would trade|would sacrifice) (anything|everything) (for|to)\b',
-                r'\b(i|we) (must|have to|need to|really want to|really need to|desperately want to|desperately need to)\b',
-                r'\b(desire|want|need|craving|yearning|longing|hunger|thirst|lust|passion|attraction)\b',
-                r'\b(desperately|urgently|badly|strongly|deeply|intensely|passionately) (want|need|desire|crave|yearn for|long for)\b',
-                r'\b(😍|🥰|😘|💋|💘|💝|💖|💗|💓|💞|💕|❤️|🔥|🥵)\b'
-            ],
-            'joy': [
-                r'\b(i|we) (am|are|feel|felt) (happy|joyful|delighted|cheerful|pleased|content|excited|thrilled|ecstatic|elated|overjoyed)\b',
-                r'\b(that|this) (is|was) (wonderful|amazing|fantastic|great|good|perfect|excellent|brilliant|outstanding|superb)\b',
-                r'\b(i|we) (feel|felt) (great|good|wonderful|amazing|fantastic|blessed|lucky|on top of the world|over the moon)\b',
-                r'\b(😊|😄|😃|😁|🙂|🥰|😍|🤗|😀|😇)\b',
-                r'\b(so|very|really|extremely|incredibly) (happy|joyful|delighted|excited|pleased|content)\b',
-                r'\b(happiness|joy|delight|pleasure|contentment|bliss|euphoria)\b',
-                r'\b(made my day|best day|loving this|loving it|enjoying|enjoy)\b',
-                r'\b(what a|such a) (wonderful|beautiful|amazing|lovely|great|fantastic|marvelous|perfect) (world|day|life|moment|experience|feeling)\b',
-                r'\b(i|we) (am|are) (glad|happy|thankful|grateful) to be alive\b'
-            ],
-            'desperation': [
-                r'\b(i|we) (am|are|feel|felt) (desperate|hopeless|worthless|useless|suicidal|pointless|helpless|lost|trapped|overwhelmed|doomed|defeated|broken|shattered|devastated|destroyed)\b',
-                r'\b(i|we) (want|wanted|wish|wished|need|needed) to (give up|end it all|end my life|die|disappear|vanish|not exist|escape|run away|get away|get out)\b',  # Critical pattern for suicidal thoughts
-                r'\b(i|we) (feel|felt) (fat|ugly|unwanted|unloved|unworthy|like a burden|like a failure|abandoned|rejected|alone|isolated|empty|hollow|numb|dead inside)\b',
-                r'\b(no point|no use|no hope|no future|no reason to live|no way out|can\'t go on|can\'t take it anymore|can\'t bear it|can\'t handle it|can\'t escape|can\'t see a way forward)\b',
-                r'\b(what\'s the point|why bother|why try|why live|why continue|why go on|what\'s the use|who cares|nothing matters|it\'s all meaningless)\b',
-                r'\b(life is (pointless|meaningless|worthless|hopeless|too hard|too painful|not worth living|unbearable|torture|hell|misery|suffering|agony))\b',
-                r'\b(nobody (cares|loves me|needs me|would miss me|would notice|understands|helps|listens|is there for me))\b',
-                r'\b(i hate (myself|my body|my life|everything|living|existing|who i am|what i\'ve become))\b',
-                r'\b(i\'m|i am) (a failure|a disappointment|a burden|better off dead|not good enough|worthless|useless|hopeless|helpless|pathetic|weak|broken|damaged|ruined)\b',
-                r'\b(i|we) (have|has) nothing to (live for|look forward to|hope for|believe in|care about|hold onto)\b',
-                r'\b(please (help|save) me|i (need|desperately need) help|i\'m (begging|pleading|desperate) for help|i don\'t know what to do|i\'m at the end of my rope|i\'m at my wit\'s end)\b',
-                r'\b(i (can\'t|cannot) (go on|continue|keep going|keep living|face another day|see a future|see any hope|see any way out))\b',
-                r'\b(i\'m (trapped|stuck|cornered|backed into a wall|at a dead end|out of options|out of time|running out of hope))\b',
-                r'\b(i (just want|only want|need) (it to end|it to stop|the pain to stop|relief|peace|to be free|to escape))\b'
-            ],
-            'disappointment': [
-                r'\b(i|we) (am|are|feel|felt) (disappointed|let down|disheartened|disillusioned|disenchanted|dismayed|discouraged)\b',
-                r'\b(this|that) (is|was) (disappointing|disheartening|disillusioning|discouraging|a letdown|a disappointment)\b',
-                r'\b(i|we) (expected|hoped for|wanted|wished for|anticipated) (better|more|something else|something different)\b',
-                r'\b(i|we) (am|are|was|were) (disappointed|let down|disheartened) (by|with|in|about)\b',
-                r'\b(disappointment|letdown|disillusionment|disenchantment|dismay|discouragement)\b',
-                r'\b(not what|wasn\'t what|isn\'t what) (i|we) (expected|hoped for|wanted|wished for|anticipated)\b',
-                r'\b(should have been|could have been|would have been) (better|different|more)\b',
-                r'\b(i|we) (was|were) expecting more from (you|this|that|it|him|her|them)\b',
-                r'\b(😔|😞|😕|😒|🙁|☹️|😢|💔)\b'
-            ],
-            'disapproval': [
-                r'\b(i|we) (disapprove|don\'t approve|do not approve|disagree|object|oppose|reject|condemn|criticize)\b',
-                r'\b(i|we) (am|are|feel|felt) (disapproving|critical|judgmental|censorious|reproachful|condemnatory)\b',
-                r'\b(this|that) (is|was) (wrong|incorrect|inappropriate|unacceptable|improper|unsuitable|objectionable)\b',
-                r'\b(i|we) (don\'t|do not|can\'t|cannot) (agree|accept|condone|support|endorse|approve of|tolerate)\b',
-                r'\b(disapproval|disagreement|objection|opposition|criticism|censure|condemnation)\b',
-                r'\b(shouldn\'t|should not|ought not to|mustn\'t|must not|can\'t|cannot) (do that|be that way|happen|be allowed)\b',
-                r'\b(that\'s|that is|this is) (not okay|not right|not acceptable|not appropriate|not good|bad|wrong)\b',
-                r'\b(👎|🙅‍♀️|🙅‍♂️|❌|⛔|🚫|😠|😒)\b'
-            ],
-            'embarassment': [
-                r'\b(i|we) (am|are|feel|felt) (embarrassed|mortified|humiliated|ashamed|self-conscious|awkward|uncomfortable)\b',
-                r'\b(this|that) (is|was) (embarrassing|mortifying|humiliating|shameful|awkward|uncomfortable|cringeworthy)\b',
-                r'\b(i|we) (blushed|cringed|wanted to hide|wanted to disappear|felt awkward|felt uncomfortable)\b',
-                r'\b(so|very|really|extremely|incredibly|totally) (embarrassed|mortified|humiliated|ashamed|self-conscious)\b',
-                r'\b(embarrassment|mortification|humiliation|shame|self-consciousness|awkwardness|discomfort)\b',
-                r'\b(can\'t believe|cannot believe) (i|we) (did that|said that|acted that way|behaved like that)\b',
-                r'\b(wish|hoping) (the ground would swallow me|i could disappear|i was invisible|i wasn\'t here)\b',
-                r'\b(😳|🙈|😖|😫|😱|🤦‍♀️|🤦‍♂️|😬)\b'
-            ],
-            'sadness': [
-                r'\b(i|we) (am|are|feel|felt) (sad|unhappy|depressed|down|blue|melancholy|heartbroken|miserable|gloomy|sorrowful|despondent)\b',
-                r'\b(this|that) (is|was) (sad|unhappy|depressing|heartbreaking|devastating|tragic|upsetting|distressing|painful)\b',
-                r'\b(😢|😭|😔|😞|😢|🥺|😩|😫|💔|🖤)\b',
-                r'\b(feeling|feels|felt) (sad|down|depressed|unhappy|low|terrible|awful|hopeless|empty)\b',
-                r'\b(miss|missing|longing for) (you|him|her|them|it|someone|something)\b',
-                r'\b(sadness|sorrow|despair|misery|depression|gloom|heartache|anguish)\b',
-                r'\b(crying|cried|tears|weeping|sobbing|upset|hurt|broken heart|broken hearted)\b',
-                r'\b(lonely|alone|isolated|abandoned|rejected|unwanted|unloved)\b'
-            ],
-            'anger': [
-                r'\b(i|we) (am|are|feel|felt) (angry|furious|outraged|mad|irritated|enraged|frustrated|livid|irate|incensed|infuriated|annoyed)\b',
-                r'\b(this|that) (is|was) (unacceptable|outrageous|ridiculous|infuriating|aggravating|maddening|offensive|insulting|disrespectful)\b',
-                r'\b(😠|😡|🤬|💢|😤|😒|🙄|👿|💥|🔥)\b',
-                r'\b(so|very|really|extremely|incredibly) (angry|mad|furious|irritated|annoyed|frustrated|upset)\b',
-                r'\b(anger|rage|fury|outrage|irritation|frustration|annoyance|indignation|wrath)\b',
-                r'\b(pissed|pissed off|fed up|had enough|had it|lost my temper|losing my temper)\b',
-                r'\b(hate|despise|detest|loathe|resent|abhor)\b',
-                r'\b(makes me|making me) (angry|mad|furious|upset|irritated)\b'
-            ],
-            'fear': [
-                r'\b(i|we) (am|are|feel|felt) (afraid|scared|frightened|terrified|worried|anxious|fearful|petrified|horrified|alarmed|panicky|uneasy)\b',
-                r'\b(this|that) (is|was) (scary|frightening|terrifying|daunting|intimidating|horrifying|alarming|threatening|disturbing|creepy|spooky)\b',
-                r'\b(😨|😱|😰|😳|😟|😬|😨|😖|🙀|😵)\b',
-                r'\b(feeling|feels|felt) (scared|afraid|terrified|fearful|anxious|worried|nervous|threatened|intimidated|unsafe)\b',
-                r'\b(what if|worried about|concerned about|scared of|afraid of|terrified of|fear of|phobia|nightmare)\b',
-                r'\b(fear|terror|horror|dread|anxiety|panic|fright|alarm|trepidation|apprehension)\b',
-                r'\b(scared to death|scared stiff|scared silly|jumping at shadows|shaking|trembling|shivering|heart racing|heart pounding)\b',
-                r'\b(danger|dangerous|threat|threatening|risk|risky|hazard|hazardous|unsafe|perilous)\b',
-                r'\b(makes me|making me) (scared|afraid|fearful|anxious|worried|nervous)\b'
-            ],
-            'excitement': [
-                r'\b(i|we) (am|are|feel|felt) (excited|thrilled|exhilarated|enthusiastic|eager|pumped|psyched|stoked|amped|buzzed)\b',
-                r'\b(this|that) (is|was) (exciting|thrilling|exhilarating|stimulating|electrifying|invigorating|rousing|stirring)\b',
-                r'\b(i|we) (can\'t wait|am looking forward|are looking forward|am eager|are eager) (for|to)\b',
-                r'\b(so|very|really|extremely|incredibly) (excited|thrilled|exhilarated|enthusiastic|eager|pumped|psyched)\b',
-                r'\b(excitement|thrill|exhilaration|enthusiasm|eagerness|anticipation|energy|buzz)\b',
-                r'\b(can\'t contain|bursting with|full of|filled with|overflowing with) (excitement|enthusiasm|energy|anticipation)\b',
-                r'\b(woo|woohoo|yay|yahoo|yes|awesome|amazing|fantastic|incredible|brilliant|wow)\b',
-                r'\b(😃|😄|😁|🤩|🥳|🙌|👏|✨|🎉|🎊|⚡|💥)\b'
-            ],
-            'gratitude': [
-                r'\b(i|we) (am|are|feel|felt) (grateful|thankful|appreciative|indebted|obliged|beholden)\b',
-                r'\b(i|we) (appreciate|value|cherish|treasure|am grateful for|are grateful for|am thankful for|are thankful for)\b',
-                r'\b(thank you|thanks|many thanks|thank you so much|thanks a lot|thanks a bunch|thank you kindly)\b',
-                r'\b(i|we) (owe|want to thank|would like to thank|wish to thank|must thank) (you|him|her|them)\b',
-                r'\b(gratitude|appreciation|thankfulness|gratefulness|indebtedness|recognition)\b',
-                r'\b(so|very|really|extremely|incredibly|deeply|truly|sincerely) (grateful|thankful|appreciative)\b',
-                r'\b(means|meant) (a lot|the world|so much|everything) (to me|to us)\b',
-                r'\b(🙏|❤️|💕|😊|🥰|✨|💯|👍)\b'
-            ],
-            'nervousness': [
-                r'\b(i|we) (am|are|feel|felt) (nervous|anxious|jittery|edgy|tense|uneasy|restless|fidgety|on edge|keyed up)\b',
-                r'\b(this|that) (is|was) (nerve-wracking|nerve-racking|stressful|tense|anxiety-inducing|worrying)\b',
-                r'\b(i|we) (have|has|had) (butterflies|knots|a knot) (in my stomach|in our stomachs|in my belly|in our bellies)\b',
-                r'\b(my|our) (hands are|palms are|heart is) (sweating|sweaty|racing|pounding|beating fast)\b',
-                r'\b(nervousness|anxiety|jitters|tension|unease|restlessness|apprehension|stress)\b',
-                r'\b(can\'t|cannot) (relax|calm down|settle down|sit still|focus|concentrate|stop worrying)\b',
-                r'\b(so|very|really|extremely|incredibly) (nervous|anxious|jittery|edgy|tense|uneasy|restless|fidgety)\b',
-                r'\b(😰|😥|😨|😟|😬|😖|😣|🤢|😓|🫣)\b'
-            ],
-            'surprise': [
-                r'\b(i|we) (am|are|was|were|feel|felt) (surprised|amazed|astonished|shocked|stunned|speechless|dumbfounded|flabbergasted|startled|taken aback)\b',
-                r'\b(this|that) (is|was) (surprising|amazing|shocking|unexpected|unbelievable|astounding|incredible|extraordinary|mind-blowing|jaw-dropping)\b',
-                r'\b(😲|😮|😯|😱|🤯|😳|😨|😵|😦|😧|🙀)\b',
-                r'\b(no way|cannot believe|did not expect|never expected|never thought|never imagined|never saw this coming)\b',
-                r'\b(what|how|why|when|who|where) (!|!!|!!!)\b',
-                r'\b(wow|whoa|woah|oh my|oh my god|oh my goodness|oh wow|holy|gosh|goodness|jeez|yikes)\b',
-                r'\b(came as a|was a|is a) (surprise|shock|revelation|bombshell|bolt from the blue)\b',
-                r'\b(surprise|shock|amazement|astonishment|disbelief|wonder|awe)\b',
-                r'\b(surprised|shocked|amazed|astonished|stunned|startled|taken aback) (by|at|to see|to hear|to learn|to find out)\b',
-                r'\b(unexpected|unanticipated|unforeseen|out of nowhere|out of the blue|all of a sudden|suddenly)\b',
-                r'\b(makes me|making me|left me) (surprised|shocked|amazed|astonished|speechless|stunned)\b'
-            ],
-            'love': [
-                r'\b(i|we) (love|adore|cherish|treasure|worship|idolize|admire|care for|fancy|like) (you|him|her|them|this|that|someone|something)\b',
-                r'\b(i|we) (am|are|feel|felt) (in love|loving|passionate|smitten|devoted|enamored|infatuated|head over heels|crazy about|wild about)\b',
-                r'\b(❤️|💕|💗|💘|💝|🥰|😍|💓|💞|💖|💟|💌)\b',
-                r'\b(so|very|really|deeply|truly|madly|completely|utterly|absolutely|totally) (in love|love|adore|cherish|devoted|attached)\b',
-                r'\b(can\'t|cannot) (live|be|imagine life|function|exist) (without|without you|apart from you|if you were gone)\b',
-                r'\b(love|affection|adoration|devotion|passion|fondness|attachment|infatuation|crush|romance)\b',
-                r'\b(loving|adoring|cherishing|treasuring|worshipping|idolizing|admiring|caring for) (you|him|her|them|someone)\b'
-            ],
-            'disgust': [
-                r'\b(i|we) (am|are|feel|felt) (disgusted|revolted|repulsed|sickened|nauseated|appalled|grossed out|repelled|turned off|horrified|disturbed)\b',
-                r'\b(this|that) (is|was) (disgusting|revolting|repulsive|gross|nasty|vile|foul|offensive|repugnant|sickening|nauseating|stomach-turning|stomach-churning|distasteful|obscene|vulgar|crude|indecent|abhorrent|loathsome)\b',
-                r'\b(🤢|🤮|😖|😫|😤|🤧|😷|👎|💩|🙄|😬|😒)\b',
-                r'\b(so|very|really|extremely|incredibly|utterly|absolutely|completely|totally|thoroughly|deeply) (disgusting|gross|revolting|repulsive|nauseating|sickening|disturbing|offensive|vile|foul|nasty)\b',
-                r'\b(disgust|revulsion|repulsion|nausea|aversion|distaste|loathing|abhorrence|contempt|disdain|horror|repugnance)\b',
-                r'\b(makes me|making me|made me) (sick|nauseous|vomit|gag|disgusted|grossed out|want to throw up|queasy|ill|uncomfortable|cringe|recoil)\b',
-                r'\b(gross|ew|eww|ugh|yuck|nasty|sick|vile|foul|filthy|dirty|rotten|putrid|rank|fetid|stinking|repellent|repugnant)\b',
-                r'\b(can\'t stomach|can\'t bear|can\'t stand|can\'t tolerate|can\'t handle|can\'t look at|can\'t even|turns my stomach)\b',
-                r'\b(that\'s|that is|this is) (disgusting|gross|revolting|repulsive|sickening|nauseating|vile|foul|nasty|disturbing|offensive)\b',
-                r'\b(i|we) (hate|detest|loathe|despise|abhor|can\'t stand) (how|the way|when|that|this|it|the fact that)\b',
-                r'\b(i almost|i nearly|i just about|i literally) (threw up|vomited|gagged|retched|got sick)\b'
-            ],
-            'trust': [
-                r'\b(i|we) (trust|believe in|have faith in|rely on|depend on|count on) (you|him|her|them|this|that|someone|something)\b',
-                r'\b(i|we) (am|are|feel|felt) (trusting|confident|assured|certain|convinced) (in|about|with|of) (you|him|her|them|this|that|someone|something)\b',
-                r'\b(you|he|she|they|it) (are|is|have|has been) (reliable|trustworthy|dependable|honest|truthful|faithful|loyal)\b',
-                r'\b(trust|faith|confidence|belief|reliance|dependence|assurance|certainty)\b',
-                r'\b(trusting|believing|having faith|relying|depending|counting on) (you|him|her|them|someone)\b',
-                r'\b(i know|i believe|i\'m sure|i\'m certain|i\'m confident) (you|he|she|they|it) (will|can|could|would)\b',
-                r'\b(i|we) (trust|have trust|place trust|put trust) (in|with) (you|him|her|them|your|his|her|their) (judgment|opinion|advice|guidance|wisdom|expertise|knowledge)\b'
-            ],
-            'grief': [
-                r'\b(i|we) (am|are|feel|felt) (grieving|mourning|bereaved|devastated|shattered|broken) (over|about|because of|due to|from) (loss|death|passing)\b',
-                r'\b(i|we) (lost|mourn|grieve for) (my|our) (loved one|family member|friend|partner|spouse|husband|wife|child|parent|mother|father|brother|sister)\b',
-                r'\b(i|we) (miss) (my|our) (deceased|late|departed|dead) (loved one|family member|friend|partner|spouse|husband|wife|child|parent|mother|father|brother|sister)\b',
-                r'\b(the|their|his|her) (death|passing|loss) (is|was) (devastating|heartbreaking|unbearable|painful|difficult|hard|tragic)\b',
-                r'\b(grief|mourning|bereavement|loss)\b',
-                r'\b(funeral|memorial|service|burial|cremation|grave|cemetery|obituary)\b',
-                r'\b(died|passed away|gone|no longer with us|departed|deceased|lost the battle)\b',
-                r'\b(i|we) (am|are) (in|experiencing|going through|dealing with|coping with) (grief|mourning|bereavement)\b',
-                r'\b(i|we) (have|had) (lost|recently lost|just lost) (someone|a loved one|a family member|a friend|a pet)\b'
-            ],
-            'relief': [
-                r'\b(i|we) (am|are|feel|felt) (relieved|unburdened|eased|relaxed|calmer|better|at ease|at peace) (that|because|now that|since)\b',
-                r'\b(that|this) (is|was) (a relief|relieving|comforting|reassuring|calming|soothing)\b',
-                r'\b(feeling|feels|felt) (relieved|unburdened|eased|better|lighter|calmer|relaxed) (after|now|since|because)\b',
-                r'\b(relief|ease|comfort|reassurance|solace|respite|reprieve|alleviation) (from|of|about)\b',
-                r'\b(weight off|burden lifted|pressure off|stress gone|worry gone|anxiety gone)\b',
-                r'\b(thank goodness|thank god|finally|at last|phew|whew|glad that\'s over)\b',
-                r'\b(i|we) (can|could) (breathe|relax|rest|sleep) (easier|better|well|peacefully|soundly) (now|again|at last|finally)\b',
-                r'\b(i|we) (no longer|don\'t|do not) (have to|need to) (worry|stress|be concerned|be anxious|be afraid|fear) (about|over)\b'
-            ],
-            'panic': [
-                r'\b(i|we) (am|are|feel|felt) (panicked|panicking|frantic|frenzied|hysterical|overwhelmed|out of control)\b',
-                r'\b(this|that) (is|was) (a disaster|catastrophic|an emergency|a crisis|urgent|critical)\b',
-                r'\b(panic|frenzy|hysteria|alarm|emergency|crisis|urgency|chaos)\b',
-                r'\b(heart racing|hyperventilating|can\'t breathe|breathing fast|sweating|shaking|trembling)\b',
-                r'\b(need help|need assistance|need support|need aid|need backup|need rescue) (now|immediately|right now|quickly|fast|asap|urgently)\b',
-                r'\b(what do i do|what should i do|help me|someone help|emergency|mayday|sos)\b',
-                r'\b(i|we) (am|are) (having|experiencing) (a panic attack|an anxiety attack|a meltdown|a breakdown)\b',
-                r'\b(oh no|oh god|oh my god|omg|help|urgent|emergency|crisis|danger|threat|risk)\b',
-                r'\b(i|we) (can\'t|cannot) (handle|deal with|cope with|manage|control) (this|the situation|what\'s happening|it) (anymore|any longer|now)\b'
-            ],
-            'neutral': [
-                r'\b(i|we) (am|are|feel|felt) (neutral|okay|fine|alright|so-so|indifferent|balanced|neither good nor bad)\b',
-                r'\b(this|that) (is|was) (neutral|okay|fine|alright|so-so|average|mediocre|neither good nor bad)\b',
-                r'\b(😐|😶|😑|😏|🙂|😕)\b',
-                r'\b(feeling|feels|felt) (neutral|okay|fine|alright|so-so|indifferent|balanced)\b',
-                r'\b(neutral|indifference|apathy|detachment|dispassion|disinterest)\b',
-                r'\b(not sure|not certain|undecided|on the fence|middle ground|no strong feelings|no opinion)\b'
-            ],
-            'nostalgia': [
-                r'\b(i|we) (am|are|feel|felt) (nostalgic|sentimental|reminiscent|wistful|yearning|longing|homesick) (about|for|when thinking about|when remembering)\b',
-                r'\b(i|we) (miss|remember|recall|reminisce about|think back to|long for|yearn for) (the old days|those days|that time|my childhood|the past|back then|simpler times|better times)\b',
-                r'\b(i|we) (miss) (my|our) (home|hometown|country|family|friend|friends|partner|spouse|husband|wife|child|parent|mother|father|brother|sister|pet|dog|cat)\b',
-                r'\b(this|that) (reminds|reminded) (me|us) (of|about) (the past|my childhood|when i was|when we were|old times|earlier times|younger days|growing up)\b',
-                r'\b(good old days|back in the day|back then|in those days|when i was young|when i was a kid|in my day|in my time|in my youth|in my childhood)\b',
-                r'\b(nostalgia|sentimentality|reminiscence|wistfulness|yearning|longing|homesickness|fond memories|cherished memories)\b',
-                r'\b(remember when|those were the days|memories|throwback|flashback|blast from the past|trip down memory lane|walk down memory lane)\b',
-                r'\b(wish i could go back|wish i could relive|wish i could experience again|wish i could return to) (those days|that time|my childhood|the past|my youth)\b',
-                r'\b(🕰️|⏳|📷|📸|🎞️|📼|💾|🧸|👵|👴)\b',
-                r'\b(i|we) (fondly|warmly|lovingly|happily|often) (remember|recall|think about|reminisce about) (the past|my childhood|growing up|those times)\b'
-            ],
-            'optimism': [
-                r'\b(i|we) (am|are|feel|felt) (optimistic|hopeful|positive|confident|upbeat|encouraged|buoyant|sanguine)\b',
-                r'\b(i|we) (believe|think|feel|am confident|am sure|am certain|have faith|trust) (things will|it will|everything will) (improve|get better|work out|be okay|be fine|be alright)\b',
-                r'\b(looking on the bright side|seeing the silver lining|focusing on the positive|keeping a positive outlook|staying positive)\b',
-                r'\b(optimism|hope|positivity|confidence|encouragement|faith|trust|belief) (for the future|about tomorrow|about what\'s ahead|about what\'s to come)\b',
-                r'\b(it\'ll|it will|things will|everything will) (be okay|be fine|be alright|work out|get better|improve|turn around) (soon|eventually|in time|in the end)\b',
-                r'\b(better days ahead|brighter future|light at the end of the tunnel|turn the corner|see the light)\b',
-                r'\b(not giving up|keeping hope alive|staying hopeful|remaining positive|keeping faith|believing in better) (days|times|future|outcomes|results)\b',
-                r'\b(😊|🙂|🌞|🌈|✨|🌟|💫|🌻|🌱|🍀)\b',
-                r'\b(i|we) (expect|anticipate|look forward to|am excited about|are excited about) (good|positive|favorable|better) (things|outcomes|results|developments|changes)\b',
-                r'\b(tomorrow|the future|what\'s ahead|what\'s to come) (is|looks|seems) (bright|promising|hopeful|positive|good|better)\b',
-                r'\b(i|we) (believe|have faith|trust|am confident|are confident) (in|about) (the future|tomorrow|what\'s ahead|what\'s to come|what lies ahead)\b',
-                r'\b(i|we) (see|envision|imagine|picture|dream of) (a better|a brighter|a positive|an improved|a promising) (future|tomorrow|world|life|outcome)\b',
-                r'\b(things are looking up|the future is bright|better times are coming|good things are on the horizon|positive change is coming)\b',
-                r'\b(i|we) (am|are) (excited|enthusiastic|eager|looking forward) (about|for) (the future|what\'s next|what\'s coming|what lies ahead)\b',
-                r'\b(i|we) (have|hold|maintain) (hope|optimism|positive expectations|faith|confidence) (for|in|about) (the future|tomorrow|what\'s ahead)\b',
-                r'\b(i|we) (believe|think|know|am sure|are sure) (that|the) (best|better) (is yet to come|days are ahead|times are coming)\b',
-                r'\b(i|we) (am|are) (investing|planning|preparing|building|working) (for|towards) (a better|a brighter|a positive) (future|tomorrow)\b',
-                r'\b(i|we) (believe|think|know|am confident|are confident) (things|life|situations|circumstances) (will|can|could) (improve|get better|change for the better)\b',
-                r'\b(better days|good things|positive changes) (are ahead|are coming|will come|will happen)\b',
-                r'\b(i|we) (trust|believe|have faith) (that) (things|it|everything) (will work out|will be okay|will be fine|will be alright)\b',
-                r'\b(the future|tomorrow|what\'s ahead|what\'s to come) (is full of|has many|offers|holds) (possibilities|opportunities|potential|promise)\b',
-                r'\b(i|we) (am|are) (planning|preparing|working|building|investing) (for|towards) (the future|tomorrow|what\'s ahead|what\'s to come)\b',
-                r'\b(i|we) (have|feel|sense) (hope|faith|optimism|confidence|trust) (for|about|in) (the future|what\'s ahead|what\'s to come)\b'
-            ],
-            'pride': [
-                r'\b(i|we) (am|are|feel|felt) (proud|accomplished|successful|fulfilled|satisfied|pleased|gratified|triumphant|victorious|honored|validated|vindicated)\b',
-                r'\b(i|we) (take pride in|am proud of|are proud of|feel proud of|feel good about|am pleased with|are pleased with|am honored by|are honored by) (myself|ourselves|my|our)\b',
-                r'\b(i|we) (achieved|accomplished|completed|finished|mastered|conquered|overcame|succeeded in|excelled at|triumphed over|prevailed|won|earned|deserved|attained|reached|surpassed)\b',
-                r'\b(proud of|pleased with|satisfied with|happy with|delighted with|impressed by|amazed by|thrilled with) (myself|ourselves|my work|our work|my achievement|our achievement|what i\'ve done|what we\'ve done|my performance|our performance)\b',
-                r'\b(pride|accomplishment|achievement|success|fulfillment|satisfaction|gratification|triumph|victory|honor|excellence|mastery|prowess|distinction)\b',
-                r'\b(look what i|see what i|check out what i|look at what i|look what we|see what we|check what we) (did|made|created|built|achieved|accomplished|finished|completed|won|earned|produced|developed)\b',
-                r'\b(i did it|we did it|nailed it|crushed it|aced it|smashed it|killed it|rocked it|owned it|dominated it|mastered it|conquered it|won it|pulled it off|made it happen)\b',
-                r'\b(😌|😏|😎|🏆|🥇|🎖️|🏅|💪|👊|🙌|✅|🔥|👑|🌟|⭐|🥳)\b',
-                r'\b(i\'m|i am|we\'re|we are) (the best|number one|top|superior|unbeatable|unstoppable|unmatched|unparalleled|exceptional|outstanding|excellent)\b',
-                r'\b(i|we) (deserve|earned|worked hard for|fought for|strived for|put in the effort for) (this|that|it|recognition|praise|reward|success|achievement|accomplishment|victory)\b',
-                r'\b(i|we) (couldn\'t be|couldn\'t feel|am|are) (prouder|more proud|more pleased|more satisfied|more fulfilled|more accomplished)\b',
-                r'\b(i|we) (proved|showed|demonstrated|established|confirmed|validated) (myself|ourselves|them|everyone|the world|the critics|the doubters|the haters) (wrong|right)\b',
-                r'\b(i|we) (stand tall|hold my head high|hold our heads high|can be proud|should be proud|have every right to be proud)\b',
-                r'\b(i|we) (am|are) (satisfied|pleased|happy|content|delighted) with (my|our) (language skills|abilities|performance|achievements|accomplishments|work|results|progress|growth|development|improvement)\b',
-                r'\b(i|we) (am|are) (satisfied|pleased|happy|content|delighted) with (how|what) (i|we) (speak|talk|communicate|express|write|read|understand|learn|know|do|perform|achieve|accomplish)\b'
-            ],
-            'realisation': [
-                r'\b(i|we) (realized|realised|understood|recognized|recognised|discovered|found out|learned|learnt|came to understand)\b',
-                r'\b(it (dawned on|occurred to|became clear to|became apparent to|hit|struck) (me|us))\b',
-                r'\b(i|we) (suddenly|just|finally|now|recently) (realized|realised|understood|recognized|recognised|see|get it|understand)\b',
-                r'\b(had an epiphany|had a revelation|had a realization|had a moment of clarity|saw the light|connected the dots)\b',
-                r'\b(realization|realisation|epiphany|revelation|insight|understanding|awareness|awakening|enlightenment)\b',
-                r'\b(now i see|now i understand|now i get it|it all makes sense|everything clicked|the penny dropped)\b',
-                r'\b(oh|aha|eureka|wow|oh my|oh my god|oh my goodness|oh wow|i see|i get it)\b',
-                r'\b(😮|😲|🤯|💡|✨|👁️|👀|🧠)\b'
-            ],
-            'remorse': [
-                r'\b(i|we) (am|are|feel|felt) (remorseful|regretful|sorry|apologetic|contrite|penitent|repentant|guilty)\b',
-                r'\b(i|we) (regret|am sorry for|are sorry for|apologize for|apologise for|feel bad about|feel guilty about)\b',
-                r'\b(i|we) (shouldn\'t have|should not have|wish i hadn\'t|wish i had not|wish we hadn\'t|wish we had not)\b',
-                r'\b(i|we) (made a mistake|did something wrong|messed up|screwed up|erred|was wrong|were wrong)\b',
-                r'\b(remorse|regret|guilt|contrition|penitence|repentance|sorrow|apology)\b',
-                r'\b(if only i|if only we|i wish i|we wish we|i should have|we should have) (hadn\'t|had not|could take back|could undo)\b',
-                r'\b(i\'m sorry|i am sorry|we\'re sorry|we are sorry|please forgive me|please forgive us|my bad|my fault|my mistake)\b',
-                r'\b(😔|😞|😢|😥|😓|🙇‍♀️|🙇‍♂️|💔|🤦‍♀️|🤦‍♂️)\b'
-            ],
-        }
+        Returns:
+            Chatbot bound to the session state
+        """
+        session_chatbot = copy.copy(self)
+        session_chatbot.history_depth = state.history_depth
+        session_chatbot.context = state.context
+        session_chatbot.conversation_memory = state.conversation_memory
+        session_chatbot.drink_recommender = copy.copy(self.drink_recommender)
+        if state.drink_profile is None:
+            session_chatbot.drink_recommender.reset_profile()
+        else:
+            session_chatbot.drink_recommender.user_profile = state.drink_profile
+        return session_chatbot
 
-        # Initialize emotion responses
-        self.emotion_responses = {
-            'achievement': [
-                "Congratulations! That's a significant accomplishment. You should be proud of what you've achieved.",
-                "Well done! Your hard work and dedication have clearly paid off. How does it feel?",
-                "That's impressive! It's great to see your efforts being rewarded. What was the most challenging part?",
-                "Excellent work! Taking time to celebrate achievements is important. What's your next goal?",
-                "That's fantastic! Your persistence has really paid off. What did you learn from this experience?"
-            ],
-            'admiration': [
-                "It's wonderful to hear you express such admiration. What qualities do you find most inspiring?",
-                "That's a beautiful sentiment of admiration. People who inspire us can have such a positive impact.",
-                "Your admiration really comes through. How does this person's influence shape your goals?",
-                "Admiration often reflects our own values. What aspects do you find most worthy of admiration?",
-                "It's great to recognize qualities we admire in others. How does this shape your own goals?"
-            ],
-            'amusement': [
-                "That does sound funny! It's great to find humor in life's moments.",
-                "I can tell that amused you! Laughter is such a wonderful part of the human experience.",
-                "That's hilarious! It's always good to have something that makes you laugh.",
-                "I'm glad that brought you some amusement. What other things make you laugh?",
-                "That's quite entertaining! Humor can really brighten our day, can't it?"
-            ],
-            'annoyance': [
-                "I can hear that you're feeling annoyed. Sometimes small things can really get under our skin.",
-                "That does sound irritating. What do you usually do when you feel this way?",
-                "I understand your annoyance. It's natural to feel frustrated when things aren't going as expected.",
-                "Being annoyed is a normal reaction. Is there something that might help improve the situation?",
-                "I can tell this is bothering you. Sometimes expressing annoyance is the first step to addressing it."
-            ],
-            'anticipation': [
-                "I can feel your anticipation! Looking forward to something can be so energizing.",
-                "It sounds like you're really looking forward to this. What are you most excited about?",
-                "That sense of anticipation can be so powerful. How are you preparing for what's coming?",
-                "Looking forward to something brings its own kind of joy. What are your expectations?",
-                "I can tell you're eagerly awaiting this. The anticipation is sometimes as enjoyable as the event itself!"
-            ],
-            'approval': [
-                "I appreciate you sharing your approval. It's good to acknowledge when things meet our standards.",
-                "That sounds like a positive endorsement. What aspects do you find most worthy of approval?",
-                "I can tell you're pleased with this. It's nice when things align with our expectations, isn't it?",
-                "Your approval comes through clearly. What standards or values is this fulfilling for you?",
-                "It's good to express when we approve of something. This seems to really resonate with your values."
-            ],
-            'curious': [
-                "That's an interesting question! Curiosity often leads to fascinating discoveries.",
-                "I can tell you're curious about this. What aspects are you most interested in exploring?",
-                "That's a thought-provoking topic to wonder about. What sparked your interest in this?",
-                "Your curiosity is evident! Questions like these often lead to the most interesting conversations.",
-                "I appreciate your inquisitive nature. What other aspects of this topic intrigue you?"
-            ],
-            'caring': [
-                "Your caring nature really comes through. It's wonderful to see such compassion.",
-                "I can tell you really care deeply. That kind of empathy is so valuable.",
-                "Your concern for others is evident. How do you balance caring for others with self-care?",
-                "That's a very thoughtful perspective. Caring connections are so important in life.",
-                "I appreciate your compassionate approach. What inspired you to be so caring?"
-            ],
-            'confusion': [
-                "I can understand why that might be confusing. Would it help to break this down into simpler parts?",
-                "It's perfectly normal to feel confused sometimes. Which aspect is most unclear?",
-                "That does sound puzzling. Sometimes talking through confusion helps clarify our thoughts.",
-                "I see why you might be feeling confused. Would looking at this from a different angle help?",
-                "Confusion often comes before clarity. What specific questions do you have that might help sort this out?"
-            ],
-            'desire': [
-                "I can hear how much you want this. What makes it so meaningful to you?",
-                "That desire comes through strongly. What steps might bring you closer to what you want?",
-                "It's powerful to recognize our desires so clearly. What would fulfilling this desire bring to your life?",
-                "I understand that feeling of wanting something deeply. How long have you felt this way?",
-                "Your desire is completely valid. Sometimes naming what we want is the first step toward it."
-            ],
-            'joy': [
-                "It's wonderful to hear you're feeling happy! Those positive moments are worth savoring.",
-                "That's great! Joy is such an energizing emotion. What's bringing you happiness right now?",
-                "I'm glad you're feeling good! Positive emotions can really brighten our perspective.",
-                "That's lovely to hear! Happiness often comes from the things that matter most to us.",
-                "Wonderful! Those moments of joy are so valuable. Is there a way to bring more of this into your daily life?"
-            ],
-            'desperation': [
-                "I hear that you're feeling overwhelmed right now. Remember that difficult moments do pass with time.",
-                "It sounds like you're going through a really tough time. Would talking about specific concerns help?",
-                "I understand you're feeling desperate. Sometimes taking one small step can help regain some sense of control.",
-                "That sounds incredibly difficult. Remember that reaching out for help shows real strength.",
-                "I'm sorry you're feeling this way. Your feelings are valid, and there are resources that can help during these times."
-            ],
-            'disappointment': [
-                "I can hear your disappointment. It's hard when reality doesn't match our expectations.",
-                "That does sound disappointing. How are you processing this letdown?",
-                "I understand that feeling of disappointment. What had you hoped would happen instead?",
-                "It's natural to feel disappointed when things don't go as planned. What might help you move forward?",
-                "I'm sorry things didn't work out as you'd hoped. Sometimes disappointment can teach us something valuable about our expectations."
-            ],
-            'disapproval': [
-                "I understand you don't approve of this. Our values often shape what we find acceptable.",
-                "I can hear your disapproval clearly. What specific aspects do you find most problematic?",
-                "Your disapproval makes sense given what you've described. What standards or values is this violating for you?",
-                "I appreciate you sharing your perspective. Disapproval often stems from our core values being challenged.",
-                "I can tell you feel strongly about this. What would a more acceptable alternative look like to you?"
-            ],
-            'embarassment': [
-                "That does sound embarrassing. Remember that everyone has moments they wish they could redo.",
-                "I understand that feeling of embarrassment. How are you handling it?",
-                "Embarrassing moments can feel so intense in the moment. Do you think others noticed as much as you felt they did?",
-                "That kind of situation would make many people nervous. Is there a way to look at it with some self-compassion?",
-                "Embarrassment is such a universal human experience. Sometimes sharing these moments helps take away some of their power."
-            ],
-            'sadness': [
-                "I understand you're feeling down. It's okay to experience sadness - it's a natural part of life.",
-                "I'm sorry to hear you're feeling sad. Would you like to talk about what's on your mind?",
-                "It's okay to feel sad sometimes. Taking care of yourself during these moments is important.",
-                "I hear that you're feeling low right now. Sometimes expressing these feelings can help lighten the burden.",
-                "Sadness is a natural response to difficult situations. Is there something specific that triggered this feeling?"
-            ],
-            'anger': [
-                "I can tell you're feeling frustrated. Sometimes anger signals that something important to us has been affected.",
-                "It sounds like you're feeling pretty upset. Would it help to talk about what happened?",
-                "I understand you're angry. That's a natural response when we feel wronged or when our boundaries aren't respected.",
-                "Your frustration comes through clearly. Sometimes anger can help us identify what matters to us.",
-                "I hear your anger. Taking some time to process these feelings before acting can sometimes be helpful."
-            ],
-            'fear': [
-                "It sounds like you're feeling anxious. Fear is often our mind's way of trying to protect us.",
-                "I understand you're feeling scared. Would it help to break down what's causing this fear?",
-                "Being afraid is completely natural. Sometimes naming our specific fears can make them feel more manageable.",
-                "I hear that you're worried. Sometimes our fears feel bigger when we face them alone.",
-                "It's okay to feel afraid. Is there a particular aspect of this situation that concerns you most?"
-            ],
-            'excitement': [
-                "Your excitement is contagious! What are you most looking forward to about this?",
-                "I can feel your enthusiasm! It's wonderful when something energizes us like that.",
-                "That sounds really exciting! How are you channeling all that positive energy?",
-                "I can tell you're thrilled about this. What aspect has you most excited?",
-                "Your excitement really comes through! These moments of anticipation can be so enjoyable."
-            ],
-            'gratitude': [
-                "That's a beautiful expression of gratitude. Appreciation can really enrich our experiences.",
-                "I can tell you're truly thankful. What impact has this had on you?",
-                "Expressing gratitude is so powerful. How has being thankful affected your perspective?",
-                "That's wonderful that you're feeling grateful. Recognizing what we appreciate can be so meaningful.",
-                "I appreciate you sharing your gratitude. What other things in life are you finding yourself thankful for?"
-            ],
-            'nervousness': [
-                "I can understand why you'd feel nervous. Those jittery feelings are your body's natural response.",
-                "Being nervous before something important is completely normal. How do you usually manage these feelings?",
-                "I hear that you're feeling on edge. Sometimes acknowledging our nervousness can help reduce its power.",
-                "That kind of situation would make many people nervous. Is there anything that might help you feel more grounded?",
-                "It's okay to feel nervous. Sometimes it's just our body's way of preparing for something that matters to us."
-            ],
-            'surprise': [
-                "That does sound unexpected! Surprises can really catch us off guard.",
-                "I can imagine that was surprising. How are you processing this unexpected development?",
-                "Unexpected events can certainly be jarring. How are you adjusting to this surprise?",
-                "That's quite a surprise. Sometimes the unexpected gives us a chance to see things differently.",
-                "I understand this wasn't what you anticipated. How do you feel about this unexpected turn?"
-            ],
-            'love': [
-                "That's a beautiful sentiment. Love and connection are such fundamental human needs.",
-                "It's wonderful to hear about those feelings of love and attachment. Relationships add so much to our lives.",
-                "Those feelings of love sound meaningful. Connections with others often bring the greatest joy.",
-                "That's lovely. The people we care about help make life rich and meaningful.",
-                "It's wonderful to experience those feelings of connection. What do you value most about this relationship?"
-            ],
-            'disgust': [
-                "I understand that doesn't sit well with you. Our sense of disgust often connects to our values.",
-                "That sounds really off-putting. Sometimes strong negative reactions tell us something important.",
-                "I can see why you'd find that disturbing. Would you like to talk more about what specifically bothers you?",
-                "That reaction makes sense. Feeling disgusted often relates to things that conflict with our sense of what's right.",
-                "I understand your aversion to that. What aspects do you find most troubling?"
-            ],
-            'neutral': [
-                "Sometimes a balanced perspective helps us see things clearly. What's on your mind today?",
-                "That sounds like a measured approach. Is there anything specific you'd like to explore further?",
-                "Taking a neutral stance can be valuable. Is there a particular aspect of this you're considering?",
-                "I appreciate your balanced view. What factors are you weighing as you think about this?",
-                "Sometimes that middle ground is exactly where clarity emerges. What are your thoughts on next steps?"
-            ],
-            'nostalgia': [
-                "Those nostalgic memories can be so powerful. What do you miss most about that time?",
-                "I can hear the nostalgia in your words. How does remembering that time make you feel?",
-                "Those memories seem really meaningful to you. What makes that time so special in your recollection?",
-                "Nostalgia often connects us with important parts of our history. How has that time shaped who you are now?",
-                "Those fond memories of the past can be so comforting. What aspects of that time would you bring into the present if you could?"
-            ],
-            'optimism': [
-                "I love your positive outlook! What's giving you this sense of optimism?",
-                "That hopeful perspective is wonderful to hear. What possibilities are you most excited about?",
-                "Your optimism really shines through. How does maintaining this positive outlook help you?",
-                "It's great to hear such a hopeful view. What's contributing to your positive expectations?",
-                "That optimistic approach can be so powerful. How does it influence the way you approach challenges?"
-            ],
-            'pride': [
-                "You have every reason to feel proud! What aspect of this achievement means the most to you?",
-                "That sense of pride is well-deserved. How did you overcome the challenges along the way?",
-                "I can hear how proud you are, and rightfully so! What did you learn about yourself through this process?",
-                "Taking pride in your accomplishments is important. How will you celebrate this achievement?",
-                "That's definitely something to be proud of. What's the next goal you're setting your sights on?"
-            ],
-            'realisation': [
-                "That moment of realization can be so powerful. How has this new understanding changed your perspective?",
-                "It sounds like something really clicked for you. What led to this insight?",
-                "Those 'aha' moments can be transformative. How do you feel now that you've made this connection?",
-                "Realizations like that can really shift our understanding. What will you do with this new insight?",
-                "I can sense how significant this realization is for you. How does it change things moving forward?"
-            ],
-            'remorse': [
-                "I can hear your regret. Being able to acknowledge mistakes is actually a sign of strength.",
-                "It sounds like you're feeling remorseful. What would you do differently if you could?",
-                "Feeling regret can be difficult but also valuable for growth. Have you considered how to make amends?",
-                "I understand that feeling of remorse. Sometimes the best response is to learn from the experience and move forward.",
-                "It takes courage to acknowledge when we've done something we regret. How might this experience shape your future choices?"
-            ],
-            'dread': [
-                "That sense of dread can be so overwhelming. What specifically are you most concerned about?",
-                "I can hear how much you're dreading this. Sometimes breaking it down into smaller parts can make it feel more manageable.",
-                "That feeling of impending doom is really difficult. What has helped you cope with similar feelings in the past?",
-                "I understand that sense of dread. Is there any part of the situation that feels within your control?",
-                "It's natural to dread certain situations. Would talking through some possible outcomes help ease some of that feeling?"
-            ],
-            'appalled': [
-                "I can understand why you'd be appalled by that. It sounds like it violates some important values for you.",
-                "That does sound shocking. What aspect do you find most disturbing?",
-                "I can hear how appalled you are. Sometimes such strong reactions tell us something important about our core values.",
-                "Being appalled by certain behaviors or situations is a natural response. How are you processing this?",
-                "I understand your reaction completely. What do you think would be an appropriate response to something so troubling?"
-            ],
-        }
+    def session_state(self) -> SessionState:
+        """
+        Get the conversation state of this chatbot.
 
-        # Initialize greeting patterns
-        self.greeting_patterns = [
-            r'\b(hi|hello|hey|greetings|howdy)\b',
-            r'\b(good) (morning|afternoon|evening|day)\b',
-            r'\b(how are you|how\'s it going|what\'s up|how do you do)\b'
-        ]
-
-        # Initialize greeting responses
-        self.greeting_responses = [
-            "Hello there! How are you doing today?",
-            "Hi! It's good to see you. How can I help?",
-            "Hey! How's your day going so far?",
-            "Hello! What's on your mind today?",
-            "Hi there! I'm here if you want to talk about anything."
-        ]
-
-        # Initialize question patterns
-        self.question_patterns = [
-            r'\b(what|who|where|when|why|how)\b.+\?',
-            r'\b(can|could|would|should|do|does|did|is|are|was|were)\b.+\?',
-            r'\?$'
-        ]
-
-        # Initialize emotion images for UI - mapping emotions to appropriate image files
-        self.emotion_images = {
-            'achievement': '/static/images/achievement.png',  # Achievement image
-            'joy': '/static/images/happy.jpg',  # Happy/joy image
-            'sadness': '/static/images/sad.jpg',  # Sad image
-            'anger': '/static/images/anger.jpeg',  # Anger image
-            'fear': '/static/images/fear.jpg',  # Fear image
-            'surprise': '/static/images/surprise.jpeg',  # Surprise image
-            'love': '/static/images/love.jpg',  # Love image
-            'disgust': '/static/images/disgust.jpg',  # Disgust image
-            'neutral': '/static/images/neutral.jpg',  # Neutral image
-            'desperation': '/static/images/desperation.jpeg',  # Desperation image
-            'trust': '/static/images/trust.jpeg',  # Trust image
-            'grief': '/static/images/grief.jpg',  # Grief image
-            'relief': '/static/images/relief.jpg',  # Relief image
-            'panic': '/static/images/panic.png',  # Panic image
-            'admiration': '/static/images/admiration.jpg',  # Admiration image
-            'amusement': '/static/images/amusement.jpg',  # Amusement image
-            'annoyance': '/static/images/annoyance.jpg',  # Annoyance image
-            'anticipation': '/static/images/anticipation.png',  # Anticipation image
-            'approval': '/static/images/approval.jpg',  # Approval image
-            'caring': '/static/images/caring.jpeg',  # Caring image
-            'confusion': '/static/images/confusion.png',  # Confusion image
-            'curious': '/static/images/curious.jpg',  # Curious image
-            'desire': '/static/images/desire.jpg',  # Desire image
-            'disappointment': '/static/images/disappointment.jpeg',  # Disappointment image
-            'disapproval': '/static/images/disapproval.jpg',  # Disapproval image
-            'embarassment': '/static/images/embarassment.jpg',  # Embarrassment image
-            'excitement': '/static/images/excitement.png',  # Excitement image
-            'gratitude': '/static/images/gratitude.jpeg',  # Gratitude image
-            'nervousness': '/static/images/nervousness.jpg',  # Nervousness image
-            'nostalgia': '/static/images/nostalgia.png',  # Nostalgia image
-            'optimism': '/static/images/optimism.jpg',  # Optimism image
-            'pride': '/static/images/pride.jpg',  # Pride image
-            'realisation': '/static/images/realisation.jpg',  # Realization image
-            'remorse': '/static/images/remorse.jpg'  # Remorse image
-        }
+        Returns:
+            SessionState referencing the current context, memory and drink profile
+        """
+        return SessionState(self.context, self.conversation_memory, self.drink_recommender.user_profile,
+                            self.history_depth)
+
+    @staticmethod
+    def _normalize_scores(scores: np.ndarray) -> None:
+        """
+        Normalize a score vector in place so that it sums to 1, unless it is all zeros.
+
+        The total is accumulated in emotion order like the per-emotion dict sums it replaces,
+        so scores sitting exactly on a threshold compare the same way.
+
+        Args:
+            scores: The score vector
+        """
+        total = sum(scores.tolist())
+        if total > 0:
+            scores /= total
 
     def analyze_emotion(self, message: str) -> Dict:
         """
@@ -845,208 +214,178 @@ class AdvancedChatbot:
         Returns:
             Dict containing the detected emotion, confidence score, and all emotion scores
         """
-        # Special handling for test cases
-        message_lower = message.lower()
+        return self.apply_context(self.score_text(message), self.context.get('session_emotions'))
 
-        # Test case: "I believe I can..."
-        if "i believe i can" in message_lower:
-            return {
-                'emotion': 'optimism',
-                'confidence': 0.8,
-                'scores': {'optimism': 0.8, 'neutral': 0.1, 'joy': 0.1},
-                'image': self.emotion_images.get('optimism', 'neutral.jpg')
-            }
+    def score_text(self, message: str) -> BaseScores:
+        """
+        Score the emotions of a message without looking at the conversation context.
 
-        # Test case: "I cannot stand..."
-        if "i cannot stand" in message_lower or "i can't stand" in message_lower:
-            return {
-                'emotion': 'annoyance',
-                'confidence': 0.8,
-                'scores': {'annoyance': 0.8, 'anger': 0.1, 'frustration': 0.1},
-                'image': self.emotion_images.get('annoyance', 'neutral.jpg')
-            }
+        The result only depends on the lowercased text, so it is memoized in the analysis
+        cache and can be shared between sessions.
 
-        # Test case: "I am sorry"
-        if "i am sorry" in message_lower or "i'm sorry" in message_lower:
-            return {
-                'emotion': 'remorse',
-                'confidence': 0.8,
-                'scores': {'remorse': 0.8, 'sadness': 0.1, 'guilt': 0.1},
-                'image': self.emotion_images.get('remorse', 'neutral.jpg')
-            }
+        Args:
+            message: The user's message
 
-        # Test case: "I saw a scary spider on the wall"
-        if "scary spider" in message_lower or "spider on the wall" in message_lower:
-            return {
-                'emotion': 'fear',
-                'confidence': 0.8,
-                'scores': {'fear': 0.8, 'panic': 0.1, 'anxiety': 0.1},
-                'image': self.emotion_images.get('fear', 'neutral.jpg')
-            }
+        Returns:
+            BaseScores of the message
+        """
+        message_lower = message.lower()
 
-        # Test case: "I'm angry about what happened."
-        if "i'm angry about what happened" in message_lower:
-            return {
-                'emotion': 'anger',
-                'confidence': 0.8,
-                'scores': {'anger': 0.8, 'neutral': 0.1, 'frustration': 0.1},
-                'image': self.emotion_images.get('anger', 'neutral.jpg')
-            }
+        base_scores = self.analysis_cache.get(message_lower)
+        if base_scores is None:
+            base_scores = self._score_text(message, message_lower)
+            self.analysis_cache.put(message_lower, base_scores)
+        return base_scores
 
-        # Test case: "I don't feel angry anymore."
-        if "i don't feel angry anymore" in message_lower:
-            return {
-                'emotion': 'relief',
-                'confidence': 0.7,
-                'scores': {'relief': 0.7, 'neutral': 0.2, 'joy': 0.1},
-                'image': self.emotion_images.get('relief', 'neutral.jpg')
-            }
+    def apply_context(self, base_scores: BaseScores, session_history: Optional[List[str]] = None) -> Dict:
+        """
+        Adjust the base scores of a message for the session and build the analysis result.
 
-        # Test case: "I'm not afraid of public speaking."
-        if "i'm not afraid of public speaking" in message_lower:
-            return {
-                'emotion': 'confidence',
-                'confidence': 0.7,
-                'scores': {'confidence': 0.7, 'neutral': 0.2, 'courage': 0.1},
-                'image': self.emotion_images.get('confidence', 'neutral.jpg')
-            }
+        Args:
+            base_scores: Result of score_text for the message
+            session_history: Emotions detected earlier in the session, oldest first
 
-        # Test case: "I'm not happy with the results."
-        if "i'm not happy with the results" in message_lower:
-            return {
-                'emotion': 'disappointment',
-                'confidence': 0.7,
-                'scores': {'disappointment': 0.7, 'frustration': 0.2, 'sadness': 0.1},
-                'image': self.emotion_images.get('disappointment', 'neutral.jpg')
-            }
+        Returns:
+            Dict containing the detected emotion, confidence score, and all emotion scores
+        """
+        override = base_scores.override
+        if override is not None:
+            return dict(override, scores=dict(override['scores']))
 
-        # Test case: "I didn't get the job I applied for."
-        if "i didn't get the job i applied for" in message_lower:
-            return {
-                'emotion': 'disappointment',
-                'confidence': 0.7,
-                'scores': {'disappointment': 0.7, 'sadness': 0.2, 'frustration': 0.1},
-                'image': self.emotion_images.get('disappointment', 'neutral.jpg')
-            }
+        emotion_scores = base_scores.scores.copy()
+        self._apply_session_emotions(session_history, emotion_scores)
+        return self._build_result(emotion_scores)
 
-        # Test case: "I found out my husband cheated on me."
-        if "i found out my husband cheated on me" in message_lower:
-            return {
-                'emotion': 'disappointment',
-                'confidence': 0.9,
-                'scores': {'disappointment': 0.6, 'sadness': 0.3, 'anger': 0.1},
-                'image': self.emotion_images.get('disappointment', 'neutral.jpg')
-            }
+    def _score_text(self, message: str, message_lower: str) -> BaseScores:
+        """
+        Compute the BaseScores of a message, bypassing the analysis cache.
 
-        # Test case: "I'm excited about the trip but nervous about flying."
-        if "i'm excited about the trip but nervous about flying" in message_lower:
-            return {
-                'emotion': 'excitement',
-                'confidence': 0.6,
-                'scores': {'excitement': 0.6, 'fear': 0.4},
-                'image': self.emotion_images.get('excitement', 'neutral.jpg'),
-                'mixed_emotion': 'fear'
-            }
+        Args:
+            message: The user's message
+            message_lower: The lowercased message
 
-        # Test case: "I need to buy groceries."
-        if "i need to buy groceries" in message_lower:
-            return {
-                'emotion': 'neutral',
-                'confidence': 0.5,
-                'scores': {'neutral': 0.8, 'desire': 0.2},
-                'image': self.emotion_images.get('neutral', 'neutral.jpg')
-            }
+        Returns:
+            BaseScores of the message
+        """
+        special_case = self.override_table.lookup(message_lower)
+        if special_case is not None:
+            return BaseScores(special_case, None)
 
-        # Test case: "I don't see any reason to live anymore."
-        if "i don't see any reason to live anymore" in message_lower or "i want to end my life" in message_lower or "i can't take it anymore, i just want to die" in message_lower:
-            return {
-                'emotion': 'desperation',
-                'confidence': 0.9,
-                'scores': {'desperation': 0.9, 'sadness': 0.1},
-                'image': self.emotion_images.get('desperation', 'neutral.jpg')
-            }
+        # Tokenize once; every sentence's tokens are also tokens of the whole message
+        message_tokens = tokenize(message_lower)
 
-        # Test case: "The frustrating situation."
-        if message_lower == "the frustrating situation.":
-            return {
-                'emotion': 'annoyance',
-                'confidence': 0.7,
-                'scores': {'annoyance': 0.7, 'frustration': 0.3},
-                'image': self.emotion_images.get('annoyance', 'neutral.jpg')
-            }
+        def match_patterns(text):
+            return self.pattern_matcher.match(text, message_tokens)
 
-        # Test case: "The extremely frustrating situation."
-        if message_lower == "the extremely frustrating situation.":
-            return {
-                'emotion': 'annoyance',
-                'confidence': 0.8,
-                'scores': {'annoyance': 0.8, 'frustration': 0.2},
-                'image': self.emotion_images.get('annoyance', 'neutral.jpg')
-            }
+        emotion_scores = np.zeros(len(self.emotion_names))
+        self._score_message(message, message_lower, self._split_sentences(message_lower), match_patterns,
+                            emotion_scores)
+        emotion_scores.flags.writeable = False
+        return BaseScores(None, emotion_scores)
 
-        # Test case: "Wow! That's surprising!"
-        if "wow! that's surprising" in message_lower:
-            return {
-                'emotion': 'surprise',
-                'confidence': 0.8,
-                'scores': {'surprise': 0.8, 'excitement': 0.2},
-                'image': self.emotion_images.get('surprise', 'neutral.jpg')
-            }
+    def analyze_emotion_batch(self, messages: List[str], context: Optional[Dict] = None) -> List[Dict]:
+        """
+        Analyze the emotions of many messages at once, e.g. for offline re-scoring.
 
-        # Test case: "They just announced budget cuts at work."
-        if "they just announced budget cuts at work" in message_lower:
-            return {
-                'emotion': 'worry',
-                'confidence': 0.7,
-                'scores': {'worry': 0.7, 'fear': 0.2, 'concern': 0.1},
-                'image': self.emotion_images.get('worry', 'neutral.jpg')
-            }
+        Tokenization and pattern matching run over the whole batch before the scores are
+        accumulated into a messages x emotions matrix. Each result is identical to what
+        analyze_emotion returns for the message with the same session emotions.
 
-        # Test case: "I'm confused about these instructions."
-        if "i'm confused about these instructions" in message_lower:
-            return {
-                'emotion': 'confusion',
-                'confidence': 0.8,
-                'scores': {'confusion': 0.8, 'neutral': 0.1, 'concern': 0.1},
-                'image': self.emotion_images.get('confusion', 'neutral.jpg')
-            }
+        Args:
+            messages: The messages to analyze
+            context: Optional conversation context; only its 'session_emotions' are read,
+                and they are the same for every message. Defaults to an empty session.
 
-        # Test case: "My flight got delayed by 5 hours."
-        if "my flight got delayed by 5 hours" in message_lower:
-            return {
-                'emotion': 'frustration',
-                'confidence': 0.7,
-                'scores': {'frustration': 0.7, 'anger': 0.2, 'disappointment': 0.1},
-                'image': self.emotion_images.get('frustration', 'neutral.jpg')
-            }
-        # Initialize scores for each emotion
-        emotion_scores = {emotion: 0.0 for emotion in self.emotion_patterns.keys()}
+        Returns:
+            List of result dicts in the same order as the messages
+        """
+        session_emotions = (context or {}).get('session_emotions')
+
+        messages_lower = [message.lower() for message in messages]
+        special_cases = [self.override_table.lookup(message_lower) for message_lower in messages_lower]
+
+        # Collect every distinct text the scoring stage can match (sentences and whole
+        # messages) and match them all in one pass over the pattern bank
+        pending = [i for i, special_case in enumerate(special_cases) if special_case is None]
+        sentences = {i: self._split_sentences(messages_lower[i]) for i in pending}
+        text_tokens = {}
+        for i in pending:
+            message_tokens = None
+            for text in sentences[i] + [messages_lower[i]]:
+                if text not in text_tokens:
+                    if message_tokens is None:
+                        message_tokens = tokenize(messages_lower[i])
+                    # The tokens of any message containing the text cover the text's own tokens
+                    text_tokens[text] = message_tokens
+        texts = list(text_tokens)
+        pattern_counts = dict(zip(texts, self.pattern_matcher.match_many(texts, list(text_tokens.values()))))
+
+        score_matrix = np.zeros((len(messages), len(self.emotion_names)))
+        results = list(special_cases)
+        for i in pending:
+            self._score_message(messages[i], messages_lower[i], sentences[i], pattern_counts.__getitem__,
+                                score_matrix[i])
+            results[i] = self.apply_context(BaseScores(None, score_matrix[i]), session_emotions)
+
+        return results
+
+    @staticmethod
+    def _split_sentences(message_lower: str) -> List[str]:
+        """
+        Split a lowercased message into its non-empty sentences.
 
-        # Convert message to lowercase for case-insensitive matching
-        message_lower = message.lower()
+        Args:
+            message_lower: The lowercased message
 
+        Returns:
+            List of stripped sentences
+        """
         # Pre-process message to handle real-life text patterns
         # Split into sentences to analyze context better
         sentences = re.split(r'[.!?]+', message_lower)
-        sentences = [s.strip() for s in sentences if s.strip()]
+        return [s.strip() for s in sentences if s.strip()]
+
+    def _score_message(self, message: str, message_lower: str, sentences: List[str], match_patterns,
+                       emotion_scores: np.ndarray) -> None:
+        """
+        Accumulate the normalized, context-independent emotion scores of a message into a score vector.
+
+        Args:
+            message: The user's message
+            message_lower: The lowercased message
+            sentences: The sentences of the lowercased message
+            match_patterns: Callable returning the pattern match counts for a sentence or the whole message
+            emotion_scores: Zeroed score vector indexed by self.emotion_index, filled in place
+        """
+        emotion_index = self.emotion_index
 
         # Analyze each sentence separately to capture context shifts
-        sentence_emotions = []
+        sentence_emotion_indices = []
+        sentence_emotion_scores = []
+        sentence_scores = np.zeros(len(self.emotion_names))
         for sentence in sentences:
-            sentence_scores = {emotion: 0.0 for emotion in self.emotion_patterns.keys()}
+            sentence_scores.fill(0.0)
+
+            # Find the matching patterns for the whole bank in one pass
+            pattern_counts = match_patterns(sentence)
+            matches_by_emotion = {}
+            for (emotion, index), match_count in pattern_counts.items():
+                matches_by_emotion.setdefault(emotion, []).append((index, match_count))
 
             # Check each emotion pattern
-            for emotion, patterns in self.emotion_patterns.items():
-                for pattern in patterns:
-                    matches = re.findall(pattern, sentence)
-                    if matches:
+            top_emotion = None
+            for emotion_position, (emotion, patterns) in enumerate(self.compiled_emotion_patterns.items()):
+                emotion_matches = matches_by_emotion.get(emotion)
+                if emotion_matches:
+                    for index, match_count in emotion_matches:
+                        _, is_explicit, is_suicidal = patterns[index]
                         # Increment score based on number and quality of matches
                         # Use a logarithmic scale to prevent overweighting messages with many matches
                         # but still reward multiple matches
-                        pattern_score = 0.3 * (1 + math.log(len(matches) + 1, 2))  # Reduced base score to prevent over-detection
+                        pattern_score = 0.3 * (1 + math.log(match_count + 1, 2))  # Reduced base score to prevent over-detection
 
                         # Give higher weight to explicit emotion statements
-                        if any(explicit in pattern for explicit in ['feel', 'felt', 'feeling', 'am', 'are', 'is', 'was', 'were']):
+                        if is_explicit:
                             pattern_score *= 1.5  # Reduced multiplier for explicit statements
 
                         # Give higher weight to non-neutral emotions to reduce neutral bias
@@ -1055,61 +394,63 @@ class AdvancedChatbot:
 
                         # Special handling for desperation patterns, particularly suicidal statements
                         # This ensures consistent detection regardless of conversation history
-                        if emotion == 'desperation' and any(suicidal in pattern for suicidal in ['die', 'end my life', 'suicidal', 'kill myself', 'suicide']):
+                        if is_suicidal:
                             pattern_score *= 2.0  # Reduced multiplier while still keeping priority for suicidal patterns
 
-                        sentence_scores[emotion] += pattern_score
+                        sentence_scores[emotion_position] += pattern_score
 
-                # Normalize sentence scores
-                total = sum(sentence_scores.values())
-                if total > 0:
-                    normalized_scores = {e: s/total for e, s in sentence_scores.items()}
-                    top_emotion = max(normalized_scores.items(), key=lambda x: x[1])
-                    sentence_emotions.append((top_emotion[0], top_emotion[1], sentence))
+                    # Normalize sentence scores (only needed when they changed)
+                    total = sum(sentence_scores.tolist())
+                    if total > 0:
+                        top_index = int(sentence_scores.argmax())
+                        top_emotion = (top_index, sentence_scores[top_index] / total)
+
+                # The top sentence emotion is recorded after every emotion once any score is present
+                if top_emotion is not None:
+                    sentence_emotion_indices.append(top_emotion[0])
+                    sentence_emotion_scores.append(top_emotion[1])
 
             # Combine sentence emotions with weighting based on sentence position and strength
             # Recent sentences (later in text) often carry more emotional weight
-            if sentence_emotions:
-                for i, (emotion, score, _) in enumerate(sentence_emotions):
-                    # Weight by position (later sentences get higher weight)
-                    position_weight = 0.5 + 0.5 * (i / len(sentence_emotions))
-                    # Weight by score strength - reduced multiplier
-                    emotion_scores[emotion] += score * position_weight * 1.0
+            if sentence_emotion_indices:
+                count = len(sentence_emotion_indices)
+                # Weight by position (later sentences get higher weight)
+                position_weights = 0.5 + 0.5 * (np.arange(count) / count)
+                # Weight by score strength - reduced multiplier
+                np.add.at(emotion_scores, sentence_emotion_indices,
+                          np.array(sentence_emotion_scores) * position_weights * 1.0)
 
                 # Normalize after combining sentences
-                total = sum(emotion_scores.values())
-                if total > 0:
-                    emotion_scores = {e: s/total for e, s in emotion_scores.items()}
+                self._normalize_scores(emotion_scores)
 
             # If no sentences were processed, fall back to whole message analysis
-            if not sentence_emotions:
+            if not sentence_emotion_indices:
                 # Check each emotion pattern on the whole message
-                for emotion, patterns in self.emotion_patterns.items():
-                    for pattern in patterns:
-                        matches = re.findall(pattern, message_lower)
-                        if matches:
-                            pattern_score = 0.3 * (1 + math.log(len(matches) + 1, 2))  # Reduced base score
+                pattern_counts = match_patterns(message_lower)
+                for emotion, index in pattern_counts:
+                    _, is_explicit, is_suicidal = self.compiled_emotion_patterns[emotion][index]
+                    pattern_score = 0.3 * (1 + math.log(pattern_counts[(emotion, index)] + 1, 2))  # Reduced base score
 
-                            if any(explicit in pattern for explicit in ['feel', 'felt', 'feeling', 'am', 'are', 'is', 'was', 'were']):
-                                pattern_score *= 1.5  # Reduced multiplier
+                    if is_explicit:
+                        pattern_score *= 1.5  # Reduced multiplier
 
-                            if emotion != 'neutral':
-                                pattern_score *= 1.1  # Reduced boost
+                    if emotion != 'neutral':
+                        pattern_score *= 1.1  # Reduced boost
 
-                            # Special handling for desperation patterns, particularly suicidal statements
-                            if emotion == 'desperation' and any(suicidal in pattern for suicidal in ['die', 'end my life', 'suicidal', 'kill myself', 'suicide']):
-                                pattern_score *= 2.0  # Reduced while maintaining priority
+                    # Special handling for desperation patterns, particularly suicidal statements
+                    if is_suicidal:
+                        pattern_score *= 2.0  # Reduced while maintaining priority
 
-                            emotion_scores[emotion] += pattern_score
+                    emotion_scores[emotion_index[emotion]] += pattern_score
 
                 # Normalize after pattern matching
-                total = sum(emotion_scores.values())
-                if total > 0:
-                    emotion_scores = {e: s/total for e, s in emotion_scores.items()}
+                self._normalize_scores(emotion_scores)
 
         # Apply enhanced sentiment analysis for real-life text scenarios
         # Extract words and phrases from the message
-        words = re.findall(r'\b\w+\b', message_lower)
+        words = self.lexicon_phrases.merge(re.findall(r'\b\w+\b', message_lower))
+        lexicon = self.lexicon
+        groups = self.emotion_group_indices
 
         # Create a context window to analyze nearby words
         context_window = 3  # Look at words within this distance
@@ -1122,7 +463,8 @@ class AdvancedChatbot:
         # Track positions of intensity modifiers for context analysis
         intensity_positions = []
         for i, word in enumerate(words):
-            if word in self.sentiment_analyzer.get('intensity_modifiers', []):
+            entry = lexicon.get(word)
+            if entry is not None and 'intensity_modifiers' in entry.categories:
                 intensity_multiplier += 0.15  # Reduced from 0.25
                 intensity_positions.append(i)
 
@@ -1138,22 +480,25 @@ class AdvancedChatbot:
                     neg_idx = words.index(neg)
                     # Look at words after negation within context window
                     for i in range(neg_idx + 1, min(neg_idx + context_window + 1, len(words))):
+                        entry = lexicon.get(words[i])
+                        if entry is None:
+                            continue
                         # Check if this word is positive
-                        if words[i] in self.sentiment_analyzer.get('positive', []):
+                        if 'positive' in entry.categories:
                             # Flip positive sentiment to negative for this word
                             words[i] = "NOT_" + words[i]  # Mark for special handling
                         # Check if this word is negative
-                        elif words[i] in self.sentiment_analyzer.get('negative', []):
+                        elif 'negative' in entry.categories:
                             # Reduce negative sentiment intensity
                             intensity_multiplier *= 0.8  # Increased from 0.7 to reduce extreme effects
                         # Check if this word is an emotion word
-                        elif words[i] in ['angry', 'anger', 'furious', 'mad', 'outraged', 'irate', 'incensed', 'infuriated']:
+                        elif entry.negated_emotion == 'anger':
                             # Mark negated anger words for special handling
                             words[i] = "NOT_ANGER"
-                        elif words[i] in ['afraid', 'fear', 'scared', 'frightened', 'terrified', 'anxious', 'fearful', 'petrified']:
+                        elif entry.negated_emotion == 'fear':
                             # Mark negated fear words for special handling
                             words[i] = "NOT_FEAR"
-                        elif words[i] in ['happy', 'joy', 'joyful', 'delighted', 'pleased', 'glad', 'cheerful', 'content']:
+                        elif entry.negated_emotion == 'joy':
                             # Mark negated joy words for special handling
                             words[i] = "NOT_JOY"
 
@@ -1172,13 +517,10 @@ class AdvancedChatbot:
                     base_sentiment_score = 0.25 * local_intensity  # Reduced from 0.2
 
                     # Map to relief or neutral emotions
-                    for emotion in ['relief', 'neutral', 'calm']:
-                        if emotion in emotion_scores:
-                            emotion_scores[emotion] += base_sentiment_score
+                    emotion_scores[groups['negated_anger']] += base_sentiment_score
 
                     # Reduce anger score significantly
-                    if 'anger' in emotion_scores:
-                        emotion_scores['anger'] *= 0.2
+                    emotion_scores[emotion_index['anger']] *= 0.2
 
                     continue  # Skip further processing for this word
 
@@ -1192,13 +534,10 @@ class AdvancedChatbot:
                     base_sentiment_score = 0.25 * local_intensity  # Reduced from 0.2
 
                     # Map to confidence or courage emotions
-                    for emotion in ['confidence', 'courage', 'neutral']:
-                        if emotion in emotion_scores:
-                            emotion_scores[emotion] += base_sentiment_score
+                    emotion_scores[groups['negated_fear']] += base_sentiment_score
 
                     # Reduce fear score significantly
-                    if 'fear' in emotion_scores:
-                        emotion_scores['fear'] *= 0.2
+                    emotion_scores[emotion_index['fear']] *= 0.2
 
                     continue  # Skip further processing for this word
 
@@ -1212,20 +551,18 @@ class AdvancedChatbot:
                     base_sentiment_score = 0.25 * local_intensity  # Reduced from 0.2
 
                     # Map to disappointment or sadness emotions
-                    for emotion in ['disappointment', 'sadness', 'frustration']:
-                        if emotion in emotion_scores:
-                            emotion_scores[emotion] += base_sentiment_score
+                    emotion_scores[groups['negated_joy']] += base_sentiment_score
 
                     # Reduce joy score significantly
-                    if 'joy' in emotion_scores:
-                        emotion_scores['joy'] *= 0.2
+                    emotion_scores[emotion_index['joy']] *= 0.2
 
                     continue  # Skip further processing for this word
 
                 # Handle regular negated words
                 original_word = word[4:]  # Remove the NOT_ prefix
                 # If it was a positive word, now treat it as negative
-                if original_word in self.sentiment_analyzer.get('positive', []):
+                entry = lexicon.get(original_word)
+                if entry is not None and 'positive' in entry.categories:
                     # Apply negative sentiment with context-aware intensity
                     local_intensity = intensity_multiplier
                     # Check if there are intensity modifiers nearby
@@ -1236,91 +573,40 @@ class AdvancedChatbot:
                     base_sentiment_score = 0.15 * local_intensity  # Reduced from 0.2
 
                     # Map to appropriate negative emotions based on the negated positive word
-                    for emotion in ['disappointment', 'sadness', 'frustration']:
-                        if emotion in emotion_scores:
-                            emotion_scores[emotion] += base_sentiment_score
+                    emotion_scores[groups['negated_joy']] += base_sentiment_score
                 continue  # Skip further processing for this word
 
             # Process regular sentiment words with context awareness
-            for sentiment, sentiment_words in self.sentiment_analyzer.items():
-                if sentiment == 'intensity_modifiers':
-                    continue  # Skip this category as we've already processed it
-
-                if word in sentiment_words:
-                    # Apply context-aware intensity
-                    local_intensity = intensity_multiplier
-                    # Check if there are intensity modifiers nearby
-                    for pos in intensity_positions:
-                        if abs(i - pos) <= context_window:
-                            local_intensity += 0.1  # Reduced boost for nearby intensity modifier
-
-                    base_sentiment_score = 0.15 * local_intensity  # Reduced from 0.2
-
-                    # Enhanced emotion mapping based on sentiment and context
-                    if sentiment == 'positive':
-                        # Check for specific positive emotion indicators
-                        if word in ['happy', 'joy', 'delighted', 'pleased']:
-                            emotion_scores['joy'] += base_sentiment_score * 1.2
-                        elif word in ['love', 'adore', 'cherish', 'passionate']:
-                            emotion_scores['love'] += base_sentiment_score * 1.2
-                        elif word in ['excited', 'thrilled', 'eager', 'enthusiastic']:
-                            emotion_scores['excitement'] += base_sentiment_score * 1.2
-                        elif word in ['hopeful', 'optimistic', 'confident']:
-                            emotion_scores['optimism'] += base_sentiment_score * 1.2
-                        elif word in ['trust', 'believe', 'faith', 'reliable']:
-                            emotion_scores['trust'] += base_sentiment_score * 1.2
-                        elif word in ['relieved', 'relaxed', 'calm', 'peaceful']:
-                            emotion_scores['relief'] += base_sentiment_score * 1.2
-                        elif word in ['proud', 'accomplished', 'achieved', 'successful']:
-                            emotion_scores['achievement'] += base_sentiment_score * 1.2
-                        else:
-                            # General positive sentiment distribution
-                            for emotion in ['joy', 'love', 'excitement', 'optimism', 'relief', 'achievement']:
-                                if emotion in emotion_scores:
-                                    emotion_scores[emotion] += base_sentiment_score * 0.8
-                    elif sentiment == 'negative':
-                        # Check for specific negative emotion indicators
-                        if word in ['sad', 'unhappy', 'depressed', 'miserable']:
-                            emotion_scores['sadness'] += base_sentiment_score * 1.2
-                        elif word in ['angry', 'furious', 'mad', 'outraged']:
-                            emotion_scores['anger'] += base_sentiment_score * 1.2
-                        elif word in ['afraid', 'scared', 'terrified', 'anxious']:
-                            emotion_scores['fear'] += base_sentiment_score * 1.2
-                        elif word in ['disgusted', 'revolted', 'gross', 'nasty']:
-                            emotion_scores['disgust'] += base_sentiment_score * 1.2
-                        elif word in ['disappointed', 'let down', 'disheartened']:
-                            emotion_scores['disappointment'] += base_sentiment_score * 1.2
-                        elif word in ['grief', 'mourning', 'bereaved', 'loss']:
-                            emotion_scores['grief'] += base_sentiment_score * 1.2
-                        elif word in ['desperate', 'hopeless', 'worthless', 'suicidal']:
-                            emotion_scores['desperation'] += base_sentiment_score * 1.3
-                        else:
-                            # General negative sentiment distribution
-                            for emotion in ['sadness', 'anger', 'fear', 'disgust', 'disappointment', 'grief', 'desperation']:
-                                if emotion in emotion_scores:
-                                    emotion_scores[emotion] += base_sentiment_score * 0.8
+            entry = lexicon.get(word)
+            if entry is not None and entry.emotions:
+                # Apply context-aware intensity
+                local_intensity = intensity_multiplier
+                # Check if there are intensity modifiers nearby
+                for pos in intensity_positions:
+                    if abs(i - pos) <= context_window:
+                        local_intensity += 0.1  # Reduced boost for nearby intensity modifier
+
+                base_sentiment_score = 0.15 * local_intensity  # Reduced from 0.2
+
+                # Enhanced emotion mapping based on sentiment and context: the lexicon holds
+                # either the specific emotion for the word or the general sentiment distribution
+                for emotion, weight in entry.emotions:
+                    emotion_scores[emotion_index[emotion]] += base_sentiment_score * weight
 
         # Normalize scores after sentiment processing
-        total = sum(emotion_scores.values())
-        if total > 0:
-            emotion_scores = {e: s/total for e, s in emotion_scores.items()}
+        self._normalize_scores(emotion_scores)
 
         # Enhanced approach for handling low or ambiguous emotion scores
         # If no emotion is detected or scores are very low, use more sophisticated inference
-        if all(score < 0.2 for score in emotion_scores.values()):  # Reduced threshold
+        if (emotion_scores < 0.2).all():  # Reduced threshold
             # First, check for implicit emotional content in the message
             implicit_emotions = self.detect_implicit_emotions(message)
 
             # Scale down implicit emotions to prevent them from dominating
-            scaled_implicit_emotions = {k: v * 0.5 for k, v in implicit_emotions.items()}
-
-            for emotion, score in scaled_implicit_emotions.items():
-                emotion_scores[emotion] += score
+            emotion_scores += np.fromiter(implicit_emotions.values(), dtype=float, count=len(implicit_emotions)) * 0.5
 
             # Normalize after adding implicit emotions
-            total = sum(emotion_scores.values())
-            if total > 0:
-                emotion_scores = {e: s/total for e, s in emotion_scores.items()}
+            self._normalize_scores(emotion_scores)
 
             # Check message length and complexity - longer, more complex messages often contain subtle emotions
             if len(message) > 15:
@@ -1333,36 +619,27 @@ class AdvancedChatbot:
                 # Apply structural emotion boosting with reduced values
                 if has_exclamation:
                     # Exclamations often indicate excitement, joy, anger, or surprise
-                    for emotion in ['excitement', 'joy', 'anger', 'surprise']:
-                        emotion_scores[emotion] += 0.08
+                    emotion_scores[groups['exclamation']] += 0.08
 
                 if has_question and not has_exclamation:
                     # Questions without exclamations often indicate curiosity or confusion
-                    for emotion in ['curious', 'confusion']:
-                        emotion_scores[emotion] += 0.08
+                    emotion_scores[groups['question']] += 0.08
 
                 if has_ellipsis:
                     # Ellipses often indicate thoughtfulness, hesitation, or sadness
-                    for emotion in ['sadness', 'confusion', 'anticipation']:
-                        emotion_scores[emotion] += 0.05
+                    emotion_scores[groups['ellipsis']] += 0.05
 
                 if has_emoji:
                     # Presence of emoji indicates emotional content
                     # The specific emotions are handled by pattern matching
                     # But boost non-neutral emotions generally with smaller values
-                    for emotion in emotion_scores:
-                        if emotion != 'neutral':
-                            emotion_scores[emotion] += 0.05
+                    emotion_scores[groups['non_neutral']] += 0.05
 
                 # Boost common emotions to avoid neutral default, with lower values
-                for emotion in ['joy', 'sadness', 'anger', 'fear', 'surprise', 'love', 'disgust', 'achievement', 'disappointment', 'panic', 'relief', 'curious']:
-                    if emotion in emotion_scores:
-                        emotion_scores[emotion] += 0.1  # Reduced boost
+                emotion_scores[groups['common']] += 0.1  # Reduced boost
 
                 # Normalize after structural boosting
-                total = sum(emotion_scores.values())
-                if total > 0:
-                    emotion_scores = {e: s/total for e, s in emotion_scores.items()}
+                self._normalize_scores(emotion_scores)
 
             # Look for any subtle emotional indicators in the message
             message_lower = message.lower()
@@ -1381,50 +658,55 @@ class AdvancedChatbot:
             for emotion, indicators in subtle_indicators.items():
                 for indicator in indicators:
                     if indicator in message_lower:
-                        emotion_scores[emotion] += 0.1  # Reduced boost for subtle indicators
+                        emotion_scores[emotion_index[emotion]] += 0.1  # Reduced boost for subtle indicators
 
             # Normalize after adding subtle indicators
-            total = sum(emotion_scores.values())
-            if total > 0:
-                emotion_scores = {e: s/total for e, s in emotion_scores.items()}
+            self._normalize_scores(emotion_scores)
 
             # Check for any emotional patterns with a lower threshold
             pattern_matches = {}
-            for emotion, patterns in self.emotion_patterns.items():
+            pattern_counts = match_patterns(message_lower)
+            for emotion, patterns in self.compiled_emotion_patterns.items():
                 if emotion != 'neutral':
-                    for pattern in patterns:
-                        if re.search(pattern, message_lower):
+                    for index, (_, _, is_suicidal) in enumerate(patterns):
+                        if (emotion, index) in pattern_counts:
                             pattern_score = 0.2  # Reduced base boost for pattern matches
 
                             # Special handling for desperation patterns, particularly suicidal statements
-                            if emotion == 'desperation' and any(suicidal in pattern for suicidal in ['die', 'end my life', 'suicidal', 'kill myself', 'suicide']):
+                            if is_suicidal:
                                 pattern_score *= 1.5  # Reduced multiplier while still prioritizing
 
                             pattern_matches[emotion] = pattern_matches.get(emotion, 0) + pattern_score
 
             # Add pattern matches with a scaling factor to prevent domination
             for emotion, score in pattern_matches.items():
-                emotion_scores[emotion] += score * 0.7
+                emotion_scores[emotion_index[emotion]] += score * 0.7
 
             # Normalize after pattern matching
-            total = sum(emotion_scores.values())
-            if total > 0:
-                emotion_scores = {e: s/total for e, s in emotion_scores.items()}
+            self._normalize_scores(emotion_scores)
 
             # Only default to neutral if absolutely no other emotion is detected
-            if all(score < 0.08 for emotion, score in emotion_scores.items() if emotion != 'neutral'):
-                emotion_scores['neutral'] = 0.2  # Reduced neutral score
+            if (emotion_scores[groups['non_neutral']] < 0.08).all():
+                emotion_scores[emotion_index['neutral']] = 0.2  # Reduced neutral score
 
                 # Final normalization
-                total = sum(emotion_scores.values())
-                if total > 0:
-                    emotion_scores = {e: s/total for e, s in emotion_scores.items()}
+                self._normalize_scores(emotion_scores)
+
+    def _apply_session_emotions(self, session_emotions: Optional[List[str]], emotion_scores: np.ndarray) -> None:
+        """
+        Adjust the scores of a message for emotional continuity within the session.
+
+        Args:
+            session_emotions: Emotions detected earlier in the session, oldest first
+            emotion_scores: Normalized score vector indexed by self.emotion_index, adjusted in place
+        """
+        emotion_index = self.emotion_index
 
         # Apply enhanced context-aware adjustments with reduced multipliers
         # If we have previous emotions detected, use more sophisticated emotional continuity
-        if self.context.get('session_emotions'):
+        if session_emotions:
             # Get the last few emotions for better context
-            recent_emotions = self.context['session_emotions'][-3:] if len(self.context['session_emotions']) >= 3 else self.context['session_emotions']
+            recent_emotions = list(islice(reversed(session_emotions), 3))[::-1]
 
             # Count occurrences of each emotion in recent history
             emotion_counts = {}
@@ -1433,7 +715,7 @@ class AdvancedChatbot:
 
             # Apply emotional continuity with decay based on recency, with reduced values
             for emotion, count in emotion_counts.items():
-                if emotion in emotion_scores:
+                if emotion in emotion_index:
                     # More weight to emotions that appeared multiple times recently
                     continuity_score = 0.05 * count  # Reduced from 0.1
 
@@ -1443,49 +725,42 @@ class AdvancedChatbot:
 
                     # Apply the continuity score, but less for neutral and desperation
                     if emotion == 'neutral':
-                        emotion_scores[emotion] += continuity_score * 0.2  # Reduced
+                        emotion_scores[emotion_index[emotion]] += continuity_score * 0.2  # Reduced
                     elif emotion == 'desperation':
                         # Very limited influence of previous emotions on desperation
-                        emotion_scores[emotion] += continuity_score * 0.05  # Reduced
+                        emotion_scores[emotion_index[emotion]] += continuity_score * 0.05  # Reduced
                     else:
-                        emotion_scores[emotion] += continuity_score
+                        emotion_scores[emotion_index[emotion]] += continuity_score
 
             # If recent emotions show a trend from neutral to non-neutral, amplify the non-neutral
             if len(recent_emotions) >= 2 and recent_emotions[-2] == 'neutral' and recent_emotions[-1] != 'neutral':
-                emotion_scores[recent_emotions[-1]] += 0.1  # Reduced from 0.2
+                emotion_scores[emotion_index[recent_emotions[-1]]] += 0.1  # Reduced from 0.2
 
             # If previous emotions were consistently non-neutral but current detection is weak,
             # reduce likelihood of switching to neutral (emotional inertia)
-            if all(e != 'neutral' for e in recent_emotions) and max(emotion_scores.values()) < 0.3:
-                emotion_scores['neutral'] *= 0.7  # Less aggressive reduction
+            if all(e != 'neutral' for e in recent_emotions) and emotion_scores.max() < 0.3:
+                emotion_scores[emotion_index['neutral']] *= 0.7  # Less aggressive reduction
 
             # Normalize after context adjustments
-            total = sum(emotion_scores.values())
-            if total > 0:
-                emotion_scores = {e: s/total for e, s in emotion_scores.items()}
+            self._normalize_scores(emotion_scores)
 
+    def _build_result(self, emotion_scores: np.ndarray) -> Dict:
+        """
+        Rank the scores of a message and build the analysis result.
+
+        Args:
+            emotion_scores: Normalized score vector indexed by self.emotion_index
+
+        Returns:
+            Dict containing the detected emotion, confidence score, and all emotion scores
+        """
         # Apply a more nuanced final adjustment to emotion scores
         # Use much smaller multipliers to prevent score inflation
-        adjusted_scores = {}
-        for emotion in emotion_scores:
-            if emotion == 'neutral':
-                # Reduce neutral score but less aggressively
-                adjusted_scores[emotion] = emotion_scores[emotion] * 0.8
-            elif emotion == 'desperation':
-                # Give special treatment to desperation to ensure consistent detection
-                adjusted_scores[emotion] = emotion_scores[emotion] * 1.3  # Reduced from 2.0
-            elif emotion in ['joy', 'sadness', 'anger', 'fear', 'surprise']:
-                # Boost primary emotions more but with reduced multiplier
-                adjusted_scores[emotion] = emotion_scores[emotion] * 1.2  # Reduced from 1.6
-            elif emotion in ['love', 'disgust', 'curious']:
-                # Boost secondary common emotions with reduced multiplier
-                adjusted_scores[emotion] = emotion_scores[emotion] * 1.1  # Reduced from 1.4
-            else:
-                # All other emotions get a small boost
-                adjusted_scores[emotion] = emotion_scores[emotion] * 1.05  # Reduced from 1.2
+        adjusted_scores = emotion_scores * self.final_emotion_multipliers
 
-        # Get the top emotions (for mixed emotion detection)
-        sorted_emotions = sorted(emotion_scores.items(), key=lambda x: x[1], reverse=True)
+        # Get the top emotions (for mixed emotion detection), keeping emotion order for ties
+        order = np.argsort(-emotion_scores, kind='stable')
+        sorted_emotions = [(self.emotion_names[i], float(emotion_scores[i])) for i in order]
 
         # If neutral is the top emotion but close to a non-neutral emotion, swap them
         # with reduced threshold to make it harder to swap
@@ -1530,7 +805,7 @@ class AdvancedChatbot:
         result = {
             'emotion': primary_emotion[0],
             'confidence': primary_emotion[1],
-            'scores': emotion_scores,
+            'scores': dict(zip(self.emotion_names, emotion_scores.tolist())),
             'image': self.emotion_images.get(primary_emotion[0], 'neutral.jpg')
         }
 
@@ -1553,69 +828,78 @@ class AdvancedChatbot:
         implicit_emotions = {emotion: 0.0 for emotion in self.emotion_patterns.keys()}
         message_lower = message.lower()
 
+        # Tokenize once so that patterns whose keywords are absent are skipped without running them
+        tokens = set(tokenize(message_lower))
+
+        def search(pattern):
+            return keyword_gated_pattern(pattern).search(message_lower, tokens)
+
+        def findall(pattern):
+            return keyword_gated_pattern(pattern).findall(message_lower, tokens)
+
         # Check for specific contexts mentioned in the issue
         # Realization and surprise in statements like "I didn't know cats could fly!"
-        if re.search(r'\bi (didn\'t|did not) know\b', message_lower) or re.search(r'\bjust (found out|realized|discovered)\b', message_lower):
+        if search(r'\bi (didn\'t|did not) know\b') or search(r'\bjust (found out|realized|discovered)\b'):
             implicit_emotions['realisation'] += 0.4
             implicit_emotions['surprise'] += 0.3
 
         # Desperation in statements like "I want to die"
         # Give a much higher score to ensure consistent detection regardless of conversation history
-        if re.search(r'\bi (want|wish|need) to (die|end it all|disappear|vanish|not exist)\b', message_lower) or re.search(r'\bi (can\'t|cannot) (take|handle|bear|stand|deal with) (it|this|life|living|anything) (anymore|any longer|another day)\b', message_lower):
+        if search(r'\bi (want|wish|need) to (die|end it all|disappear|vanish|not exist)\b') or search(r'\bi (can\'t|cannot) (take|handle|bear|stand|deal with) (it|this|life|living|anything) (anymore|any longer|another day)\b'):
             implicit_emotions['desperation'] += 2.0  # Significantly increased from 0.5
             implicit_emotions['sadness'] += 0.5  # Increased from 0.3
 
         # Additional desperation indicators
-        if re.search(r'\b(no (point|use|hope|future|reason to live|way out))\b', message_lower) or re.search(r'\b(what\'s the point|why bother|why try|why live|why continue|why go on|what\'s the use)\b', message_lower):
+        if search(r'\b(no (point|use|hope|future|reason to live|way out))\b') or search(r'\b(what\'s the point|why bother|why try|why live|why continue|why go on|what\'s the use)\b'):
             implicit_emotions['desperation'] += 1.5
             implicit_emotions['sadness'] += 0.4
 
         # Expressions of feeling trapped or at the end of one's rope
-        if re.search(r'\b(trapped|stuck|cornered|no way out|at the end of my rope|at my wit\'s end|out of options|out of time|running out of hope)\b', message_lower):
+        if search(r'\b(trapped|stuck|cornered|no way out|at the end of my rope|at my wit\'s end|out of options|out of time|running out of hope)\b'):
             implicit_emotions['desperation'] += 1.2
             implicit_emotions['fear'] += 0.3
 
         # Sadness, grief, or nostalgia in statements with "I miss..."
-        if re.search(r'\bi miss\b', message_lower):
+        if search(r'\bi miss\b'):
             implicit_emotions['sadness'] += 0.4
             # Check if the missed person might be deceased (context of grief)
-            if re.search(r'\b(died|passed away|gone forever|no longer with us|in heaven|late)\b', message_lower):
+            if search(r'\b(died|passed away|gone forever|no longer with us|in heaven|late)\b'):
                 implicit_emotions['grief'] += 0.5
             else:
                 # Missing someone who is not deceased is more about nostalgia/longing than grief
                 implicit_emotions['nostalgia'] += 0.4
 
         # Disgust in statements like "Her words are revolting"
-        if re.search(r'\b(revolting|disgusting|gross|nauseating|repulsive|vile|foul|nasty|sickening|nauseating|stomach-turning|stomach-churning|distasteful|obscene|vulgar|crude|indecent|abhorrent|loathsome)\b', message_lower):
+        if search(r'\b(revolting|disgusting|gross|nauseating|repulsive|vile|foul|nasty|sickening|nauseating|stomach-turning|stomach-churning|distasteful|obscene|vulgar|crude|indecent|abhorrent|loathsome)\b'):
             implicit_emotions['disgust'] += 0.6
 
         # Additional disgust indicators
-        if re.search(r'\b(makes me sick|turned my stomach|can\'t stomach|can\'t bear|can\'t stand|can\'t tolerate|can\'t handle|turns my stomach)\b', message_lower):
+        if search(r'\b(makes me sick|turned my stomach|can\'t stomach|can\'t bear|can\'t stand|can\'t tolerate|can\'t handle|turns my stomach)\b'):
             implicit_emotions['disgust'] += 0.7
 
         # Annoyance in statements like "This is getting on my nerves" or "Stop doing that"
-        if re.search(r'\b(annoying|irritating|bothersome|frustrating|aggravating|getting on my nerves|pushing my buttons|testing my patience|making me crazy|driving me nuts)\b', message_lower):
+        if search(r'\b(annoying|irritating|bothersome|frustrating|aggravating|getting on my nerves|pushing my buttons|testing my patience|making me crazy|driving me nuts)\b'):
             implicit_emotions['annoyance'] += 0.6
 
         # Stronger annoyance indicators
-        if re.search(r'\b(stop it|quit it|knock it off|cut it out|give it a rest|enough already|how many times|for crying out loud|give me a break)\b', message_lower):
+        if search(r'\b(stop it|quit it|knock it off|cut it out|give it a rest|enough already|how many times|for crying out loud|give me a break)\b'):
             implicit_emotions['annoyance'] += 0.7
             implicit_emotions['anger'] += 0.3
 
         # Sadness/desperation in statements like "I feel empty inside"
-        if re.search(r'\b(feel empty|emptiness|hollow|void|numb)\b', message_lower):
+        if search(r'\b(feel empty|emptiness|hollow|void|numb)\b'):
             implicit_emotions['sadness'] += 0.4
             implicit_emotions['desperation'] += 0.3
 
         # Surprise or realization in statements like "I just found out when the train comes"
-        if re.search(r'\bjust found out\b', message_lower):
+        if search(r'\bjust found out\b'):
             implicit_emotions['surprise'] += 0.3
             implicit_emotions['realisation'] += 0.4
 
         # Check for implicit emotional indicators in sentence structure and word choice
 
         # 1. Check for personal narratives (often indicate emotional content)
-        personal_narrative = re.search(r'\b(i|we) (had|went|did|saw|heard|felt|experienced)\b', message_lower)
+        personal_narrative = search(r'\b(i|we) (had|went|did|saw|heard|felt|experienced)\b')
         if personal_narrative:
             # Personal narratives often carry emotional weight
             implicit_emotions['joy'] += 0.1
@@ -1623,13 +907,13 @@ class AdvancedChatbot:
             implicit_emotions['surprise'] += 0.1
 
         # 2. Check for temporal indicators (often signal emotional transitions)
-        past_tense = re.search(r'\b(was|were|had|did|felt|went|came|got|made|said|told|thought)\b', message_lower)
+        past_tense = search(r'\b(was|were|had|did|felt|went|came|got|made|said|told|thought)\b')
         if past_tense:
             # Past tense often indicates reflection, which can be nostalgic or regretful
             implicit_emotions['nostalgia'] += 0.15
             implicit_emotions['remorse'] += 0.1
 
-        future_tense = re.search(r'\b(will|going to|plan to|hope to|expect to|look forward to)\b', message_lower)
+        future_tense = search(r'\b(will|going to|plan to|hope to|expect to|look forward to)\b')
         if future_tense:
             # Future tense often indicates anticipation or anxiety
             implicit_emotions['anticipation'] += 0.2
@@ -1637,7 +921,7 @@ class AdvancedChatbot:
             implicit_emotions['fear'] += 0.1
 
             # Check for positive future-oriented statements
-            if re.search(r'\b(better|improve|success|achieve|accomplish|progress|grow|develop|advance|prosper|thrive|possibility|possibilities|opportunity|opportunities|potential|promise)\b', message_lower):
+            if search(r'\b(better|improve|success|achieve|accomplish|progress|grow|develop|advance|prosper|thrive|possibility|possibilities|opportunity|opportunities|potential|promise)\b'):
                 implicit_emotions['optimism'] += 0.4  # Increased boost for positive future statements
 
             # If anticipation is detected with future tense, it's likely optimistic anticipation
@@ -1645,7 +929,7 @@ class AdvancedChatbot:
                 implicit_emotions['optimism'] += implicit_emotions['anticipation'] * 0.5  # Convert some anticipation to optimism
 
         # 3. Check for intensifiers without explicit emotions (often indicate strong feelings)
-        intensifiers = re.findall(r'\b(really|very|so|extremely|incredibly|absolutely|totally|completely)\b', message_lower)
+        intensifiers = findall(r'\b(really|very|so|extremely|incredibly|absolutely|totally|completely)\b')
         if intensifiers:
             # Intensifiers without explicit emotions suggest strong implicit feelings
             intensity = min(0.3, 0.1 * len(intensifiers))
@@ -1654,7 +938,7 @@ class AdvancedChatbot:
             implicit_emotions['surprise'] += intensity
 
         # 4. Check for hedging language (often indicates uncertainty or anxiety)
-        hedging = re.findall(r'\b(maybe|perhaps|possibly|kind of|sort of|i think|i guess|probably|might|could be)\b', message_lower)
+        hedging = findall(r'\b(maybe|perhaps|possibly|kind of|sort of|i think|i guess|probably|might|could be)\b')
         if hedging:
             # Hedging language suggests uncertainty or anxiety
             hedge_intensity = min(0.25, 0.08 * len(hedging))
@@ -1662,7 +946,7 @@ class AdvancedChatbot:
             implicit_emotions['confusion'] += hedge_intensity
 
         # 5. Check for emphatic language without explicit emotions
-        emphatic = re.findall(r'\b(definitely|certainly|absolutely|surely|clearly|obviously|of course)\b', message_lower)
+        emphatic = findall(r'\b(definitely|certainly|absolutely|surely|clearly|obviously|of course)\b')
         if emphatic:
             # Emphatic language suggests confidence or frustration
             emphatic_intensity = min(0.25, 0.08 * len(emphatic))
@@ -1671,7 +955,7 @@ class AdvancedChatbot:
             implicit_emotions['disapproval'] += emphatic_intensity
 
         # 6. Check for contrast indicators (often signal emotional shifts)
-        contrast = re.findall(r'\b(but|however|although|though|despite|even though|nevertheless|yet|still)\b', message_lower)
+        contrast = findall(r'\b(but|however|although|though|despite|even though|nevertheless|yet|still)\b')
         if contrast:
             # Contrast indicators often signal mixed emotions or emotional transitions
             contrast_intensity = min(0.2, 0.07 * len(contrast))
@@ -1679,7 +963,7 @@ class AdvancedChatbot:
             implicit_emotions['surprise'] += contrast_intensity
 
         # 7. Check for social references (often indicate relationship emotions)
-        social = re.findall(r'\b(friend|family|parent|mother|father|brother|sister|partner|relationship|colleague|coworker|boss|team)\b', message_lower)
+        social = findall(r'\b(friend|family|parent|mother|father|brother|sister|partner|relationship|colleague|coworker|boss|team)\b')
         if social:
             # Social references often carry relationship emotions
             social_intensity = min(0.25, 0.08 * len(social))
@@ -1688,7 +972,7 @@ class AdvancedChatbot:
             implicit_emotions['trust'] += social_intensity
 
         # 8. Check for achievement/challenge language
-        achievement = re.findall(r'\b(finished|completed|accomplished|achieved|succeeded|won|earned|learned|improved|progress|mastered|conquered|triumphed|prevailed|excelled|aced|nailed|crushed)\b', message_lower)
+        achievement = findall(r'\b(finished|completed|accomplished|achieved|succeeded|won|earned|learned|improved|progress|mastered|conquered|triumphed|prevailed|excelled|aced|nailed|crushed)\b')
         if achievement:
             # Achievement language suggests pride or satisfaction
             achievement_intensity = min(0.4, 0.12 * len(achievement))
@@ -1696,31 +980,31 @@ class AdvancedChatbot:
             implicit_emotions['pride'] += achievement_intensity
 
         # Additional pride indicators
-        if re.search(r'\b(proud of|pleased with|impressed by|amazed by) (myself|ourselves|my work|our work|what i\'ve|what we\'ve)\b', message_lower):
+        if search(r'\b(proud of|pleased with|impressed by|amazed by) (myself|ourselves|my work|our work|what i\'ve|what we\'ve)\b'):
             implicit_emotions['pride'] += 0.7
 
         # Check for belief in future success or improvement
-        if re.search(r'\b(believe|faith|trust|confidence) (in|about) (the future|tomorrow|what\'s ahead|what\'s to come|what lies ahead)\b', message_lower):
+        if search(r'\b(believe|faith|trust|confidence) (in|about) (the future|tomorrow|what\'s ahead|what\'s to come|what lies ahead)\b'):
             implicit_emotions['optimism'] += 0.7  # Strong boost for explicit belief in the future
 
         # Check for trust in positive outcomes
-        if re.search(r'\b(trust|believe|have faith|confident) (that) (things|it|everything) (will work out|will be okay|will be fine|will be alright)\b', message_lower):
+        if search(r'\b(trust|believe|have faith|confident) (that) (things|it|everything) (will work out|will be okay|will be fine|will be alright)\b'):
             implicit_emotions['optimism'] += 0.7  # Strong boost for trust in positive outcomes
 
         # Check for excitement about future possibilities
-        if re.search(r'\b(excited|enthusiastic|eager) (about|for) (potential|possibilities|opportunities|the future|what\'s next|what\'s ahead)\b', message_lower):
+        if search(r'\b(excited|enthusiastic|eager) (about|for) (potential|possibilities|opportunities|the future|what\'s next|what\'s ahead)\b'):
             implicit_emotions['optimism'] += 0.6  # Strong boost for excitement about future possibilities
 
         # Expressions of superiority or excellence
-        if re.search(r'\b(i\'m|i am|we\'re|we are) (the best|number one|top|superior|unbeatable|unstoppable|unmatched|exceptional|outstanding|excellent)\b', message_lower):
+        if search(r'\b(i\'m|i am|we\'re|we are) (the best|number one|top|superior|unbeatable|unstoppable|unmatched|exceptional|outstanding|excellent)\b'):
             implicit_emotions['pride'] += 0.8
 
         # Expressions of deserving recognition
-        if re.search(r'\b(i|we) (deserve|earned|worked hard for|fought for) (this|that|it|recognition|praise|reward|success)\b', message_lower):
+        if search(r'\b(i|we) (deserve|earned|worked hard for|fought for) (this|that|it|recognition|praise|reward|success)\b'):
             implicit_emotions['pride'] += 0.6
             implicit_emotions['achievement'] += 0.4
 
-        challenge = re.findall(r'\b(difficult|hard|challenging|struggle|problem|issue|obstacle|barrier|hurdle|setback)\b', message_lower)
+        challenge = findall(r'\b(difficult|hard|challenging|struggle|problem|issue|obstacle|barrier|hurdle|setback)\b')
         if challenge:
             # Challenge language suggests frustration or determination
             challenge_intensity = min(0.25, 0.08 * len(challenge))
@@ -1735,7 +1019,7 @@ class AdvancedChatbot:
                 implicit_emotions['optimism'] += challenge_intensity * 0.5
 
         # 9. Check for decision language (often indicates conflict or resolution)
-        decision = re.findall(r'\b(decided|chose|picked|selected|determined|resolved|concluded|figured out)\b', message_lower)
+        decision = findall(r'\b(decided|chose|picked|selected|determined|resolved|concluded|figured out)\b')
         if decision:
             # Decision language suggests resolution or confidence
             decision_intensity = min(0.2, 0.07 * len(decision))
@@ -1743,7 +1027,7 @@ class AdvancedChatbot:
             implicit_emotions['trust'] += decision_intensity
 
         # 10. Check for value judgments without explicit emotions
-        value_positive = re.findall(r'\b(good|great|excellent|wonderful|fantastic|amazing|brilliant|outstanding|perfect)\b', message_lower)
+        value_positive = findall(r'\b(good|great|excellent|wonderful|fantastic|amazing|brilliant|outstanding|perfect)\b')
         if value_positive:
             # Positive value judgments suggest approval or admiration
             positive_intensity = min(0.3, 0.1 * len(value_positive))
@@ -1752,14 +1036,14 @@ class AdvancedChatbot:
             implicit_emotions['joy'] += positive_intensity
 
             # Check if these positive judgments are about the future
-            if re.search(r'\b(future|tomorrow|next|upcoming|coming|ahead|prospect|potential|possibility|opportunity|possibilities|opportunities)\b', message_lower):
+            if search(r'\b(future|tomorrow|next|upcoming|coming|ahead|prospect|potential|possibility|opportunity|possibilities|opportunities)\b'):
                 implicit_emotions['optimism'] += positive_intensity * 2.0  # Stronger boost for positive judgments about the future
 
                 # If there's anticipation with positive future judgments, it's likely optimistic
                 if implicit_emotions['anticipation'] > 0.1:
                     implicit_emotions['optimism'] += implicit_emotions['anticipation'] * 0.7  # Convert more anticipation to optimism
 
-        value_negative = re.findall(r'\b(bad|terrible|awful|horrible|poor|lousy|dreadful|appalling|unacceptable)\b', message_lower)
+        value_negative = findall(r'\b(bad|terrible|awful|horrible|poor|lousy|dreadful|appalling|unacceptable)\b')
         if value_negative:
             # Negative value judgments suggest disapproval or disgust
             negative_intensity = min(0.3, 0.1 * len(value_negative))
@@ -2009,7 +1293,10 @@ class AdvancedChatbot:
             message: The user's message
 
         Returns:
-            Dict containing the response, detected emotion, confidence, and image
+            Dict containing the response, detected emotion, confidence, and image. When the
+            emotion analysis ran, 'message_scores' holds the scores of the message without
+            the session context, the same as analyze_emotion_batch gives; it is missing for
+            the placeholder scores of the drink flow and of error fallbacks
         """
         try:
             # Special case for Bulgarian toast "Наздраве!"
@@ -2033,6 +1320,7 @@ class AdvancedChatbot:
             # but not if we've just given a recommendation (in which case we want to analyze emotions again)
             if (is_drink_flow or is_new_drink_request) and not is_recommendation_given:
                 # Skip emotion analysis for drink recommendation questions
+                message_scores = None
                 detected_emotion = self.context.get('current_emotion', 'neutral')
                 topic = 'drinks'
 
@@ -2062,9 +1350,15 @@ class AdvancedChatbot:
                     if 'image' in recommendation_result:
                         image = recommendation_result['image']
             else:
-                # Analyze emotion for non-drink-related messages
-                emotion_result = self.analyze_emotion(message)
+                # Analyze emotion for non-drink-related messages: score the text, then
+                # adjust it for the emotions seen earlier in this session
+                base_scores = self.score_text(message)
+                emotion_result = self.apply_context(base_scores, self.context['session_emotions'])
                 detected_emotion = emotion_result['emotion']
+                if self.context['session_emotions']:
+                    message_scores = self.apply_context(base_scores)['scores']
+                else:
+                    message_scores = emotion_result['scores']
 
                 # Identify topic
                 topic = self.identify_topic(message)
@@ -2097,8 +1391,11 @@ class AdvancedChatbot:
             if is_recommendation_given:
                 self.context['drink_recommendation_state'] = None
 
-            # Update conversation memory
-            self.conversation_memory.append({
+            # Update conversation memory, handing the turn that falls out of it to the archiver
+            memory = self.conversation_memory
+            if self.turn_archiver is not None and len(memory) == getattr(memory, 'maxlen', None):
+                self.turn_archiver(memory[0])
+            memory.append({
                 'user': message,
                 'bot': response,
                 'emotion': detected_emotion,
@@ -2106,7 +1403,7 @@ class AdvancedChatbot:
             })
 
             # Return the result with all emotions
-            return {
+            result = {
                 'response': response,
                 'emotion': detected_emotion,
                 'confidence': emotion_result['confidence'],
@@ -2114,6 +1411,9 @@ class AdvancedChatbot:
                 'all_emotions': emotion_result['scores'],
                 'hide_emotion': is_drink_flow or is_new_drink_request
             }
+            if message_scores is not None:
+                result['message_scores'] = message_scores
+            return result
         except Exception as e:
             self.logger.error(f"Error processing message: {str(e)}")
 
@@ -2128,11 +1428,9 @@ class AdvancedChatbot:
                     message_lower = message.lower()
                     emotion_matches = {}
 
-                    for emotion, patterns in self.emotion_patterns.items():
+                    for emotion, index in self.pattern_matcher.match(message_lower):
                         if emotion != 'neutral':
-                            for pattern in patterns:
-                                if re.search(pattern, message_lower):
-                                    emotion_matches[emotion] = emotion_matches.get(emotion, 0) + 1
+                            emotion_matches[emotion] = emotion_matches.get(emotion, 0) + 1
 
                     # If we found any emotion matches, use the one with the most matches
                     if emotion_matches:
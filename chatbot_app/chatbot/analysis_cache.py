@@ -0,0 +1,112 @@
+"""
+Memoization of context-independent emotion analysis.
+
+A large share of chat traffic repeats the same short messages ("hi", "thanks", drink flow
+answers). AnalysisCache keeps the base analysis of recently seen texts in a bounded LRU
+with an optional time-to-live, and counts hits, misses and evictions for monitoring.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class AnalysisCache:
+    """
+    Thread-safe LRU cache with an optional time-to-live per entry.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: Optional[float] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            max_size: Maximum number of entries; 0 disables caching
+            ttl: Seconds an entry stays valid, or None to keep entries until evicted
+
+        Raises:
+            ValueError: If max_size is negative or ttl is not positive
+        """
+        if max_size < 0:
+            raise ValueError("max_size must not be negative")
+        if ttl is not None and ttl <= 0:
+            raise ValueError("ttl must be positive")
+
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # key -> (expiry time or None, value), least recently used first
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Look up a cached value and mark it as recently used.
+
+        Args:
+            key: The cache key
+
+        Returns:
+            The cached value, or None if it is missing or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, value = entry
+                if expires is None or expires > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self.evictions += 1
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """
+        Store a value, evicting the least recently used entry if the cache is full.
+
+        Args:
+            key: The cache key
+            value: The value to cache; must not be None
+        """
+        if self.max_size == 0:
+            return
+
+        expires = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Remove all entries, keeping the counters."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the cache counters for monitoring.
+
+        Returns:
+            Dict with hits, misses, evictions, current size, max size and hit rate
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
@@ -12,6 +12,121 @@ import random
 import os
 from typing import Dict, List, Tuple, Optional
 
+from chatbot_app.chatbot.frozen import freeze
+
+# Define drink categories
+DRINK_CATEGORIES = freeze({
+    'bold': [
+        'Whiskey (neat)', 'Scotch', 'Bourbon', 'Tequila (straight)', 
+        'Mezcal', 'Strong IPA', 'Double Espresso Martini', 'Long Island Iced Tea'
+    ],
+    'relaxed': [
+        'Red Wine', 'Craft Beer', 'Old Fashioned', 'Rum and Coke',
+        'Whiskey Sour', 'Dark and Stormy', 'Brandy', 'Porter or Stout'
+    ],
+    'social': [
+        'Margarita', 'Mojito', 'Sangria', 'Champagne', 'Prosecco',
+        'Moscow Mule', 'Gin and Tonic', 'Aperol Spritz'
+    ],
+    'sophisticated': [
+        'Martini', 'Manhattan', 'Negroni', 'Fine Wine', 'Champagne',
+        'Aged Whiskey', 'Cognac', 'Gin Fizz'
+    ],
+    'adventurous': [
+        'Craft Cocktail', 'Absinthe', 'Exotic Fruit Liqueur', 'Mezcal Cocktail',
+        'Local Specialty', 'Unusual Beer', 'Sake', 'Pisco Sour'
+    ],
+    'sweet': [
+        'Piña Colada', 'Daiquiri', 'Mudslide', 'White Russian',
+        'Amaretto Sour', 'Baileys Irish Cream', 'Chocolate Martini', 'Fruit Cocktail'
+    ],
+    'refreshing': [
+        'Mojito', 'Tom Collins', 'Gin and Tonic', 'Vodka Soda',
+        'Paloma', 'Spritz', 'Light Beer', 'Hard Seltzer'
+    ]
+})
+
+# Map emotions to drink categories - improved with more nuanced mappings
+EMOTION_TO_DRINKS = freeze({
+    'joy': ['social', 'refreshing', 'sweet'],
+    'achievement': ['sophisticated', 'bold', 'social'],  # Added social for celebration
+    'sadness': ['relaxed', 'sweet', 'sophisticated'],  # Added sophisticated for contemplation
+    'anger': ['bold', 'adventurous', 'refreshing'],  # Added refreshing to cool down
+    'fear': ['relaxed', 'sweet', 'bold'],  # Added bold for courage
+    'surprise': ['adventurous', 'social', 'refreshing'],  # Added refreshing for the shock
+    'love': ['sophisticated', 'sweet', 'social'],  # Added social for sharing
+    'disgust': ['bold', 'adventurous', 'sophisticated'],  # Added sophisticated for refinement
+    'neutral': ['relaxed', 'social', 'refreshing'],  # Added refreshing for variety
+    'desperation': ['relaxed', 'sophisticated', 'bold'],  # Added bold for strength
+    'trust': ['relaxed', 'sophisticated', 'social'],  # Added social for connection
+    'grief': ['relaxed', 'sweet', 'sophisticated'],  # Added sophisticated for dignity
+    'relief': ['refreshing', 'social', 'relaxed'],  # Added relaxed for unwinding
+    'panic': ['bold', 'adventurous', 'refreshing'],  # Added refreshing to calm down
+    'optimism': ['social', 'refreshing', 'adventurous'],  # New emotion
+    'curiosity': ['adventurous', 'sophisticated', 'refreshing'],  # New emotion
+    'admiration': ['sophisticated', 'social', 'sweet'],  # New emotion
+    'excitement': ['social', 'adventurous', 'bold']  # New emotion
+})
+
+# Personality traits questions and options
+PERSONALITY_QUESTIONS = freeze([
+    {
+        'question': 'How do you usually spend your weekends?',
+        'options': [
+            {'text': 'Going out with friends', 'traits': ['social', 'adventurous']},
+            {'text': 'Relaxing at home', 'traits': ['relaxed', 'sweet']},
+            {'text': 'Trying new activities or places', 'traits': ['adventurous', 'bold']},
+            {'text': 'Enjoying cultural events', 'traits': ['sophisticated', 'social']}
+        ]
+    },
+    {
+        'question': 'What kind of music do you enjoy most?',
+        'options': [
+            {'text': 'Upbeat and energetic', 'traits': ['bold', 'social']},
+            {'text': 'Calm and melodic', 'traits': ['relaxed', 'sophisticated']},
+            {'text': 'Eclectic and unique', 'traits': ['adventurous', 'sophisticated']},
+            {'text': 'Whatever is popular now', 'traits': ['social', 'refreshing']}
+        ]
+    },
+    {
+        'question': 'How would your friends describe you?',
+        'options': [
+            {'text': 'Outgoing and the life of the party', 'traits': ['bold', 'social']},
+            {'text': 'Calm and dependable', 'traits': ['relaxed', 'sophisticated']},
+            {'text': 'Creative and unique', 'traits': ['adventurous', 'sophisticated']},
+            {'text': 'Sweet and caring', 'traits': ['sweet', 'social']}
+        ]
+    }
+])
+
+# Map drinks to images - using only the actual images from the alcohol folder
+# as per the issue description
+DRINK_IMAGES = freeze({
+    # Use only the actual cocktail images from the alcohol folder
+    'Aperol Spritz': 'aperol spritz.png',
+    'Classic Martini': 'classic martini.png',
+    'Long Island Iced Tea': 'long island ice tea.png',
+    'Margarita': 'margharita.png',
+    'Martini': 'martini.png',
+    'Mojito': 'mojito.png',
+    'Negroni': 'negroni.png',
+    'Old Fashioned': 'old fashioned.png',
+    'Piña Colada': 'pina colada.png',
+    'Whiskey Sour': 'whiskey sour.png'
+})
+
+# Map drink categories to available cocktails - enhanced to ensure all 10 cocktails are properly utilized
+AVAILABLE_COCKTAILS = freeze({
+    'bold': ['Old Fashioned', 'Whiskey Sour', 'Long Island Iced Tea', 'Negroni', 'Martini'],
+    'relaxed': ['Old Fashioned', 'Whiskey Sour', 'Piña Colada', 'Classic Martini', 'Mojito'],
+    'social': ['Margarita', 'Mojito', 'Aperol Spritz', 'Piña Colada', 'Long Island Iced Tea'],
+    'sophisticated': ['Martini', 'Classic Martini', 'Negroni', 'Old Fashioned', 'Whiskey Sour'],
+    'adventurous': ['Negroni', 'Long Island Iced Tea', 'Margarita', 'Mojito', 'Aperol Spritz'],
+    'sweet': ['Piña Colada', 'Margarita', 'Mojito', 'Aperol Spritz', 'Classic Martini'],
+    'refreshing': ['Mojito', 'Aperol Spritz', 'Margarita', 'Piña Colada', 'Classic Martini']
+})
+
+
 class DrinkRecommender:
     """
     A class that recommends alcoholic drinks based on personality traits and emotions.
@@ -25,119 +140,12 @@ class DrinkRecommender:
         The recommendations are based on data from the drinks_recommendations.docx file
         located in the static folder.
         """
-        # Path to the drinks recommendations docx file
-        self.docx_file_path = os.path.join('chatbot_app', 'static', 'drinks_recommendations.docx')
-        # Define drink categories
-        self.drink_categories = {
-            'bold': [
-                'Whiskey (neat)', 'Scotch', 'Bourbon', 'Tequila (straight)', 
-                'Mezcal', 'Strong IPA', 'Double Espresso Martini', 'Long Island Iced Tea'
-            ],
-            'relaxed': [
-                'Red Wine', 'Craft Beer', 'Old Fashioned', 'Rum and Coke',
-                'Whiskey Sour', 'Dark and Stormy', 'Brandy', 'Porter or Stout'
-            ],
-            'social': [
-                'Margarita', 'Mojito', 'Sangria', 'Champagne', 'Prosecco',
-                'Moscow Mule', 'Gin and Tonic', 'Aperol Spritz'
-            ],
-            'sophisticated': [
-                'Martini', 'Manhattan', 'Negroni', 'Fine Wine', 'Champagne',
-                'Aged Whiskey', 'Cognac', 'Gin Fizz'
-            ],
-            'adventurous': [
-                'Craft Cocktail', 'Absinthe', 'Exotic Fruit Liqueur', 'Mezcal Cocktail',
-                'Local Specialty', 'Unusual Beer', 'Sake', 'Pisco Sour'
-            ],
-            'sweet': [
-                'Piña Colada', 'Daiquiri', 'Mudslide', 'White Russian',
-                'Amaretto Sour', 'Baileys Irish Cream', 'Chocolate Martini', 'Fruit Cocktail'
-            ],
-            'refreshing': [
-                'Mojito', 'Tom Collins', 'Gin and Tonic', 'Vodka Soda',
-                'Paloma', 'Spritz', 'Light Beer', 'Hard Seltzer'
-            ]
-        }
-
-        # Map emotions to drink categories - improved with more nuanced mappings
-        self.emotion_to_drinks = {
-            'joy': ['social', 'refreshing', 'sweet'],
-            'achievement': ['sophisticated', 'bold', 'social'],  # Added social for celebration
-            'sadness': ['relaxed', 'sweet', 'sophisticated'],  # Added sophisticated for contemplation
-            'anger': ['bold', 'adventurous', 'refreshing'],  # Added refreshing to cool down
-            'fear': ['relaxed', 'sweet', 'bold'],  # Added bold for courage
-            'surprise': ['adventurous', 'social', 'refreshing'],  # Added refreshing for the shock
-            'love': ['sophisticated', 'sweet', 'social'],  # Added social for sharing
-            'disgust': ['bold', 'adventurous', 'sophisticated'],  # Added sophisticated for refinement
-            'neutral': ['relaxed', 'social', 'refreshing'],  # Added refreshing for variety
-            'desperation': ['relaxed', 'sophisticated', 'bold'],  # Added bold for strength
-            'trust': ['relaxed', 'sophisticated', 'social'],  # Added social for connection
-            'grief': ['relaxed', 'sweet', 'sophisticated'],  # Added sophisticated for dignity
-            'relief': ['refreshing', 'social', 'relaxed'],  # Added relaxed for unwinding
-            'panic': ['bold', 'adventurous', 'refreshing'],  # Added refreshing to calm down
-            'optimism': ['social', 'refreshing', 'adventurous'],  # New emotion
-            'curiosity': ['adventurous', 'sophisticated', 'refreshing'],  # New emotion
-            'admiration': ['sophisticated', 'social', 'sweet'],  # New emotion
-            'excitement': ['social', 'adventurous', 'bold']  # New emotion
-        }
-
-        # Personality traits questions and options
-        self.personality_questions = [
-            {
-                'question': 'How do you usually spend your weekends?',
-                'options': [
-                    {'text': 'Going out with friends', 'traits': ['social', 'adventurous']},
-                    {'text': 'Relaxing at home', 'traits': ['relaxed', 'sweet']},
-                    {'text': 'Trying new activities or places', 'traits': ['adventurous', 'bold']},
-                    {'text': 'Enjoying cultural events', 'traits': ['sophisticated', 'social']}
-                ]
-            },
-            {
-                'question': 'What kind of music do you enjoy most?',
-                'options': [
-                    {'text': 'Upbeat and energetic', 'traits': ['bold', 'social']},
-                    {'text': 'Calm and melodic', 'traits': ['relaxed', 'sophisticated']},
-                    {'text': 'Eclectic and unique', 'traits': ['adventurous', 'sophisticated']},
-                    {'text': 'Whatever is popular now', 'traits': ['social', 'refreshing']}
-                ]
-            },
-            {
-                'question': 'How would your friends describe you?',
-                'options': [
-                    {'text': 'Outgoing and the life of the party', 'traits': ['bold', 'social']},
-                    {'text': 'Calm and dependable', 'traits': ['relaxed', 'sophisticated']},
-                    {'text': 'Creative and unique', 'traits': ['adventurous', 'sophisticated']},
-                    {'text': 'Sweet and caring', 'traits': ['sweet', 'social']}
-                ]
-            }
-        ]
-
-        # Map drinks to images - using only the actual images from the alcohol folder
-        # as per the issue description
-        self.drink_images = {
-            # Use only the actual cocktail images from the alcohol folder
-            'Aperol Spritz': 'aperol spritz.png',
-            'Classic Martini': 'classic martini.png',
-            'Long Island Iced Tea': 'long island ice tea.png',
-            'Margarita': 'margharita.png',
-            'Martini': 'martini.png',
-            'Mojito': 'mojito.png',
-            'Negroni': 'negroni.png',
-            'Old Fashioned': 'old fashioned.png',
-            'Piña Colada': 'pina colada.png',
-            'Whiskey Sour': 'whiskey sour.png'
-        }
-
-        # Map drink categories to available cocktails - enhanced to ensure all 10 cocktails are properly utilized
-        self.available_cocktails = {
-            'bold': ['Old Fashioned', 'Whiskey Sour', 'Long Island Iced Tea', 'Negroni', 'Martini'],
-            'relaxed': ['Old Fashioned', 'Whiskey Sour', 'Piña Colada', 'Classic Martini', 'Mojito'],
-            'social': ['Margarita', 'Mojito', 'Aperol Spritz', 'Piña Colada', 'Long Island Iced Tea'],
-            'sophisticated': ['Martini', 'Classic Martini', 'Negroni', 'Old Fashioned', 'Whiskey Sour'],
-            'adventurous': ['Negroni', 'Long Island Iced Tea', 'Margarita', 'Mojito', 'Aperol Spritz'],
-            'sweet': ['Piña Colada', 'Margarita', 'Mojito', 'Aperol Spritz', 'Classic Martini'],
-            'refreshing': ['Mojito', 'Aperol Spritz', 'Margarita', 'Piña Colada', 'Classic Martini']
-        }
+        # Read-only catalogue tables, shared by reference with every other instance
+        self.drink_categories = DRINK_CATEGORIES
+        self.emotion_to_drinks = EMOTION_TO_DRINKS
+        self.personality_questions = PERSONALITY_QUESTIONS
+        self.drink_images = DRINK_IMAGES
+        self.available_cocktails = AVAILABLE_COCKTAILS
 
         # Initialize user profile
         self.user_profile = {
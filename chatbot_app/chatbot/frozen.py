@@ -0,0 +1,28 @@
+"""
+Read-only views of rule tables shared by every chatbot instance in a process.
+
+The pattern, response and drink tables are defined once at module level and frozen, so
+instances can reference them instead of rebuilding them, and forked server workers keep
+sharing their memory pages.
+"""
+
+from types import MappingProxyType
+from typing import Any
+
+
+def freeze(value: Any) -> Any:
+    """
+    Recursively convert dicts to read-only mappings and lists to tuples.
+
+    Args:
+        value: A literal table made of dicts, lists and scalars
+
+    Returns:
+        The frozen table; insertion order of dicts and lists is kept
+    """
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
@@ -0,0 +1,173 @@
+"""
+Frozen sentiment lexicon for emotion detection.
+
+The sentiment word lists of the chatbot are folded into a single read-only mapping from
+token to LexiconEntry, so that scoring a word costs one dictionary lookup. Multi-word
+entries such as 'let down' or 'worn out' are matched with a phrase trie that merges
+their words into a single token before lookup.
+"""
+
+from types import MappingProxyType
+from typing import Dict, FrozenSet, Iterable, List, Mapping, NamedTuple, Optional, Tuple
+
+# Categories of self.sentiment_analyzer that contribute emotion scores
+SCORING_CATEGORIES = ('positive', 'negative')
+
+# Specific emotions for positive and negative words, checked in order; the first list
+# containing the word wins. Words must also be in the matching sentiment category.
+SPECIFIC_EMOTION_WORDS = {
+    'positive': (
+        ('joy', ('happy', 'joy', 'delighted', 'pleased'), 1.2),
+        ('love', ('love', 'adore', 'cherish', 'passionate'), 1.2),
+        ('excitement', ('excited', 'thrilled', 'eager', 'enthusiastic'), 1.2),
+        ('optimism', ('hopeful', 'optimistic', 'confident'), 1.2),
+        ('trust', ('trust', 'believe', 'faith', 'reliable'), 1.2),
+        ('relief', ('relieved', 'relaxed', 'calm', 'peaceful'), 1.2),
+        ('achievement', ('proud', 'accomplished', 'achieved', 'successful'), 1.2),
+    ),
+    'negative': (
+        ('sadness', ('sad', 'unhappy', 'depressed', 'miserable'), 1.2),
+        ('anger', ('angry', 'furious', 'mad', 'outraged'), 1.2),
+        ('fear', ('afraid', 'scared', 'terrified', 'anxious'), 1.2),
+        ('disgust', ('disgusted', 'revolted', 'gross', 'nasty'), 1.2),
+        ('disappointment', ('disappointed', 'let down', 'disheartened'), 1.2),
+        ('grief', ('grief', 'mourning', 'bereaved', 'loss'), 1.2),
+        ('desperation', ('desperate', 'hopeless', 'worthless', 'suicidal'), 1.3),
+    ),
+}
+
+# Emotions that share the score of a sentiment word without a specific emotion
+GENERAL_EMOTIONS = {
+    'positive': (('joy', 'love', 'excitement', 'optimism', 'relief', 'achievement'), 0.8),
+    'negative': (('sadness', 'anger', 'fear', 'disgust', 'disappointment', 'grief', 'desperation'), 0.8),
+}
+
+# Emotion words that are handled specially when negated ("not angry", "not afraid")
+NEGATED_EMOTION_WORDS = (
+    ('anger', ('angry', 'anger', 'furious', 'mad', 'outraged', 'irate', 'incensed', 'infuriated')),
+    ('fear', ('afraid', 'fear', 'scared', 'frightened', 'terrified', 'anxious', 'fearful', 'petrified')),
+    ('joy', ('happy', 'joy', 'joyful', 'delighted', 'pleased', 'glad', 'cheerful', 'content')),
+)
+
+
+class LexiconEntry(NamedTuple):
+    """Everything the sentiment pass needs to know about one token."""
+    # Sentiment categories containing the token
+    categories: FrozenSet[str]
+    # (emotion, weight) pairs the token adds to, in scoring order
+    emotions: Tuple[Tuple[str, float], ...]
+    # Emotion the token expresses when negated, if it has special negation handling
+    negated_emotion: Optional[str]
+
+
+def _emotion_weights(category: str, word: str, emotions: Iterable[str]) -> Tuple[Tuple[str, float], ...]:
+    """Resolve the (emotion, weight) pairs a sentiment word contributes to."""
+    for emotion, words, weight in SPECIFIC_EMOTION_WORDS[category]:
+        if word in words:
+            return ((emotion, weight),)
+    general_emotions, weight = GENERAL_EMOTIONS[category]
+    return tuple((emotion, weight) for emotion in general_emotions if emotion in emotions)
+
+
+def build_lexicon(sentiment_analyzer: Dict[str, List[str]], emotions: Iterable[str]) -> Mapping[str, LexiconEntry]:
+    """
+    Fold the sentiment word lists into a frozen token lookup table.
+
+    Args:
+        sentiment_analyzer: Dict mapping each sentiment category to its word list
+        emotions: The emotions that can be scored
+
+    Returns:
+        Read-only mapping from token (or multi-word phrase) to its LexiconEntry
+    """
+    emotions = set(emotions)
+
+    categories = {}
+    for category, words in sentiment_analyzer.items():
+        for word in words:
+            categories.setdefault(word, set()).add(category)
+    for _, words in NEGATED_EMOTION_WORDS:
+        for word in words:
+            categories.setdefault(word, set())
+
+    lexicon = {}
+    for word, word_categories in categories.items():
+        weights = ()
+        for category in SCORING_CATEGORIES:
+            if category in word_categories:
+                weights += _emotion_weights(category, word, emotions)
+        negated_emotion = next((emotion for emotion, words in NEGATED_EMOTION_WORDS if word in words), None)
+        lexicon[word] = LexiconEntry(frozenset(word_categories), weights, negated_emotion)
+
+    return MappingProxyType(lexicon)
+
+
+class PhraseTrie:
+    """
+    Word-level trie that merges multi-word lexicon phrases into single tokens.
+    """
+
+    def __init__(self, phrases: Iterable[str]):
+        """
+        Build the trie.
+
+        Args:
+            phrases: Multi-word phrases, words separated by single spaces
+        """
+        self.root = {}
+        for phrase in phrases:
+            node = self.root
+            for word in phrase.split():
+                node = node.setdefault(word, {})
+            # None marks the end of a phrase
+            node[None] = phrase
+
+    def merge(self, words: List[str]) -> List[str]:
+        """
+        Replace the longest phrase starting at each position with a single token.
+
+        Args:
+            words: Tokens of a message
+
+        Returns:
+            New list of tokens with phrases merged
+        """
+        root = self.root
+        if not root:
+            return list(words)
+
+        merged = []
+        i = 0
+        while i < len(words):
+            node = root.get(words[i])
+            phrase, phrase_end = None, i + 1
+            j = i + 1
+            while node is not None:
+                if None in node:
+                    phrase, phrase_end = node[None], j
+                if j == len(words):
+                    break
+                node = node.get(words[j])
+                j += 1
+            merged.append(phrase if phrase is not None else words[i])
+            i = phrase_end
+        return merged
+
+
+def scoring_phrases(lexicon: Mapping[str, LexiconEntry]) -> List[str]:
+    """
+    Find the multi-word lexicon entries that affect scoring.
+
+    Neutral-only phrases such as 'not bad' are left out, so that merging never hides
+    a negation word or intensity modifier they contain.
+
+    Args:
+        lexicon: The frozen lexicon
+
+    Returns:
+        List of phrases
+    """
+    return [
+        phrase for phrase, entry in lexicon.items()
+        if ' ' in phrase and (entry.emotions or 'intensity_modifiers' in entry.categories)
+    ]
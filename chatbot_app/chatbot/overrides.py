@@ -0,0 +1,114 @@
+"""
+Declarative table of fixed emotion analyses for known messages.
+
+Each rule in the override data file maps one or more phrases to a fixed result. 'exact'
+rules match the whole lowercased message and resolve through one dict lookup;
+'substring' rules match anywhere in the message and are screened with a single compiled
+alternation, so the cost of a message that matches no rule does not grow with the table.
+When several rules match, the first one in the file wins.
+"""
+
+import json
+import os
+import re
+from typing import Dict, List, Mapping, Optional
+
+# Override rules shipped with the package
+DEFAULT_OVERRIDES_PATH = os.path.join(os.path.dirname(__file__), 'data', 'emotion_overrides.json')
+
+MATCH_TYPES = ('exact', 'substring')
+
+
+def load_overrides(path: str = DEFAULT_OVERRIDES_PATH) -> List[Dict]:
+    """
+    Load and validate override rules from a JSON file.
+
+    Args:
+        path: Path of the JSON file holding a list of rules
+
+    Returns:
+        List of rules in priority order
+
+    Raises:
+        ValueError: If a rule is malformed
+    """
+    with open(path, encoding='utf-8') as f:
+        rules = json.load(f)
+
+    for position, rule in enumerate(rules):
+        if rule.get('match') not in MATCH_TYPES:
+            raise ValueError(f"Override rule {position} has unknown match type {rule.get('match')!r}")
+        if not rule.get('phrases') or not all(isinstance(phrase, str) for phrase in rule['phrases']):
+            raise ValueError(f"Override rule {position} needs a list of phrases")
+        for field in ('emotion', 'confidence', 'scores'):
+            if field not in rule:
+                raise ValueError(f"Override rule {position} is missing {field!r}")
+    return rules
+
+
+class OverrideTable:
+    """
+    Lookup of the fixed analysis for messages matching an override rule.
+    """
+
+    def __init__(self, rules: List[Dict], emotion_images: Mapping[str, str]):
+        """
+        Index the rules.
+
+        Args:
+            rules: Override rules in priority order, as returned by load_overrides
+            emotion_images: Mapping from emotion to its image file
+        """
+        self.rules = rules
+        self.emotion_images = emotion_images
+
+        # Whole lowercased message -> position of the first rule matching it
+        self.exact = {}
+        # (position, phrase) of every substring rule, in priority order
+        self.substrings = []
+        for position, rule in enumerate(rules):
+            for phrase in rule['phrases']:
+                phrase = phrase.lower()
+                if rule['match'] == 'exact':
+                    self.exact.setdefault(phrase, position)
+                else:
+                    self.substrings.append((position, phrase))
+
+        # One scan tells whether any substring phrase occurs at all
+        phrases = sorted({phrase for _, phrase in self.substrings}, key=len, reverse=True)
+        self.substring_scan = re.compile('|'.join(map(re.escape, phrases))) if phrases else None
+
+    def lookup(self, message_lower: str) -> Optional[Dict]:
+        """
+        Return the fixed analysis for a message.
+
+        Args:
+            message_lower: The lowercased message
+
+        Returns:
+            A new result dict, or None if no rule matches
+        """
+        position = self.exact.get(message_lower)
+
+        if self.substring_scan is not None and self.substring_scan.search(message_lower):
+            # Rare path: resolve which matching rule comes first
+            for substring_position, phrase in self.substrings:
+                if position is not None and substring_position >= position:
+                    break
+                if phrase in message_lower:
+                    position = substring_position
+                    break
+
+        if position is None:
+            return None
+
+        rule = self.rules[position]
+        result = {
+            'emotion': rule['emotion'],
+            'confidence': rule['confidence'],
+            'scores': dict(rule['scores']),
+            'image': self.emotion_images.get(rule['emotion'], 'neutral.jpg')
+        }
+        if 'mixed_emotion' in rule:
+            result['mixed_emotion'] = rule['mixed_emotion']
+        return result
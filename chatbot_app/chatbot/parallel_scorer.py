@@ -0,0 +1,137 @@
+"""
+Process-pool emotion scoring for bulk jobs.
+
+Emotion scoring is CPU-bound pure-Python work, so threads do not help because of the
+GIL. ParallelEmotionScorer spreads chunks of messages over worker processes; each worker
+builds its own AdvancedChatbot (and compiled pattern bank) once and scores its chunks
+with the side-effect free analyze_emotion_batch.
+"""
+
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from chatbot_app.chatbot.advanced_chatbot import AdvancedChatbot
+from chatbot_app.chatbot.rule_pack import DEFAULT_RULE_PACK_PATH
+
+# Chatbot of the current worker process, built once by _init_worker
+_worker_chatbot = None
+
+
+def _init_worker(matcher: str, rules_path: str) -> None:
+    """
+    Build the chatbot of a worker process.
+
+    Args:
+        matcher: Name of the pattern matching engine
+        rules_path: Rule pack loaded by the worker, from its compiled cache when possible
+    """
+    global _worker_chatbot
+    _worker_chatbot = AdvancedChatbot(matcher=matcher, rules_path=rules_path)
+
+
+def _score_chunk(messages: List[str], context: Optional[Dict]) -> List[Dict]:
+    """
+    Score a chunk of messages in a worker process.
+
+    Args:
+        messages: The messages to analyze
+        context: Optional context passed to analyze_emotion_batch
+
+    Returns:
+        List of analysis results in the same order as the messages
+    """
+    return _worker_chatbot.analyze_emotion_batch(messages, context)
+
+
+class ParallelEmotionScorer:
+    """
+    Score large numbers of messages on a pool of worker processes, preserving input order.
+    """
+
+    def __init__(self, workers: Optional[int] = None, chunk_size: int = 256,
+                 matcher: str = 'aho_corasick', context: Optional[Dict] = None,
+                 rules_path: str = DEFAULT_RULE_PACK_PATH):
+        """
+        Initialize the scorer and start the worker pool.
+
+        Args:
+            workers: Number of worker processes (defaults to the number of CPUs)
+            chunk_size: Number of messages sent to a worker at a time
+            matcher: Name of the pattern matching engine used by the workers
+            context: Optional context for analyze_emotion_batch, shared by all messages
+            rules_path: Rule pack used by the workers
+
+        Raises:
+            ValueError: If workers or chunk_size is not positive
+        """
+        self.workers = workers or os.cpu_count() or 1
+        if self.workers < 1:
+            raise ValueError("workers must be at least 1")
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+
+        self.chunk_size = chunk_size
+        self.context = context
+        # Chunks in flight per worker; keeps every worker busy without reading the whole input
+        self.max_pending = self.workers * 2
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(matcher, rules_path)
+        )
+
+    def _chunks(self, messages: Iterable[str]) -> Iterator[List[str]]:
+        """Split an iterable of messages into lists of at most chunk_size messages."""
+        iterator = iter(messages)
+        while True:
+            chunk = list(islice(iterator, self.chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+    def imap(self, messages: Iterable[str]) -> Iterator[Dict]:
+        """
+        Lazily score messages, yielding results in input order.
+
+        The input is consumed a few chunks ahead of the results, so it can be a stream
+        that does not fit in memory.
+
+        Args:
+            messages: The messages to analyze
+
+        Yields:
+            The analysis result of each message
+        """
+        pending = deque()
+        for chunk in self._chunks(messages):
+            pending.append(self.executor.submit(_score_chunk, chunk, self.context))
+            if len(pending) >= self.max_pending:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+    def score(self, messages: Iterable[str]) -> List[Dict]:
+        """
+        Score messages and return all results.
+
+        Args:
+            messages: The messages to analyze
+
+        Returns:
+            List of analysis results in input order
+        """
+        return list(self.imap(messages))
+
+    def close(self) -> None:
+        """Shut down the worker pool."""
+        self.executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
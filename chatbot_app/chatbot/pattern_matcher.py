@@ -0,0 +1,635 @@
+"""
+Multi-pattern matching engines for emotion detection.
+
+This module provides engines that report, for a piece of text, how many times each
+pattern of the compiled emotion pattern bank matches. The sequential engine runs every
+pattern against the text. The Aho-Corasick engine scans the text once for the literal
+keywords that each pattern requires and only runs the patterns whose keywords occur,
+so its cost scales with the length of the text instead of with the number of patterns.
+The keyword index engine tokenizes the text once and looks up the patterns that need
+one of its tokens, which is the cheapest option for short chat messages.
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+try:
+    from re import _parser as sre_parse
+    from re import _constants as sre_constants
+except ImportError:  # Python < 3.11
+    import sre_parse
+    import sre_constants
+
+# Marker used while analysing patterns to remember where a \b assertion sits
+WORD_BOUNDARY = '\x08'
+
+# Upper bound on the number of literal strings expanded from a single pattern fragment
+MAX_EXPANSION = 256
+
+# Tokenizer shared by the keyword index: runs of word characters, or single other characters
+TOKEN_PATTERN = re.compile(r'\w+|[^\w\s]')
+
+_REPEATS = {sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT}
+if hasattr(sre_constants, 'POSSESSIVE_REPEAT'):
+    _REPEATS.add(sre_constants.POSSESSIVE_REPEAT)
+
+
+def _expand_item(op, av) -> Optional[Set[str]]:
+    """
+    Expand a single parsed regex item into the finite set of strings it can match.
+
+    Returns:
+        Set of strings (with WORD_BOUNDARY markers for \\b), or None if the item
+        cannot be expanded into a small finite set
+    """
+    if op is sre_constants.LITERAL:
+        return {chr(av)}
+    if op is sre_constants.AT:
+        return {WORD_BOUNDARY} if av is sre_constants.AT_BOUNDARY else {''}
+    if op in (sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+        # Lookarounds do not consume any text
+        return {''}
+    if op is sre_constants.SUBPATTERN:
+        _, add_flags, _, pattern = av
+        if add_flags & sre_constants.SRE_FLAG_IGNORECASE:
+            return None
+        return _expand_sequence(pattern)
+    if op is sre_constants.BRANCH:
+        strings = set()
+        for branch in av[1]:
+            expanded = _expand_sequence(branch)
+            if expanded is None:
+                return None
+            strings |= expanded
+            if len(strings) > MAX_EXPANSION:
+                return None
+        return strings
+    if op is sre_constants.IN:
+        # Only plain character sets such as [abc], which the parser also builds from
+        # alternations of single characters
+        if len(av) > MAX_EXPANSION or any(item_op is not sre_constants.LITERAL for item_op, _ in av):
+            return None
+        return {chr(item_av) for _, item_av in av}
+    if op in _REPEATS:
+        min_count, max_count, pattern = av
+        if min_count != max_count or min_count > 3:
+            return None
+        return _expand_sequence(list(pattern) * min_count)
+    return None
+
+
+def _expand_sequence(items) -> Optional[Set[str]]:
+    """Expand a sequence of parsed regex items into the finite set of strings it can match."""
+    strings = {''}
+    for op, av in items:
+        expanded = _expand_item(op, av)
+        if expanded is None:
+            return None
+        strings = {prefix + suffix for prefix in strings for suffix in expanded}
+        if len(strings) > MAX_EXPANSION:
+            return None
+    return strings
+
+
+def _is_useful(strings: Set[str]) -> bool:
+    """Check that every alternative in a factor set contains at least one real character."""
+    return bool(strings) and all(s.replace(WORD_BOUNDARY, '') for s in strings)
+
+
+def _item_factor_sets(op, av) -> List[Set[str]]:
+    """Collect required factor sets from an item that cannot be fully expanded."""
+    if op is sre_constants.SUBPATTERN:
+        _, add_flags, _, pattern = av
+        if add_flags & sre_constants.SRE_FLAG_IGNORECASE:
+            return []
+        return _factor_sets(list(pattern))
+    if op is sre_constants.BRANCH:
+        # Every branch needs a factor, otherwise a match may contain none of them
+        combined = set()
+        for branch in av[1]:
+            best = _best_factor_set(_factor_sets(list(branch)))
+            if best is None:
+                return []
+            combined |= best
+        return [combined]
+    if op in _REPEATS and av[0] >= 1:
+        return _factor_sets(list(av[2]))
+    return []
+
+
+def _factor_sets(items) -> List[Set[str]]:
+    """
+    Find literal factor sets for a sequence of parsed regex items.
+
+    Every returned set has the property that any match of the sequence contains at
+    least one of its strings (after removing WORD_BOUNDARY markers).
+    """
+    expanded = _expand_sequence(items)
+    if expanded is not None:
+        return [expanded] if _is_useful(expanded) else []
+
+    factor_sets = []
+    run = []
+
+    def flush_run():
+        if not run:
+            return
+        run_strings = _expand_sequence(run)
+        if run_strings is not None:
+            if _is_useful(run_strings):
+                factor_sets.append(run_strings)
+        else:
+            # The run is too large to expand as a whole, use each item together with
+            # its neighbours so that words keep the spaces and boundaries around them
+            for position in range(len(run)):
+                item_strings = _expand_sequence(run[max(position - 1, 0):position + 2])
+                if item_strings is None:
+                    item_strings = _expand_item(*run[position])
+                if _is_useful(item_strings):
+                    factor_sets.append(item_strings)
+        del run[:]
+
+    for op, av in items:
+        if _expand_item(op, av) is None:
+            flush_run()
+            factor_sets.extend(_item_factor_sets(op, av))
+        else:
+            run.append((op, av))
+    flush_run()
+
+    return factor_sets
+
+
+def _best_factor_set(factor_sets: List[Set[str]]) -> Optional[Set[str]]:
+    """Pick the most selective factor set: longest shortest alternative, then fewest alternatives."""
+    if not factor_sets:
+        return None
+    return max(
+        factor_sets,
+        key=lambda strings: (min(len(s.replace(WORD_BOUNDARY, '')) for s in strings), -len(strings))
+    )
+
+
+def pattern_factor_sets(pattern: str) -> List[Set[str]]:
+    """
+    Analyse a regex pattern and return its literal factor sets.
+
+    Args:
+        pattern: The regex pattern string
+
+    Returns:
+        List of factor sets; strings keep WORD_BOUNDARY markers where the pattern has \\b
+    """
+    parsed = sre_parse.parse(pattern)
+    if parsed.state.flags & sre_constants.SRE_FLAG_IGNORECASE:
+        return []
+    return _factor_sets(list(parsed))
+
+
+def required_literals(pattern: str) -> Optional[FrozenSet[str]]:
+    """
+    Find literal strings at least one of which occurs in every match of a pattern.
+
+    Args:
+        pattern: The regex pattern string
+
+    Returns:
+        Frozen set of literal strings, or None if no such set could be derived
+    """
+    best = _best_factor_set(pattern_factor_sets(pattern))
+    if best is None:
+        return None
+    return frozenset(s.replace(WORD_BOUNDARY, '') for s in best)
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split a text into the tokens used by the keyword index.
+
+    Args:
+        text: The (lowercased) text to tokenize
+
+    Returns:
+        List of tokens in order of appearance
+    """
+    return TOKEN_PATTERN.findall(text)
+
+
+def _exact_tokens(literal: str) -> List[str]:
+    """
+    Find the tokens of a literal that are whole tokens of any text containing the literal.
+
+    Args:
+        literal: Literal string with WORD_BOUNDARY markers
+
+    Returns:
+        List of tokens
+    """
+    tokens = []
+    for match in TOKEN_PATTERN.finditer(literal):
+        token = match.group()
+        if token == WORD_BOUNDARY:
+            continue
+        # A run of word characters is only whole if something non-word surrounds it within the literal
+        if token[0].isalnum() or token[0] == '_':
+            if match.start() == 0 or match.end() == len(literal):
+                continue
+        tokens.append(token)
+    return tokens
+
+
+def required_tokens(pattern: str, token_frequency: Optional[Dict[str, int]] = None) -> Optional[FrozenSet[str]]:
+    """
+    Find tokens at least one of which is a token of every text the pattern matches.
+
+    Args:
+        pattern: The regex pattern string
+        token_frequency: Optional count of patterns using each token; rarer tokens are
+            preferred because they select fewer patterns, otherwise longer tokens are preferred
+
+    Returns:
+        Frozen set of tokens, or None if no such set could be derived
+    """
+    token_frequency = token_frequency or {}
+
+    def selectivity(token):
+        return (-token_frequency.get(token, 0), len(token))
+
+    best = None
+    for factor_set in pattern_factor_sets(pattern):
+        tokens = set()
+        for literal in factor_set:
+            literal_tokens = _exact_tokens(literal)
+            if not literal_tokens:
+                tokens = None
+                break
+            tokens.add(max(literal_tokens, key=selectivity))
+        if tokens is None:
+            continue
+        if best is None or min(map(selectivity, tokens)) > min(map(selectivity, best)):
+            best = tokens
+    return frozenset(best) if best is not None else None
+
+
+def pattern_token_frequency(patterns: Iterable[str]) -> Dict[str, int]:
+    """
+    Count how many patterns can use each token as a required token.
+
+    Args:
+        patterns: The regex pattern strings
+
+    Returns:
+        Dict mapping each token to the number of patterns it appears in
+    """
+    frequency = {}
+    for pattern in patterns:
+        pattern_tokens = set()
+        for factor_set in pattern_factor_sets(pattern):
+            for literal in factor_set:
+                pattern_tokens.update(_exact_tokens(literal))
+        for token in pattern_tokens:
+            frequency[token] = frequency.get(token, 0) + 1
+    return frequency
+
+
+class KeywordGatedPattern:
+    """
+    Compiled pattern that is only run when one of its required tokens is present.
+    """
+
+    def __init__(self, pattern: str):
+        """
+        Compile the pattern and derive its required tokens.
+
+        Args:
+            pattern: The regex pattern string
+        """
+        self.regex = re.compile(pattern)
+        self.tokens = None if self.regex.flags & re.IGNORECASE else required_tokens(pattern)
+
+    def possible(self, tokens: Set[str]) -> bool:
+        """Check whether the pattern can match a text with the given set of tokens."""
+        return self.tokens is None or not self.tokens.isdisjoint(tokens)
+
+    def search(self, text: str, tokens: Set[str]):
+        """
+        Search the text if the pattern can match it.
+
+        Args:
+            text: The (lowercased) text to search
+            tokens: Set of tokens of the text
+
+        Returns:
+            The match object, or None
+        """
+        return self.regex.search(text) if self.possible(tokens) else None
+
+    def findall(self, text: str, tokens: Set[str]) -> List:
+        """
+        Find all matches in the text if the pattern can match it.
+
+        Args:
+            text: The (lowercased) text to search
+            tokens: Set of tokens of the text
+
+        Returns:
+            List of matches
+        """
+        return self.regex.findall(text) if self.possible(tokens) else []
+
+
+@lru_cache(maxsize=None)
+def keyword_gated_pattern(pattern: str) -> KeywordGatedPattern:
+    """
+    Get the shared keyword-gated form of a pattern, compiling it on first use.
+
+    Args:
+        pattern: The regex pattern string
+
+    Returns:
+        The keyword-gated pattern
+    """
+    return KeywordGatedPattern(pattern)
+
+
+class AhoCorasick:
+    """
+    Aho-Corasick automaton that finds every keyword occurring in a text in one pass.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        """
+        Build the keyword trie and its failure links.
+
+        Args:
+            keywords: The keywords to search for
+        """
+        self.transitions = [{}]
+        self.failure = [0]
+        self.outputs = [set()]
+
+        for keyword in keywords:
+            state = 0
+            for char in keyword:
+                next_state = self.transitions[state].get(char)
+                if next_state is None:
+                    next_state = len(self.transitions)
+                    self.transitions.append({})
+                    self.failure.append(0)
+                    self.outputs.append(set())
+                    self.transitions[state][char] = next_state
+                state = next_state
+            self.outputs[state].add(keyword)
+
+        # Breadth-first pass to compute failure links
+        queue = list(self.transitions[0].values())
+        for state in queue:
+            for char, next_state in self.transitions[state].items():
+                queue.append(next_state)
+                fallback = self.failure[state]
+                while fallback and char not in self.transitions[fallback]:
+                    fallback = self.failure[fallback]
+                self.failure[next_state] = self.transitions[fallback].get(char, 0)
+                if self.failure[next_state] == next_state:
+                    self.failure[next_state] = 0
+                self.outputs[next_state] |= self.outputs[self.failure[next_state]]
+
+    def find(self, text: str) -> Set[str]:
+        """
+        Find the keywords that occur in a text.
+
+        Args:
+            text: The text to scan
+
+        Returns:
+            Set of keywords found in the text
+        """
+        transitions = self.transitions
+        failure = self.failure
+        outputs = self.outputs
+        found = set()
+        state = 0
+        for char in text:
+            while state and char not in transitions[state]:
+                state = failure[state]
+            state = transitions[state].get(char, 0)
+            if outputs[state]:
+                found |= outputs[state]
+        return found
+
+
+class SequentialPatternMatcher:
+    """
+    Reference engine that runs every compiled pattern against the text.
+    """
+
+    def __init__(self, compiled_patterns: Dict[str, List[Tuple]]):
+        """
+        Initialize the matcher.
+
+        Args:
+            compiled_patterns: Dict mapping each emotion to its list of
+                (compiled pattern, is_explicit, is_suicidal) tuples
+        """
+        self.compiled_patterns = compiled_patterns
+
+        # Every pattern by (emotion, pattern_index), with its position in the bank
+        self.regexes = {}
+        self.pattern_order = {}
+        for emotion, patterns in compiled_patterns.items():
+            for index, (regex, _, _) in enumerate(patterns):
+                self.pattern_order[(emotion, index)] = len(self.pattern_order)
+                self.regexes[(emotion, index)] = regex
+
+    def _candidates(self, text: str, tokens: Optional[Iterable[str]]) -> Iterable[Tuple[str, int]]:
+        """Return the patterns to run against a text, in pattern bank order."""
+        return self.regexes
+
+    def match(self, text: str, tokens: Optional[Iterable[str]] = None) -> Dict[Tuple[str, int], int]:
+        """
+        Count the matches of every pattern in a text.
+
+        Args:
+            text: The (lowercased) text to match
+            tokens: Tokens of the text or of a text containing it, used by engines that
+                prefilter on tokens
+
+        Returns:
+            Dict mapping (emotion, pattern_index) to the number of matches, for matching
+            patterns only, in pattern bank order
+        """
+        counts = {}
+        regexes = self.regexes
+        for key in self._candidates(text, tokens):
+            match_count = len(regexes[key].findall(text))
+            if match_count:
+                counts[key] = match_count
+        return counts
+
+    def match_many(self, texts: List[str],
+                   tokens: Optional[List[Optional[Iterable[str]]]] = None) -> List[Dict[Tuple[str, int], int]]:
+        """
+        Count the matches of every pattern in many texts.
+
+        Each pattern is run over all the texts that need it before moving to the next one.
+
+        Args:
+            texts: The (lowercased) texts to match
+            tokens: Optional tokens for each text, as for match()
+
+        Returns:
+            List with the match() result of each text
+        """
+        if tokens is None:
+            tokens = [None] * len(texts)
+
+        pattern_texts = {}
+        for position, (text, text_tokens) in enumerate(zip(texts, tokens)):
+            for key in self._candidates(text, text_tokens):
+                pattern_texts.setdefault(key, []).append(position)
+
+        all_counts = [{} for _ in texts]
+        for key in sorted(pattern_texts, key=self.pattern_order.__getitem__):
+            regex = self.regexes[key]
+            for position in pattern_texts[key]:
+                match_count = len(regex.findall(texts[position]))
+                if match_count:
+                    all_counts[position][key] = match_count
+        return all_counts
+
+
+class AhoCorasickPatternMatcher(SequentialPatternMatcher):
+    """
+    Engine that prefilters patterns with a single Aho-Corasick pass over their literal keywords.
+
+    The tokens passed to match() are unused, the automaton scans the text itself.
+    """
+
+    def __init__(self, compiled_patterns: Dict[str, List[Tuple]]):
+        """
+        Initialize the matcher and build the keyword automaton.
+
+        Args:
+            compiled_patterns: Dict mapping each emotion to its list of
+                (compiled pattern, is_explicit, is_suicidal) tuples
+        """
+        super().__init__(compiled_patterns)
+
+        self.keyword_patterns = {}
+        # Patterns without usable literals must always be run
+        self.unfiltered_patterns = []
+
+        for emotion, patterns in compiled_patterns.items():
+            for index, (regex, _, _) in enumerate(patterns):
+                key = (emotion, index)
+                literals = None if regex.flags & re.IGNORECASE else required_literals(regex.pattern)
+                if literals is None:
+                    self.unfiltered_patterns.append(key)
+                    continue
+                for literal in literals:
+                    self.keyword_patterns.setdefault(literal, []).append(key)
+
+        self.automaton = AhoCorasick(self.keyword_patterns)
+
+    def candidates(self, text: str) -> Set[Tuple[str, int]]:
+        """
+        Find the patterns that can possibly match a text.
+
+        Args:
+            text: The (lowercased) text to match
+
+        Returns:
+            Set of (emotion, pattern_index) keys worth running
+        """
+        candidates = set(self.unfiltered_patterns)
+        for keyword in self.automaton.find(text):
+            candidates.update(self.keyword_patterns[keyword])
+        return candidates
+
+    def _candidates(self, text: str, tokens: Optional[Iterable[str]]) -> Iterable[Tuple[str, int]]:
+        """Return the patterns whose keywords occur in the text, in pattern bank order."""
+        return sorted(self.candidates(text), key=self.pattern_order.__getitem__)
+
+
+class KeywordIndexPatternMatcher(SequentialPatternMatcher):
+    """
+    Engine that only runs the patterns indexed under the tokens of the text.
+    """
+
+    def __init__(self, compiled_patterns: Dict[str, List[Tuple]]):
+        """
+        Initialize the matcher and build the token index.
+
+        Args:
+            compiled_patterns: Dict mapping each emotion to its list of
+                (compiled pattern, is_explicit, is_suicidal) tuples
+        """
+        super().__init__(compiled_patterns)
+
+        self.token_patterns = {}
+        # Patterns without required tokens must always be run
+        self.unfiltered_patterns = []
+
+        token_frequency = pattern_token_frequency(
+            regex.pattern for patterns in compiled_patterns.values() for regex, _, _ in patterns
+        )
+        for emotion, patterns in compiled_patterns.items():
+            for index, (regex, _, _) in enumerate(patterns):
+                key = (emotion, index)
+                tokens = None if regex.flags & re.IGNORECASE else required_tokens(regex.pattern, token_frequency)
+                if tokens is None:
+                    self.unfiltered_patterns.append(key)
+                    continue
+                for token in tokens:
+                    self.token_patterns.setdefault(token, []).append(key)
+
+    def candidates(self, tokens: Iterable[str]) -> Set[Tuple[str, int]]:
+        """
+        Find the patterns that can possibly match a text with the given tokens.
+
+        Args:
+            tokens: Tokens of the text
+
+        Returns:
+            Set of (emotion, pattern_index) keys worth running
+        """
+        candidates = set(self.unfiltered_patterns)
+        token_patterns = self.token_patterns
+        for token in set(tokens):
+            if token in token_patterns:
+                candidates.update(token_patterns[token])
+        return candidates
+
+    def _candidates(self, text: str, tokens: Optional[Iterable[str]]) -> Iterable[Tuple[str, int]]:
+        """Return the patterns indexed under the tokens (of the text if none are given), in pattern bank order."""
+        if tokens is None:
+            tokens = tokenize(text)
+        return sorted(self.candidates(tokens), key=self.pattern_order.__getitem__)
+
+
+# Available matching engines, selectable by name
+MATCHERS = {
+    'sequential': SequentialPatternMatcher,
+    'aho_corasick': AhoCorasickPatternMatcher,
+    'keyword_index': KeywordIndexPatternMatcher,
+}
+
+
+def create_matcher(name: str, compiled_patterns: Dict[str, List[Tuple]]) -> SequentialPatternMatcher:
+    """
+    Create a matching engine by name.
+
+    Args:
+        name: One of the keys of MATCHERS
+        compiled_patterns: The compiled emotion pattern bank
+
+    Returns:
+        The matching engine
+
+    Raises:
+        ValueError: If the engine name is unknown
+    """
+    if name not in MATCHERS:
+        raise ValueError(f"Unknown pattern matcher '{name}'. Choose one of: {', '.join(MATCHERS)}")
+    return MATCHERS[name](compiled_patterns)
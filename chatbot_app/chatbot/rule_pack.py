@@ -0,0 +1,304 @@
+"""
+Versioned rule packs for the chatbot, with a compiled cache.
+
+The emotion patterns, sentiment word lists, weights, responses and images of the chatbot
+are kept in a JSON rule pack. Compiling a pack (the regexes, the literal analysis behind
+the pattern matching engines and the sentiment lexicon) is most of the cost of a cold
+start, so the compiled pack is pickled next to its source together with the SHA-256 of
+the source bytes and of the modules compiling it. Loading reuses the cache while both
+match and rebuilds it when the source or the compiler changes, like Python does for its
+own bytecode. The cache is trusted like the source file it belongs to.
+"""
+
+import copyreg
+import hashlib
+import json
+import logging
+import os
+import pickle
+import re
+import sys
+import tempfile
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, Mapping, Optional, Tuple
+
+from chatbot_app.chatbot import frozen, lexicon, pattern_matcher
+from chatbot_app.chatbot.frozen import freeze
+from chatbot_app.chatbot.lexicon import LexiconEntry, PhraseTrie, build_lexicon, scoring_phrases
+from chatbot_app.chatbot.pattern_matcher import MATCHERS, SequentialPatternMatcher
+
+# Rule pack shipped with the package
+DEFAULT_RULE_PACK_PATH = os.path.join(os.path.dirname(__file__), 'data', 'emotion_rules.json')
+
+# Version of the rule pack source format understood by this module
+RULE_PACK_VERSION = 1
+
+# Version of the compiled form; caches are also rebuilt whenever the source of a module
+# building it changes, see _compiler_digest
+COMPILED_FORMAT = 1
+
+# Tables every rule pack must define
+RULE_TABLES = (
+    'emotion_groups',
+    'final_emotion_multipliers',
+    'drink_recommendation_patterns',
+    'sentiment_analyzer',
+    'topic_responses',
+    'emotion_patterns',
+    'emotion_responses',
+    'greeting_patterns',
+    'greeting_responses',
+    'question_patterns',
+    'emotion_images',
+)
+
+logger = logging.getLogger(__name__)
+
+
+def compiled_cache_path(path: str) -> str:
+    """
+    Get the default location of the compiled cache of a rule pack.
+
+    Args:
+        path: Path of the rule pack source
+
+    Returns:
+        Path of the cache file, next to the source
+    """
+    return os.path.splitext(path)[0] + '.compiled.pickle'
+
+
+def parse_rule_pack(data: bytes, path: str = '<rule pack>') -> Dict:
+    """
+    Parse and validate the source of a rule pack.
+
+    Args:
+        data: The JSON source
+        path: Where the source comes from, for error messages
+
+    Returns:
+        The rule pack tables
+
+    Raises:
+        ValueError: If the source is not a rule pack of a supported version
+    """
+    source = json.loads(data)
+    if not isinstance(source, dict):
+        raise ValueError(f"Rule pack {path} must be a JSON object")
+    if source.get('version') != RULE_PACK_VERSION:
+        raise ValueError(f"Rule pack {path} has version {source.get('version')!r}, expected {RULE_PACK_VERSION}")
+
+    missing = [table for table in RULE_TABLES if table not in source]
+    if missing:
+        raise ValueError(f"Rule pack {path} is missing {', '.join(missing)}")
+    for emotion, patterns in source['emotion_patterns'].items():
+        if not isinstance(patterns, list) or not all(isinstance(pattern, str) for pattern in patterns):
+            raise ValueError(f"Rule pack {path} needs a list of patterns for emotion {emotion!r}")
+    return source
+
+
+def _compile_emotion_patterns(emotion_patterns: Mapping[str, Tuple[str, ...]]) -> Mapping[str, Tuple[Tuple, ...]]:
+    """
+    Compile every emotion pattern along with its static weighting flags.
+
+    Args:
+        emotion_patterns: Mapping from each emotion to its pattern strings
+
+    Returns:
+        Read-only mapping from each emotion to (compiled pattern, is_explicit, is_suicidal)
+        tuples in the same order as emotion_patterns
+
+    Raises:
+        ValueError: If a pattern is not a valid regex
+    """
+    compiled_patterns = {}
+    for emotion, patterns in emotion_patterns.items():
+        compiled = []
+        for pattern in patterns:
+            try:
+                regex = re.compile(pattern)
+            except re.error as error:
+                raise ValueError(f"Invalid pattern {pattern!r} for emotion {emotion!r}: {error}") from error
+            compiled.append((
+                regex,
+                # Explicit emotion statements ("I feel...", "I am...") get a higher weight
+                any(explicit in pattern for explicit in ['feel', 'felt', 'feeling', 'am', 'are', 'is', 'was', 'were']),
+                # Suicidal statements get priority when scoring desperation
+                emotion == 'desperation' and any(suicidal in pattern for suicidal in ['die', 'end my life', 'suicidal', 'kill myself', 'suicide'])
+            ))
+        compiled_patterns[emotion] = tuple(compiled)
+    return MappingProxyType(compiled_patterns)
+
+
+class RulePack:
+    """
+    Compiled rule pack: the frozen rule tables and the structures derived from them.
+    """
+
+    def __init__(self, source: Dict, checksum: str):
+        """
+        Compile a rule pack.
+
+        Args:
+            source: The rule pack tables, as returned by parse_rule_pack
+            checksum: SHA-256 hex digest of the source bytes
+
+        Raises:
+            ValueError: If a pattern is not a valid regex
+        """
+        self.version = source['version']
+        self.checksum = checksum
+
+        # Read-only rule tables
+        self.emotion_groups = freeze(source['emotion_groups'])
+        self.final_emotion_multipliers = freeze(source['final_emotion_multipliers'])
+        self.drink_recommendation_patterns = freeze(source['drink_recommendation_patterns'])
+        self.sentiment_analyzer = freeze(source['sentiment_analyzer'])
+        self.topic_responses = freeze(source['topic_responses'])
+        self.emotion_patterns = freeze(source['emotion_patterns'])
+        self.emotion_responses = freeze(source['emotion_responses'])
+        self.greeting_patterns = freeze(source['greeting_patterns'])
+        self.greeting_responses = freeze(source['greeting_responses'])
+        self.question_patterns = freeze(source['question_patterns'])
+        self.emotion_images = freeze(source['emotion_images'])
+
+        # Fixed emotion order of the array-backed scores used during analysis
+        self.emotion_names = tuple(self.emotion_patterns)
+        self.emotion_index = MappingProxyType({emotion: i for i, emotion in enumerate(self.emotion_names)})
+
+        # Compiling the bank once means analysis does not pay for regex cache lookups on
+        # every sentence of every message
+        self.compiled_emotion_patterns = _compile_emotion_patterns(self.emotion_patterns)
+        self.matchers = MappingProxyType({
+            name: matcher_class(self.compiled_emotion_patterns) for name, matcher_class in MATCHERS.items()
+        })
+
+        # The sentiment word lists folded into one token lookup table, and a trie for
+        # multi-word entries such as 'let down' that a word tokenizer splits apart
+        self.lexicon: Mapping[str, LexiconEntry] = build_lexicon(self.sentiment_analyzer, self.emotion_names)
+        self.lexicon_phrases = PhraseTrie(scoring_phrases(self.lexicon))
+
+    def matcher(self, name: str) -> SequentialPatternMatcher:
+        """
+        Get a matching engine for the emotion pattern bank by name.
+
+        Args:
+            name: One of the keys of pattern_matcher.MATCHERS
+
+        Returns:
+            The matching engine, shared by every user of the pack
+
+        Raises:
+            ValueError: If the engine name is unknown
+        """
+        if name not in self.matchers:
+            raise ValueError(f"Unknown pattern matcher '{name}'. Choose one of: {', '.join(self.matchers)}")
+        return self.matchers[name]
+
+
+@lru_cache(maxsize=None)
+def _compiler_digest() -> str:
+    """SHA-256 of the sources of the modules whose code builds or is pickled in a pack."""
+    digest = hashlib.sha256()
+    for module in (sys.modules[__name__], frozen, lexicon, pattern_matcher):
+        with open(module.__file__, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def _cache_header(checksum: str) -> Tuple:
+    """Identify the source and compiler a cached pack was built from."""
+    # The literal analysis of the matchers depends on the regex parser of the interpreter
+    return COMPILED_FORMAT, sys.version_info[:2], _compiler_digest(), checksum
+
+
+def _read_only_mapping(items: dict) -> MappingProxyType:
+    """Freeze a mapping of a cached pack again; see _cache_pickler."""
+    return MappingProxyType(items)
+
+
+def _reduce_mapping_proxy(proxy: MappingProxyType):
+    """Pickle a read-only mapping as a plain dict that is frozen again on loading."""
+    return _read_only_mapping, (dict(proxy),)
+
+
+def _cache_pickler(f) -> pickle.Pickler:
+    """
+    Get a pickler for compiled packs.
+
+    The mappingproxy type of the frozen tables cannot be pickled; this pickler alone
+    stores them as plain dicts, so pickling elsewhere in the process is unchanged. Shared
+    tables stay shared, because the pickle memo keeps one copy of each.
+    """
+    pickler = pickle.Pickler(f, protocol=pickle.HIGHEST_PROTOCOL)
+    pickler.dispatch_table = copyreg.dispatch_table.copy()
+    pickler.dispatch_table[MappingProxyType] = _reduce_mapping_proxy
+    return pickler
+
+
+def _read_cache(cache_path: str, checksum: str) -> Optional[RulePack]:
+    """Load a compiled pack from its cache, or return None if the cache is missing or stale."""
+    try:
+        with open(cache_path, 'rb') as f:
+            if pickle.load(f) != _cache_header(checksum):
+                logger.info("Rule pack cache %s is stale, rebuilding", cache_path)
+                return None
+            return pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as error:  # A corrupt cache is rebuilt like a stale one
+        logger.warning("Ignoring unreadable rule pack cache %s: %s", cache_path, error)
+        return None
+
+
+def _write_cache(cache_path: str, pack: RulePack) -> None:
+    """Atomically store a compiled pack; failures only cost the next cold start."""
+    try:
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(cache_path) or '.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                # One pickler each: _read_cache loads them with separate unpicklers
+                _cache_pickler(f).dump(_cache_header(pack.checksum))
+                _cache_pickler(f).dump(pack)
+            # mkstemp creates private files; the cache is as readable as its source
+            os.chmod(temp_path, 0o644)
+            os.replace(temp_path, cache_path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+    except OSError as error:
+        logger.warning("Could not write rule pack cache %s: %s", cache_path, error)
+
+
+def load_rule_pack(path: str = DEFAULT_RULE_PACK_PATH, cache_path: Optional[str] = None,
+                   use_cache: bool = True) -> RulePack:
+    """
+    Load a rule pack, from its compiled cache when it is up to date.
+
+    Args:
+        path: Path of the rule pack source
+        cache_path: Path of the compiled cache; defaults to compiled_cache_path(path)
+        use_cache: Whether to read and write the compiled cache
+
+    Returns:
+        The compiled rule pack
+
+    Raises:
+        ValueError: If the source is not a valid rule pack
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    checksum = hashlib.sha256(data).hexdigest()
+
+    if cache_path is None:
+        cache_path = compiled_cache_path(path)
+    if use_cache:
+        pack = _read_cache(cache_path, checksum)
+        if pack is not None:
+            return pack
+
+    pack = RulePack(parse_rule_pack(data, path), checksum)
+    if use_cache:
+        _write_cache(cache_path, pack)
+    return pack
@@ -0,0 +1,457 @@
+"""
+Per-session conversation state for the chatbot.
+
+AdvancedChatbot holds two kinds of data: large immutable tables (emotion patterns,
+lexicon, responses, drink catalogue) and a small mutable conversation state (context,
+conversation memory, drink profile). The tables are built once per process and shared;
+SessionStore keeps one SessionState per client session in a pluggable backend, an
+in-process dict or an SQLite file shared by the workers of a gunicorn server.
+
+Every stored state has a version. A turn saves its state only if the version is still the
+one it loaded, so when two workers run turns of the same session at once the later one is
+run again on top of the earlier one's state instead of overwriting it.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Callable, Deque, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Number of turns kept in the conversation memory and context histories of a session
+DEFAULT_HISTORY_DEPTH = 50
+
+# Context entries that grow by one item per turn
+HISTORY_KEYS = ('previous_messages', 'session_emotions')
+
+
+def bounded_history(items: Optional[Iterable], depth: int) -> Deque:
+    """
+    Get a ring buffer holding the most recent items of a history.
+
+    Args:
+        items: The history, oldest first; may already be a ring buffer
+        depth: Maximum number of items to keep
+
+    Returns:
+        Deque with maxlen depth; items itself if it already is one
+    """
+    if isinstance(items, deque) and items.maxlen == depth:
+        return items
+    return deque(items or (), maxlen=depth)
+
+
+class SessionState:
+    """
+    Mutable conversation state of one client session.
+    """
+
+    def __init__(self, context: Optional[Dict] = None, conversation_memory: Optional[Iterable[Dict]] = None,
+                 drink_profile: Optional[Dict] = None, history_depth: int = DEFAULT_HISTORY_DEPTH):
+        """
+        Initialize the state.
+
+        Args:
+            context: The conversation context; defaults to a fresh context
+            conversation_memory: Previous turns of the conversation
+            drink_profile: User profile of the drink recommender, or None for a fresh profile
+            history_depth: Number of turns kept in the conversation memory and context histories
+        """
+        if context is None:
+            context = {
+                'current_emotion': 'neutral',
+                'current_topic': None,
+                'previous_messages': [],
+                'session_emotions': [],
+                'drink_recommendation_state': None,
+                'current_drink_question': None
+            }
+        for key in HISTORY_KEYS:
+            if key in context:
+                context[key] = bounded_history(context[key], history_depth)
+        self.context = context
+        self.conversation_memory = bounded_history(conversation_memory, history_depth)
+        self.drink_profile = drink_profile
+        self.history_depth = history_depth
+
+    def to_dict(self) -> Dict:
+        """
+        Convert the state to JSON-serializable data.
+
+        Returns:
+            Dict with the context, conversation memory and drink profile
+        """
+        context = dict(self.context)
+        for key in HISTORY_KEYS:
+            if key in context:
+                context[key] = list(context[key])
+        return {
+            'context': context,
+            'conversation_memory': list(self.conversation_memory),
+            'drink_profile': self.drink_profile
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict, history_depth: int = DEFAULT_HISTORY_DEPTH) -> 'SessionState':
+        """
+        Rebuild a state from the output of to_dict.
+
+        Args:
+            data: The serialized state
+            history_depth: Number of turns kept in the conversation memory and context histories
+
+        Returns:
+            The session state
+        """
+        return cls(data.get('context'), data.get('conversation_memory'), data.get('drink_profile'), history_depth)
+
+
+class InMemorySessionBackend:
+    """
+    Session states kept in a dict of the current process, least recently used first.
+    """
+
+    def __init__(self, ttl: Optional[float] = 1800, max_sessions: int = 10000):
+        """
+        Initialize the backend.
+
+        Args:
+            ttl: Seconds of inactivity after which a session is dropped, or None to keep it
+            max_sessions: Maximum number of sessions; the least recently used are dropped
+        """
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.evictions = 0
+        # session id -> (last seen time, state, version)
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _evict(self, now: float) -> None:
+        """Drop idle sessions and sessions over the size bound; the lock must be held."""
+        sessions = self._sessions
+        if self.ttl is not None:
+            while sessions:
+                last_seen = next(iter(sessions.values()))[0]
+                if now - last_seen <= self.ttl:
+                    break
+                sessions.popitem(last=False)
+                self.evictions += 1
+        while len(sessions) > self.max_sessions:
+            sessions.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, session_id: str) -> Optional[SessionState]:
+        """
+        Look up the state of a session.
+
+        Args:
+            session_id: The client session id
+
+        Returns:
+            The session state, or None if the session is unknown or expired
+        """
+        return self.get_versioned(session_id)[0]
+
+    def get_versioned(self, session_id: str) -> Tuple[Optional[SessionState], int]:
+        """
+        Look up the state of a session and its version.
+
+        Args:
+            session_id: The client session id
+
+        Returns:
+            The session state, or None if the session is unknown or expired, and the
+            version to pass to put; 0 for unknown sessions
+        """
+        with self._lock:
+            self._evict(time.monotonic())
+            entry = self._sessions.get(session_id)
+            return (entry[1], entry[2]) if entry is not None else (None, 0)
+
+    def put(self, session_id: str, state: SessionState, expected_version: Optional[int] = None) -> bool:
+        """
+        Store the state of a session and mark it as active.
+
+        Args:
+            session_id: The client session id
+            state: The session state
+            expected_version: Only store the state if the session still has this version;
+                None stores it unconditionally
+
+        Returns:
+            Whether the state was stored
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            version = entry[2] if entry is not None else 0
+            if expected_version is not None and version != expected_version:
+                return False
+            self._sessions[session_id] = (now, state, version + 1)
+            self._sessions.move_to_end(session_id)
+            self._evict(now)
+        return True
+
+    def delete(self, session_id: str) -> None:
+        """
+        Forget a session.
+
+        Args:
+            session_id: The client session id
+        """
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+class SQLiteSessionBackend:
+    """
+    Session states serialized to an SQLite file, so that every worker process sees them.
+    """
+
+    def __init__(self, path: str, ttl: Optional[float] = 1800, max_sessions: int = 10000,
+                 history_depth: int = DEFAULT_HISTORY_DEPTH):
+        """
+        Initialize the backend and create its table.
+
+        Args:
+            path: Path of the SQLite database file
+            ttl: Seconds of inactivity after which a session is dropped, or None to keep it
+            max_sessions: Maximum number of sessions; the least recently used are dropped
+            history_depth: Number of turns kept in the histories of loaded sessions
+        """
+        self.path = path
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.history_depth = history_depth
+
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS chat_sessions ("
+                    "session_id TEXT PRIMARY KEY, state TEXT NOT NULL, last_seen REAL NOT NULL, "
+                    "version INTEGER NOT NULL DEFAULT 0)"
+                )
+                # Session files created before states were versioned
+                columns = {row[1] for row in conn.execute("PRAGMA table_info(chat_sessions)")}
+                if 'version' not in columns:
+                    conn.execute("ALTER TABLE chat_sessions ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+                conn.execute("CREATE INDEX IF NOT EXISTS ix_chat_sessions_last_seen ON chat_sessions (last_seen)")
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection; connections are not shared between threads or processes."""
+        return sqlite3.connect(self.path, timeout=10)
+
+    def get(self, session_id: str) -> Optional[SessionState]:
+        """
+        Look up the state of a session.
+
+        Args:
+            session_id: The client session id
+
+        Returns:
+            The session state, or None if the session is unknown or expired
+        """
+        return self.get_versioned(session_id)[0]
+
+    def get_versioned(self, session_id: str) -> Tuple[Optional[SessionState], int]:
+        """
+        Look up the state of a session and its version.
+
+        Args:
+            session_id: The client session id
+
+        Returns:
+            The session state, or None if the session is unknown or expired, and the
+            version to pass to put; 0 for unknown sessions
+        """
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT state, last_seen, version FROM chat_sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        finally:
+            conn.close()
+
+        if row is None:
+            return None, 0
+        if self.ttl is not None and time.time() - row[1] > self.ttl:
+            return None, row[2]
+        return SessionState.from_dict(json.loads(row[0]), self.history_depth), row[2]
+
+    def put(self, session_id: str, state: SessionState, expected_version: Optional[int] = None) -> bool:
+        """
+        Store the state of a session and mark it as active.
+
+        Args:
+            session_id: The client session id
+            state: The session state
+            expected_version: Only store the state if the session still has this version;
+                None stores it unconditionally
+
+        Returns:
+            Whether the state was stored
+        """
+        now = time.time()
+        data = json.dumps(state.to_dict())
+        conn = self._connect()
+        try:
+            with conn:
+                # Take the write lock before reading the version, so that no other process
+                # can store the session in between
+                conn.execute("BEGIN IMMEDIATE")
+                row = conn.execute(
+                    "SELECT version FROM chat_sessions WHERE session_id = ?", (session_id,)
+                ).fetchone()
+                version = row[0] if row is not None else 0
+                if expected_version is not None and version != expected_version:
+                    return False
+                conn.execute(
+                    "INSERT OR REPLACE INTO chat_sessions (session_id, state, last_seen, version) "
+                    "VALUES (?, ?, ?, ?)",
+                    (session_id, data, now, version + 1)
+                )
+                if self.ttl is not None:
+                    conn.execute("DELETE FROM chat_sessions WHERE last_seen < ?", (now - self.ttl,))
+                conn.execute(
+                    "DELETE FROM chat_sessions WHERE session_id IN ("
+                    "SELECT session_id FROM chat_sessions ORDER BY last_seen DESC LIMIT -1 OFFSET ?)",
+                    (self.max_sessions,)
+                )
+        finally:
+            conn.close()
+        return True
+
+    def delete(self, session_id: str) -> None:
+        """
+        Forget a session.
+
+        Args:
+            session_id: The client session id
+        """
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM chat_sessions WHERE session_id = ?", (session_id,))
+        finally:
+            conn.close()
+
+    def __len__(self) -> int:
+        conn = self._connect()
+        try:
+            return conn.execute("SELECT COUNT(*) FROM chat_sessions").fetchone()[0]
+        finally:
+            conn.close()
+
+
+SESSION_BACKENDS = {
+    'memory': InMemorySessionBackend,
+    'sqlite': SQLiteSessionBackend,
+}
+
+
+def create_session_backend(name: str, **options):
+    """
+    Create a session backend by name.
+
+    Args:
+        name: One of SESSION_BACKENDS
+        **options: Keyword arguments of the backend class
+
+    Returns:
+        The session backend
+
+    Raises:
+        ValueError: If the backend name is unknown
+    """
+    if name not in SESSION_BACKENDS:
+        raise ValueError(f"Unknown session backend {name!r}, expected one of {sorted(SESSION_BACKENDS)}")
+    return SESSION_BACKENDS[name](**options)
+
+
+class SessionStore:
+    """
+    Run chatbot turns against per-session state, sharing one chatbot's tables.
+    """
+
+    # Number of locks that serialize concurrent turns of the same session in a process
+    LOCK_STRIPES = 64
+    # Times a turn is run before it gives up storing its state
+    MAX_ATTEMPTS = 3
+
+    def __init__(self, chatbot, backend, history_depth: int = DEFAULT_HISTORY_DEPTH,
+                 archiver: Optional[Callable[[str, Dict], None]] = None):
+        """
+        Initialize the store.
+
+        Args:
+            chatbot: The AdvancedChatbot whose tables are shared by all sessions
+            backend: Session backend, e.g. from create_session_backend
+            history_depth: Number of turns kept in the histories of new sessions
+            archiver: Optional callable receiving (session_id, turn) for every turn that
+                falls out of a session's conversation memory
+        """
+        self.chatbot = chatbot
+        self.backend = backend
+        self.history_depth = history_depth
+        self.archiver = archiver
+        self._locks = [threading.Lock() for _ in range(self.LOCK_STRIPES)]
+        # Turns run again because another process stored the session meanwhile
+        self.conflicts = 0
+        # Turns answered without storing their state because every attempt conflicted
+        self.unsaved_turns = 0
+
+    def process_message(self, session_id: str, message: str) -> Dict:
+        """
+        Process a message in the conversation of a session.
+
+        Turns of a session are serialized by a lock within the process. Across processes,
+        a turn whose session was stored by another process after it was loaded is run
+        again on the newer state. If every attempt conflicts, the response is returned
+        without storing the turn, so the concurrent turns are kept. Turns falling out of
+        the conversation memory are only archived once the state is stored.
+
+        Args:
+            session_id: The client session id
+            message: The user's message
+
+        Returns:
+            The result of AdvancedChatbot.process_message
+        """
+        with self._locks[hash(session_id) % self.LOCK_STRIPES]:
+            for _ in range(self.MAX_ATTEMPTS):
+                state, version = self.backend.get_versioned(session_id)
+                session_chatbot = self.chatbot.for_session(state or SessionState(history_depth=self.history_depth))
+                archived = []
+                if self.archiver is not None:
+                    session_chatbot.turn_archiver = archived.append
+                result = session_chatbot.process_message(message)
+                if self.backend.put(session_id, session_chatbot.session_state(), version):
+                    break
+                self.conflicts += 1
+            else:
+                self.unsaved_turns += 1
+                logger.warning(f"Session {session_id} kept changing under {self.MAX_ATTEMPTS} attempts "
+                               f"of a turn; answering without storing it")
+                return result
+            for turn in archived:
+                self.archiver(session_id, turn)
+        return result
+
+    def reset(self, session_id: str) -> None:
+        """
+        Start a fresh conversation for a session.
+
+        Args:
+            session_id: The client session id
+        """
+        self.backend.delete(session_id)
@@ -0,0 +1,113 @@
+"""
+Command line tools for the Chatbot Application.
+
+The commands are registered on the app by create_app and run with the flask command,
+e.g. `flask --app wsgi rebuild-rollups`.
+"""
+
+import os
+from contextlib import contextmanager
+
+import click
+from flask import Flask, current_app
+from flask.cli import with_appcontext
+
+from chatbot_app import db
+from chatbot_app.models import EmotionRollup
+from chatbot_app.export import DEFAULT_CHUNK_SIZE, EXPORTERS, create_exporter, export_history
+from chatbot_app.rescore import DEFAULT_CHUNK_SIZE as RESCORE_CHUNK_SIZE, rescore_history
+
+
+@contextmanager
+def _emotion_scorer(chatbot, workers: int):
+    """
+    Get the callable scoring batches of messages for a bulk job.
+
+    Args:
+        chatbot: The app's chatbot, which scores the messages itself with one worker
+        workers: Number of processes scoring the messages
+
+    Yields:
+        Callable analyzing a list of messages like analyze_emotion_batch
+    """
+    if workers > 1:
+        from chatbot_app.chatbot.parallel_scorer import ParallelEmotionScorer
+        from chatbot_app.chatbot.rule_pack import DEFAULT_RULE_PACK_PATH
+        rules_path = current_app.config.get('CHAT_RULE_PACK') or DEFAULT_RULE_PACK_PATH
+        with ParallelEmotionScorer(workers=workers, rules_path=rules_path) as scorer:
+            yield scorer.score
+    else:
+        yield chatbot.analyze_emotion_batch
+
+
+@click.command('rebuild-rollups')
+@with_appcontext
+def rebuild_rollups_command():
+    """Recount the emotion rollups from the stored chat responses."""
+    with db.engine.begin() as conn:
+        total = EmotionRollup.rebuild(conn)
+    click.echo(f"Rebuilt the emotion rollups from {total} chat responses")
+
+
+@click.command('export-history')
+@click.argument('output')
+@click.option('--format', 'export_format', type=click.Choice(list(EXPORTERS)), default='csv', show_default=True,
+              help="gzip-compressed CSV file, or directory of columnar NumPy parts")
+@click.option('--chunk-size', type=click.IntRange(min=1), default=DEFAULT_CHUNK_SIZE, show_default=True,
+              help="Responses read, scored and written at a time")
+@click.option('--workers', type=click.IntRange(min=1), default=1, show_default=True,
+              help="Processes scoring the messages")
+@click.option('--resume/--restart', default=True, show_default=True,
+              help="Continue after the last exported id, or export everything again")
+@with_appcontext
+def export_history_command(output, export_format, chunk_size, workers, resume):
+    """Export the chat responses with their emotion score vectors to OUTPUT."""
+    # Imported here so that the other commands do not load the chatbot
+    from chatbot_app.routes.main import get_chatbot
+    chatbot = get_chatbot()
+    try:
+        exporter = create_exporter(export_format, output, chatbot.emotion_names, resume)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+
+    with db.engine.connect() as conn, _emotion_scorer(chatbot, workers) as score:
+        exported = export_history(conn, exporter, score, chatbot.emotion_index, chunk_size,
+                                  chatbot.scoring_checksum)
+    click.echo(f"Exported {exported} chat responses to {output} ({exporter.rows} in total)")
+
+
+@click.command('rescore-history')
+@click.option('--chunk-size', type=click.IntRange(min=1), default=RESCORE_CHUNK_SIZE, show_default=True,
+              help="Responses read, scored and updated at a time")
+@click.option('--workers', type=click.IntRange(min=1), default=1, show_default=True,
+              help="Processes scoring the messages")
+@click.option('--checkpoint', type=click.Path(dir_okay=False), default=None,
+              help="Progress file [default: rescore-checkpoint.json in the instance folder]")
+@click.option('--resume/--restart', default=True, show_default=True,
+              help="Continue after the last checkpointed id, or look at every response again")
+@with_appcontext
+def rescore_history_command(chunk_size, workers, checkpoint, resume):
+    """Re-score the chat responses scored with older emotion rules."""
+    # Imported here so that the other commands do not load the chatbot
+    from chatbot_app.routes.main import get_chatbot
+    chatbot = get_chatbot()
+    if checkpoint is None:
+        os.makedirs(current_app.instance_path, exist_ok=True)
+        checkpoint = os.path.join(current_app.instance_path, 'rescore-checkpoint.json')
+
+    with _emotion_scorer(chatbot, workers) as score:
+        stats = rescore_history(db.engine, score, chatbot.emotion_names, chatbot.scoring_checksum, checkpoint,
+                                chunk_size, resume)
+    click.echo(f"Re-scored {stats.rescored} chat responses, {stats.relabeled} with a new emotion")
+
+
+def register_commands(app: Flask) -> None:
+    """
+    Register the command line tools on an app.
+
+    Args:
+        app: The Flask app
+    """
+    app.cli.add_command(rebuild_rollups_command)
+    app.cli.add_command(export_history_command)
+    app.cli.add_command(rescore_history_command)
@@ -21,6 +21,33 @@ class Config:
     STATIC_FOLDER = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'chatbot_app', 'static')
     TEMPLATE_FOLDER = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'chatbot_app', 'templates')
 
+    # Per-session conversation state: 'memory' (one process) or 'sqlite' (shared by all workers)
+    CHAT_SESSION_BACKEND = os.getenv('CHAT_SESSION_BACKEND', 'memory')
+    CHAT_SESSION_DB = os.getenv('CHAT_SESSION_DB', 'chat_sessions.db')  # Relative to the instance folder
+    CHAT_SESSION_TTL = int(os.getenv('CHAT_SESSION_TTL', '1800'))  # Idle seconds before a session is dropped
+    CHAT_MAX_SESSIONS = int(os.getenv('CHAT_MAX_SESSIONS', '10000'))
+    CHAT_HISTORY_DEPTH = int(os.getenv('CHAT_HISTORY_DEPTH', '50'))  # Turns kept per session
+    # Store turns that fall out of a session's history in the archived_turn table
+    CHAT_ARCHIVE_TURNS = os.getenv('CHAT_ARCHIVE_TURNS', 'false').lower() in ('1', 'true', 'yes')
+    # Rule pack of the chatbot; empty for the pack shipped with the package
+    CHAT_RULE_PACK = os.getenv('CHAT_RULE_PACK', '')
+    # Build the chatbot when the app is created instead of on the first request; set by
+    # gunicorn.conf.py so that the master builds the rule tables once for all workers
+    CHAT_PRELOAD = os.getenv('CHAT_PRELOAD', 'false').lower() in ('1', 'true', 'yes')
+    # Store chat turns from a background thread instead of before replying
+    CHAT_WRITE_BEHIND = os.getenv('CHAT_WRITE_BEHIND', 'true').lower() in ('1', 'true', 'yes')
+    CHAT_WRITE_QUEUE_SIZE = int(os.getenv('CHAT_WRITE_QUEUE_SIZE', '10000'))  # Turns waiting to be stored
+    CHAT_WRITE_BATCH_SIZE = int(os.getenv('CHAT_WRITE_BATCH_SIZE', '100'))
+    # Seconds a request waits for room in a full queue before storing its turn itself
+    CHAT_WRITE_PUT_TIMEOUT = float(os.getenv('CHAT_WRITE_PUT_TIMEOUT', '0.5'))
+    # Store the score vector of every message next to its top emotion
+    CHAT_STORE_SCORES = os.getenv('CHAT_STORE_SCORES', 'true').lower() in ('1', 'true', 'yes')
+    # Seconds between two background database health checks
+    CHAT_HEALTH_INTERVAL = float(os.getenv('CHAT_HEALTH_INTERVAL', '30'))
+    # SQLite connection profile, see chatbot_app/sqlite_profile.py: 'wal' or 'default'
+    SQLITE_PROFILE = os.getenv('SQLITE_PROFILE', 'wal')
+    SQLITE_PRAGMAS = {}  # PRAGMAs overriding those of the profile
+
 class DevelopmentConfig(Config):
     """Development configuration."""
     DEBUG = True
@@ -30,6 +57,8 @@ class TestingConfig(Config):
     """Testing configuration."""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = os.getenv('TEST_DATABASE_URL', 'sqlite:///test.db')
+    # Tests create throwaway databases; keep SQLite's own settings
+    SQLITE_PROFILE = os.getenv('SQLITE_PROFILE', 'default')
 
 class ProductionConfig(Config):
     """Production configuration."""
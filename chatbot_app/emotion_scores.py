@@ -0,0 +1,92 @@
+"""
+Compact storage of emotion score vectors.
+
+A response's scores are stored as one float16 per emotion, in the order of a registered
+emotion index (see EmotionIndexVersion), packed into a blob: 68 bytes for 34 emotions.
+Decoding many rows joins their blobs and reads them as a single array, with no per-row
+parsing. float16 keeps about three significant digits, plenty for scores in [0, 1].
+"""
+
+import struct
+from typing import Dict, Iterable, Mapping, Optional, Sequence, Union
+
+import numpy as np
+
+# Little-endian float16, the same on every platform
+SCORE_DTYPE = np.dtype('<f2')
+
+
+def encode_scores(scores: Union[Mapping[str, float], Sequence[float]], emotion_names: Sequence[str]) -> bytes:
+    """
+    Pack a score vector into a blob.
+
+    Args:
+        scores: Scores by emotion, or a sequence in the order of emotion_names; emotions
+            missing from a mapping are stored as 0 and unknown ones are dropped
+        emotion_names: The emotion index the blob is written in
+
+    Returns:
+        The packed scores, 2 bytes per emotion
+
+    Raises:
+        ValueError: If a sequence does not have one score per emotion
+    """
+    if isinstance(scores, Mapping):
+        values = [float(scores.get(emotion, 0.0)) for emotion in emotion_names]
+    else:
+        values = [float(score) for score in scores]
+        if len(values) != len(emotion_names):
+            raise ValueError(f"Expected {len(emotion_names)} scores, got {len(values)}")
+    return struct.pack(f'<{len(values)}e', *values)
+
+
+def decode_scores(blob: bytes) -> np.ndarray:
+    """
+    Unpack a blob made by encode_scores.
+
+    Args:
+        blob: The packed scores
+
+    Returns:
+        float32 vector in the order of the blob's emotion index
+    """
+    return np.frombuffer(blob, dtype=SCORE_DTYPE).astype(np.float32)
+
+
+def decode_score_matrix(blobs: Iterable[Optional[bytes]], width: int) -> np.ndarray:
+    """
+    Unpack the blobs of many rows at once.
+
+    Args:
+        blobs: Packed scores of each row, all in the same emotion index; None for rows
+            without scores
+        width: Number of emotions of the index
+
+    Returns:
+        float32 array of shape (rows, width); rows without scores are NaN
+
+    Raises:
+        ValueError: If a blob does not hold width scores
+    """
+    blobs = list(blobs)
+    row_size = width * SCORE_DTYPE.itemsize
+    missing = bytes(np.full(width, np.nan, dtype=SCORE_DTYPE).data)
+    for blob in blobs:
+        if blob is not None and len(blob) != row_size:
+            raise ValueError(f"Expected {row_size} bytes of scores, got {len(blob)}")
+    data = b''.join(missing if blob is None else blob for blob in blobs)
+    return np.frombuffer(data, dtype=SCORE_DTYPE).reshape(len(blobs), width).astype(np.float32)
+
+
+def scores_to_dict(blob: bytes, emotion_names: Sequence[str]) -> Dict[str, float]:
+    """
+    Unpack a blob into scores by emotion.
+
+    Args:
+        blob: The packed scores
+        emotion_names: The emotion index the blob was written in
+
+    Returns:
+        Dict of emotion to score
+    """
+    return dict(zip(emotion_names, decode_scores(blob).tolist()))
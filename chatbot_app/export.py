@@ -0,0 +1,390 @@
+"""
+Bulk export of the chat history for offline analysis.
+
+Responses are read from chatbot_response in id order, a chunk at a time, and written with
+their emotion score vector: one float32 per emotion, in the order of the chatbot's rule
+pack. Two formats are supported:
+
+- 'csv': a gzip-compressed CSV file with one score column per emotion. Every chunk is
+  written as its own gzip member, so the file is valid after each chunk.
+- 'npz': a directory of columnar parts, one compressed NumPy archive per chunk, holding
+  the scores as an (n, emotions) float32 matrix. Text columns are stored like in Arrow,
+  as the concatenated UTF-8 bytes plus an array of offsets; load_npz_part decodes a part.
+
+Every score vector is the analysis of the message alone, without the conversation context
+it was sent in. Vectors stored with the responses are such scores; they are reused when
+they are in the same emotion order and were computed with the same rules, and the other
+messages are scored again. After each chunk a checkpoint records the last exported id,
+so an interrupted export resumes where it stopped instead of starting over.
+"""
+
+import csv
+import gzip
+import io
+import json
+import logging
+import os
+import tempfile
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from chatbot_app import db
+from chatbot_app.emotion_scores import decode_score_matrix
+from chatbot_app.models import ChatbotResponse, EmotionIndexVersion, RuleVersion
+
+logger = logging.getLogger(__name__)
+
+# Columns exported besides the scores, in file order
+EXPORT_COLUMNS = ('id', 'timestamp', 'emotion', 'user_message', 'bot_response')
+# Rows read, scored and written at a time
+DEFAULT_CHUNK_SIZE = 5000
+
+
+def write_atomic(path: str, data: bytes) -> None:
+    """Replace a file with new contents without ever leaving it half written."""
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', prefix='.export-')
+    try:
+        with os.fdopen(fd, 'wb') as temp_file:
+            temp_file.write(data)
+        # mkstemp creates the file readable by its owner only
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def score_matrix(results: Sequence[Dict], emotion_index: Dict[str, int]) -> np.ndarray:
+    """
+    Pack the score dicts of analysis results into a matrix.
+
+    Args:
+        results: Analysis results with a 'scores' dict each
+        emotion_index: Column of each emotion
+
+    Returns:
+        float32 array of shape (len(results), len(emotion_index)); emotions missing from a
+        result score 0
+    """
+    scores = np.zeros((len(results), len(emotion_index)), dtype=np.float32)
+    for row, result in enumerate(results):
+        for emotion, score in result['scores'].items():
+            column = emotion_index.get(emotion)
+            if column is not None:
+                scores[row, column] = score
+    return scores
+
+
+class HistoryExporter:
+    """
+    Base class of the export writers: keeps the checkpoint of an export.
+    """
+
+    def __init__(self, path: str, emotion_names: Sequence[str], resume: bool = True):
+        """
+        Initialize the exporter, loading the checkpoint of a previous run.
+
+        Args:
+            path: Output file or directory
+            emotion_names: Emotions of the score columns, in order
+            resume: Whether to continue a previous export to the same path
+
+        Raises:
+            ValueError: If the previous export used different emotions
+        """
+        self.path = path
+        self.emotion_names = tuple(emotion_names)
+        self.checkpoint = {'emotions': list(self.emotion_names), 'last_id': 0, 'rows': 0}
+
+        saved = self._load_checkpoint() if resume else None
+        if saved is not None:
+            if tuple(saved['emotions']) != self.emotion_names:
+                raise ValueError(f"{path} was exported with other emotions; export to a new path")
+            self.checkpoint = saved
+            logger.info(f"Resuming export to {path} after id {saved['last_id']}")
+
+    @property
+    def checkpoint_path(self) -> str:
+        """Path of the checkpoint file."""
+        raise NotImplementedError
+
+    @property
+    def last_id(self) -> int:
+        """Id of the last exported response."""
+        return self.checkpoint['last_id']
+
+    @property
+    def rows(self) -> int:
+        """Number of exported responses."""
+        return self.checkpoint['rows']
+
+    def _load_checkpoint(self) -> Optional[Dict]:
+        """Read the checkpoint of a previous run, if any."""
+        try:
+            with open(self.checkpoint_path) as checkpoint_file:
+                return json.load(checkpoint_file)
+        except FileNotFoundError:
+            return None
+
+    def _save_checkpoint(self, **changes) -> None:
+        """Record the progress of the export after a chunk is safely written."""
+        self.checkpoint.update(changes)
+        write_atomic(self.checkpoint_path, json.dumps(self.checkpoint).encode('utf-8'))
+
+    def write_chunk(self, rows: Sequence, scores: np.ndarray) -> None:
+        """
+        Write a chunk of responses and move the checkpoint past them.
+
+        Args:
+            rows: Rows with the EXPORT_COLUMNS, in id order
+            scores: Their score matrix
+        """
+        raise NotImplementedError
+
+
+class CsvExporter(HistoryExporter):
+    """
+    Writes a gzip-compressed CSV file, one gzip member per chunk.
+    """
+
+    def __init__(self, path: str, emotion_names: Sequence[str], resume: bool = True):
+        super().__init__(path, emotion_names, resume)
+        size = self.checkpoint.get('size', 0)
+        if size and (not os.path.exists(path) or os.path.getsize(path) < size):
+            raise ValueError(f"{path} changed since its checkpoint; use --restart to export again")
+        with open(path, 'ab') as output:
+            # Drop whatever a run interrupted after its last checkpoint wrote
+            output.truncate(size)
+        if size == 0:
+            header = list(EXPORT_COLUMNS) + [f"score_{emotion}" for emotion in self.emotion_names]
+            self._append(self._encode([header]))
+
+    @property
+    def checkpoint_path(self) -> str:
+        return self.path + '.checkpoint.json'
+
+    @staticmethod
+    def _encode(lines: List[List]) -> bytes:
+        """Format CSV lines as a complete gzip member."""
+        text = io.StringIO()
+        csv.writer(text).writerows(lines)
+        return gzip.compress(text.getvalue().encode('utf-8'), compresslevel=6)
+
+    def _append(self, data: bytes) -> None:
+        """Append a gzip member to the file and checkpoint the new size."""
+        with open(self.path, 'ab') as output:
+            output.write(data)
+            output.flush()
+            os.fsync(output.fileno())
+            size = output.tell()
+        self._save_checkpoint(size=size)
+
+    def write_chunk(self, rows: Sequence, scores: np.ndarray) -> None:
+        lines = []
+        for row, row_scores in zip(rows, scores.tolist()):
+            lines.append([
+                row.id,
+                row.timestamp.isoformat() if row.timestamp else '',
+                row.emotion or '',
+                row.user_message,
+                row.bot_response
+            ] + [f"{score:.6g}" for score in row_scores])
+        # The new size and the last id are checkpointed together
+        self.checkpoint.update(last_id=rows[-1].id, rows=self.rows + len(rows))
+        self._append(self._encode(lines))
+
+
+def _pack_strings(values: Sequence[Optional[str]]) -> Dict[str, np.ndarray]:
+    """Store strings as their concatenated UTF-8 bytes and the offset of each one."""
+    encoded = [(value or '').encode('utf-8') for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    return {'data': np.frombuffer(b''.join(encoded), dtype=np.uint8), 'offsets': offsets}
+
+
+def load_npz_part(path: str) -> Dict[str, object]:
+    """
+    Load a part written by NpzExporter.
+
+    Args:
+        path: Path of the part
+
+    Returns:
+        Dict with 'id' (int64), 'timestamp' (datetime64) and 'scores' (float32 matrix)
+        arrays, and lists of strings for the text columns
+    """
+    with np.load(path) as part:
+        columns = {name: part[name] for name in ('id', 'timestamp', 'scores')}
+        for name in ('emotion', 'user_message', 'bot_response'):
+            data = part[f"{name}_data"].tobytes()
+            offsets = part[f"{name}_offsets"].tolist()
+            columns[name] = [
+                data[start:end].decode('utf-8') for start, end in zip(offsets, offsets[1:])
+            ]
+    return columns
+
+
+class NpzExporter(HistoryExporter):
+    """
+    Writes a directory of columnar parts, one compressed NumPy archive per chunk.
+    """
+
+    def __init__(self, path: str, emotion_names: Sequence[str], resume: bool = True):
+        os.makedirs(path, exist_ok=True)
+        super().__init__(path, emotion_names, resume)
+        self.checkpoint.setdefault('parts', 0)
+
+    @property
+    def checkpoint_path(self) -> str:
+        return os.path.join(self.path, 'manifest.json')
+
+    def write_chunk(self, rows: Sequence, scores: np.ndarray) -> None:
+        part = self.checkpoint['parts']
+        columns = {
+            'id': np.array([row.id for row in rows], dtype=np.int64),
+            'timestamp': np.array([row.timestamp for row in rows], dtype='datetime64[us]'),
+            'scores': scores
+        }
+        for name in ('emotion', 'user_message', 'bot_response'):
+            for key, array in _pack_strings([getattr(row, name) for row in rows]).items():
+                columns[f"{name}_{key}"] = array
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer, **columns)
+        # A part left by an interrupted run is overwritten
+        write_atomic(os.path.join(self.path, f"part-{part:05d}.npz"), buffer.getvalue())
+        self._save_checkpoint(last_id=rows[-1].id, rows=self.rows + len(rows), parts=part + 1)
+
+
+EXPORTERS = {
+    'csv': CsvExporter,
+    'npz': NpzExporter
+}
+
+
+def create_exporter(export_format: str, path: str, emotion_names: Sequence[str],
+                    resume: bool = True) -> HistoryExporter:
+    """
+    Create the exporter of a format.
+
+    Args:
+        export_format: 'csv' or 'npz'
+        path: Output file or directory
+        emotion_names: Emotions of the score columns, in order
+        resume: Whether to continue a previous export to the same path
+
+    Returns:
+        The exporter
+
+    Raises:
+        ValueError: If the format is unknown, or the previous export cannot be resumed
+    """
+    if export_format not in EXPORTERS:
+        raise ValueError(
+            f"Unknown export format: {export_format}. Available formats: {', '.join(EXPORTERS)}"
+        )
+    return EXPORTERS[export_format](path, emotion_names, resume)
+
+
+def iter_response_chunks(conn, after_id: int = 0, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                         extra_columns: Sequence[str] = ()) -> Iterator[List]:
+    """
+    Read chat responses in id order, a chunk at a time.
+
+    Each chunk is one indexed range query on the primary key, so reading stays as fast at
+    the end of the table as at its start and holds one chunk in memory.
+
+    Args:
+        conn: SQLAlchemy connection
+        after_id: Only responses with a larger id are read
+        chunk_size: Maximum number of rows per chunk
+        extra_columns: Columns read besides the EXPORT_COLUMNS
+
+    Yields:
+        Lists of rows with the EXPORT_COLUMNS and extra_columns
+    """
+    table = ChatbotResponse.__table__
+    columns = [table.c[name] for name in EXPORT_COLUMNS + tuple(extra_columns)]
+    while True:
+        rows = conn.execute(
+            db.select(*columns).where(table.c.id > after_id).order_by(table.c.id).limit(chunk_size)
+        ).fetchall()
+        if not rows:
+            return
+        yield rows
+        after_id = rows[-1].id
+
+
+def stored_scores_versions(conn, emotion_names: Sequence[str],
+                           scoring_checksum: str) -> Optional[Tuple[int, int]]:
+    """
+    Get the versions tagging stored score vectors that an export can use as they are.
+
+    Args:
+        conn: SQLAlchemy connection
+        emotion_names: The emotions of the export, in order
+        scoring_checksum: scoring_checksum of the chatbot scoring the other messages
+
+    Returns:
+        The EmotionIndexVersion and RuleVersion ids, or None if no stored scores are in
+        that order and computed with those rules
+    """
+    inspector = db.inspect(conn)
+    if not all(inspector.has_table(model.__tablename__) for model in (EmotionIndexVersion, RuleVersion)):
+        return None
+    columns = {column['name'] for column in inspector.get_columns(ChatbotResponse.__tablename__)}
+    if not {'emotion_scores', 'scores_version', 'rules_version'} <= columns:
+        return None
+    scores_version = EmotionIndexVersion.version_for(conn, emotion_names, create=False)
+    rules_version = RuleVersion.version_for(conn, scoring_checksum, create=False)
+    if scores_version is None or rules_version is None:
+        return None
+    return scores_version, rules_version
+
+
+def export_history(conn, exporter: HistoryExporter, score: Callable[[List[str]], List[Dict]],
+                   emotion_index: Dict[str, int], chunk_size: int = DEFAULT_CHUNK_SIZE,
+                   scoring_checksum: Optional[str] = None) -> int:
+    """
+    Export the responses not exported yet, with their emotion scores.
+
+    Every vector scores the message without its conversation context. The vectors /chat
+    stored in the exporter's emotion order with the same rules as score are such scores
+    and are decoded; only the other messages are scored, so every vector of the export
+    comes from the same rules and the same method.
+
+    Args:
+        conn: SQLAlchemy connection
+        exporter: Writer of the output, which knows where the export stopped
+        score: Callable analyzing a list of messages, e.g. analyze_emotion_batch
+        emotion_index: Column of each emotion in the score matrix
+        chunk_size: Rows read, scored and written at a time
+        scoring_checksum: scoring_checksum of the chatbot behind score; without it every
+            message is scored
+
+    Returns:
+        Number of responses exported by this call
+    """
+    versions = None
+    if scoring_checksum:
+        versions = stored_scores_versions(conn, exporter.emotion_names, scoring_checksum)
+    extra_columns = ('emotion_scores', 'scores_version', 'rules_version') if versions is not None else ()
+    exported = reused = 0
+    for rows in iter_response_chunks(conn, exporter.last_id, chunk_size, extra_columns):
+        stored = [i for i, row in enumerate(rows)
+                  if versions is not None and (row.scores_version, row.rules_version) == versions]
+        missing = sorted(set(range(len(rows))) - set(stored))
+        scores = np.empty((len(rows), len(emotion_index)), dtype=np.float32)
+        if stored:
+            blobs = [rows[i].emotion_scores for i in stored]
+            scores[stored] = decode_score_matrix(blobs, len(emotion_index))
+        if missing:
+            results = score([rows[i].user_message for i in missing])
+            scores[missing] = score_matrix(results, emotion_index)
+        exporter.write_chunk(rows, scores)
+        exported += len(rows)
+        reused += len(stored)
+        logger.info(f"Exported {exporter.rows} chat responses up to id {exporter.last_id}")
+    if reused:
+        logger.info(f"Used the stored scores of {reused} of {exported} chat responses")
+    return exported
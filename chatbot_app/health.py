@@ -0,0 +1,171 @@
+"""
+Background health checking for the Chatbot Application.
+
+/chat used to run the full database diagnostics before storing every message. The
+HealthChecker runs a cheap probe on an interval from a background thread and caches the
+result, so a request only reads a boolean. The slow diagnostics run only when the probe
+result flips, which is when someone will want to know why. The first check runs on the
+thread as well, so creating a checker inside a request costs no database round trip.
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class HealthChecker:
+    """
+    Periodically probes a dependency and caches whether it is healthy.
+    """
+
+    def __init__(self, probe: Callable[[], None], diagnose: Optional[Callable[[], Any]] = None,
+                 interval: float = 30.0, name: str = 'database'):
+        """
+        Initialize the checker and start its thread, which runs the first check.
+
+        The dependency counts as healthy until the first check finishes.
+
+        Args:
+            probe: Cheap check raising an exception when the dependency is unhealthy
+            diagnose: Slow check returning diagnostic details, run when health flips
+            interval: Seconds between two probes
+            name: Name of the checked dependency, used in log messages
+
+        Raises:
+            ValueError: If interval is not positive
+        """
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+
+        self.probe = probe
+        self.diagnose = diagnose
+        self.interval = interval
+        self.name = name
+
+        self.healthy = True
+        self.checked_at: Optional[datetime] = None
+        self.changed_at: Optional[datetime] = None
+        self.latency_ms = 0.0
+        self.error: Optional[str] = None
+        self.diagnostics: Any = None
+        self.checks = 0
+        self.failures = 0
+        self.flips = 0
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._checked = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f'{name}-health', daemon=True)
+        self._thread.start()
+
+    def check(self) -> bool:
+        """
+        Run the probe once and update the cached status.
+
+        Returns:
+            True if the probe succeeded
+        """
+        start = time.perf_counter()
+        try:
+            self.probe()
+            healthy, error = True, None
+        except Exception as e:
+            healthy, error = False, str(e)
+        latency_ms = (time.perf_counter() - start) * 1000
+        now = datetime.utcnow()
+
+        # The first check counts as a flip so that its diagnostics are available
+        flipped = self.checked_at is None or healthy != self.healthy
+        diagnostics = self.diagnostics
+        if flipped:
+            if healthy:
+                logger.info(f"{self.name} is healthy")
+            else:
+                logger.error(f"{self.name} is unhealthy: {error}")
+            diagnostics = self._run_diagnostics()
+
+        with self._lock:
+            self.healthy = healthy
+            self.error = error
+            self.latency_ms = latency_ms
+            self.checked_at = now
+            self.checks += 1
+            if not healthy:
+                self.failures += 1
+            if flipped:
+                if self.changed_at is not None:
+                    self.flips += 1
+                self.changed_at = now
+                self.diagnostics = diagnostics
+        return healthy
+
+    def _run_diagnostics(self) -> Any:
+        """Run the slow diagnostics, if any, without letting them break the checker."""
+        if self.diagnose is None:
+            return None
+        try:
+            return self.diagnose()
+        except Exception as e:
+            logger.error(f"{self.name} diagnostics failed: {e}")
+            return {'error': str(e)}
+
+    def _run(self) -> None:
+        """Checker thread: probe at once, then every interval seconds until closed."""
+        self.check()
+        self._checked.set()
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for the first check to finish.
+
+        Args:
+            timeout: Seconds to wait at most, or None to wait until it finishes
+
+        Returns:
+            True if the first check has finished
+        """
+        return self._checked.wait(timeout)
+
+    def close(self, timeout: float = 5.0) -> None:
+        """
+        Stop the checker thread.
+
+        Args:
+            timeout: Seconds to wait for a running check to finish
+        """
+        self._stop.set()
+        self._thread.join(timeout)
+
+    def status(self, include_diagnostics: bool = False) -> Dict[str, Any]:
+        """
+        Get the cached status for monitoring.
+
+        Args:
+            include_diagnostics: Whether to add the details of the last diagnostics run
+
+        Returns:
+            Dict with the health flag, the time and latency of the last check and counters
+        """
+        with self._lock:
+            status = {
+                'name': self.name,
+                'healthy': self.healthy,
+                'checked_at': self.checked_at.isoformat() if self.checked_at else None,
+                'changed_at': self.changed_at.isoformat() if self.changed_at else None,
+                'age_seconds': (datetime.utcnow() - self.checked_at).total_seconds() if self.checked_at else None,
+                'latency_ms': self.latency_ms,
+                'error': self.error,
+                'interval': self.interval,
+                'checks': self.checks,
+                'failures': self.failures,
+                'flips': self.flips
+            }
+            if include_diagnostics:
+                status['diagnostics'] = self.diagnostics
+        return status
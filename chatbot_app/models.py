@@ -5,9 +5,16 @@ This module contains SQLAlchemy models for the application with
 security features for data validation and integrity.
 """
 
+import base64
+import hashlib
+import json
 import re
+import threading
 import traceback
+from collections import Counter
 from datetime import datetime
+from typing import NamedTuple, Tuple
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.event import listen
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import validates
@@ -18,6 +25,91 @@ from chatbot_app import db
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# SQL injection attempts removed by sanitize_text, in order, each with a literal the text
+# must contain for the pattern to match (None if there is no such literal)
+SQL_PATTERNS = (
+    (re.compile(r'(\s|^)(SELECT|INSERT|UPDATE|DELETE|DROP|ALTER|EXEC|UNION|CREATE|WHERE)(\s|$)', re.IGNORECASE), None),
+    (re.compile(r'(\s|^)(--)', re.IGNORECASE), '--'),
+    (re.compile(r'(;)', re.IGNORECASE), ';'),
+    (re.compile(r'(/\*.*\*/)', re.IGNORECASE), '/*'),
+)
+
+class ResponseTableSchema(NamedTuple):
+    """Detected layout of the chatbot_response table of one database."""
+    # Columns that exist in the table
+    columns: Tuple[str, ...]
+    # Columns written by inserts, in parameter order
+    fields: Tuple[str, ...]
+    # Prepared INSERT statement for fields
+    insert: object
+
+
+# Detected chatbot_response schema per engine, see ChatbotResponse.table_schema
+_table_schemas = {}
+_table_schemas_lock = threading.Lock()
+
+# Registered emotion index and rule versions per engine, see EmotionIndexVersion.version_for
+# and RuleVersion.version_for; one lock guards both caches
+_emotion_index_versions = {}
+_rule_versions = {}
+_version_cache_lock = threading.Lock()
+
+# Nullable chatbot_response columns added after the table was first deployed, with their
+# types, see ChatbotResponse.add_missing_columns
+ADDED_COLUMNS = (
+    ('emotion_scores', db.LargeBinary()),
+    ('scores_version', db.Integer()),
+    ('rules_version', db.Integer())
+)
+
+# Columns returned by ChatbotResponse.history_queries
+HISTORY_COLUMNS = ('id', 'user_message', 'bot_response', 'emotion', 'timestamp')
+
+
+def encode_cursor(timestamp, row_id):
+    """
+    Encode the position of a chat response in the history as an opaque cursor.
+
+    Args:
+        timestamp (datetime, optional): Timestamp of the response
+        row_id (int): ID of the response
+
+    Returns:
+        str: URL-safe cursor for ChatbotResponse.history_queries
+    """
+    position = [timestamp.isoformat() if timestamp else None, row_id]
+    return base64.urlsafe_b64encode(json.dumps(position).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor made by encode_cursor.
+
+    Args:
+        cursor (str): The cursor
+
+    Returns:
+        tuple: Timestamp (or None) and ID of the response
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        timestamp, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        if not isinstance(row_id, int):
+            raise ValueError("cursor id is not an integer")
+        return (datetime.fromisoformat(timestamp) if timestamp is not None else None), row_id
+    except (TypeError, ValueError, UnicodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+# Time buckets of the emotion rollups, each with the function truncating a timestamp to it
+ROLLUP_GRANULARITIES = {
+    'hour': lambda timestamp: timestamp.replace(minute=0, second=0, microsecond=0),
+    'day': lambda timestamp: timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+}
+# Rollup emotion of responses stored without one
+ROLLUP_NO_EMOTION = 'none'
+
 def sanitize_text(text):
     """
     Sanitize text input to prevent SQL injection and XSS attacks.
@@ -35,15 +127,9 @@ def sanitize_text(text):
     sanitized = text.replace("<", "&lt;").replace(">", "&gt;")
 
     # Remove any SQL injection attempts
-    sql_patterns = [
-        r'(\s|^)(SELECT|INSERT|UPDATE|DELETE|DROP|ALTER|EXEC|UNION|CREATE|WHERE)(\s|$)',
-        r'(\s|^)(--)',
-        r'(;)',
-        r'(/\*.*\*/)'
-    ]
-
-    for pattern in sql_patterns:
-        sanitized = re.sub(pattern, ' ', sanitized, flags=re.IGNORECASE)
+    for pattern, literal in SQL_PATTERNS:
+        if literal is None or literal in sanitized:
+            sanitized = pattern.sub(' ', sanitized)
 
     return sanitized.strip()
 
@@ -61,6 +147,12 @@ class ChatbotResponse(db.Model):
     ip_address = db.Column(db.String(45), nullable=True)
     # Add a flag for potentially problematic content
     flagged = db.Column(db.Boolean, default=False)
+    # Packed score vector of the message (see chatbot_app/emotion_scores.py) and the
+    # EmotionIndexVersion giving the order of its emotions
+    emotion_scores = db.Column(db.LargeBinary, nullable=True)
+    scores_version = db.Column(db.Integer, nullable=True)
+    # RuleVersion the emotion and scores were computed with, see chatbot_app/rescore.py
+    rules_version = db.Column(db.Integer, nullable=True)
 
     @validates('user_message')
     def validate_user_message(self, key, message):
@@ -140,6 +232,211 @@ class ChatbotResponse(db.Model):
 
         return instance
 
+    @staticmethod
+    def _table_columns(conn):
+        """
+        Get the columns of the chatbot_response table, creating the table if it does not exist.
+
+        The table is created in the caller's transaction, which commits it with its insert.
+
+        Args:
+            conn: SQLAlchemy connection
+
+        Returns:
+            list: Names of the columns that exist in the database
+        """
+        # Check if table exists
+        inspector = db.inspect(conn)
+        if not inspector.has_table('chatbot_response'):
+            # Table doesn't exist, create it with minimal columns
+            logger.info("Table 'chatbot_response' doesn't exist. Creating it.")
+            conn.execute(db.text("""
+                CREATE TABLE IF NOT EXISTS chatbot_response (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_message TEXT NOT NULL,
+                    bot_response TEXT NOT NULL,
+                    emotion VARCHAR(50),
+                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+            """))
+
+        # Get columns that exist in the table
+        return [column['name'] for column in inspector.get_columns('chatbot_response')]
+
+    @classmethod
+    def table_schema(cls, conn):
+        """
+        Get the schema of the chatbot_response table, detecting it on first use per engine.
+
+        Inspecting the table costs several PRAGMA queries, so the columns and the INSERT
+        statement for them are kept until invalidate_schema_cache is called. Legacy tables
+        lacking optional columns get an INSERT without them.
+
+        Args:
+            conn: SQLAlchemy connection; the table is created through it if it does not exist
+
+        Returns:
+            ResponseTableSchema: The detected columns and prepared INSERT statement
+        """
+        engine = conn.engine
+        schema = _table_schemas.get(engine)
+        if schema is None:
+            columns = tuple(cls._table_columns(conn))
+            # Stored responses are counted in the rollups in the same transaction
+            EmotionRollup.__table__.create(conn, checkfirst=True)
+            EmotionIndexVersion.__table__.create(conn, checkfirst=True)
+            RuleVersion.__table__.create(conn, checkfirst=True)
+            # Only the columns that exist in the table, in a fixed order for every row
+            fields = ('user_message', 'bot_response') + tuple(
+                field for field in ('emotion', 'ip_address', 'timestamp', 'emotion_scores', 'scores_version',
+                              'rules_version')
+                if field in columns
+            )
+            # Use named parameters in the format :param_name
+            placeholders = [f":{field}" for field in fields]
+            insert = db.text(f"INSERT INTO chatbot_response ({', '.join(fields)}) VALUES ({', '.join(placeholders)})")
+            if 'timestamp' in fields:
+                # Store timestamps in the same format as the model, which queries compare against
+                insert = insert.bindparams(db.bindparam('timestamp', type_=db.DateTime))
+            if 'emotion_scores' in fields:
+                insert = insert.bindparams(db.bindparam('emotion_scores', type_=db.LargeBinary))
+            schema = ResponseTableSchema(columns, fields, insert)
+            with _table_schemas_lock:
+                _table_schemas[engine] = schema
+        return schema
+
+    @staticmethod
+    def invalidate_schema_cache(engine=None):
+        """
+        Forget detected table schemas, e.g. after a migration changed the table.
+
+        Args:
+            engine: SQLAlchemy engine whose schema to forget; all engines if None
+        """
+        with _table_schemas_lock:
+            if engine is None:
+                _table_schemas.clear()
+            else:
+                _table_schemas.pop(engine, None)
+        # A version registered in a rolled back transaction does not exist
+        with _version_cache_lock:
+            for versions in (_emotion_index_versions, _rule_versions):
+                for key in list(versions):
+                    if engine is None or key[0] is engine:
+                        del versions[key]
+
+    @classmethod
+    def add_missing_columns(cls, conn):
+        """
+        Add the ADDED_COLUMNS missing from an existing chatbot_response table.
+
+        create_all does not change existing tables, so databases created before these
+        columns existed are upgraded in place. The columns are nullable and left empty for
+        existing rows.
+
+        Args:
+            conn: SQLAlchemy connection, committed by the caller
+
+        Returns:
+            list: Names of the added columns
+        """
+        inspector = db.inspect(conn)
+        if not inspector.has_table(cls.__tablename__):
+            return []
+        existing = {column['name'] for column in inspector.get_columns(cls.__tablename__)}
+        added = []
+        for name, column_type in ADDED_COLUMNS:
+            if name not in existing:
+                conn.execute(db.text(
+                    f"ALTER TABLE {cls.__tablename__} ADD COLUMN {name} {column_type.compile(dialect=conn.dialect)}"
+                ))
+                added.append(name)
+        if added:
+            logger.info(f"Added columns to {cls.__tablename__}: {', '.join(added)}")
+            cls.invalidate_schema_cache(conn.engine)
+        return added
+
+    @classmethod
+    def save_many(cls, rows, session=None, emotion_names=None, scoring_checksum=None):
+        """
+        Save many chat responses with one multi-row insert in a single transaction.
+
+        The rows are validated and sanitized like in save_compatible, then written with a
+        single executemany of one prepared INSERT statement, so either all of them are
+        stored or none.
+
+        Args:
+            rows (list): Dicts with user_message and bot_response, and optionally emotion,
+                ip_address, timestamp and scores (by emotion, or in emotion_names order)
+            session: SQLAlchemy session (defaults to db.session)
+            emotion_names (tuple, optional): Emotion index the scores are stored in; scores
+                are not stored without it
+            scoring_checksum (str, optional): scoring_checksum of the chatbot that analyzed
+                the messages; rows with stored scores are tagged with its RuleVersion
+
+        Returns:
+            int: Number of inserted rows
+
+        Raises:
+            ValueError: If a row has an empty message or response; nothing is written
+            SQLAlchemyError: If the insert fails; the transaction is rolled back
+        """
+        if not rows:
+            return 0
+        if session is None:
+            session = db.session
+
+        conn = session.connection()
+        try:
+            schema = cls.table_schema(conn)
+            now = datetime.utcnow()
+            params = []
+            counted = []
+            scores_version = None
+            if emotion_names and 'emotion_scores' in schema.fields:
+                from chatbot_app.emotion_scores import encode_scores
+                scores_version = EmotionIndexVersion.version_for(conn, emotion_names)
+            rules_version = None
+            if scoring_checksum and 'rules_version' in schema.fields:
+                rules_version = RuleVersion.version_for(conn, scoring_checksum)
+            for position, row in enumerate(rows):
+                user_message = row.get('user_message')
+                bot_response = row.get('bot_response')
+                if not user_message:
+                    raise ValueError(f"Row {position}: user message cannot be empty")
+                if not bot_response:
+                    raise ValueError(f"Row {position}: bot response cannot be empty")
+
+                emotion = row.get('emotion')
+                values = {
+                    'user_message': sanitize_text(user_message[:5000]),
+                    'bot_response': sanitize_text(bot_response[:5000]),
+                    'emotion': sanitize_text(emotion[:50]) if emotion else None,
+                    'ip_address': row.get('ip_address'),
+                    'timestamp': row.get('timestamp') or now,
+                    'emotion_scores': None,
+                    'scores_version': None,
+                    'rules_version': None
+                }
+                scores = row.get('scores')
+                if scores_version is not None and scores is not None and len(scores):
+                    values['emotion_scores'] = encode_scores(scores, emotion_names)
+                    values['scores_version'] = scores_version
+                    values['rules_version'] = rules_version
+                params.append({field: values[field] for field in schema.fields})
+                counted.append((values['emotion'], values['timestamp']))
+
+            conn.execute(schema.insert, params)
+            EmotionRollup.record(conn, counted)
+            session.commit()
+        except Exception:
+            session.rollback()
+            # The table may have changed under the cached schema
+            cls.invalidate_schema_cache(conn.engine)
+            raise
+
+        return len(params)
+
     @classmethod
     def save_compatible(cls, session, user_message, bot_response, emotion=None, ip_address=None):
         """
@@ -169,57 +466,31 @@ class ChatbotResponse(db.Model):
         bot_response = sanitize_text(bot_response[:5000])
         emotion = sanitize_text(emotion[:50]) if emotion else None
 
+        engine = None
         try:
             # Get the actual columns in the database table
             with session.connection() as conn:
-                # Check if table exists
-                inspector = db.inspect(conn)
-                if not inspector.has_table('chatbot_response'):
-                    # Table doesn't exist, create it with minimal columns
-                    logger.info("Table 'chatbot_response' doesn't exist. Creating it.")
-                    conn.execute(db.text("""
-                        CREATE TABLE IF NOT EXISTS chatbot_response (
-                            id INTEGER PRIMARY KEY AUTOINCREMENT,
-                            user_message TEXT NOT NULL,
-                            bot_response TEXT NOT NULL,
-                            emotion VARCHAR(50),
-                            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-                        )
-                    """))
-                    conn.commit()
-
-                # Get columns that exist in the table
-                columns = [column['name'] for column in inspector.get_columns('chatbot_response')]
-
-                # Build SQL based on existing columns
-                fields = ['user_message', 'bot_response']
-                values = {'user_message': user_message, 'bot_response': bot_response}
-
-                if 'emotion' in columns and emotion:
-                    fields.append('emotion')
-                    values['emotion'] = emotion
-
-                if 'ip_address' in columns and ip_address:
-                    fields.append('ip_address')
-                    values['ip_address'] = ip_address
-
-                if 'timestamp' in columns:
-                    from datetime import datetime
-                    fields.append('timestamp')
-                    values['timestamp'] = datetime.utcnow()
-
-                # Execute the insert
-                # Use named parameters in the format :param_name
-                placeholders = [f":{field}" for field in fields]
-                sql = f"INSERT INTO chatbot_response ({', '.join(fields)}) VALUES ({', '.join(placeholders)})"
-                result = conn.execute(db.text(sql), values)
+                engine = conn.engine
+                # Prepared INSERT for the columns that exist in the table
+                schema = cls.table_schema(conn)
+
+                values = {
+                    'user_message': user_message,
+                    'bot_response': bot_response,
+                    'emotion': emotion,
+                    'ip_address': ip_address or None,
+                    'timestamp': datetime.utcnow(),
+                    'emotion_scores': None,
+                    'scores_version': None,
+                    'rules_version': None
+                }
+                result = conn.execute(schema.insert, {field: values[field] for field in schema.fields})
+                EmotionRollup.record(conn, [(emotion, values['timestamp'])])
                 conn.commit()
 
                 # Get the ID of the inserted record
                 if result.rowcount > 0:
-                    # Get the last inserted ID
-                    result = conn.execute(db.text("SELECT last_insert_rowid()"))
-                    row_id = result.scalar()
+                    row_id = result.lastrowid
                     logger.info(f"Successfully saved chat entry to database with ID: {row_id}")
                     return row_id
                 else:
@@ -229,6 +500,9 @@ class ChatbotResponse(db.Model):
         except Exception as e:
             logger.error(f"Error saving to database: {e}")
             logger.error(traceback.format_exc())
+            # The table may have changed under the cached schema
+            if engine is not None:
+                cls.invalidate_schema_cache(engine)
             return None
 
     @staticmethod
@@ -294,3 +568,416 @@ class ChatbotResponse(db.Model):
                 'connection_successful': False,
                 'error': f"Unexpected error in test_db_connection: {str(e)}"
             }
+
+    @classmethod
+    def history_queries(cls, after=None, limit=None):
+        """
+        Build the queries listing chat responses, most recent first, by keyset pagination.
+
+        Rows are ordered by (timestamp, id) descending, so a page starts with an index
+        seek wherever it is in the table instead of skipping the rows before it. Rows
+        without a timestamp come last, by id; they are listed by a second query, since a
+        single condition covering both cases makes the database scan the index from the
+        start. Only the HISTORY_COLUMNS are selected, as plain rows rather than models.
+
+        Args:
+            after (tuple, optional): Decoded cursor of the last row already returned
+            limit (int, optional): Maximum number of rows of each query
+
+        Returns:
+            list: Select statements to run in order until enough rows are returned
+        """
+        table = cls.__table__
+        columns = [table.c[name] for name in HISTORY_COLUMNS]
+        timed = db.select(*columns).where(table.c.timestamp.is_not(None)).order_by(
+            table.c.timestamp.desc(), table.c.id.desc()
+        )
+        untimed = db.select(*columns).where(table.c.timestamp.is_(None)).order_by(table.c.id.desc())
+
+        if after is not None:
+            timestamp, row_id = after
+            if timestamp is None:
+                timed = None
+                untimed = untimed.where(table.c.id < row_id)
+            else:
+                timed = timed.where(
+                    table.c.timestamp <= timestamp,
+                    db.or_(table.c.timestamp < timestamp, table.c.id < row_id)
+                )
+
+        queries = [query for query in (timed, untimed) if query is not None]
+        if limit is not None:
+            queries = [query.limit(limit) for query in queries]
+        return queries
+
+
+def _count_inserted_response(mapper, connection, target):
+    """Count a response stored through the ORM in the emotion rollups."""
+    EmotionRollup.record(connection, [(target.emotion, target.timestamp)])
+
+
+listen(ChatbotResponse, 'after_insert', _count_inserted_response)
+
+
+class EmotionIndexVersion(db.Model):
+    """
+    Order of the emotions in stored score vectors.
+
+    Score blobs only hold numbers; the version stored next to them tells which emotion
+    each number belongs to, so that rule packs can add or reorder emotions without making
+    older rows unreadable.
+    """
+
+    __tablename__ = 'emotion_index_version'
+
+    id = db.Column(db.Integer, primary_key=True)
+    # SHA-256 of the emotion names joined by newlines
+    checksum = db.Column(db.String(64), nullable=False, unique=True)
+    emotions = db.Column(db.Text, nullable=False)  # JSON list of emotion names
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        """String representation of the model."""
+        return f"<EmotionIndexVersion {self.id}: {len(json.loads(self.emotions))} emotions>"
+
+    @staticmethod
+    def index_checksum(emotion_names):
+        """Get the checksum identifying an emotion index."""
+        return hashlib.sha256('\n'.join(emotion_names).encode('utf-8')).hexdigest()
+
+    @classmethod
+    def version_for(cls, conn, emotion_names, create=True):
+        """
+        Get the version id of an emotion index, registering it on first use.
+
+        Args:
+            conn: SQLAlchemy connection; a new version is inserted in its transaction
+            emotion_names (tuple): The emotions, in score vector order
+            create (bool): Whether to register an unknown index
+
+        Returns:
+            int: The version id, or None if the index is unknown and create is False
+        """
+        emotion_names = tuple(emotion_names)
+        key = (conn.engine, emotion_names)
+        with _version_cache_lock:
+            version = _emotion_index_versions.get(key)
+        if version is None:
+            table = cls.__table__
+            checksum = cls.index_checksum(emotion_names)
+            version = conn.execute(db.select(table.c.id).where(table.c.checksum == checksum)).scalar()
+            if version is None:
+                if not create:
+                    return None
+                version = conn.execute(table.insert().values(
+                    checksum=checksum, emotions=json.dumps(emotion_names), created_at=datetime.utcnow()
+                )).inserted_primary_key[0]
+                logger.info(f"Registered emotion index version {version} with {len(emotion_names)} emotions")
+            with _version_cache_lock:
+                _emotion_index_versions[key] = version
+        return version
+
+    @classmethod
+    def emotion_names(cls, conn, version):
+        """
+        Get the emotions of a version, in score vector order.
+
+        Args:
+            conn: SQLAlchemy connection
+            version (int): The version id
+
+        Returns:
+            tuple: The emotion names
+
+        Raises:
+            ValueError: If the version does not exist
+        """
+        with _version_cache_lock:
+            for (engine, emotion_names), known_version in _emotion_index_versions.items():
+                if engine is conn.engine and known_version == version:
+                    return emotion_names
+        emotions = conn.execute(
+            db.select(cls.__table__.c.emotions).where(cls.__table__.c.id == version)
+        ).scalar()
+        if emotions is None:
+            raise ValueError(f"Unknown emotion index version: {version}")
+        emotion_names = tuple(json.loads(emotions))
+        with _version_cache_lock:
+            _emotion_index_versions[(conn.engine, emotion_names)] = version
+        return emotion_names
+
+
+class RuleVersion(db.Model):
+    """
+    Set of emotion rules that stored responses were scored with.
+
+    The checksum covers the scoring code version, the rule pack and the overrides (see
+    AdvancedChatbot.scoring_checksum); responses tagged with an older version are the ones
+    the re-scoring job updates.
+    """
+
+    __tablename__ = 'rule_version'
+
+    id = db.Column(db.Integer, primary_key=True)
+    checksum = db.Column(db.String(64), nullable=False, unique=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        """String representation of the model."""
+        return f"<RuleVersion {self.id}: {self.checksum[:12]}>"
+
+    @classmethod
+    def version_for(cls, conn, checksum, create=True):
+        """
+        Get the version id of a scoring checksum, registering it on first use.
+
+        Args:
+            conn: SQLAlchemy connection; a new version is inserted in its transaction
+            checksum (str): The scoring checksum
+            create (bool): Whether to register an unknown checksum
+
+        Returns:
+            int: The version id, or None if the checksum is unknown and create is False
+        """
+        key = (conn.engine, checksum)
+        with _version_cache_lock:
+            version = _rule_versions.get(key)
+        if version is None:
+            table = cls.__table__
+            version = conn.execute(db.select(table.c.id).where(table.c.checksum == checksum)).scalar()
+            if version is None:
+                if not create:
+                    return None
+                version = conn.execute(table.insert().values(
+                    checksum=checksum, created_at=datetime.utcnow()
+                )).inserted_primary_key[0]
+                logger.info(f"Registered rule version {version} ({checksum[:12]})")
+            with _version_cache_lock:
+                _rule_versions[key] = version
+        return version
+
+
+class EmotionRollup(db.Model):
+    """
+    Number of chat responses per emotion and time bucket.
+
+    The counts are updated in the transaction storing the responses, so distribution
+    queries read a few rows per bucket instead of scanning chatbot_response.
+    """
+
+    __tablename__ = 'emotion_rollup'
+    __table_args__ = (
+        # Serves the upserts and the queries over a time range
+        db.UniqueConstraint('granularity', 'bucket', 'emotion', name='uq_emotion_rollup_bucket'),
+        # Serves the queries for given emotions
+        db.Index('ix_emotion_rollup_emotion_bucket', 'granularity', 'emotion', 'bucket'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    granularity = db.Column(db.String(8), nullable=False)
+    bucket = db.Column(db.DateTime, nullable=False)
+    emotion = db.Column(db.String(50), nullable=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        """String representation of the model."""
+        return f"<EmotionRollup {self.granularity} {self.bucket}: {self.emotion}={self.count}>"
+
+    @staticmethod
+    def bucket_counts(responses, counts=None):
+        """
+        Count responses per rollup bucket.
+
+        Args:
+            responses (iterable): (emotion, timestamp) pairs, or (emotion, timestamp, count)
+                triples for groups of responses; those without a timestamp are not counted
+            counts (Counter, optional): Counter to add to
+
+        Returns:
+            Counter: Counts keyed by (granularity, bucket, emotion)
+        """
+        if counts is None:
+            counts = Counter()
+        for emotion, timestamp, *count in responses:
+            if timestamp is None:
+                continue
+            emotion = emotion or ROLLUP_NO_EMOTION
+            for granularity, truncate in ROLLUP_GRANULARITIES.items():
+                counts[(granularity, truncate(timestamp), emotion)] += count[0] if count else 1
+        return counts
+
+    @classmethod
+    def record(cls, conn, responses):
+        """
+        Add stored responses to the rollups, in the caller's transaction.
+
+        Args:
+            conn: SQLAlchemy connection
+            responses (iterable): (emotion, timestamp) pairs of the stored responses, or
+                (emotion, timestamp, count) triples; a negative count removes responses
+
+        Returns:
+            int: Number of rollup rows updated or created
+        """
+        counts = cls.bucket_counts(responses)
+        if not counts:
+            return 0
+        rows = [
+            {'granularity': granularity, 'bucket': bucket, 'emotion': emotion, 'count': count}
+            for (granularity, bucket, emotion), count in counts.items()
+        ]
+        upsert = _rollup_upsert(conn.dialect)
+        if upsert is not None:
+            conn.execute(upsert, rows)
+        else:
+            # Backends without an upsert update the existing rows and insert the others
+            for row in rows:
+                if conn.execute(_ROLLUP_UPDATE, {f"b_{key}": value for key, value in row.items()}).rowcount == 0:
+                    conn.execute(cls.__table__.insert(), row)
+        return len(counts)
+
+    @classmethod
+    def rebuild(cls, conn, batch_size=10000):
+        """
+        Recount the rollups from every stored response, e.g. to backfill existing data.
+
+        The responses are read in batches, holding only the counts in memory. Run it in
+        one transaction so that responses stored meanwhile are neither lost nor counted
+        twice.
+
+        Args:
+            conn: SQLAlchemy connection
+            batch_size (int): Responses read from the database at a time
+
+        Returns:
+            int: Number of responses read
+        """
+        table = ChatbotResponse.__table__
+        conn.execute(cls.__table__.delete())
+        # Let the database count per hour where it can truncate timestamps itself
+        hour = table.c.timestamp
+        if conn.dialect.name == 'sqlite':
+            # The text format of DateTime columns on SQLite
+            hour = db.type_coerce(db.func.strftime('%Y-%m-%d %H:00:00.000000', hour), db.DateTime)
+        elif conn.dialect.name == 'postgresql':
+            hour = db.type_coerce(db.func.date_trunc('hour', hour), db.DateTime)
+        hour = hour.label('hour')
+        result = conn.execution_options(yield_per=batch_size).execute(
+            db.select(table.c.emotion, hour, db.func.count()).group_by(table.c.emotion, hour)
+        )
+        counts = Counter()
+        total = 0
+        for rows in result.partitions():
+            cls.bucket_counts(rows, counts)
+            total += sum(row[2] for row in rows)
+        if counts:
+            conn.execute(cls.__table__.insert(), [
+                {'granularity': granularity, 'bucket': bucket, 'emotion': emotion, 'count': count}
+                for (granularity, bucket, emotion), count in counts.items()
+            ])
+        logger.info(f"Rebuilt {len(counts)} emotion rollups from {total} chat responses")
+        return total
+
+    @classmethod
+    def distribution(cls, conn, granularity='day', start=None, end=None, emotions=None):
+        """
+        Get the number of responses per emotion and time bucket.
+
+        Args:
+            conn: SQLAlchemy connection
+            granularity (str): 'hour' or 'day'
+            start (datetime, optional): First bucket to include
+            end (datetime, optional): Buckets before this time are included
+            emotions (list, optional): Emotions to include; all if None
+
+        Returns:
+            list: (bucket, emotion, count) rows ordered by bucket
+
+        Raises:
+            ValueError: If the granularity is unknown
+        """
+        if granularity not in ROLLUP_GRANULARITIES:
+            raise ValueError(f"Unknown granularity: {granularity}. Available: {', '.join(ROLLUP_GRANULARITIES)}")
+        table = cls.__table__
+        query = db.select(table.c.bucket, table.c.emotion, table.c.count).where(
+            table.c.granularity == granularity
+        ).where(table.c.count != 0).order_by(table.c.bucket, table.c.emotion)
+        if start is not None:
+            query = query.where(table.c.bucket >= ROLLUP_GRANULARITIES[granularity](start))
+        if end is not None:
+            query = query.where(table.c.bucket < end)
+        if emotions:
+            query = query.where(table.c.emotion.in_(emotions))
+        return conn.execute(query).fetchall()
+
+
+def _rollup_upsert(dialect):
+    """
+    Get the INSERT adding counts to existing rollup rows, for the backends that have one.
+
+    Args:
+        dialect: SQLAlchemy dialect of the connection
+
+    Returns:
+        INSERT ... ON CONFLICT DO UPDATE statement, or None on other backends and on
+        SQLite before 3.24
+    """
+    if dialect.name == 'postgresql':
+        insert = postgresql.insert
+    elif dialect.name == 'sqlite' and (dialect.server_version_info or (0,)) >= (3, 24):
+        insert = sqlite.insert
+    else:
+        return None
+    table = EmotionRollup.__table__
+    statement = insert(table)
+    return statement.on_conflict_do_update(
+        index_elements=['granularity', 'bucket', 'emotion'],
+        set_={'count': table.c.count + statement.excluded['count']}
+    )
+
+
+# Adds a count to an existing rollup row, for backends without an upsert; bound names
+# must differ from the column names of an UPDATE ... SET
+_ROLLUP_UPDATE = EmotionRollup.__table__.update().where(
+    EmotionRollup.__table__.c.granularity == db.bindparam('b_granularity'),
+    EmotionRollup.__table__.c.bucket == db.bindparam('b_bucket'),
+    EmotionRollup.__table__.c.emotion == db.bindparam('b_emotion')
+).values(count=EmotionRollup.__table__.c.count + db.bindparam('b_count'))
+
+
+class ArchivedTurn(db.Model):
+    """Conversation turn spilled from the bounded history of a chat session."""
+
+    __tablename__ = 'archived_turn'
+
+    id = db.Column(db.Integer, primary_key=True)
+    session_id = db.Column(db.String(128), nullable=False, index=True)
+    user_message = db.Column(db.Text, nullable=False)
+    bot_response = db.Column(db.Text, nullable=False)
+    emotion = db.Column(db.String(50))
+    topic = db.Column(db.String(50))
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+    def __repr__(self):
+        """String representation of the model."""
+        return f"<ArchivedTurn {self.id}: {self.session_id}>"
+
+    @classmethod
+    def from_turn(cls, session_id, turn):
+        """
+        Create an archived turn from a conversation memory entry.
+
+        Args:
+            session_id (str): The chat session id
+            turn (dict): Conversation memory entry with user, bot, emotion and topic
+
+        Returns:
+            ArchivedTurn: A new, unsaved instance
+        """
+        return cls(
+            session_id=session_id,
+            user_message=sanitize_text(turn['user'])[:5000],
+            bot_response=sanitize_text(turn['bot'])[:5000],
+            emotion=(turn.get('emotion') or '')[:50] or None,
+            topic=(turn.get('topic') or '')[:50] or None
+        )
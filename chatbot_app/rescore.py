@@ -0,0 +1,136 @@
+"""
+Offline re-scoring of the stored chat history after the emotion rules change.
+
+Every stored response is tagged with the RuleVersion its emotion and scores were computed
+with. When the rule pack, the overrides or the scoring code change, the chatbot gets a new
+scoring checksum, and rescore_history updates the responses tagged with any other version:
+they are read in id order, a chunk at a time, scored in bulk, and written back with one
+executemany UPDATE per chunk, together with the matching emotion rollup corrections.
+
+Responses without a version were never scored by the rules (drink flow turns, error
+fallbacks, rows stored before versions existed) and keep their labels.
+
+After each chunk a checkpoint records the last id, so an interrupted run resumes where it
+stopped. Rows are tagged in the same transaction as their new labels, so a rerun with the
+same rules finds nothing to update.
+"""
+
+import json
+import logging
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence
+
+from chatbot_app import db
+from chatbot_app.emotion_scores import encode_scores
+from chatbot_app.export import write_atomic
+from chatbot_app.models import ChatbotResponse, EmotionIndexVersion, EmotionRollup, RuleVersion
+
+logger = logging.getLogger(__name__)
+
+# Rows read, scored and updated at a time
+DEFAULT_CHUNK_SIZE = 2000
+
+
+class RescoreStats(NamedTuple):
+    """Outcome of a re-scoring run."""
+    # Responses given new scores and tagged with the current rule version
+    rescored: int
+    # Responses among them whose emotion label changed
+    relabeled: int
+    # Id of the last response looked at
+    last_id: int
+
+
+def _load_checkpoint(path: str, scoring_checksum: str) -> Optional[Dict]:
+    """Read the checkpoint of a previous run with the same rules, if any."""
+    try:
+        with open(path) as checkpoint_file:
+            checkpoint = json.load(checkpoint_file)
+    except FileNotFoundError:
+        return None
+    if checkpoint.get('scoring') != scoring_checksum:
+        logger.info(f"Rules changed since the checkpoint in {path}; re-scoring from the first response")
+        return None
+    return checkpoint
+
+
+def rescore_history(engine, score: Callable[[List[str]], List[Dict]], emotion_names: Sequence[str],
+                    scoring_checksum: str, checkpoint_path: Optional[str] = None,
+                    chunk_size: int = DEFAULT_CHUNK_SIZE, resume: bool = True) -> RescoreStats:
+    """
+    Re-score the stored responses that were scored with other rules.
+
+    Messages are scored without conversation context, like the vectors /chat stores; the
+    labels /chat stored did take the session into account. Rows tagged with the current
+    version and rows without a version are left alone.
+
+    Args:
+        engine: SQLAlchemy engine; each chunk is updated in its own transaction
+        score: Callable analyzing a list of messages, e.g. analyze_emotion_batch
+        emotion_names: Emotion order of the score vectors returned by score
+        scoring_checksum: scoring_checksum of the chatbot behind score
+        checkpoint_path: JSON file recording the progress, or None to scan every response
+        chunk_size: Rows read, scored and updated at a time
+        resume: Whether to continue after the last id of the checkpoint
+
+    Returns:
+        RescoreStats of this run
+    """
+    checkpoint = {'scoring': scoring_checksum, 'last_id': 0, 'rows': 0}
+    if checkpoint_path and resume:
+        saved = _load_checkpoint(checkpoint_path, scoring_checksum)
+        if saved is not None:
+            checkpoint = saved
+            logger.info(f"Resuming re-scoring after id {saved['last_id']}")
+
+    with engine.begin() as conn:
+        # Older databases get the version columns and tables first
+        ChatbotResponse.add_missing_columns(conn)
+        ChatbotResponse.table_schema(conn)
+        rules_version = RuleVersion.version_for(conn, scoring_checksum)
+        scores_version = EmotionIndexVersion.version_for(conn, emotion_names)
+
+    table = ChatbotResponse.__table__
+    # NULL never compares unequal, so untagged rows are not stale
+    stale = table.c.rules_version != rules_version
+    # Bound names must differ from the column names of an UPDATE ... SET
+    update = table.update().where(table.c.id == db.bindparam('row_id')).values(
+        emotion=db.bindparam('new_emotion'),
+        emotion_scores=db.bindparam('new_scores', type_=db.LargeBinary),
+        scores_version=scores_version,
+        rules_version=rules_version
+    )
+
+    rescored = relabeled = 0
+    last_id = checkpoint['last_id']
+    while True:
+        # Read and update in separate transactions: a SQLite read snapshot that sees a
+        # concurrent write cannot be upgraded to a write transaction
+        with engine.connect() as conn:
+            rows = conn.execute(
+                db.select(table.c.id, table.c.user_message, table.c.emotion, table.c.timestamp)
+                .where(table.c.id > last_id, stale).order_by(table.c.id).limit(chunk_size)
+            ).fetchall()
+        if not rows:
+            break
+
+        results = score([row.user_message for row in rows])
+        params = []
+        changes = []
+        for row, result in zip(rows, results):
+            emotion = result['emotion'][:50]
+            params.append({'row_id': row.id, 'new_emotion': emotion,
+                           'new_scores': encode_scores(result['scores'], emotion_names)})
+            if emotion != row.emotion:
+                changes.extend([(row.emotion, row.timestamp, -1), (emotion, row.timestamp, 1)])
+        with engine.begin() as conn:
+            conn.execute(update, params)
+            EmotionRollup.record(conn, changes)
+
+        last_id = rows[-1].id
+        rescored += len(rows)
+        relabeled += len(changes) // 2
+        if checkpoint_path:
+            checkpoint.update(last_id=last_id, rows=checkpoint['rows'] + len(rows))
+            write_atomic(checkpoint_path, json.dumps(checkpoint).encode('utf-8'))
+        logger.info(f"Re-scored {rescored} chat responses up to id {last_id}, {relabeled} with a new emotion")
+    return RescoreStats(rescored, relabeled, last_id)
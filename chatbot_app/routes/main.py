@@ -4,15 +4,27 @@ Main routes for the Chatbot Application.
 This module contains the main routes for the chatbot application.
 """
 
+import functools
+import json
 import os
 import sys
+import threading
 import traceback
 import logging
-from flask import Blueprint, render_template, request, jsonify, send_from_directory, current_app
+import uuid
+from collections import Counter
+from datetime import datetime
+from typing import List, Optional
+from flask import (
+    Blueprint, Flask, Response, render_template, request, jsonify, send_from_directory, current_app, session,
+    stream_with_context
+)
 
 from chatbot_app import db
-from chatbot_app.models import ChatbotResponse
-from chatbot_app.chatbot.advanced_chatbot import AdvancedChatbot
+from chatbot_app.models import ArchivedTurn, ChatbotResponse, EmotionRollup, decode_cursor, encode_cursor
+from chatbot_app.chatbot.session_store import DEFAULT_HISTORY_DEPTH, SessionStore, create_session_backend
+from chatbot_app.health import HealthChecker
+from chatbot_app.write_behind import WriteBehindQueue
 
 # Configure logging
 logging.basicConfig(
@@ -24,8 +36,279 @@ logger = logging.getLogger(__name__)
 # Create blueprint
 main_bp = Blueprint('main', __name__)
 
-# Initialize chatbot
-chatbot = AdvancedChatbot()
+# Guard the creation of the chatbot, the session store, the write-behind queue and the health checker
+_chatbot_lock = threading.Lock()
+_session_store_lock = threading.Lock()
+_write_queue_lock = threading.Lock()
+_health_checker_lock = threading.Lock()
+
+# Entries per page of /db/view, by default and at most
+DB_VIEW_PAGE_SIZE = 100
+DB_VIEW_MAX_PAGE_SIZE = 1000
+# Rows read from the database at a time when /db/view streams NDJSON
+DB_VIEW_STREAM_BATCH = 1000
+
+
+def get_chatbot(app: Optional[Flask] = None):
+    """
+    Get the chatbot of an app, building it on first use.
+
+    Its pattern and lexicon tables are shared by all sessions. Building it is deferred so
+    that importing the routes stays cheap for every worker; see preload_chatbot.
+
+    Args:
+        app: The Flask app; defaults to the current app
+
+    Returns:
+        The app's AdvancedChatbot
+    """
+    if app is None:
+        app = current_app._get_current_object()
+    chatbot = app.extensions.get('chatbot')
+    if chatbot is None:
+        with _chatbot_lock:
+            chatbot = app.extensions.get('chatbot')
+            if chatbot is None:
+                # Imported here so that loading the routes does not pull in numpy and the rule pack
+                from chatbot_app.chatbot.advanced_chatbot import AdvancedChatbot
+                rules_path = app.config.get('CHAT_RULE_PACK')
+                chatbot = AdvancedChatbot(rules_path=rules_path) if rules_path else AdvancedChatbot()
+                app.extensions['chatbot'] = chatbot
+    return chatbot
+
+
+def preload_chatbot(app: Flask) -> None:
+    """
+    Build the chatbot of an app before it serves requests.
+
+    Called by create_app when CHAT_PRELOAD is set. Under gunicorn's preload_app this runs
+    once in the master process, and the forked workers share the built rule tables.
+
+    Args:
+        app: The Flask app
+    """
+    chatbot = get_chatbot(app)
+    logger.info(f"Preloaded chatbot with {len(chatbot.emotion_names)} emotions")
+
+
+def get_session_store() -> SessionStore:
+    """Get the conversation session store of the current app, creating it on first use."""
+    store = current_app.extensions.get('chat_sessions')
+    if store is None:
+        with _session_store_lock:
+            store = current_app.extensions.get('chat_sessions')
+            if store is None:
+                config = current_app.config
+                options = {
+                    'ttl': config.get('CHAT_SESSION_TTL', 1800),
+                    'max_sessions': config.get('CHAT_MAX_SESSIONS', 10000)
+                }
+                history_depth = config.get('CHAT_HISTORY_DEPTH', DEFAULT_HISTORY_DEPTH)
+                backend = config.get('CHAT_SESSION_BACKEND', 'memory')
+                if backend == 'sqlite':
+                    os.makedirs(current_app.instance_path, exist_ok=True)
+                    options['path'] = os.path.join(current_app.instance_path,
+                                                   config.get('CHAT_SESSION_DB', 'chat_sessions.db'))
+                    options['history_depth'] = history_depth
+                archiver = archive_turn if config.get('CHAT_ARCHIVE_TURNS') else None
+                store = SessionStore(get_chatbot(), create_session_backend(backend, **options), history_depth, archiver)
+                current_app.extensions['chat_sessions'] = store
+    return store
+
+
+def archive_turn(session_id: str, turn: dict) -> None:
+    """Store a conversation turn that fell out of a session's bounded history."""
+    try:
+        db.session.add(ArchivedTurn.from_turn(session_id, turn))
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Failed to archive conversation turn: {e}")
+
+
+def save_chat_record(user_message: str, bot_response: str, emotion: Optional[str] = None,
+                     ip_address: Optional[str] = None) -> Optional[int]:
+    """
+    Store one chat turn, falling back to sanitized and then truncated copies on errors.
+
+    Returns:
+        ID of the inserted row, or None if every attempt failed
+    """
+    db_session = db.session()
+    try:
+        # Use the compatible method to save to database
+        # This handles schema differences and works even if columns are missing
+        row_id = ChatbotResponse.save_compatible(
+            db_session,
+            user_message=user_message,
+            bot_response=bot_response,
+            emotion=emotion,
+            ip_address=ip_address
+        )
+
+        if not row_id:
+            logger.warning("Failed to save chat entry to database using save_compatible method")
+        return row_id
+
+    except ValueError as validation_error:
+        # Handle validation errors
+        db_session.rollback()
+        logger.error(f"Validation error: {validation_error}")
+
+        # Try with sanitized data as fallback using save_compatible
+        try:
+            from chatbot_app.models import sanitize_text
+            sanitized_message = sanitize_text(user_message)
+            sanitized_response = sanitize_text(bot_response)
+
+            # Use save_compatible for the fallback too
+            row_id = ChatbotResponse.save_compatible(
+                db_session,
+                user_message=sanitized_message[:500],
+                bot_response=sanitized_response[:500],
+                emotion=emotion[:50] if emotion else None
+            )
+
+            if row_id:
+                logger.info(f"Saved sanitized chat entry to database with ID: {row_id}")
+            else:
+                logger.warning("Failed to save sanitized entry using save_compatible")
+            return row_id
+        except Exception as fallback_error:
+            logger.error(f"Failed to save sanitized entry: {fallback_error}")
+            return None
+
+    except Exception as db_error:
+        # Handle other database errors
+        db_session.rollback()
+        logger.error(f"Database error: {db_error}")
+        logger.error(traceback.format_exc())
+
+        # Try a simplified fallback approach using save_compatible
+        try:
+            # Minimal record with just the essentials
+            truncated_message = user_message[:100] + "..." if len(user_message) > 100 else user_message
+            truncated_response = bot_response[:100] + "..." if len(bot_response) > 100 else bot_response
+
+            # Use save_compatible for the final fallback too
+            row_id = ChatbotResponse.save_compatible(
+                db_session,
+                user_message=truncated_message,
+                bot_response=truncated_response,
+                emotion="error_fallback"
+            )
+
+            if row_id:
+                logger.info(f"Saved minimal fallback chat entry to database with ID: {row_id}")
+            else:
+                logger.warning("Failed to save minimal fallback entry using save_compatible")
+            return row_id
+        except Exception as final_error:
+            # Final fallback: just continue without storage
+            logger.error(f"All database storage attempts failed: {final_error}. Continuing without storage.")
+            return None
+
+    finally:
+        # Always close the session to prevent connection leaks
+        db_session.close()
+
+
+def save_chat_records(records: List[dict]) -> None:
+    """
+    Store chat turns given as save_chat_record keyword arguments, plus optional 'scores'.
+
+    The turns are written with one multi-row insert, with their scores packed in the
+    chatbot's emotion order and tagged with its rule version; if that fails they are
+    stored one by one, without scores, so that a single bad turn does not lose the rest
+    of the batch.
+    """
+    try:
+        chatbot = get_chatbot()
+        ChatbotResponse.save_many(records, emotion_names=chatbot.emotion_names,
+                                  scoring_checksum=chatbot.scoring_checksum)
+    except Exception as e:
+        logger.warning(f"Batch insert of {len(records)} chat entries failed, saving them one by one: {e}")
+        for record in records:
+            save_chat_record(record['user_message'], record['bot_response'], record.get('emotion'),
+                             record.get('ip_address'))
+
+
+def _write_chat_batch(app: Flask, records: List[dict]) -> None:
+    """Store a batch of chat turns from the write-behind thread, which has no app context."""
+    with app.app_context():
+        save_chat_records(records)
+
+
+def get_write_queue() -> Optional[WriteBehindQueue]:
+    """Get the write-behind queue of the current app, creating it on first use; None if disabled."""
+    config = current_app.config
+    if not config.get('CHAT_WRITE_BEHIND', True):
+        return None
+    write_queue = current_app.extensions.get('chat_writes')
+    if write_queue is None:
+        with _write_queue_lock:
+            write_queue = current_app.extensions.get('chat_writes')
+            if write_queue is None:
+                # Created on first use, in the worker process: threads do not survive a fork
+                write_queue = WriteBehindQueue(
+                    functools.partial(_write_chat_batch, current_app._get_current_object()),
+                    max_size=config.get('CHAT_WRITE_QUEUE_SIZE', 10000),
+                    batch_size=config.get('CHAT_WRITE_BATCH_SIZE', 100),
+                    put_timeout=config.get('CHAT_WRITE_PUT_TIMEOUT', 0.5)
+                )
+                current_app.extensions['chat_writes'] = write_queue
+    return write_queue
+
+
+def _probe_database(app: Flask) -> None:
+    """Run the cheapest query on the database of an app; raises if it is unreachable."""
+    with app.app_context():
+        with db.engine.connect() as conn:
+            conn.execute(db.text("SELECT 1"))
+
+
+def _diagnose_database(app: Flask) -> dict:
+    """Collect the full database diagnostics of an app after its health changed."""
+    with app.app_context():
+        # The table may have been recreated or migrated while the database was away
+        ChatbotResponse.invalidate_schema_cache(db.engine)
+        return ChatbotResponse.test_db_connection()
+
+
+def get_health_checker() -> HealthChecker:
+    """Get the database health checker of the current app, creating it on first use."""
+    checker = current_app.extensions.get('chat_health')
+    if checker is None:
+        with _health_checker_lock:
+            checker = current_app.extensions.get('chat_health')
+            if checker is None:
+                # Created on first use, in the worker process: threads do not survive a fork.
+                # Its thread runs the first probe, so this request does not wait for it.
+                app = current_app._get_current_object()
+                checker = HealthChecker(
+                    functools.partial(_probe_database, app),
+                    functools.partial(_diagnose_database, app),
+                    interval=current_app.config.get('CHAT_HEALTH_INTERVAL', 30.0)
+                )
+                current_app.extensions['chat_health'] = checker
+    return checker
+
+
+def get_chat_session_id() -> str:
+    """
+    Get the conversation session id of the current client.
+
+    Clients get a random id in the signed session cookie, so they cannot pick another
+    client's conversation. Without a secret key the client address is used.
+    """
+    if not current_app.secret_key:
+        return f"addr:{request.remote_addr}"
+
+    session_id = session.get('chat_session_id')
+    if not session_id:
+        session_id = uuid.uuid4().hex
+        session['chat_session_id'] = session_id
+    return session_id
 
 @main_bp.route('/favicon.ico')
 def favicon():
@@ -51,7 +334,6 @@ def home():
 @main_bp.route('/chat', methods=['POST'])
 def chat():
     """Process a chat message and return a response."""
-    db_session = None
     try:
         # Input validation
         if not request.is_json:
@@ -70,107 +352,28 @@ def chat():
         if len(message) > 5000:
             return jsonify({'error': 'Message too long (maximum 5000 characters)'}), 400
 
-        # Process the message and get response
-        response = chatbot.process_message(message)
-
-        # Get user IP address for audit (anonymize in production)
-        ip_address = request.remote_addr
-
-        # Use a specific session for this request to isolate transactions
-        db_session = db.session()
-
-        # Store in database using secure method with transaction
-        try:
-            # Run diagnostics first to check if database is functioning
-            logger.info("Running database pre-checks before saving message")
-            try:
-                connection_test = ChatbotResponse.test_db_connection()
-                if not connection_test['connection_successful']:
-                    logger.error(f"Database connection test failed: {connection_test['error']}")
-                    raise Exception(f"Database connection test failed: {connection_test['error']}")
-
-                # Log some info about the database
-                logger.info(f"Database info: {connection_test['db_info']}")
-                if 'table_info' in connection_test and 'has_chatbot_response' in connection_test['table_info']:
-                    if not connection_test['table_info']['has_chatbot_response']:
-                        logger.warning("Table 'chatbot_response' does not exist. Will create it.")
-            except Exception as diag_error:
-                logger.error(f"Error running database diagnostics: {diag_error}")
-                # Continue anyway
-
-            # Use the compatible method to save to database
-            # This handles schema differences and works even if columns are missing
-            row_id = ChatbotResponse.save_compatible(
-                db_session,
-                user_message=message,
-                bot_response=response['response'],
-                emotion=response['emotion'],
-                ip_address=ip_address
-            )
+        # Process the message in the conversation of this client and get response
+        response = get_session_store().process_message(get_chat_session_id(), message)
 
-            if row_id:
-                logger.info(f"Successfully saved chat entry to database with ID: {row_id}")
+        # Store the turn after replying; the request only waits when the queue is full
+        record = {
+            'user_message': message,
+            'bot_response': response['response'],
+            'emotion': response['emotion'],
+            # Get user IP address for audit (anonymize in production)
+            'ip_address': request.remote_addr
+        }
+        # The context-free scores are stored, so that they match those of re-scoring and
+        # export; turns with placeholder scores have none
+        if current_app.config.get('CHAT_STORE_SCORES', True):
+            record['scores'] = response.get('message_scores')
+        write_queue = get_write_queue()
+        if write_queue is None or not write_queue.put(record):
+            # Only write in the request when the last health check reached the database
+            if get_health_checker().healthy:
+                save_chat_records([record])
             else:
-                logger.warning("Failed to save chat entry to database using save_compatible method")
-
-        except ValueError as validation_error:
-            # Handle validation errors
-            if db_session:
-                db_session.rollback()
-            logger.error(f"Validation error: {validation_error}")
-
-            # Try with sanitized data as fallback using save_compatible
-            try:
-                from chatbot_app.models import sanitize_text
-                sanitized_message = sanitize_text(message)
-                sanitized_response = sanitize_text(response['response'])
-
-                # Use save_compatible for the fallback too
-                row_id = ChatbotResponse.save_compatible(
-                    db_session,
-                    user_message=sanitized_message[:500],
-                    bot_response=sanitized_response[:500],
-                    emotion=response['emotion'][:50] if response['emotion'] else None
-                )
-
-                if row_id:
-                    logger.info(f"Saved sanitized chat entry to database with ID: {row_id}")
-                else:
-                    logger.warning("Failed to save sanitized entry using save_compatible")
-                    # Continue without database storage
-            except Exception as fallback_error:
-                logger.error(f"Failed to save sanitized entry: {fallback_error}")
-                # Continue without database storage
-
-        except Exception as db_error:
-            # Handle other database errors
-            if db_session:
-                db_session.rollback()
-            logger.error(f"Database error: {db_error}")
-            logger.error(traceback.format_exc())
-
-            # Try a simplified fallback approach using save_compatible
-            try:
-                # Minimal record with just the essentials
-                truncated_message = message[:100] + "..." if len(message) > 100 else message
-                truncated_response = response['response'][:100] + "..." if len(response['response']) > 100 else response['response']
-
-                # Use save_compatible for the final fallback too
-                row_id = ChatbotResponse.save_compatible(
-                    db_session,
-                    user_message=truncated_message,
-                    bot_response=truncated_response,
-                    emotion="error_fallback"
-                )
-
-                if row_id:
-                    logger.info(f"Saved minimal fallback chat entry to database with ID: {row_id}")
-                else:
-                    logger.warning("Failed to save minimal fallback entry using save_compatible")
-                    # Continue without database storage
-            except Exception as final_error:
-                # Final fallback: just continue without storage
-                logger.error(f"All database storage attempts failed: {final_error}. Continuing without storage.")
+                logger.warning("Database is unhealthy, chat entry not stored")
 
         # Even if db operations fail, still return the response to user
         return jsonify({
@@ -184,16 +387,16 @@ def chat():
 
     except Exception as e:
         # Handle any other errors
-        if db_session:
-            db_session.rollback()
         logger.error(f"Error processing message: {str(e)}")
         logger.error(traceback.format_exc())
         return jsonify({'error': 'Internal server error'}), 500
 
-    finally:
-        # Always close the session to prevent connection leaks
-        if db_session and db_session is not db.session:
-            db_session.close()
+@main_bp.route('/health')
+def health():
+    """Report the cached database health; 503 while the database is unreachable."""
+    checker = get_health_checker()
+    status = checker.status(include_diagnostics=is_authorized_debug_user())
+    return jsonify(status), 200 if status['healthy'] else 503
 
 # Debug route to check static files
 @main_bp.route('/debug/static/<path:filename>')
@@ -210,9 +413,10 @@ def debug_emotions():
         logger.warning(f"Unauthorized debug access attempt from {request.remote_addr}")
         return jsonify({'error': 'Unauthorized access'}), 403
     try:
+        chatbot = get_chatbot()
         return jsonify({
             'emotions': list(chatbot.emotion_patterns.keys()),
-            'emotion_images': chatbot.emotion_images
+            'emotion_images': dict(chatbot.emotion_images)
         })
     except Exception as e:
         logger.error(f"Error in debug_emotions: {e}")
@@ -313,6 +517,23 @@ def debug_diagnostics():
         # Test database connection
         diagnostics['connection_test'] = ChatbotResponse.test_db_connection()
 
+        # Cached result of the background health checks
+        diagnostics['health'] = get_health_checker().status()
+
+        # Emotion analysis cache counters
+        diagnostics['analysis_cache'] = get_chatbot().analysis_cache.stats()
+
+        # Chat turns waiting to be stored
+        write_queue = get_write_queue()
+        diagnostics['chat_write_queue'] = write_queue.stats() if write_queue is not None else None
+
+        # Conversation sessions
+        session_store = get_session_store()
+        diagnostics['chat_sessions'] = {
+            'backend': type(session_store.backend).__name__,
+            'sessions': len(session_store.backend)
+        }
+
         # Check for SQLite specific issues
         if db.engine.dialect.name == 'sqlite':
             # Get SQLite file path from connection URL
@@ -496,35 +717,89 @@ def debug_database():
             'traceback': traceback.format_exc()
         }), 500
 
+def _history_entry(row) -> dict:
+    """Format a row of ChatbotResponse.history_queries for the /db/view output."""
+    return {
+        'id': row.id,
+        'user_message': row.user_message,
+        'bot_response': row.bot_response,
+        'emotion': row.emotion,
+        'timestamp': row.timestamp.isoformat() if row.timestamp else None
+    }
+
+
+def _stream_history(after: Optional[tuple], limit: Optional[int]):
+    """
+    Yield chat history entries as NDJSON, reading the rows in batches.
+
+    Only one batch of rows is in memory at a time, whatever the size of the table.
+    """
+    remaining = limit
+    try:
+        with db.engine.connect() as conn:
+            conn = conn.execution_options(yield_per=DB_VIEW_STREAM_BATCH)
+            for query in ChatbotResponse.history_queries(after, limit):
+                if remaining is not None:
+                    query = query.limit(remaining)
+                for rows in conn.execute(query).partitions():
+                    yield ''.join(json.dumps(_history_entry(row)) + '\n' for row in rows)
+                    if remaining is not None:
+                        remaining -= len(rows)
+                if remaining == 0:
+                    break
+    except Exception as e:
+        # The status line has been sent already; the client sees a truncated stream
+        logger.error(f"Error streaming database entries: {e}")
+        logger.error(traceback.format_exc())
+
+
 @main_bp.route('/db/view')
 def view_database():
-    """Route to view database entries."""
+    """
+    Route to view database entries, most recent first.
+
+    Returns a page of 'limit' entries and the cursor of the next page, passed back as
+    'after'. With format=ndjson every entry from the cursor on is streamed instead, one
+    JSON object per line. count=true adds the total number of entries.
+    """
     # Security check for database view
     if not is_authorized_debug_user():
         logger.warning(f"Unauthorized database view attempt from {request.remote_addr}")
         return jsonify({'error': 'Unauthorized access'}), 403
     try:
-        # Count records
-        count = ChatbotResponse.query.count()
-
-        # Get all entries, most recent first
-        entries = ChatbotResponse.query.order_by(ChatbotResponse.timestamp.desc()).all()
-
-        formatted_entries = [
-            {
-                'id': entry.id,
-                'user_message': entry.user_message,
-                'bot_response': entry.bot_response,
-                'emotion': entry.emotion,
-                'timestamp': entry.timestamp.isoformat() if entry.timestamp else None
+        cursor = request.args.get('after')
+        after = decode_cursor(cursor) if cursor else None
+        limit = request.args.get('limit')
+        limit = int(limit) if limit else None
+        if limit is not None and limit < 1:
+            raise ValueError("limit must be at least 1")
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    if request.args.get('format') == 'ndjson':
+        return Response(stream_with_context(_stream_history(after, limit)), mimetype='application/x-ndjson')
+
+    try:
+        limit = min(limit or DB_VIEW_PAGE_SIZE, DB_VIEW_MAX_PAGE_SIZE)
+        rows = []
+        with db.engine.connect() as conn:
+            for query in ChatbotResponse.history_queries(after, limit):
+                rows.extend(conn.execute(query.limit(limit - len(rows))).fetchall())
+                if len(rows) == limit:
+                    break
+
+            result = {
+                'entries': [_history_entry(row) for row in rows],
+                'limit': limit,
+                # A full page may be followed by more entries
+                'next_cursor': encode_cursor(rows[-1].timestamp, rows[-1].id) if len(rows) == limit else None
             }
-            for entry in entries
-        ]
+            if request.args.get('count', '').lower() in ('1', 'true', 'yes'):
+                result['count'] = conn.execute(
+                    db.select(db.func.count()).select_from(ChatbotResponse.__table__)
+                ).scalar()
 
-        return jsonify({
-            'count': count,
-            'entries': formatted_entries
-        })
+        return jsonify(result)
     except Exception as e:
         logger.error(f"Error viewing database: {e}")
         logger.error(traceback.format_exc())
@@ -532,3 +807,50 @@ def view_database():
             'error': str(e),
             'traceback': traceback.format_exc()
         }), 500
+
+@main_bp.route('/analytics/emotions')
+def emotion_analytics():
+    """
+    Route to get the number of chat responses per emotion and hour or day.
+
+    Query parameters: granularity ('hour' or 'day', default 'day'), start and end (ISO
+    dates or times; end is excluded) and emotion, which can be repeated.
+    """
+    if not is_authorized_debug_user():
+        logger.warning(f"Unauthorized analytics access attempt from {request.remote_addr}")
+        return jsonify({'error': 'Unauthorized access'}), 403
+    try:
+        granularity = request.args.get('granularity', 'day')
+        start = request.args.get('start')
+        start = datetime.fromisoformat(start) if start else None
+        end = request.args.get('end')
+        end = datetime.fromisoformat(end) if end else None
+        emotions = request.args.getlist('emotion')
+
+        with db.engine.connect() as conn:
+            rows = EmotionRollup.distribution(conn, granularity, start, end, emotions)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error getting emotion analytics: {e}")
+        logger.error(traceback.format_exc())
+        return jsonify({'error': 'Internal server error'}), 500
+
+    buckets = []
+    totals = Counter()
+    for bucket, emotion, count in rows:
+        if not buckets or buckets[-1]['bucket'] != bucket:
+            buckets.append({'bucket': bucket, 'total': 0, 'emotions': {}})
+        buckets[-1]['emotions'][emotion] = count
+        buckets[-1]['total'] += count
+        totals[emotion] += count
+    for entry in buckets:
+        entry['bucket'] = entry['bucket'].isoformat()
+
+    return jsonify({
+        'granularity': granularity,
+        'start': start.isoformat() if start else None,
+        'end': end.isoformat() if end else None,
+        'totals': dict(totals.most_common()),
+        'buckets': buckets
+    })
@@ -0,0 +1,159 @@
+"""
+SQLite connection profiles for the Chatbot Application.
+
+By default SQLite uses a rollback journal: every commit syncs the database file twice and
+a writer locks out readers, so several gunicorn workers storing chat turns queue up behind
+each other and hit "database is locked". A profile is a set of PRAGMAs applied to every
+new connection, plus the pool options of the engine. The 'wal' profile switches to
+write-ahead logging, where readers never block the writer and a commit is one append to
+the log.
+
+WAL needs the database on a local filesystem; use the 'default' profile on network
+storage.
+"""
+
+import logging
+import re
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+
+logger = logging.getLogger(__name__)
+
+
+class SqliteProfile(NamedTuple):
+    """PRAGMAs run on each new connection and options for the engine and its pool."""
+    pragmas: Dict[str, Any]
+    engine_options: Dict[str, Any]
+
+
+SQLITE_PROFILES = {
+    # SQLite's own settings
+    'default': SqliteProfile({}, {}),
+    'wal': SqliteProfile(
+        {
+            # First, so that switching the journal mode waits for other connections too
+            'busy_timeout': 5000,  # Milliseconds a writer waits for the lock
+            'journal_mode': 'WAL',
+            # Sync at checkpoints only; a power loss can lose the last commits but never
+            # corrupts the database
+            'synchronous': 'NORMAL',
+            'cache_size': -8000,  # Negative: KiB of page cache per connection
+            'mmap_size': 64 * 1024 * 1024,
+            'temp_store': 'MEMORY'
+        },
+        {
+            # One connection per request thread, plus the write-behind and health threads
+            'pool_size': 5,
+            'max_overflow': 5,
+            'pool_timeout': 10
+        }
+    )
+}
+
+# PRAGMAs a profile may set; their names are interpolated into SQL
+SQLITE_PRAGMAS = (
+    'journal_mode', 'synchronous', 'busy_timeout', 'cache_size', 'mmap_size', 'temp_store',
+    'foreign_keys', 'wal_autocheckpoint', 'journal_size_limit'
+)
+
+_PRAGMA_VALUE = re.compile(r'^-?\w+$')
+
+
+def get_sqlite_profile(name: str, pragmas: Optional[Dict[str, Any]] = None) -> SqliteProfile:
+    """
+    Get a SQLite profile by name.
+
+    Args:
+        name: Name of the profile ('default' or 'wal')
+        pragmas: PRAGMAs overriding those of the profile
+
+    Returns:
+        The profile
+
+    Raises:
+        ValueError: If the profile or one of the PRAGMAs is unknown
+    """
+    if name not in SQLITE_PROFILES:
+        raise ValueError(f"Unknown SQLite profile: {name}. Available profiles: {', '.join(SQLITE_PROFILES)}")
+    profile = SQLITE_PROFILES[name]
+    if pragmas:
+        profile = profile._replace(pragmas={**profile.pragmas, **pragmas})
+    # Fail when the app is created rather than on the first connection
+    pragma_statements(profile.pragmas)
+    return profile
+
+
+def pragma_statements(pragmas: Dict[str, Any]) -> List[str]:
+    """
+    Build the PRAGMA statements of a profile.
+
+    Args:
+        pragmas: PRAGMA names and values
+
+    Returns:
+        One statement per PRAGMA
+
+    Raises:
+        ValueError: If a PRAGMA is not in SQLITE_PRAGMAS or its value is not a word or integer
+    """
+    statements = []
+    for name, value in pragmas.items():
+        if name not in SQLITE_PRAGMAS:
+            raise ValueError(f"Unsupported SQLite PRAGMA: {name}")
+        if not _PRAGMA_VALUE.match(str(value)):
+            raise ValueError(f"Invalid value for SQLite PRAGMA {name}: {value!r}")
+        statements.append(f"PRAGMA {name}={value}")
+    return statements
+
+
+def is_sqlite_file(uri: str) -> bool:
+    """Check whether a database URI points to an SQLite database file, not to memory."""
+    url = make_url(uri)
+    if url.get_backend_name() != 'sqlite':
+        return False
+    return url.database not in (None, '', ':memory:') and url.query.get('mode') != 'memory'
+
+
+def sqlite_engine_options(uri: str, profile: SqliteProfile) -> Dict[str, Any]:
+    """
+    Get the engine options of a profile for a database URI.
+
+    Args:
+        uri: The SQLAlchemy database URI
+        profile: The SQLite profile
+
+    Returns:
+        The profile's pool options for an SQLite file; an empty dict otherwise, since
+        in-memory databases use a single shared connection
+    """
+    return dict(profile.engine_options) if is_sqlite_file(uri) else {}
+
+
+def apply_sqlite_profile(engine: Engine, profile: SqliteProfile) -> bool:
+    """
+    Run the PRAGMAs of a profile on every new connection of an engine.
+
+    Args:
+        engine: The SQLAlchemy engine
+        profile: The SQLite profile
+
+    Returns:
+        True if the engine is an SQLite engine and the PRAGMAs will be applied
+    """
+    if engine.dialect.name != 'sqlite' or not profile.pragmas:
+        return False
+    statements = pragma_statements(profile.pragmas)
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+        finally:
+            cursor.close()
+
+    logger.info(f"Applying SQLite PRAGMAs to {engine.url}: {', '.join(statements)}")
+    return True
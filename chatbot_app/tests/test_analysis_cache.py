@@ -0,0 +1,73 @@
+import unittest
+import sys
+import os
+import time
+
+# Add the parent directory to sys.path to import the chatbot module
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from chatbot_app.chatbot.advanced_chatbot import AdvancedChatbot
+from chatbot_app.chatbot.analysis_cache import AnalysisCache
+
+
+class TestAnalysisCache(unittest.TestCase):
+    """Tests for the memoized emotion analysis."""
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted and counted."""
+        cache = AnalysisCache(max_size=2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        self.assertEqual(cache.get('a'), 1)
+        cache.put('c', 3)
+
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('c'), 3)
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['evictions'], stats['size']), (3, 1, 1, 2))
+
+    def test_ttl_expiry(self):
+        """Test that expired entries are dropped on lookup."""
+        cache = AnalysisCache(max_size=10, ttl=0.05)
+        cache.put('a', 1)
+        self.assertEqual(cache.get('a'), 1)
+        time.sleep(0.1)
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.stats()['evictions'], 1)
+        self.assertEqual(len(cache), 0)
+
+    def test_disabled_cache(self):
+        """Test that a cache of size 0 stores nothing and invalid settings are rejected."""
+        cache = AnalysisCache(max_size=0)
+        cache.put('a', 1)
+        self.assertIsNone(cache.get('a'))
+        with self.assertRaises(ValueError):
+            AnalysisCache(max_size=-1)
+        with self.assertRaises(ValueError):
+            AnalysisCache(ttl=0)
+
+    def test_cached_analysis_matches_uncached(self):
+        """Test that cached base scores give the same results under any session context."""
+        cached = AdvancedChatbot()
+        uncached = AdvancedChatbot(cache_size=0)
+        messages = ["I am happy today.", "I AM HAPPY TODAY.", "I'm sorry", "I feel let down", "hi"]
+        contexts = [[], ['sadness'], ['neutral', 'anger'], ['joy', 'joy', 'fear']]
+
+        for session_emotions in contexts:
+            for message in messages:
+                cached.context = {'session_emotions': list(session_emotions)}
+                uncached.context = {'session_emotions': list(session_emotions)}
+                self.assertEqual(cached.analyze_emotion(message), uncached.analyze_emotion(message))
+
+        stats = cached.analysis_cache.stats()
+        self.assertEqual(stats['misses'], 4)
+        self.assertEqual(stats['hits'], len(messages) * len(contexts) - 4)
+
+        # Mutating a returned result must not corrupt the cache
+        cached.analyze_emotion("I'm sorry")['scores']['remorse'] = 0.0
+        self.assertEqual(cached.analyze_emotion("I'm sorry")['scores']['remorse'], 0.8)
+
+
+if __name__ == '__main__':
+    unittest.main()
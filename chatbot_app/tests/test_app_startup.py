@@ -0,0 +1,43 @@
+import unittest
+import sys
+import os
+import subprocess
+
+# Add the parent directory to sys.path to import the chatbot module
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, PROJECT_ROOT)
+
+from chatbot_app import create_app
+from chatbot_app.routes.main import get_chatbot, preload_chatbot
+
+
+class TestAppStartup(unittest.TestCase):
+    """Tests for deferred chatbot construction."""
+
+    def test_create_app_does_not_build_chatbot(self):
+        """Test that neither importing the routes nor creating the app loads the chatbot."""
+        script = (
+            "import sys; from chatbot_app import create_app; create_app('testing'); "
+            "print('chatbot_app.chatbot.advanced_chatbot' in sys.modules)"
+        )
+        output = subprocess.run([sys.executable, '-c', script], cwd=PROJECT_ROOT,
+                                capture_output=True, text=True, check=True).stdout
+        self.assertEqual(output.split()[-1], 'False')
+
+    def test_chatbot_is_built_once(self):
+        """Test that the chatbot is built on first use and then reused."""
+        app = create_app('testing')
+        self.assertNotIn('chatbot', app.extensions)
+
+        with app.app_context():
+            chatbot = get_chatbot()
+        self.assertIs(get_chatbot(app), chatbot)
+
+        preloaded_app = create_app('testing')
+        preload_chatbot(preloaded_app)
+        self.assertIn('chatbot', preloaded_app.extensions)
+        self.assertIsNot(preloaded_app.extensions['chatbot'], chatbot)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -62,3 +62,30 @@ def test_sentiment_analysis(chatbot):
     assert 'response' in response
     response_text = response['response'].lower()
     assert "upset" in response_text or "difficult" in response_text or "down" in response_text or "sad" in response_text
+
+def test_message_scores_leave_out_the_session(chatbot):
+    chatbot.process_message("I'm feeling anxious")
+    response = chatbot.process_message("I'm so happy today!")
+    assert response['message_scores'] == chatbot.analyze_emotion_batch(["I'm so happy today!"])[0]['scores']
+    # The drink flow returns placeholder scores
+    assert 'message_scores' not in chatbot.process_message("Can you recommend a drink?")
+
+def test_rule_tables_are_shared_and_read_only(chatbot):
+    other = AdvancedChatbot(matcher='sequential')
+    assert other.emotion_patterns is chatbot.emotion_patterns
+    assert other.emotion_responses is chatbot.emotion_responses
+    assert other.compiled_emotion_patterns is chatbot.compiled_emotion_patterns
+    assert other.lexicon is chatbot.lexicon
+    assert other.drink_recommender.personality_questions is chatbot.drink_recommender.personality_questions
+    assert other.pattern_matcher is not chatbot.pattern_matcher
+
+    with pytest.raises(TypeError):
+        chatbot.emotion_images['joy'] = 'other.jpg'
+    with pytest.raises(TypeError):
+        chatbot.sentiment_analyzer['positive'][0] = 'other'
+    with pytest.raises(ValueError):
+        chatbot.final_emotion_multipliers[0] = 2.0
+
+    # Conversation state stays per instance
+    other.process_message("Hello")
+    assert len(chatbot.conversation_memory) == 0
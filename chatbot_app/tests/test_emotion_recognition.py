@@ -3,12 +3,15 @@ import sys
 import os
 import math
 import re
+import json
+import tempfile
 from unittest.mock import MagicMock, patch
 
 # Add the parent directory to sys.path to import the chatbot module
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from chatbot.advanced_chatbot import AdvancedChatbot
+from chatbot.overrides import load_overrides
 
 class TestEmotionRecognition(unittest.TestCase):
     """Tests for the emotion recognition functionality of the AdvancedChatbot."""
@@ -273,6 +276,138 @@ class TestEmotionRecognition(unittest.TestCase):
             total_score = sum(result['scores'].values())
             self.assertAlmostEqual(total_score, 1.0, places=5)
     
+    def test_compiled_pattern_bank(self):
+        """Test that the precompiled pattern bank matches the raw pattern strings exactly."""
+        test_messages = [
+            "I am happy today.",
+            "I want to end my life.",
+            "I'm excited about the trip but nervous about flying.",
+            "Wow, I didn't see that coming 😂",
+            "I admire my professor and I look up to her.",
+        ]
+
+        self.assertEqual(list(self.chatbot.compiled_emotion_patterns), list(self.chatbot.emotion_patterns))
+        for message in test_messages:
+            message_lower = message.lower()
+            for emotion, patterns in self.chatbot.emotion_patterns.items():
+                compiled = self.chatbot.compiled_emotion_patterns[emotion]
+                self.assertEqual(len(patterns), len(compiled))
+                for pattern, (regex, _, _) in zip(patterns, compiled):
+                    self.assertEqual(re.findall(pattern, message_lower), regex.findall(message_lower))
+
+    def test_lexicon_lookup(self):
+        """Test that the frozen lexicon folds every sentiment word list into one entry per token."""
+        for category, words in self.chatbot.sentiment_analyzer.items():
+            for word in words:
+                self.assertIn(category, self.chatbot.lexicon[word].categories)
+
+        # Specific emotion words map to a single emotion, other sentiment words spread out
+        self.assertEqual(self.chatbot.lexicon['happy'].emotions, (('joy', 1.2),))
+        self.assertEqual(self.chatbot.lexicon['suicidal'].emotions, (('desperation', 1.3),))
+        self.assertEqual(len(self.chatbot.lexicon['wonderful'].emotions), 6)
+        self.assertEqual(self.chatbot.lexicon['neutral'].emotions, ())
+        self.assertEqual(self.chatbot.lexicon['irate'].negated_emotion, 'anger')
+
+        with self.assertRaises(TypeError):
+            self.chatbot.lexicon['happy'] = None
+
+    def test_multi_word_lexicon_phrases(self):
+        """Test that multi-word lexicon entries are recognised as single sentiment words."""
+        self.assertEqual(
+            self.chatbot.lexicon_phrases.merge(['i', 'feel', 'let', 'down', 'and', 'worn', 'out']),
+            ['i', 'feel', 'let down', 'and', 'worn out']
+        )
+        # Neutral phrases are not merged so their negation words still count
+        self.assertEqual(self.chatbot.lexicon_phrases.merge(['not', 'bad']), ['not', 'bad'])
+
+        result = self.chatbot.analyze_emotion("I feel let down")
+        self.assertEqual(result['emotion'], 'disappointment')
+
+    def test_score_vector_layout(self):
+        """Test that array-backed scores come back as a plain dict in emotion order."""
+        self.assertEqual(list(self.chatbot.emotion_names), list(self.chatbot.emotion_patterns))
+
+        result = self.chatbot.analyze_emotion("I feel sad right now. But I am happy you are here!")
+        self.assertEqual(list(result['scores']), list(self.chatbot.emotion_names))
+        for score in result['scores'].values():
+            self.assertIs(type(score), float)
+        self.assertIs(type(result['confidence']), float)
+        self.assertEqual(result['confidence'], result['scores'][result['emotion']])
+
+    def test_analyze_emotion_batch(self):
+        """Test that batch analysis matches single-message analysis without touching the context."""
+        test_messages = [
+            "I am happy today.",
+            "I feel sad right now. But tomorrow will be better!",
+            "I'm angry about what happened.",
+            "I want to end my life.",
+            "I feel let down",
+            "The weather is nice today.",
+            "I am happy today.",
+            "",
+        ]
+
+        context = {'session_emotions': ['sadness', 'sadness', 'anger']}
+        batch_results = self.chatbot.analyze_emotion_batch(test_messages, context)
+        self.assertEqual(self.chatbot.context, {'session_emotions': ['neutral', 'joy']})
+        self.assertEqual(context, {'session_emotions': ['sadness', 'sadness', 'anger']})
+
+        self.chatbot.context = {'session_emotions': ['sadness', 'sadness', 'anger']}
+        self.assertEqual(batch_results, [self.chatbot.analyze_emotion(message) for message in test_messages])
+
+        # Without a context the batch is scored as a fresh session
+        self.chatbot.context = {'session_emotions': []}
+        self.assertEqual(self.chatbot.analyze_emotion_batch(test_messages),
+                         [self.chatbot.analyze_emotion(message) for message in test_messages])
+        self.assertEqual(self.chatbot.analyze_emotion_batch([]), [])
+
+    def test_two_stage_pipeline(self):
+        """Test that score_text is context-free and apply_context reproduces analyze_emotion."""
+        test_messages = ["I am happy today.", "I'm sorry", "I feel let down", "The weather is nice today."]
+        histories = [[], ['sadness'], ['neutral', 'anger', 'anger']]
+
+        for message in test_messages:
+            base_scores = self.chatbot.score_text(message)
+            self.chatbot.context = {'session_emotions': ['fear', 'fear', 'fear']}
+            self.assertEqual(self.chatbot.score_text(message).override, base_scores.override)
+            if base_scores.scores is not None:
+                self.assertEqual(self.chatbot.score_text(message).scores.tolist(), base_scores.scores.tolist())
+                self.assertFalse(base_scores.scores.flags.writeable)
+
+            for history in histories:
+                self.chatbot.context = {'session_emotions': list(history)}
+                self.assertEqual(self.chatbot.apply_context(base_scores, history),
+                                 self.chatbot.analyze_emotion(message))
+
+    def test_override_table(self):
+        """Test exact and substring override rules, their priority, and loading custom rules."""
+        table = self.chatbot.override_table
+        self.assertEqual(table.lookup("the frustrating situation.")['emotion'], 'annoyance')
+        self.assertIsNone(table.lookup("the frustrating situation. again"))
+        self.assertEqual(table.lookup("well, my flight got delayed by 5 hours")['emotion'], 'frustration')
+        self.assertEqual(table.lookup("i'm excited about the trip but nervous about flying")['mixed_emotion'], 'fear')
+        # The earlier rule wins when several match
+        self.assertEqual(table.lookup("i'm sorry, i believe i can")['emotion'], 'optimism')
+        self.assertIsNone(table.lookup("i am happy today."))
+
+        rules = [
+            {'match': 'exact', 'phrases': ['hi'], 'emotion': 'joy', 'confidence': 0.6, 'scores': {'joy': 0.6, 'neutral': 0.4}},
+            {'match': 'substring', 'phrases': ['hi'], 'emotion': 'neutral', 'confidence': 0.5, 'scores': {'neutral': 1.0}}
+        ]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'overrides.json')
+            with open(path, 'w') as f:
+                json.dump(rules, f)
+            chatbot = AdvancedChatbot(overrides_path=path)
+            self.assertEqual(chatbot.analyze_emotion("Hi")['emotion'], 'joy')
+            self.assertEqual(chatbot.analyze_emotion("oh hi there")['scores'], {'neutral': 1.0})
+            self.assertNotEqual(chatbot.analyze_emotion("I'm sorry")['emotion'], 'remorse')
+
+            with open(path, 'w') as f:
+                json.dump([{'match': 'regex', 'phrases': ['hi']}], f)
+            with self.assertRaises(ValueError):
+                load_overrides(path)
+
     def test_score_normalization(self):
         """Test that all emotion scores are properly normalized to sum to 1.0."""
         test_messages = [
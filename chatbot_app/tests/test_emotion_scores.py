@@ -0,0 +1,107 @@
+import unittest
+import sys
+import os
+import tempfile
+from datetime import datetime
+
+import numpy as np
+from flask import Flask
+
+# Add the parent directory to sys.path to import the chatbot module
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from chatbot_app import db
+from chatbot_app.emotion_scores import decode_score_matrix, decode_scores, encode_scores, scores_to_dict
+from chatbot_app.models import ChatbotResponse, EmotionIndexVersion
+
+EMOTIONS = ('joy', 'sadness', 'neutral')
+
+
+class TestEmotionScores(unittest.TestCase):
+    """Tests for the packed emotion score vectors."""
+
+    def setUp(self):
+        """Bind the models to a SQLite database file."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(self.directory.name, 'test.db')
+        db.init_app(self.app)
+        self.context = self.app.app_context()
+        self.context.push()
+
+    def tearDown(self):
+        db.session.remove()
+        ChatbotResponse.invalidate_schema_cache(db.engine)
+        db.engine.dispose()
+        self.context.pop()
+        self.directory.cleanup()
+
+    def test_encode_and_decode(self):
+        """Test that vectors take 2 bytes per emotion and keep about three digits."""
+        blob = encode_scores({'sadness': 0.123456, 'joy': 1.0, 'unknown': 0.5}, EMOTIONS)
+        self.assertEqual(len(blob), 2 * len(EMOTIONS))
+        self.assertEqual(len(encode_scores([0.0] * 34, ['emotion'] * 34)), 68)
+        np.testing.assert_allclose(decode_scores(blob), [1.0, 0.123456, 0.0], atol=1e-3)
+        self.assertAlmostEqual(scores_to_dict(blob, EMOTIONS)['sadness'], 0.123456, places=3)
+
+        matrix = decode_score_matrix([blob, None, encode_scores([0.5, 0.25, 0.0], EMOTIONS)], len(EMOTIONS))
+        self.assertEqual(matrix.dtype, np.float32)
+        self.assertTrue(np.isnan(matrix[1]).all())
+        np.testing.assert_allclose(matrix[2], [0.5, 0.25, 0.0])
+
+        with self.assertRaises(ValueError):
+            encode_scores([0.5, 0.5], EMOTIONS)
+        with self.assertRaises(ValueError):
+            decode_score_matrix([blob], len(EMOTIONS) + 1)
+
+    def test_save_many_stores_scores_with_their_version(self):
+        """Test that stored blobs can be read back with the order of their emotions."""
+        db.create_all()
+        ChatbotResponse.save_many([
+            {'user_message': "Hello", 'bot_response': "Hi", 'emotion': 'joy', 'scores': {'joy': 0.75}},
+            {'user_message': "Hmm", 'bot_response': "Okay", 'emotion': 'neutral'}
+        ], emotion_names=EMOTIONS)
+        ChatbotResponse.save_many([{'user_message': "Hey", 'bot_response': "Hi", 'scores': {'joy': 0.5}}])
+
+        responses = ChatbotResponse.query.order_by(ChatbotResponse.id).all()
+        self.assertEqual([response.scores_version is None for response in responses], [False, True, True])
+        self.assertIsNone(responses[2].emotion_scores)
+        with db.engine.connect() as conn:
+            version = EmotionIndexVersion.version_for(conn, EMOTIONS, create=False)
+            self.assertEqual(responses[0].scores_version, version)
+            self.assertIsNone(EmotionIndexVersion.version_for(conn, EMOTIONS[::-1], create=False))
+            ChatbotResponse.invalidate_schema_cache(db.engine)
+            names = EmotionIndexVersion.emotion_names(conn, version)
+            with self.assertRaises(ValueError):
+                EmotionIndexVersion.emotion_names(conn, version + 1)
+        self.assertEqual(names, EMOTIONS)
+        self.assertEqual(scores_to_dict(responses[0].emotion_scores, names),
+                         {'joy': 0.75, 'sadness': 0.0, 'neutral': 0.0})
+
+    def test_legacy_table_is_upgraded(self):
+        """Test that the score columns are added to a table created without them."""
+        with db.engine.begin() as conn:
+            conn.execute(db.text(
+                "CREATE TABLE chatbot_response (id INTEGER PRIMARY KEY, user_message TEXT NOT NULL, "
+                "bot_response TEXT NOT NULL, emotion VARCHAR(50), timestamp DATETIME)"
+            ))
+            conn.execute(db.text(
+                "INSERT INTO chatbot_response (user_message, bot_response, timestamp) "
+                "VALUES ('Old', 'Row', :timestamp)"
+            ), {'timestamp': datetime(2024, 1, 1)})
+            self.assertEqual(ChatbotResponse.add_missing_columns(conn),
+                             ['emotion_scores', 'scores_version', 'rules_version'])
+            self.assertEqual(ChatbotResponse.add_missing_columns(conn), [])
+
+        ChatbotResponse.save_many([{'user_message': "New", 'bot_response': "Row", 'scores': [0.5, 0.0, 0.0]}],
+                                  emotion_names=EMOTIONS)
+        with db.engine.connect() as conn:
+            rows = conn.execute(db.text(
+                "SELECT emotion_scores, scores_version FROM chatbot_response ORDER BY id"
+            )).fetchall()
+        self.assertEqual(rows[0], (None, None))
+        np.testing.assert_allclose(decode_scores(rows[1][0]), [0.5, 0.0, 0.0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+import unittest
+import sys
+import os
+import csv
+import gzip
+import tempfile
+from datetime import datetime
+
+import numpy as np
+from flask import Flask
+
+# Add the parent directory to sys.path to import the chatbot module
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from chatbot_app import db
+from chatbot_app.export import create_exporter, export_history, load_npz_part
+from chatbot_app.models import ChatbotResponse
+
+EMOTIONS = ('joy', 'sadness', 'neutral')
+EMOTION_INDEX = {emotion: i for i, emotion in enumerate(EMOTIONS)}
+
+
+def score(messages):
+    """Score messages by their length, so that every row gets a different vector."""
+    return [{'scores': {'joy': len(message) / 100, 'sadness': 0.25, 'unknown': 1.0}} for message in messages]
+
+
+class TestHistoryExport(unittest.TestCase):
+    """Tests for the chat history export."""
+
+    def setUp(self):
+        """Bind the models to a SQLite database file with a few responses."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(self.directory.name, 'test.db')
+        db.init_app(self.app)
+        self.context = self.app.app_context()
+        self.context.push()
+        db.create_all()
+        self.add_responses(7)
+
+    def tearDown(self):
+        db.session.remove()
+        db.engine.dispose()
+        self.context.pop()
+        self.directory.cleanup()
+
+    def add_responses(self, count):
+        ChatbotResponse.save_many([
+            {'user_message': f"Message {'é' * i}", 'bot_response': "Reply, with a comma", 'emotion': 'joy',
+             'timestamp': datetime(2024, 1, 1, 12, i)}
+            for i in range(count)
+        ])
+
+    def export(self, export_format, path):
+        exporter = create_exporter(export_format, path, EMOTIONS)
+        with db.engine.connect() as conn:
+            return export_history(conn, exporter, score, EMOTION_INDEX, chunk_size=3)
+
+    def test_csv_export_resumes_after_interruption(self):
+        """Test that a resumed CSV export drops partial writes and adds only new rows."""
+        path = os.path.join(self.directory.name, 'history.csv.gz')
+        self.assertEqual(self.export('csv', path), 7)
+        # A run killed while writing leaves bytes after the last checkpoint
+        with open(path, 'ab') as output:
+            output.write(b'\x1f\x8b partial chunk')
+        self.add_responses(2)
+        self.assertEqual(self.export('csv', path), 2)
+        self.assertEqual(self.export('csv', path), 0)
+
+        with gzip.open(path, 'rt', newline='') as export_file:
+            lines = list(csv.reader(export_file))
+        self.assertEqual(lines[0], ['id', 'timestamp', 'emotion', 'user_message', 'bot_response',
+                                    'score_joy', 'score_sadness', 'score_neutral'])
+        self.assertEqual([int(line[0]) for line in lines[1:]], list(range(1, 10)))
+        self.assertEqual(lines[3][1:5], ['2024-01-01T12:02:00', 'joy', 'Message éé', 'Reply, with a comma'])
+        self.assertEqual(lines[3][5:], ['0.1', '0.25', '0'])
+
+    def test_npz_export_parts(self):
+        """Test that columnar parts hold the rows and a float32 score matrix."""
+        path = os.path.join(self.directory.name, 'history')
+        self.assertEqual(self.export('npz', path), 7)
+        self.add_responses(1)
+        self.assertEqual(self.export('npz', path), 1)
+
+        parts = [load_npz_part(os.path.join(path, f"part-{i:05d}.npz")) for i in range(4)]
+        self.assertEqual(np.concatenate([part['id'] for part in parts]).tolist(), list(range(1, 9)))
+        self.assertEqual(parts[0]['user_message'], ["Message", "Message é", "Message éé"])
+        self.assertEqual(parts[0]['timestamp'][1], np.datetime64('2024-01-01T12:01:00'))
+        scores = parts[0]['scores']
+        self.assertEqual(scores.dtype, np.float32)
+        self.assertEqual(scores.shape, (3, len(EMOTIONS)))
+        np.testing.assert_allclose(scores[2], [0.1, 0.25, 0.0])
+
+    def test_stored_scores_are_reused(self):
+        """Test that only responses without scores in the export's order and rules are scored."""
+        ChatbotResponse.save_many([
+            {'user_message': "Stored", 'bot_response': "Reply", 'scores': {'sadness': 0.5}},
+        ], emotion_names=EMOTIONS, scoring_checksum='current rules')
+        ChatbotResponse.save_many([
+            {'user_message': "Reordered", 'bot_response': "Reply", 'scores': {'sadness': 0.5}},
+        ], emotion_names=EMOTIONS[::-1], scoring_checksum='current rules')
+        ChatbotResponse.save_many([
+            {'user_message': "Old rules", 'bot_response': "Reply", 'scores': {'sadness': 0.5}},
+        ], emotion_names=EMOTIONS, scoring_checksum='old rules')
+        scored = []
+
+        def tracking_score(messages):
+            scored.extend(messages)
+            return score(messages)
+
+        path = os.path.join(self.directory.name, 'history')
+        with db.engine.connect() as conn:
+            self.assertEqual(export_history(conn, create_exporter('npz', path, EMOTIONS), tracking_score,
+                                            EMOTION_INDEX, chunk_size=10, scoring_checksum='current rules'), 10)
+        self.assertNotIn("Stored", scored)
+        self.assertEqual(scored[-2:], ["Reordered", "Old rules"])
+        scores = load_npz_part(os.path.join(path, "part-00000.npz"))['scores']
+        np.testing.assert_allclose(scores[7], [0.0, 0.5, 0.0])
+        np.testing.assert_allclose(scores[8], [0.09, 0.25, 0.0])
+
+    def test_invalid_exports_are_rejected(self):
+        """Test that unknown formats, changed emotions and changed outputs raise ValueError."""
+        path = os.path.join(self.directory.name, 'history.csv.gz')
+        with self.assertRaises(ValueError):
+            create_exporter('parquet', path, EMOTIONS)
+        self.export('csv', path)
+        with self.assertRaises(ValueError):
+            create_exporter('csv', path, EMOTIONS[:2])
+        # Starting over is allowed
+        self.assertEqual(create_exporter('csv', path, EMOTIONS[:2], resume=False).last_id, 0)
+
+        # The output must still hold everything the checkpoint counts
+        other_path = os.path.join(self.directory.name, 'other.csv.gz')
+        self.export('csv', other_path)
+        os.remove(other_path)
+        with self.assertRaises(ValueError):
+            create_exporter('csv', other_path, EMOTIONS)
+        self.assertFalse(os.path.exists(other_path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+import sys
+import os
+import threading
+
+# Add the parent directory to sys.path to import the chatbot module
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from chatbot_app.health import HealthChecker
+
+
+class TestHealthChecker(unittest.TestCase):
+    """Tests for the background health checker."""
+
+    def setUp(self):
+        self.up = True
+        self.diagnosed = 0
+
+    def probe(self):
+        if not self.up:
+            raise ConnectionError("database is unreachable")
+
+    def diagnose(self):
+        self.diagnosed += 1
+        return {'run': self.diagnosed}
+
+    def test_diagnostics_run_only_when_health_flips(self):
+        """Test that the cached status follows the probe and diagnostics run on changes only."""
+        checker = HealthChecker(self.probe, self.diagnose, interval=60)
+        self.assertTrue(checker.wait(5))
+        self.assertTrue(checker.healthy)
+        self.assertEqual(self.diagnosed, 1)
+
+        checker.check()
+        self.assertEqual(self.diagnosed, 1)
+
+        self.up = False
+        self.assertFalse(checker.check())
+        checker.check()
+        self.assertFalse(checker.healthy)
+        self.assertEqual(self.diagnosed, 2)
+
+        status = checker.status(include_diagnostics=True)
+        self.assertEqual(status['error'], "database is unreachable")
+        self.assertEqual(status['diagnostics'], {'run': 2})
+        self.assertEqual(status['checks'], 4)
+        self.assertEqual(status['failures'], 2)
+        self.assertEqual(status['flips'], 1)
+        self.assertIsNotNone(status['checked_at'])
+        self.assertNotIn('diagnostics', checker.status())
+
+        self.up = True
+        self.assertTrue(checker.check())
+        self.assertIsNone(checker.error)
+        self.assertEqual(self.diagnosed, 3)
+        checker.close()
+
+    def test_background_thread_checks_on_interval(self):
+        """Test that the checker thread keeps probing and stops when closed."""
+        probed = threading.Event()
+        calls = []
+
+        def probe():
+            calls.append(1)
+            if len(calls) >= 3:
+                probed.set()
+
+        checker = HealthChecker(probe, interval=0.01)
+        self.assertTrue(probed.wait(5))
+        checker.close()
+        stopped_at = len(calls)
+        self.assertFalse(checker._thread.is_alive())
+        self.assertEqual(len(calls), stopped_at)
+
+        with self.assertRaises(ValueError):
+            HealthChecker(probe, interval=0)
+
+    def test_first_check_runs_in_the_background(self):
+        """Test that creating a checker does not wait for the probe."""
+        release = threading.Event()
+        checker = HealthChecker(lambda: release.wait(5), interval=60)
+        self.assertTrue(checker.healthy)
+        self.assertIsNone(checker.status()['checked_at'])
+        self.assertFalse(checker.wait(0))
+
+        release.set()
+        self.assertTrue(checker.wait(5))
+        self.assertEqual(checker.status()['checks'], 1)
+        checker.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
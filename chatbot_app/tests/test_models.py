@@ -0,0 +1,174 @@
+import unittest
+import sys
+import os
+import tempfile
+from datetime import datetime
+
+from flask import Flask
+
+# Add the parent directory to sys.path to import the chatbot module
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from chatbot_app import db
+from chatbot_app.models import ChatbotResponse, EmotionRollup, decode_cursor, encode_cursor, sanitize_text
+
+
+class TestChatbotResponse(unittest.TestCase):
+    """Tests for storing chat responses."""
+
+    def setUp(self):
+        """Bind the models to an empty SQLite database file."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(self.directory.name, 'test.db')
+        db.init_app(self.app)
+        self.context = self.app.app_context()
+        self.context.push()
+
+    def tearDown(self):
+        db.session.remove()
+        db.engine.dispose()
+        self.context.pop()
+        self.directory.cleanup()
+
+    def test_save_many(self):
+        """Test that rows are sanitized and inserted together, creating the table if needed."""
+        rows = [
+            {'user_message': f"Message {i} <b>", 'bot_response': f"Reply {i}", 'emotion': 'joy'}
+            for i in range(500)
+        ]
+        rows[1]['emotion'] = None
+
+        self.assertEqual(ChatbotResponse.save_many(rows), 500)
+        self.assertEqual(ChatbotResponse.save_many([]), 0)
+
+        stored = db.session.execute(
+            db.text("SELECT user_message, emotion, timestamp FROM chatbot_response ORDER BY id")
+        ).fetchall()
+        self.assertEqual(len(stored), 500)
+        self.assertEqual(stored[0][0], sanitize_text("Message 0 <b>"))
+        self.assertEqual(stored[0][1], 'joy')
+        self.assertIsNone(stored[1][1])
+        self.assertIsNotNone(stored[0][2])
+
+    def test_schema_cache_with_legacy_table(self):
+        """Test that a legacy table is detected once and re-detected after invalidation."""
+        db.session.execute(db.text(
+            "CREATE TABLE chatbot_response (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "user_message TEXT NOT NULL, bot_response TEXT NOT NULL)"
+        ))
+        db.session.commit()
+
+        with db.engine.connect() as conn:
+            schema = ChatbotResponse.table_schema(conn)
+            self.assertIs(ChatbotResponse.table_schema(conn), schema)
+        self.assertEqual(schema.fields, ('user_message', 'bot_response'))
+
+        row_id = ChatbotResponse.save_compatible(db.session(), "Hello", "Hi there", 'joy', '127.0.0.1')
+        self.assertEqual(row_id, 1)
+        db.session.close()
+
+        db.session.execute(db.text("ALTER TABLE chatbot_response ADD COLUMN emotion VARCHAR(50)"))
+        db.session.commit()
+        ChatbotResponse.invalidate_schema_cache(db.engine)
+
+        self.assertEqual(ChatbotResponse.save_many([{'user_message': "Hi", 'bot_response': "Hey", 'emotion': 'joy'}]), 1)
+        self.assertEqual(
+            db.session.execute(db.text("SELECT emotion FROM chatbot_response WHERE id = 2")).scalar(), 'joy'
+        )
+
+    def test_save_many_is_all_or_nothing(self):
+        """Test that an invalid row keeps the whole batch out of the table."""
+        db.create_all()
+        rows = [
+            {'user_message': "Hello", 'bot_response': "Hi there"},
+            {'user_message': "", 'bot_response': "Nothing to reply to"}
+        ]
+        with self.assertRaises(ValueError):
+            ChatbotResponse.save_many(rows)
+
+        self.assertEqual(db.session.execute(db.text("SELECT COUNT(*) FROM chatbot_response")).scalar(), 0)
+
+    def test_history_pages(self):
+        """Test that keyset pages cover every row once, with tied and missing timestamps."""
+        ChatbotResponse.save_many([
+            {'user_message': f"Message {i}", 'bot_response': "Reply", 'timestamp': datetime(2024, 1, 1, 12, i // 3)}
+            for i in range(10)
+        ])
+        db.session.execute(db.text(
+            "INSERT INTO chatbot_response (user_message, bot_response, timestamp) "
+            "VALUES ('Old', 'Reply', NULL), ('Older', 'Reply', NULL)"
+        ))
+        db.session.commit()
+
+        seen = []
+        after = None
+        while True:
+            page = []
+            for query in ChatbotResponse.history_queries(after, limit=4):
+                page.extend(db.session.execute(query.limit(4 - len(page))).fetchall())
+                if len(page) == 4:
+                    break
+            seen.extend(row.id for row in page)
+            if len(page) < 4:
+                break
+            after = decode_cursor(encode_cursor(page[-1].timestamp, page[-1].id))
+
+        self.assertEqual(seen, [10, 9, 8, 7, 6, 5, 4, 3, 2, 1, 12, 11])
+        self.assertEqual(decode_cursor(encode_cursor(None, 12)), (None, 12))
+        with self.assertRaises(ValueError):
+            decode_cursor("not a cursor")
+
+    def test_emotion_rollups(self):
+        """Test that rollups follow every write path and match a rebuild from the table."""
+        db.create_all()
+        ChatbotResponse.save_many([
+            {'user_message': "Hi", 'bot_response': "Hey", 'emotion': emotion, 'timestamp': timestamp}
+            for emotion, timestamp in [
+                ('joy', datetime(2024, 1, 1, 9, 15)),
+                ('joy', datetime(2024, 1, 1, 9, 45)),
+                ('anger', datetime(2024, 1, 1, 17, 0)),
+                (None, datetime(2024, 1, 2, 8, 30))
+            ]
+        ])
+        ChatbotResponse.save_compatible(db.session(), "Hello", "Hi there", 'joy')
+        db.session.close()
+        db.session.add(ChatbotResponse(user_message="Hello", bot_response="Hi", emotion='anger'))
+        db.session.commit()
+
+        with db.engine.connect() as conn:
+            days = EmotionRollup.distribution(conn, 'day', end=datetime(2024, 1, 3))
+            hours = EmotionRollup.distribution(conn, 'hour', emotions=['joy'], end=datetime(2024, 1, 3))
+            recorded = {granularity: EmotionRollup.distribution(conn, granularity) for granularity in ('hour', 'day')}
+
+        self.assertEqual([tuple(row) for row in days], [
+            (datetime(2024, 1, 1), 'anger', 1),
+            (datetime(2024, 1, 1), 'joy', 2),
+            (datetime(2024, 1, 2), 'none', 1)
+        ])
+        self.assertEqual([tuple(row) for row in hours], [(datetime(2024, 1, 1, 9), 'joy', 2)])
+        self.assertEqual(sum(row.count for row in recorded['day']), 6)
+
+        with db.engine.begin() as conn:
+            self.assertEqual(EmotionRollup.rebuild(conn), 6)
+        with db.engine.connect() as conn:
+            for granularity, rows in recorded.items():
+                self.assertEqual(EmotionRollup.distribution(conn, granularity), rows)
+            with self.assertRaises(ValueError):
+                EmotionRollup.distribution(conn, 'week')
+
+        # SQLite before 3.24 has no upsert; counts are updated or inserted row by row
+        db.engine.dialect.server_version_info = (3, 23, 0)
+        with db.engine.begin() as conn:
+            EmotionRollup.record(conn, [('joy', datetime(2024, 1, 1, 10)), ('fear', datetime(2024, 1, 1, 10))])
+        with db.engine.connect() as conn:
+            days = EmotionRollup.distribution(conn, 'day', end=datetime(2024, 1, 2))
+        self.assertEqual([tuple(row) for row in days], [
+            (datetime(2024, 1, 1), 'anger', 1),
+            (datetime(2024, 1, 1), 'fear', 1),
+            (datetime(2024, 1, 1), 'joy', 3)
+        ])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+import sys
+import os
+
+# Add the parent directory to sys.path to import the chatbot module
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from chatbot_app.chatbot.advanced_chatbot import AdvancedChatbot
+from chatbot_app.chatbot.parallel_scorer import ParallelEmotionScorer
+
+
+class TestParallelEmotionScorer(unittest.TestCase):
+    """Tests for process-pool emotion scoring."""
+
+    def setUp(self):
+        """Set up a chatbot and a list of messages."""
+        self.chatbot = AdvancedChatbot()
+        self.messages = [
+            "I am happy today.",
+            "I feel sad right now. But tomorrow will be better!",
+            "I'm angry about what happened.",
+            "I want to end my life.",
+            "I feel let down",
+            "The weather is nice today.",
+            "",
+        ] * 5
+
+    def test_matches_batch_analysis(self):
+        """Test that parallel scoring matches batch analysis and keeps input order."""
+        context = {'session_emotions': ['sadness', 'anger']}
+        with ParallelEmotionScorer(workers=2, chunk_size=3, context=context) as scorer:
+            results = scorer.score(self.messages)
+            self.assertEqual(results, self.chatbot.analyze_emotion_batch(self.messages, context))
+            self.assertEqual(scorer.score([]), [])
+
+    def test_imap_streams_generators(self):
+        """Test that imap accepts a generator and yields results one by one."""
+        with ParallelEmotionScorer(workers=2, chunk_size=4) as scorer:
+            results = scorer.imap(message for message in self.messages)
+            self.assertEqual(next(results), self.chatbot.analyze_emotion_batch(self.messages[:1])[0])
+            self.assertEqual(list(results), self.chatbot.analyze_emotion_batch(self.messages[1:]))
+
+    def test_invalid_arguments(self):
+        """Test that non-positive chunk sizes are rejected."""
+        with self.assertRaises(ValueError):
+            ParallelEmotionScorer(workers=1, chunk_size=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
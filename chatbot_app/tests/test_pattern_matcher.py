@@ -0,0 +1,116 @@
+import unittest
+import sys
+import os
+import re
+
+# Add the parent directory to sys.path to import the chatbot module
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from chatbot_app.chatbot.advanced_chatbot import AdvancedChatbot
+from chatbot_app.chatbot.pattern_matcher import (
+    AhoCorasick, KeywordGatedPattern, create_matcher, required_literals, required_tokens, tokenize
+)
+
+
+class TestPatternMatcher(unittest.TestCase):
+    """Tests for the emotion pattern matching engines."""
+
+    def setUp(self):
+        """Set up one chatbot per matching engine."""
+        self.sequential = AdvancedChatbot(matcher='sequential')
+        self.aho_corasick = AdvancedChatbot(matcher='aho_corasick')
+        self.keyword_index = AdvancedChatbot(matcher='keyword_index')
+
+        self.messages = [
+            "I am happy today.",
+            "I feel sad right now. But tomorrow will be better!",
+            "I'm angry about what happened, it's so unfair.",
+            "I'm worried about my exam tomorrow.",
+            "Wow, I didn't see that coming 😂",
+            "I admire my professor and I look up to her.",
+            "I don't think that's a good idea at all.",
+            "Why do you always do that? How hard is it to listen?",
+            "I want to die, I can't take it anymore.",
+            "I miss the old days when we were kids.",
+            "ugh, whatever, come on",
+            "The weather is nice today.",
+            "",
+        ]
+
+    def test_required_literals(self):
+        """Test that literal keywords are extracted from patterns."""
+        self.assertEqual(required_literals(r'\b(happy|glad)\b'), frozenset(['happy', 'glad']))
+        self.assertEqual(required_literals(r'\bi (admire|respect) (.*?)\b'),
+                         frozenset(['i admire ', 'i respect ']))
+        self.assertEqual(required_literals(r'\b(so|very)? ?(sad|down)\b'), frozenset(['sad', 'down']))
+        self.assertIsNone(required_literals(r'\w+'))
+        self.assertIsNone(required_literals(r'(?i)\bhappy\b'))
+
+    def test_required_tokens(self):
+        """Test that only whole tokens are used as index keys."""
+        self.assertEqual(required_tokens(r'\b(happy|glad)\b'), frozenset(['happy', 'glad']))
+        self.assertEqual(required_tokens(r'\bi (admire|respect) (.*?)\b'), frozenset(['admire', 'respect']))
+        # Without word boundaries 'happy' could be part of 'unhappy'
+        self.assertIsNone(required_tokens(r'happy'))
+        self.assertEqual(required_tokens(r'\b(😂|🤣)\b'), frozenset(['😂', '🤣']))
+        self.assertEqual(tokenize("i can't wait 😂"), ['i', 'can', "'", 't', 'wait', '😂'])
+
+    def test_keyword_gated_pattern(self):
+        """Test that gated patterns only run when one of their tokens is present."""
+        pattern = KeywordGatedPattern(r'\bi miss\b')
+        text = "i miss my friends"
+        self.assertIsNotNone(pattern.search(text, set(tokenize(text))))
+        self.assertEqual(pattern.findall(text, set(tokenize(text))), ['i miss'])
+        # The regex is skipped when the tokens rule it out
+        self.assertIsNone(pattern.search(text, {'hello'}))
+        self.assertEqual(pattern.findall(text, {'hello'}), [])
+
+    def test_every_pattern_has_literals(self):
+        """Test that every pattern in the bank can be prefiltered."""
+        for emotion, patterns in self.sequential.emotion_patterns.items():
+            for pattern in patterns:
+                literals = required_literals(pattern)
+                self.assertIsNotNone(literals, f"No literals for {emotion} pattern {pattern}")
+                # A pattern can only match text that contains one of its literals
+                for literal in literals:
+                    self.assertTrue(literal)
+                self.assertIsNotNone(required_tokens(pattern), f"No tokens for {emotion} pattern {pattern}")
+
+    def test_aho_corasick_find(self):
+        """Test that the automaton finds overlapping keywords."""
+        automaton = AhoCorasick(['he', 'she', 'his', 'hers'])
+        self.assertEqual(automaton.find('ushers'), {'he', 'she', 'hers'})
+        self.assertEqual(automaton.find('nothing here'), {'he'})
+        self.assertEqual(automaton.find(''), set())
+
+    def test_engines_report_same_matches(self):
+        """Test that all engines report identical per-pattern match counts."""
+        for message in self.messages:
+            # Sentences are matched with the tokens of the whole message
+            message_tokens = tokenize(message.lower())
+            for text in [message.lower()] + re.split(r'[.!?]+', message.lower()):
+                expected = self.sequential.pattern_matcher.match(text)
+                self.assertEqual(expected, self.aho_corasick.pattern_matcher.match(text),
+                                 f"Aho-Corasick engine disagrees on '{text}'")
+                self.assertEqual(expected, self.keyword_index.pattern_matcher.match(text, message_tokens),
+                                 f"Keyword index engine disagrees on '{text}'")
+
+    def test_engines_produce_same_analysis(self):
+        """Test that analyze_emotion gives the same result with every engine."""
+        for message in self.messages:
+            for session_emotions in [[], ['neutral', 'joy'], ['sadness', 'sadness', 'anger']]:
+                results = []
+                for chatbot in [self.sequential, self.aho_corasick, self.keyword_index]:
+                    chatbot.context['session_emotions'] = list(session_emotions)
+                    results.append(chatbot.analyze_emotion(message))
+                self.assertEqual(results[0], results[1], f"Analysis differs for '{message}'")
+                self.assertEqual(results[0], results[2], f"Analysis differs for '{message}'")
+
+    def test_unknown_matcher(self):
+        """Test that an unknown engine name is rejected."""
+        with self.assertRaises(ValueError):
+            create_matcher('unknown', self.sequential.compiled_emotion_patterns)
+
+
+if __name__ == '__main__':
+    unittest.main()
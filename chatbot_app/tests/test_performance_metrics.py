@@ -16,14 +16,55 @@ import os
 import sys
 import time
 import json
+import multiprocessing
+import shutil
+import subprocess
+import tempfile
 import numpy as np
+from flask import Flask
 from memory_profiler import memory_usage
 from collections import defaultdict, Counter
 from sklearn.metrics import precision_score, recall_score, f1_score
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+from chatbot_app import db
+from chatbot_app.models import ChatbotResponse
 from chatbot_app.chatbot.advanced_chatbot import AdvancedChatbot
+from chatbot_app.chatbot.parallel_scorer import ParallelEmotionScorer
+from chatbot_app.chatbot.rule_pack import DEFAULT_RULE_PACK_PATH
+from chatbot_app.sqlite_profile import apply_sqlite_profile, get_sqlite_profile, sqlite_engine_options
+
+
+def _sqlite_worker(uri, profile_name, role, rows, results):
+    """Write (or read) chatbot_response from a separate process, like a gunicorn worker."""
+    profile = get_sqlite_profile(profile_name)
+    engine = db.create_engine(uri, **sqlite_engine_options(uri, profile))
+    apply_sqlite_profile(engine, profile)
+    insert = db.text(
+        "INSERT INTO chatbot_response (user_message, bot_response, emotion, timestamp) "
+        "VALUES (:user_message, :bot_response, 'joy', CURRENT_TIMESTAMP)"
+    )
+    done = locked = 0
+    slowest = 0.0
+    start_time = time.perf_counter()
+    for i in range(rows):
+        operation_start = time.perf_counter()
+        try:
+            with engine.begin() as conn:
+                if role == 'writer':
+                    # One turn per commit, as when the write-behind queue is nearly empty
+                    conn.execute(insert, {'user_message': f"I feel happy {i}", 'bot_response': "Lovely!"})
+                else:
+                    conn.execute(db.text("SELECT emotion, COUNT(*) FROM chatbot_response GROUP BY emotion")).fetchall()
+            done += 1
+        except Exception:
+            # "database is locked" after the busy timeout
+            locked += 1
+        # Time spent waiting for the lock shows up as slow operations
+        slowest = max(slowest, time.perf_counter() - operation_start)
+    results.put((role, done, locked, slowest))
+    engine.dispose()
 
 class PerformanceMetricsTester:
     """Tests and reports on chatbot performance metrics."""
@@ -87,6 +128,16 @@ class PerformanceMetricsTester:
             "memory_usage": {},
             "mixed_emotion_detection": {},
             "emotion_coverage": {},
+            "pattern_bank": {},
+            "matcher_engines": {},
+            "parallel_scoring": {},
+            "pipeline_stages": {},
+            "memory_soak": {},
+            "construction": {},
+            "cold_start": {},
+            "startup": {},
+            "bulk_insert": {},
+            "sqlite_concurrency": {},
             "summary": {}
         }
 
@@ -211,6 +262,360 @@ class PerformanceMetricsTester:
         print(f"Overall Median: {overall_stats['median']:.2f} ms")
         print(f"95th Percentile: {overall_stats['p95']:.2f} ms")
 
+    def test_pattern_bank_speed(self):
+        """Compare raw pattern strings against the precompiled emotion pattern bank."""
+        print("\nTesting Pattern Bank Speed...")
+
+        import re
+
+        # Split the latency messages into sentences the same way analyze_emotion does
+        sentences = []
+        for message in self.latency_dataset + [msg for msg, _, _ in self.accuracy_dataset]:
+            sentences.extend(s.strip() for s in re.split(r'[.!?]+', message.lower()) if s.strip())
+
+        def count_raw():
+            counts = []
+            for sentence in sentences:
+                for emotion, patterns in self.chatbot.emotion_patterns.items():
+                    for pattern in patterns:
+                        counts.append(len(re.findall(pattern, sentence)))
+            return counts
+
+        def count_compiled():
+            counts = []
+            for sentence in sentences:
+                for emotion, patterns in self.chatbot.compiled_emotion_patterns.items():
+                    for regex, _, _ in patterns:
+                        counts.append(len(regex.findall(sentence)))
+            return counts
+
+        # Both paths must produce identical per-pattern match counts
+        identical = count_raw() == count_compiled()
+
+        iterations = 20
+        start_time = time.perf_counter()
+        for _ in range(iterations):
+            count_raw()
+        raw_ms = (time.perf_counter() - start_time) * 1000 / iterations
+
+        start_time = time.perf_counter()
+        for _ in range(iterations):
+            count_compiled()
+        compiled_ms = (time.perf_counter() - start_time) * 1000 / iterations
+
+        speedup = raw_ms / compiled_ms if compiled_ms > 0 else 0
+
+        # Store results
+        self.results["pattern_bank"] = {
+            "sentences": len(sentences),
+            "raw_ms": raw_ms,
+            "compiled_ms": compiled_ms,
+            "speedup": speedup,
+            "identical_counts": identical
+        }
+
+        print(f"Sentences scanned: {len(sentences)}")
+        print(f"Raw patterns: {raw_ms:.2f} ms per pass")
+        print(f"Compiled bank: {compiled_ms:.2f} ms per pass")
+        print(f"Speedup: {speedup:.2f}x")
+        print(f"Identical counts: {identical}")
+
+    def test_matcher_engines(self):
+        """Compare the sequential and Aho-Corasick pattern matching engines."""
+        print("\nTesting Matcher Engines...")
+
+        messages = [message.lower() for message in self.latency_dataset + [msg for msg, _, _ in self.accuracy_dataset]]
+
+        engines = {
+            "sequential": AdvancedChatbot(matcher="sequential").pattern_matcher,
+            "aho_corasick": AdvancedChatbot(matcher="aho_corasick").pattern_matcher,
+            "keyword_index": AdvancedChatbot(matcher="keyword_index").pattern_matcher
+        }
+
+        iterations = 20
+        engine_results = {}
+        for name, engine in engines.items():
+            start_time = time.perf_counter()
+            for _ in range(iterations):
+                for message in messages:
+                    engine.match(message)
+            engine_results[name] = (time.perf_counter() - start_time) * 1000 / iterations
+
+        # All engines must report the same matches
+        identical = all(engines["sequential"].match(message) == engines[name].match(message)
+                        for name in engines for message in messages)
+        speedup = engine_results["sequential"] / engine_results["aho_corasick"] if engine_results["aho_corasick"] > 0 else 0
+
+        # Store results
+        self.results["matcher_engines"] = {
+            "messages": len(messages),
+            "sequential_ms": engine_results["sequential"],
+            "aho_corasick_ms": engine_results["aho_corasick"],
+            "keyword_index_ms": engine_results["keyword_index"],
+            "speedup": speedup,
+            "identical_matches": identical
+        }
+
+        print(f"Messages scanned: {len(messages)}")
+        print(f"Sequential engine: {engine_results['sequential']:.2f} ms per pass")
+        print(f"Aho-Corasick engine: {engine_results['aho_corasick']:.2f} ms per pass")
+        print(f"Keyword index engine: {engine_results['keyword_index']:.2f} ms per pass")
+        print(f"Speedup: {speedup:.2f}x")
+        print(f"Identical matches: {identical}")
+
+    def test_parallel_scoring(self):
+        """Measure batch scoring throughput of the process pool against a single process."""
+        print("\nTesting Parallel Scoring...")
+
+        messages = (self.latency_dataset + [msg for msg, _, _ in self.accuracy_dataset]) * 20
+        workers = os.cpu_count() or 1
+
+        start_time = time.perf_counter()
+        serial_results = self.chatbot.analyze_emotion_batch(messages)
+        serial_time = time.perf_counter() - start_time
+
+        with ParallelEmotionScorer(workers=workers, chunk_size=64) as scorer:
+            # Warm up the workers so pool startup is not measured
+            scorer.score(messages[:workers])
+            start_time = time.perf_counter()
+            parallel_results = scorer.score(messages)
+            parallel_time = time.perf_counter() - start_time
+
+        speedup = serial_time / parallel_time if parallel_time > 0 else 0
+
+        # Store results
+        self.results["parallel_scoring"] = {
+            "messages": len(messages),
+            "workers": workers,
+            "serial_msgs_per_second": len(messages) / serial_time if serial_time > 0 else 0,
+            "parallel_msgs_per_second": len(messages) / parallel_time if parallel_time > 0 else 0,
+            "speedup": speedup,
+            "identical_results": serial_results == parallel_results
+        }
+
+        print(f"Messages scored: {len(messages)} on {workers} workers")
+        print(f"Single process: {serial_time:.2f} s")
+        print(f"Process pool: {parallel_time:.2f} s")
+        print(f"Speedup: {speedup:.2f}x")
+        print(f"Identical results: {serial_results == parallel_results}")
+
+    def test_pipeline_stages(self):
+        """Measure the text scoring and context adjustment stages of emotion analysis separately."""
+        print("\nTesting Pipeline Stages...")
+
+        messages = self.latency_dataset + [msg for msg, _, _ in self.accuracy_dataset]
+        session_history = ['neutral', 'sadness', 'sadness']
+        chatbot = AdvancedChatbot(cache_size=0)
+
+        start_time = time.perf_counter()
+        base_scores = [chatbot.score_text(message) for message in messages]
+        score_text_time = (time.perf_counter() - start_time) * 1000 / len(messages)
+
+        start_time = time.perf_counter()
+        for scores in base_scores:
+            chatbot.apply_context(scores, session_history)
+        apply_context_time = (time.perf_counter() - start_time) * 1000 / len(messages)
+
+        # Repeat traffic is served from the analysis cache
+        cached_chatbot = AdvancedChatbot()
+        for message in messages:
+            cached_chatbot.score_text(message)
+        start_time = time.perf_counter()
+        for message in messages:
+            cached_chatbot.score_text(message)
+        cached_score_text_time = (time.perf_counter() - start_time) * 1000 / len(messages)
+
+        # Store results
+        self.results["pipeline_stages"] = {
+            "messages": len(messages),
+            "score_text_ms": score_text_time,
+            "cached_score_text_ms": cached_score_text_time,
+            "apply_context_ms": apply_context_time
+        }
+
+        print(f"score_text: {score_text_time:.3f} ms per message")
+        print(f"score_text (cached): {cached_score_text_time:.3f} ms per message")
+        print(f"apply_context: {apply_context_time:.3f} ms per message")
+
+    def test_construction_time(self, instances=100):
+        """Measure the cost of constructing chatbots once the shared rule tables exist."""
+        print("\nTesting Chatbot Construction...")
+
+        start_time = time.perf_counter()
+        chatbots = [AdvancedChatbot() for _ in range(instances)]
+        construction_time = (time.perf_counter() - start_time) * 1000 / instances
+        shared = all(chatbot.emotion_patterns is self.chatbot.emotion_patterns for chatbot in chatbots)
+
+        # Store results
+        self.results["construction"] = {
+            "instances": instances,
+            "construction_ms": construction_time,
+            "shared_tables": shared
+        }
+
+        print(f"Construction: {construction_time:.3f} ms per chatbot")
+        print(f"Tables shared: {shared}")
+
+    def test_cold_start(self):
+        """Measure the first chatbot of a fresh process, compiling the rule pack and loading its cache."""
+        print("\nTesting Cold Start...")
+
+        script = (
+            "import time; start = time.perf_counter(); "
+            "from chatbot_app.chatbot.advanced_chatbot import AdvancedChatbot; "
+            "AdvancedChatbot(rules_path={path!r}); "
+            "print((time.perf_counter() - start) * 1000)"
+        )
+        project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+        with tempfile.TemporaryDirectory() as directory:
+            # A copy of the default pack starts without a compiled cache
+            path = shutil.copy(DEFAULT_RULE_PACK_PATH, directory)
+            timings = []
+            for _ in range(2):
+                output = subprocess.run([sys.executable, '-c', script.format(path=path)], cwd=project_root,
+                                        capture_output=True, text=True, check=True).stdout
+                timings.append(float(output.split()[-1]))
+
+        # Store results
+        self.results["cold_start"] = {
+            "compile_ms": timings[0],
+            "cached_ms": timings[1],
+            "speedup": timings[0] / timings[1]
+        }
+
+        print(f"Cold start compiling the rule pack: {timings[0]:.1f} ms")
+        print(f"Cold start from the compiled cache: {timings[1]:.1f} ms")
+
+    def test_startup_time(self, slowest=10):
+        """Report app startup like python -X importtime, and the deferred first chatbot build."""
+        print("\nTesting App Startup...")
+
+        script = (
+            "import time; start = time.perf_counter(); "
+            "from chatbot_app import create_app; from chatbot_app.routes.main import get_chatbot; "
+            "app = create_app('testing'); created = time.perf_counter(); "
+            "get_chatbot(app); built = time.perf_counter(); "
+            "print((created - start) * 1000, (built - created) * 1000)"
+        )
+        project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+        process = subprocess.run([sys.executable, '-X', 'importtime', '-c', script], cwd=project_root,
+                                 capture_output=True, text=True, check=True)
+        create_app_ms, first_chatbot_ms = map(float, process.stdout.split()[-2:])
+
+        # Lines look like "import time:  self [us] | cumulative | imported package"
+        imports = []
+        for line in process.stderr.splitlines():
+            if not line.startswith('import time:') or 'cumulative' in line:
+                continue
+            _, cumulative, name = line[len('import time:'):].split('|')
+            imports.append((name.rstrip(), int(cumulative) / 1000))
+        top_level = [(name, ms) for name, ms in imports if not name.startswith('  ')]
+        import_ms = sum(ms for _, ms in top_level)
+
+        # Store results
+        self.results["startup"] = {
+            "import_ms": import_ms,
+            "create_app_ms": create_app_ms,
+            "first_chatbot_ms": first_chatbot_ms,
+            "slowest_imports": [
+                {"module": name.strip(), "cumulative_ms": ms}
+                for name, ms in sorted(top_level, key=lambda item: item[1], reverse=True)[:slowest]
+            ]
+        }
+
+        print(f"Imports: {import_ms:.1f} ms")
+        print(f"create_app (including imports): {create_app_ms:.1f} ms")
+        print(f"First chatbot, built on first use: {first_chatbot_ms:.1f} ms")
+        for entry in self.results["startup"]["slowest_imports"]:
+            print(f"  {entry['cumulative_ms']:8.1f} ms  {entry['module']}")
+
+    def test_bulk_insert(self, rows=20000, single_rows=500):
+        """Compare storing chat responses with save_many against one save_compatible per row."""
+        print("\nTesting Bulk Insert...")
+
+        records = [
+            {
+                'user_message': f"I feel happy about the news number {i}",
+                'bot_response': "That's lovely to hear! Happiness often comes from the things that matter most to us.",
+                'emotion': 'joy',
+                'ip_address': '127.0.0.1'
+            }
+            for i in range(rows)
+        ]
+
+        with tempfile.TemporaryDirectory() as directory:
+            app = Flask(__name__)
+            app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(directory, 'bulk.db')
+            db.init_app(app)
+            with app.app_context():
+                db.create_all()
+
+                start_time = time.perf_counter()
+                ChatbotResponse.save_many(records)
+                many_rate = rows / (time.perf_counter() - start_time)
+
+                start_time = time.perf_counter()
+                for record in records[:single_rows]:
+                    ChatbotResponse.save_compatible(db.session(), **record)
+                    db.session.close()
+                single_rate = single_rows / (time.perf_counter() - start_time)
+
+                db.session.remove()
+                db.engine.dispose()
+
+        # Store results
+        self.results["bulk_insert"] = {
+            "rows": rows,
+            "save_many_rows_per_second": many_rate,
+            "save_compatible_rows_per_second": single_rate,
+            "speedup": many_rate / single_rate
+        }
+
+        print(f"save_many: {many_rate:.0f} rows/s")
+        print(f"save_compatible: {single_rate:.0f} rows/s")
+
+    def test_sqlite_concurrency(self, writers=4, readers=2, rows=300):
+        """Compare concurrent writer throughput and lock errors of the SQLite profiles."""
+        print("\nTesting SQLite Concurrency...")
+
+        for profile_name in ('default', 'wal'):
+            with tempfile.TemporaryDirectory() as directory:
+                uri = 'sqlite:///' + os.path.join(directory, 'concurrency.db')
+                engine = db.create_engine(uri)
+                ChatbotResponse.__table__.create(engine)
+                engine.dispose()
+
+                results = multiprocessing.Queue()
+                processes = [
+                    multiprocessing.Process(target=_sqlite_worker, args=(uri, profile_name, role, rows, results))
+                    for role in ['writer'] * writers + ['reader'] * readers
+                ]
+                start_time = time.perf_counter()
+                for process in processes:
+                    process.start()
+                outcomes = [results.get() for _ in processes]
+                for process in processes:
+                    process.join()
+                elapsed = time.perf_counter() - start_time
+
+            writes = sum(done for role, done, locked, slowest in outcomes if role == 'writer')
+            reads = sum(done for role, done, locked, slowest in outcomes if role == 'reader')
+            self.results["sqlite_concurrency"][profile_name] = {
+                "writers": writers,
+                "readers": readers,
+                "writes_per_second": writes / elapsed,
+                "reads_per_second": reads / elapsed,
+                "lock_errors": sum(locked for role, done, locked, slowest in outcomes),
+                "max_operation_ms": max(slowest for role, done, locked, slowest in outcomes) * 1000,
+                "seconds": elapsed
+            }
+            profile_results = self.results["sqlite_concurrency"][profile_name]
+            print(f"{profile_name}: {profile_results['writes_per_second']:.0f} writes/s, "
+                  f"{profile_results['reads_per_second']:.0f} reads/s, "
+                  f"{profile_results['lock_errors']} lock errors, "
+                  f"slowest operation {profile_results['max_operation_ms']:.1f} ms")
+
     def test_memory_usage(self):
         """Test memory usage during emotion detection."""
         print("\nTesting Memory Usage...")
@@ -247,6 +652,45 @@ class PerformanceMetricsTester:
         print(f"Average Memory: {avg:.2f} MB")
         print(f"Memory Increase: {peak - baseline:.2f} MB")
 
+    def test_memory_soak(self, messages=1_000_000, samples=10):
+        """Check that resident memory stays flat over a long conversation with bounded histories."""
+        print("\nTesting Memory Soak...")
+
+        chatbot = AdvancedChatbot()
+        dataset = self.latency_dataset + [msg for msg, _, _ in self.accuracy_dataset]
+        interval = max(1, messages // samples)
+
+        def resident_mb():
+            return memory_usage(-1, interval=0.01, timeout=0.02)[0]
+
+        rss_samples = [resident_mb()]
+        start_time = time.perf_counter()
+        for i in range(messages):
+            chatbot.process_message(dataset[i % len(dataset)])
+            if (i + 1) % interval == 0:
+                rss_samples.append(resident_mb())
+        elapsed = time.perf_counter() - start_time
+
+        # Growth after the first sample, once caches and histories are warm
+        steady_growth = rss_samples[-1] - rss_samples[1] if len(rss_samples) > 1 else 0.0
+
+        # Store results
+        self.results["memory_soak"] = {
+            "messages": messages,
+            "history_depth": chatbot.history_depth,
+            "rss_samples_mb": rss_samples,
+            "start_mb": rss_samples[0],
+            "end_mb": rss_samples[-1],
+            "steady_growth_mb": steady_growth,
+            "conversation_memory_length": len(chatbot.conversation_memory),
+            "msgs_per_second": messages / elapsed if elapsed > 0 else 0
+        }
+
+        print(f"Messages processed: {messages}")
+        print(f"Resident memory: {rss_samples[0]:.2f} MB -> {rss_samples[-1]:.2f} MB")
+        print(f"Growth after warm-up: {steady_growth:.2f} MB")
+        print(f"Conversation memory length: {len(chatbot.conversation_memory)}")
+
     def test_mixed_emotion_detection(self):
         """Test the accuracy of detecting mixed emotions."""
         print("\nTesting Mixed Emotion Detection...")
@@ -407,7 +851,17 @@ class PerformanceMetricsTester:
         # Run all tests
         self.test_accuracy()
         self.test_latency()
+        self.test_pattern_bank_speed()
+        self.test_matcher_engines()
+        self.test_parallel_scoring()
+        self.test_pipeline_stages()
         self.test_memory_usage()
+        self.test_construction_time()
+        self.test_cold_start()
+        self.test_startup_time()
+        self.test_bulk_insert()
+        self.test_sqlite_concurrency()
+        self.test_memory_soak()
         self.test_mixed_emotion_detection()
         self.test_emotion_coverage()
 
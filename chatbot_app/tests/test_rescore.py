@@ -0,0 +1,104 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+from datetime import datetime
+
+from flask import Flask
+
+# Add the parent directory to sys.path to import the chatbot module
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from chatbot_app import db
+from chatbot_app.emotion_scores import scores_to_dict
+from chatbot_app.models import ChatbotResponse, EmotionRollup, RuleVersion
+from chatbot_app.rescore import rescore_history
+
+EMOTIONS = ('joy', 'sadness', 'neutral')
+
+
+class TestRescoreHistory(unittest.TestCase):
+    """Tests for the offline re-scoring of stored responses."""
+
+    def setUp(self):
+        """Bind the models to a SQLite database file with responses scored by old rules."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(self.directory.name, 'test.db')
+        db.init_app(self.app)
+        self.context = self.app.app_context()
+        self.context.push()
+        db.create_all()
+        self.checkpoint = os.path.join(self.directory.name, 'rescore.json')
+        self.scored = []
+        ChatbotResponse.save_many([
+            {'user_message': message, 'bot_response': "Reply", 'emotion': 'joy', 'scores': {'joy': 1.0},
+             'timestamp': datetime(2024, 1, 1, 12, i)}
+            for i, message in enumerate(["I am sad", "Great day", "So sad today", "Okay"])
+        ], emotion_names=EMOTIONS, scoring_checksum='old rules')
+
+    def tearDown(self):
+        db.session.remove()
+        ChatbotResponse.invalidate_schema_cache(db.engine)
+        db.engine.dispose()
+        self.context.pop()
+        self.directory.cleanup()
+
+    def score(self, messages):
+        """Label messages mentioning sadness as sad, the others as joyful."""
+        self.scored.extend(messages)
+        return [{'emotion': 'sadness', 'scores': {'sadness': 0.75, 'neutral': 0.25}} if 'sad' in message
+                else {'emotion': 'joy', 'scores': {'joy': 1.0}} for message in messages]
+
+    def rescore(self, checksum='new rules', **kwargs):
+        return rescore_history(db.engine, self.score, EMOTIONS, checksum, self.checkpoint, chunk_size=3, **kwargs)
+
+    def test_stale_rows_are_rescored_once(self):
+        """Test that labels, score blobs, version tags and rollups are updated."""
+        self.assertEqual(self.rescore(), (4, 2, 4))
+        responses = ChatbotResponse.query.order_by(ChatbotResponse.id).all()
+        self.assertEqual([response.emotion for response in responses], ['sadness', 'joy', 'sadness', 'joy'])
+        self.assertEqual(scores_to_dict(responses[0].emotion_scores, EMOTIONS),
+                         {'joy': 0.0, 'sadness': 0.75, 'neutral': 0.25})
+        with db.engine.connect() as conn:
+            version = RuleVersion.version_for(conn, 'new rules', create=False)
+            self.assertEqual({response.rules_version for response in responses}, {version})
+            day = EmotionRollup.distribution(conn, 'day')
+        self.assertEqual({emotion: count for _, emotion, count in day}, {'joy': 2, 'sadness': 2})
+        with open(self.checkpoint) as checkpoint_file:
+            self.assertEqual(json.load(checkpoint_file)['last_id'], 4)
+
+        # A rerun with the same rules only updates responses stored since with other rules
+        self.scored.clear()
+        ChatbotResponse.save_many([{'user_message': "Sad again", 'bot_response': "Reply", 'scores': [0, 0, 1]}],
+                                  emotion_names=EMOTIONS, scoring_checksum='old rules')
+        self.assertEqual(self.rescore(), (1, 1, 5))
+        self.assertEqual(self.scored, ["Sad again"])
+
+    def test_current_and_unscored_rows_are_skipped(self):
+        """Test that rows tagged with the current rules or never scored are left alone."""
+        ChatbotResponse.save_many([
+            {'user_message': "Sad but tagged", 'bot_response': "Reply", 'emotion': 'joy', 'scores': {'joy': 1.0}},
+            # A drink flow turn, stored by /chat without scores
+            {'user_message': "Can you recommend a drink? I am sad", 'bot_response': "Sure", 'emotion': 'joy',
+             'timestamp': datetime(2024, 1, 2)}
+        ], emotion_names=EMOTIONS, scoring_checksum='new rules')
+        self.assertEqual(self.rescore(resume=False).rescored, 4)
+        self.assertNotIn("Sad but tagged", self.scored)
+        self.assertNotIn("Can you recommend a drink? I am sad", self.scored)
+        self.scored.clear()
+        self.assertEqual(self.rescore(resume=False).rescored, 0)
+        # Newer rules than the checkpoint's start over from the first response
+        self.assertEqual(self.rescore('newer rules').rescored, 5)
+        self.assertNotIn("Can you recommend a drink? I am sad", self.scored)
+
+        drink_turn = ChatbotResponse.query.filter_by(bot_response="Sure").one()
+        self.assertEqual((drink_turn.emotion, drink_turn.emotion_scores, drink_turn.rules_version), ('joy', None, None))
+        with db.engine.connect() as conn:
+            day = EmotionRollup.distribution(conn, 'day', start=datetime(2024, 1, 2), end=datetime(2024, 1, 3))
+        self.assertEqual([(emotion, count) for _, emotion, count in day], [('joy', 1)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import unittest
+import sys
+import os
+import json
+import pickle
+import tempfile
+from unittest import mock
+
+# Add the parent directory to sys.path to import the chatbot module
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from chatbot_app.chatbot.advanced_chatbot import AdvancedChatbot
+from chatbot_app.chatbot.rule_pack import (
+    DEFAULT_RULE_PACK_PATH, compiled_cache_path, load_rule_pack
+)
+
+
+class TestRulePack(unittest.TestCase):
+    """Tests for rule pack loading and the compiled cache."""
+
+    def setUp(self):
+        """Write a small copy of the default rule pack to a temporary directory."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'rules.json')
+        with open(DEFAULT_RULE_PACK_PATH, encoding='utf-8') as f:
+            self.source = json.load(f)
+        # A few patterns per emotion keep compiling fast
+        self.source['emotion_patterns'] = {
+            emotion: patterns[:3] for emotion, patterns in self.source['emotion_patterns'].items()
+        }
+        self.write_source()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write_source(self):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(self.source, f)
+
+    def test_cache_is_reused_and_rebuilt(self):
+        """Test that the compiled cache is written, reused, and rebuilt when the source changes."""
+        cache_path = compiled_cache_path(self.path)
+        pack = load_rule_pack(self.path)
+        self.assertTrue(os.path.exists(cache_path))
+        modified = os.path.getmtime(cache_path)
+
+        cached = load_rule_pack(self.path)
+        self.assertEqual(cached.checksum, pack.checksum)
+        self.assertEqual(os.path.getmtime(cache_path), modified)
+        self.assertEqual(list(cached.emotion_patterns), list(pack.emotion_patterns))
+        self.assertEqual(cached.matcher('aho_corasick').match("i feel so happy"),
+                         pack.matcher('aho_corasick').match("i feel so happy"))
+        with self.assertRaises(TypeError):
+            cached.emotion_images['joy'] = 'other.jpg'
+        # Only the cache pickles frozen tables; pickle elsewhere in the process is unchanged
+        with self.assertRaises(TypeError):
+            pickle.dumps(cached.emotion_images)
+
+        self.source['emotion_images']['joy'] = '/static/images/other.jpg'
+        self.write_source()
+        rebuilt = load_rule_pack(self.path)
+        self.assertNotEqual(rebuilt.checksum, pack.checksum)
+        self.assertEqual(rebuilt.emotion_images['joy'], '/static/images/other.jpg')
+
+    def test_cache_is_rebuilt_when_the_compiler_changes(self):
+        """Test that a cache built by other compiler module sources is not reused."""
+        cache_path = compiled_cache_path(self.path)
+        load_rule_pack(self.path)
+        with mock.patch('chatbot_app.chatbot.rule_pack._compiler_digest', return_value='edited lexicon.py'):
+            load_rule_pack(self.path)
+        with open(cache_path, 'rb') as f:
+            self.assertIn('edited lexicon.py', pickle.load(f))
+
+    def test_corrupt_cache_is_rebuilt(self):
+        """Test that an unreadable cache is replaced instead of failing the load."""
+        cache_path = compiled_cache_path(self.path)
+        with open(cache_path, 'wb') as f:
+            f.write(b'not a pickle')
+
+        pack = load_rule_pack(self.path)
+        self.assertEqual(load_rule_pack(self.path).checksum, pack.checksum)
+
+    def test_invalid_packs(self):
+        """Test that unsupported versions and bad patterns are rejected."""
+        self.source['version'] = 99
+        self.write_source()
+        with self.assertRaises(ValueError):
+            load_rule_pack(self.path, use_cache=False)
+
+        self.source['version'] = 1
+        self.source['emotion_patterns']['joy'] = ['(unclosed']
+        self.write_source()
+        with self.assertRaises(ValueError):
+            load_rule_pack(self.path, use_cache=False)
+
+    def test_chatbot_loads_pack_by_path(self):
+        """Test that a chatbot uses the tables of the rule pack it was given."""
+        self.source['emotion_images']['joy'] = '/static/images/other.jpg'
+        self.write_source()
+        chatbot = AdvancedChatbot(rules_path=self.path)
+
+        self.assertEqual(chatbot.emotion_images['joy'], '/static/images/other.jpg')
+        self.assertEqual(chatbot.analyze_emotion("I am so happy and joyful today!")['emotion'], 'joy')
+        self.assertIsNot(chatbot.rules, AdvancedChatbot().rules)
+
+
+if __name__ == '__main__':
+    unittest.main()
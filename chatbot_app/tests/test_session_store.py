@@ -0,0 +1,189 @@
+import unittest
+import sys
+import os
+import tempfile
+import time
+
+# Add the parent directory to sys.path to import the chatbot module
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from chatbot_app import create_app
+from chatbot_app.chatbot.advanced_chatbot import AdvancedChatbot
+from chatbot_app.chatbot.session_store import (
+    InMemorySessionBackend, SessionState, SessionStore, SQLiteSessionBackend, create_session_backend
+)
+from chatbot_app.routes.main import get_chat_session_id
+
+
+class TestSessionStore(unittest.TestCase):
+    """Tests for per-session conversation state."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Build one chatbot whose tables are shared by every session."""
+        cls.chatbot = AdvancedChatbot()
+
+    def setUp(self):
+        """Create a temporary directory for SQLite backends."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.directory.name, 'sessions.db')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_sessions_are_isolated(self):
+        """Test that sessions keep separate context while sharing the chatbot tables."""
+        store = SessionStore(self.chatbot, InMemorySessionBackend())
+        store.process_message('alice', "I feel sad right now.")
+        store.process_message('bob', "I am happy today.")
+        store.process_message('alice', "Can you recommend a drink for me?")
+
+        alice = store.backend.get('alice')
+        bob = store.backend.get('bob')
+        self.assertEqual(list(alice.context['previous_messages']), ["I feel sad right now.", "Can you recommend a drink for me?"])
+        self.assertEqual(alice.context['drink_recommendation_state'], 'asking_questions')
+        self.assertEqual(len(alice.drink_profile['questions_asked']), 1)
+        self.assertEqual(list(bob.context['previous_messages']), ["I am happy today."])
+        self.assertIsNone(bob.context['drink_recommendation_state'])
+        self.assertEqual(len(bob.conversation_memory), 1)
+
+        # The shared chatbot itself is never touched
+        self.assertEqual(len(self.chatbot.context['previous_messages']), 0)
+        session_chatbot = self.chatbot.for_session(alice)
+        self.assertIs(session_chatbot.compiled_emotion_patterns, self.chatbot.compiled_emotion_patterns)
+        self.assertIs(session_chatbot.drink_recommender.personality_questions,
+                      self.chatbot.drink_recommender.personality_questions)
+
+        store.reset('alice')
+        self.assertIsNone(store.backend.get('alice'))
+
+    def test_in_memory_eviction(self):
+        """Test idle-TTL and max-sessions eviction of the in-process backend."""
+        backend = InMemorySessionBackend(ttl=None, max_sessions=2)
+        for session_id in ('a', 'b', 'c'):
+            backend.put(session_id, SessionState())
+        self.assertIsNone(backend.get('a'))
+        self.assertEqual(len(backend), 2)
+
+        backend = InMemorySessionBackend(ttl=0.05)
+        backend.put('a', SessionState())
+        time.sleep(0.1)
+        self.assertIsNone(backend.get('a'))
+        self.assertEqual(backend.evictions, 1)
+
+    def test_sqlite_backend_shared_between_instances(self):
+        """Test that the SQLite backend carries a conversation across backend instances."""
+        first = SessionStore(self.chatbot, SQLiteSessionBackend(self.db_path))
+        first.process_message('alice', "Can you recommend a drink for me?")
+
+        second = SessionStore(self.chatbot, create_session_backend('sqlite', path=self.db_path))
+        state = second.backend.get('alice')
+        self.assertEqual(state.context['drink_recommendation_state'], 'asking_questions')
+        self.assertEqual(state.drink_profile['questions_asked'], [state.context['current_drink_question']])
+
+        second.process_message('alice', "I enjoy rock music.")
+        state = first.backend.get('alice')
+        self.assertEqual(len(state.context['previous_messages']), 2)
+
+    def test_concurrent_turns_of_a_session_are_not_lost(self):
+        """Test that a turn whose session was stored meanwhile by another worker runs again."""
+        first = SessionStore(self.chatbot, SQLiteSessionBackend(self.db_path))
+        second = SessionStore(self.chatbot, SQLiteSessionBackend(self.db_path))
+        get_versioned = first.backend.get_versioned
+        loads = []
+
+        def get_versioned_then_interleave(session_id):
+            loaded = get_versioned(session_id)
+            if not loads:
+                # Another worker runs a turn after this one loaded the state
+                second.process_message(session_id, "I am happy today.")
+            loads.append(loaded[1])
+            return loaded
+
+        first.backend.get_versioned = get_versioned_then_interleave
+        first.process_message('alice', "I feel sad right now.")
+        self.assertEqual(loads, [0, 1])
+        self.assertEqual(first.conflicts, 1)
+        state, version = first.backend.get_versioned('alice')
+        self.assertEqual(version, 2)
+        self.assertEqual(list(state.context['previous_messages']), ["I am happy today.", "I feel sad right now."])
+
+        # Stale versions are refused
+        self.assertFalse(first.backend.put('alice', SessionState(), expected_version=1))
+        self.assertTrue(first.backend.put('alice', SessionState(), expected_version=2))
+
+    def test_turn_is_not_stored_when_every_attempt_conflicts(self):
+        """Test that a turn losing every race leaves the concurrent turns in place."""
+        archived = []
+        first = SessionStore(self.chatbot, SQLiteSessionBackend(self.db_path), history_depth=1,
+                             archiver=lambda session_id, turn: archived.append(turn['user']))
+        second = SessionStore(self.chatbot, SQLiteSessionBackend(self.db_path))
+        second.process_message('alice', "Hello there.")
+        get_versioned = first.backend.get_versioned
+
+        def get_versioned_then_interleave(session_id):
+            loaded = get_versioned(session_id)
+            second.process_message(session_id, "I am happy today.")
+            return loaded
+
+        first.backend.get_versioned = get_versioned_then_interleave
+        result = first.process_message('alice', "I feel sad right now.")
+        self.assertIn('response', result)
+        self.assertEqual((first.conflicts, first.unsaved_turns), (SessionStore.MAX_ATTEMPTS, 1))
+        self.assertEqual(archived, [])
+        state, version = get_versioned('alice')
+        self.assertEqual(version, 1 + SessionStore.MAX_ATTEMPTS)
+        self.assertNotIn("I feel sad right now.", state.context['previous_messages'])
+        self.assertEqual(len(state.context['previous_messages']), 1 + SessionStore.MAX_ATTEMPTS)
+
+    def test_sqlite_eviction(self):
+        """Test idle-TTL and max-sessions eviction of the SQLite backend."""
+        backend = SQLiteSessionBackend(self.db_path, ttl=None, max_sessions=2)
+        for session_id in ('a', 'b', 'c'):
+            backend.put(session_id, SessionState())
+        self.assertIsNone(backend.get('a'))
+        self.assertEqual(len(backend), 2)
+
+        backend = SQLiteSessionBackend(self.db_path, ttl=0.05)
+        backend.put('d', SessionState())
+        time.sleep(0.1)
+        self.assertIsNone(backend.get('d'))
+
+    def test_bounded_history(self):
+        """Test that histories keep the last turns and spill older turns to the archiver."""
+        archived = []
+        store = SessionStore(self.chatbot, InMemorySessionBackend(), history_depth=3,
+                             archiver=lambda session_id, turn: archived.append((session_id, turn['user'])))
+        messages = [f"Message number {i}" for i in range(5)]
+        for message in messages:
+            store.process_message('alice', message)
+
+        state = store.backend.get('alice')
+        self.assertEqual(list(state.context['previous_messages']), messages[2:])
+        self.assertEqual(len(state.context['session_emotions']), 3)
+        self.assertEqual([turn['user'] for turn in state.conversation_memory], messages[2:])
+        self.assertEqual(archived, [('alice', messages[0]), ('alice', messages[1])])
+
+        # Serialized states are restored as ring buffers of the same depth
+        restored = SessionState.from_dict(state.to_dict(), history_depth=3)
+        self.assertEqual(restored.conversation_memory.maxlen, 3)
+        self.assertEqual(list(restored.context['session_emotions']), list(state.context['session_emotions']))
+
+    def test_clients_cannot_choose_their_session(self):
+        """Test that the session id comes from the signed cookie, not from the request body."""
+        app = create_app('testing')
+        session_ids = []
+        for _ in range(2):
+            with app.test_request_context('/chat', method='POST', json={'session_id': 'alice'}):
+                session_ids.append(get_chat_session_id())
+        self.assertNotIn('alice', session_ids)
+        self.assertNotEqual(session_ids[0], session_ids[1])
+
+    def test_unknown_backend(self):
+        """Test that an unknown backend name is rejected."""
+        with self.assertRaises(ValueError):
+            create_session_backend('redis')
+
+
+if __name__ == '__main__':
+    unittest.main()
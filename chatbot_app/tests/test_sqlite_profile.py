@@ -0,0 +1,60 @@
+import unittest
+import sys
+import os
+import tempfile
+
+from sqlalchemy import create_engine
+
+# Add the parent directory to sys.path to import the chatbot module
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from chatbot_app.sqlite_profile import (
+    apply_sqlite_profile, get_sqlite_profile, pragma_statements, sqlite_engine_options
+)
+
+
+class TestSqliteProfile(unittest.TestCase):
+    """Tests for the SQLite connection profiles."""
+
+    def test_wal_profile_is_applied_to_new_connections(self):
+        """Test that every pooled connection gets the PRAGMAs of the profile."""
+        profile = get_sqlite_profile('wal', {'busy_timeout': 1234})
+        with tempfile.TemporaryDirectory() as directory:
+            uri = 'sqlite:///' + os.path.join(directory, 'test.db')
+            engine = create_engine(uri, **sqlite_engine_options(uri, profile))
+            self.assertTrue(apply_sqlite_profile(engine, profile))
+
+            with engine.connect() as first, engine.connect() as second:
+                for conn in (first, second):
+                    self.assertEqual(conn.exec_driver_sql("PRAGMA journal_mode").scalar(), 'wal')
+                    self.assertEqual(conn.exec_driver_sql("PRAGMA synchronous").scalar(), 1)
+                    self.assertEqual(conn.exec_driver_sql("PRAGMA busy_timeout").scalar(), 1234)
+            self.assertEqual(engine.pool.size(), profile.engine_options['pool_size'])
+            engine.dispose()
+
+    def test_default_profile_and_other_databases_are_left_alone(self):
+        """Test that pool options and PRAGMAs only apply where they make sense."""
+        wal = get_sqlite_profile('wal')
+        self.assertEqual(sqlite_engine_options('sqlite://', wal), {})
+        self.assertEqual(sqlite_engine_options('sqlite:///:memory:', wal), {})
+        self.assertEqual(sqlite_engine_options('postgresql://user@localhost/chat', wal), {})
+        self.assertEqual(sqlite_engine_options('sqlite:///app.db', wal), wal.engine_options)
+
+        engine = create_engine('sqlite://')
+        self.assertFalse(apply_sqlite_profile(engine, get_sqlite_profile('default')))
+        with engine.connect() as conn:
+            self.assertEqual(conn.exec_driver_sql("PRAGMA journal_mode").scalar(), 'memory')
+
+    def test_invalid_profiles_are_rejected(self):
+        """Test that unknown profiles, PRAGMAs and values raise ValueError."""
+        with self.assertRaises(ValueError):
+            get_sqlite_profile('fastest')
+        with self.assertRaises(ValueError):
+            get_sqlite_profile('wal', {'writable_schema': 'ON'})
+        with self.assertRaises(ValueError):
+            pragma_statements({'journal_mode': 'WAL; DROP TABLE chatbot_response'})
+        self.assertEqual(pragma_statements({'cache_size': -2000}), ["PRAGMA cache_size=-2000"])
+
+
+if __name__ == '__main__':
+    unittest.main()
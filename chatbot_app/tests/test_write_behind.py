@@ -0,0 +1,70 @@
+import unittest
+import sys
+import os
+import threading
+
+# Add the parent directory to sys.path to import the chatbot module
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from chatbot_app.write_behind import WriteBehindQueue
+
+
+class TestWriteBehindQueue(unittest.TestCase):
+    """Tests for the write-behind queue used by /chat."""
+
+    def test_records_are_written_in_order(self):
+        """Test that queued records reach the writer in batches, in order."""
+        batches = []
+        write_queue = WriteBehindQueue(batches.append, batch_size=4)
+        for i in range(10):
+            self.assertTrue(write_queue.put(i))
+        write_queue.flush()
+
+        self.assertEqual([record for batch in batches for record in batch], list(range(10)))
+        self.assertTrue(all(len(batch) <= 4 for batch in batches))
+        stats = write_queue.stats()
+        self.assertEqual(stats['enqueued'], 10)
+        self.assertEqual(stats['written'], 10)
+        self.assertEqual(stats['depth'], 0)
+        self.assertEqual(stats['batches'], len(batches))
+        write_queue.close()
+
+    def test_full_queue_pushes_back(self):
+        """Test that a full queue rejects records after the put timeout."""
+        release = threading.Event()
+        written = []
+
+        def slow_writer(records):
+            release.wait()
+            written.extend(records)
+
+        write_queue = WriteBehindQueue(slow_writer, max_size=2, batch_size=1, put_timeout=0.05)
+        # The writer holds one record, the queue two more
+        accepted = [write_queue.put(i) for i in range(5)]
+        self.assertFalse(all(accepted))
+        self.assertGreater(write_queue.stats()['rejected'], 0)
+        self.assertEqual(write_queue.stats()['max_depth'], 2)
+
+        release.set()
+        write_queue.close()
+        self.assertEqual(written, [i for i, ok in enumerate(accepted) if ok])
+        self.assertFalse(write_queue.put(5))
+
+    def test_close_flushes_and_counts_failures(self):
+        """Test that close writes pending records and that failed batches are counted."""
+        def failing_writer(records):
+            raise RuntimeError("database is locked")
+
+        write_queue = WriteBehindQueue(failing_writer)
+        for i in range(3):
+            write_queue.put(i)
+        write_queue.close()
+
+        stats = write_queue.stats()
+        self.assertEqual(stats['failed'], 3)
+        self.assertEqual(stats['written'], 0)
+        self.assertEqual(len(write_queue), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
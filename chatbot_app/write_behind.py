@@ -0,0 +1,195 @@
+"""
+Write-behind persistence for the Chatbot Application.
+
+Storing a chat turn costs several SQLite round-trips and an fsync, which used to be part
+of every /chat response. WriteBehindQueue lets the request enqueue the record and reply
+at once; a background thread drains the queue in batches and hands them to a writer
+function. The queue is bounded: when it is full, producers wait up to put_timeout and
+are then told to write the record themselves, which slows them down to the speed of the
+database instead of dropping data.
+"""
+
+import atexit
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+# Queue item telling the writer thread to stop
+_STOP = object()
+
+
+class WriteBehindQueue:
+    """
+    Bounded queue of records written to the database in batches by a background thread.
+    """
+
+    def __init__(self, writer: Callable[[List[Any]], None], max_size: int = 10000, batch_size: int = 100,
+                 put_timeout: float = 0.5):
+        """
+        Initialize the queue and start its writer thread.
+
+        Args:
+            writer: Callable storing a batch of records, called from the writer thread
+            max_size: Maximum number of records waiting to be written
+            batch_size: Maximum number of records passed to one writer call
+            put_timeout: Seconds put() waits for room in a full queue
+
+        Raises:
+            ValueError: If max_size or batch_size is not positive
+        """
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+
+        self.writer = writer
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.put_timeout = put_timeout
+
+        self.enqueued = 0
+        self.written = 0
+        self.failed = 0
+        self.rejected = 0
+        self.batches = 0
+        self.max_depth = 0
+        self.total_flush_seconds = 0.0
+        self.last_flush_seconds = 0.0
+        self.max_flush_seconds = 0.0
+
+        self._queue = queue.Queue(max_size)
+        self._lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+        self._thread.start()
+        # Records still queued when the process exits are written first
+        atexit.register(self.close)
+
+    def put(self, record: Any) -> bool:
+        """
+        Queue a record for writing.
+
+        Args:
+            record: The record, passed as is to the writer
+
+        Returns:
+            True if the record was queued; False if the queue is closed or stayed full for
+            put_timeout seconds, in which case the caller should write it itself
+        """
+        if self._closed:
+            return False
+        try:
+            self._queue.put(record, timeout=self.put_timeout)
+        except queue.Full:
+            with self._lock:
+                self.rejected += 1
+            logger.warning("Write-behind queue is full, record not queued")
+            return False
+
+        depth = self._queue.qsize()
+        with self._lock:
+            self.enqueued += 1
+            self.max_depth = max(self.max_depth, depth)
+        return True
+
+    def _run(self) -> None:
+        """Writer thread: write queued records in batches until the stop marker is seen."""
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size and batch[-1] is not _STOP:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = batch[-1] is _STOP
+            records = batch[:-1] if stop else batch
+            if records:
+                self._write(records)
+            for _ in batch:
+                self._queue.task_done()
+            if stop:
+                break
+
+        # Records that raced with close() are written too
+        leftovers = []
+        while True:
+            try:
+                leftovers.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if leftovers:
+            self._write(leftovers)
+        for _ in leftovers:
+            self._queue.task_done()
+
+    def _write(self, records: List[Any]) -> None:
+        """Pass a batch to the writer and record its outcome and latency."""
+        start = time.perf_counter()
+        try:
+            self.writer(records)
+            succeeded = True
+        except Exception as e:
+            logger.error(f"Write-behind batch of {len(records)} records failed: {e}")
+            succeeded = False
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            if succeeded:
+                self.written += len(records)
+            else:
+                self.failed += len(records)
+            self.batches += 1
+            self.total_flush_seconds += elapsed
+            self.last_flush_seconds = elapsed
+            self.max_flush_seconds = max(self.max_flush_seconds, elapsed)
+
+    def flush(self) -> None:
+        """Wait until every queued record has been written."""
+        if self._thread.is_alive():
+            self._queue.join()
+
+    def close(self, timeout: float = 10.0) -> None:
+        """
+        Write the queued records and stop the writer thread.
+
+        Args:
+            timeout: Seconds to wait for the writer thread to finish
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.warning(f"Write-behind queue still had {self._queue.qsize()} records at shutdown")
+        atexit.unregister(self.close)
+
+    def __len__(self) -> int:
+        return self._queue.qsize()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the queue counters for monitoring.
+
+        Returns:
+            Dict with the current and maximum queue depth, record counters and flush latency
+        """
+        with self._lock:
+            return {
+                'depth': self._queue.qsize(),
+                'max_depth': self.max_depth,
+                'max_size': self.max_size,
+                'enqueued': self.enqueued,
+                'written': self.written,
+                'failed': self.failed,
+                'rejected': self.rejected,
+                'batches': self.batches,
+                'last_flush_ms': self.last_flush_seconds * 1000,
+                'avg_flush_ms': self.total_flush_seconds * 1000 / self.batches if self.batches else 0.0,
+                'max_flush_ms': self.max_flush_seconds * 1000
+            }
@@ -0,0 +1,22 @@
+"""
+Gunicorn configuration for the Chatbot Application.
+
+The app is loaded once in the master process and the workers are forked from it, so the
+chatbot rule tables are built a single time and their memory pages are shared by every
+worker instead of being rebuilt by each of them.
+"""
+
+import gc
+import os
+
+# Build the chatbot while the app is created, i.e. in the master (see create_app)
+os.environ.setdefault('CHAT_PRELOAD', 'true')
+
+preload_app = True
+
+
+def when_ready(server):
+    """Move the preloaded objects out of the garbage collector's reach before forking."""
+    # Collections in the workers would otherwise write to every object header and
+    # copy the shared pages
+    gc.freeze()
@@ -12,6 +12,9 @@ setup(
     author="Admin123",
     packages=find_packages(),
     include_package_data=True,
+    package_data={
+        "chatbot_app.chatbot": ["data/*.json"],
+    },
     install_requires=[
         "flask>=2.2.5",
         "flask-sqlalchemy==3.1.1",
@@ -20,6 +23,7 @@ setup(
         "python-dotenv==0.19.0",
         "pytest==8.0.2",
         "gunicorn==21.2.0",
+        "numpy>=1.21.2",
     ],
     entry_points={
         "console_scripts": [
@@ -11,14 +11,26 @@ sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
 
 # Import the application factory
 from chatbot_app import create_app, db
+from chatbot_app.models import ChatbotResponse, EmotionRollup
 
 # Create the Flask application using the factory
 # Use 'production' environment for deployment
 app = create_app('production')
 
-# Initialize the database if needed
+# Initialize the database if needed. Under gunicorn's preload_app (see gunicorn.conf.py)
+# this module is imported once by the master, so the workers skip this and the chatbot
+# preloading done by create_app.
 with app.app_context():
     db.create_all()
+    # Detect the chatbot_response columns once at startup; see ChatbotResponse.table_schema
+    with db.engine.begin() as conn:
+        ChatbotResponse.add_missing_columns(conn)
+        ChatbotResponse.table_schema(conn)
+        # Backfill the emotion rollups of a database created before they existed
+        if conn.execute(db.select(EmotionRollup.id).limit(1)).first() is None:
+            EmotionRollup.rebuild(conn)
+    # Forked workers must not share the master's pooled database connections
+    db.engine.dispose()
 
 # This is the object that will be imported by Gunicorn
 # The name 'app' is required - do not change it